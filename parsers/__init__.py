@@ -2,84 +2,137 @@
 
 import sys
 import os
+import logging
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
 
 from .base_parser import BaseBillParser
 from .alipay_parser import AlipayParser
 from .wechat_parser import WeChatParser
 from .unionpay_parser import UnionPayParser
+from .detection import compile_detector, read_detection_text, rank_candidates
+from .parallel import parse_many, result_frame, result_records
+from .probe import load_probe, new_probe, save_probe
 
 PARSERS = [AlipayParser, WeChatParser, UnionPayParser]
 
+# Entry point group through which other packages register parser classes
+ENTRY_POINT_GROUP = 'import_bill_to_notion.parsers'
 
-def get_parser(file_path):
-    """Auto-detect bill format and return appropriate parser."""
-    import logging
-    import pandas as pd
-    import os
+logger = logging.getLogger(__name__)
+
+# Detector compiled from the registered parsers, rebuilt on registration
+_detector = None
+_entry_points_loaded = False
+
+
+def register_parser(parser_cls):
+    """Register a BaseBillParser subclass for detection and lookup."""
+    global _detector
+    if not (isinstance(parser_cls, type) and issubclass(parser_cls, BaseBillParser)):
+        raise TypeError(f"{parser_cls!r} is not a BaseBillParser subclass")
+    if parser_cls not in PARSERS:
+        PARSERS.append(parser_cls)
+        _detector = None
+    return parser_cls
 
-    logger = logging.getLogger(__name__)
-    logger.info(f"Detecting bill format: {file_path}")
 
-    # Get file extension
-    file_ext = os.path.splitext(file_path)[1].lower()
-
-    # Read file content based on format
-    content = ""
-
-    if file_ext in ['.xlsx', '.xls']:
-        # For Excel files, read with pandas
-        try:
-            # Try to import required libraries
-            if file_ext == '.xlsx':
-                import openpyxl
-                df = pd.read_excel(file_path, engine='openpyxl', nrows=20, header=None)
-            else:  # .xls
-                import xlrd
-                df = pd.read_excel(file_path, engine='xlrd', nrows=20, header=None)
-
-            # Convert DataFrame to string content for keyword detection
-            for idx, row in df.iterrows():
-                row_content = ' '.join([str(v) for v in row.values if pd.notna(v)])
-                content += row_content + '\n'
-
-                # Early exit if we found enough content
-                if idx >= 20:
-                    break
-
-        except ImportError as e:
-            logger.error(f"Excel support requires additional libraries: {e}")
-            return None
-        except Exception as e:
-            logger.error(f"Failed to read Excel file {file_path}: {e}")
-            return None
-    else:
-        # For CSV/TXT files, use the original method
-        from src.utils import read_file_lines
-        lines = read_file_lines(file_path, 20)
-        if not lines:
-            logger.error(f"Cannot read file: {file_path}")
-            return None
-        content = '\n'.join(lines)
-
-    # Detect platform by keywords
-    if any(kw in content for kw in ['微信支付账单明细', '微信昵称', '微信号']):
-        logger.info("Detected WeChat Pay format")
-        return WeChatParser(file_path)
-
-    if any(kw in content for kw in ['支付宝支付科技有限公司', '支付宝账户', '支付宝（中国）网络技术有限公司']):
-        logger.info("Detected Alipay format")
-        return AlipayParser(file_path)
-
-    if any(kw in content for kw in ['银联', 'unionpay', '中国银联']):
-        logger.info("Detected UnionPay format")
-        return UnionPayParser(file_path)
-
-    logger.error(f"Cannot detect format: {file_path}")
-    logger.error(f"Content preview: {content[:200]}")  # Log first 200 chars for debugging
+def get_registered_parsers():
+    """Return the built-in parsers plus those registered through entry points."""
+    global _entry_points_loaded
+    if not _entry_points_loaded:
+        _entry_points_loaded = True
+        from importlib.metadata import entry_points
+
+        for entry_point in entry_points(group=ENTRY_POINT_GROUP):
+            try:
+                register_parser(entry_point.load())
+                logger.info(f"Registered parser from entry point: {entry_point.name}")
+            except Exception as e:
+                logger.warning(f"Cannot load parser entry point {entry_point.name}: {e}")
+    return PARSERS
+
+
+def _parser_class_by_name(name):
+    """Look up a registered parser class by class name."""
+    for parser_cls in get_registered_parsers():
+        if parser_cls.__name__ == name:
+            return parser_cls
     return None
 
 
+def get_parser(file_path, probe=None):
+    """Auto-detect bill format and return appropriate parser.
+
+    The detected platform is cached in the file's probe, so later calls for
+    the same unchanged file skip detection entirely.
+
+    Args:
+        file_path: Path to the bill file
+        probe: Probe from an earlier stage; loaded from the cache if omitted
+    """
+    if probe is None:
+        probe = load_probe(file_path)
+    if probe and probe.get('parser'):
+        parser_cls = _parser_class_by_name(probe['parser'])
+        if parser_cls:
+            logger.info(f"Using cached detection for {file_path}: {probe.get('platform')}")
+            return parser_cls(file_path, probe=probe)
+
+    parser_cls = _detect_parser_class(file_path)
+    if parser_cls is None:
+        return None
+
+    if probe is None:
+        probe = new_probe(file_path)
+    parser = parser_cls(file_path, probe=probe)
+    probe['parser'] = parser_cls.__name__
+    probe['platform'] = parser.get_platform()
+    save_probe(file_path, probe)
+    return parser
+
+
+def detect_platform(file_path):
+    """Rank the registered parsers for a bill file.
+
+    The start of the file is read once and scanned for the signature
+    keywords and header columns of all parsers in a single pass.
+
+    Returns:
+        List of candidate dicts ('parser', 'score', 'keywords'), best first;
+        empty if the file cannot be read or nothing matches
+    """
+    global _detector
+    logger.info(f"Detecting bill format: {file_path}")
+
+    parsers = get_registered_parsers()
+    text = read_detection_text(file_path)
+    if text is None:
+        return []
+
+    if _detector is None:
+        _detector = compile_detector(parsers)
+    candidates = rank_candidates(text, _detector)
+
+    for candidate in candidates:
+        logger.info(f"Candidate {candidate['parser'].__name__}: score {candidate['score']}, "
+                    f"keywords {candidate['keywords']}")
+    if not candidates:
+        logger.error(f"Cannot detect format: {file_path}")
+        logger.error(f"Content preview: {text[:200]}")  # Log first 200 chars for debugging
+    return candidates
+
+
+def _detect_parser_class(file_path):
+    """Detect the parser class for a bill file as the best-scoring candidate."""
+    candidates = detect_platform(file_path)
+    if not candidates:
+        return None
+
+    parser_cls = candidates[0]['parser']
+    logger.info(f"Detected {parser_cls.__name__} (score {candidates[0]['score']})")
+    return parser_cls
+
+
 def get_parser_by_platform(file_path, platform):
     """Get parser by platform name.
 
@@ -112,13 +165,26 @@ def get_parser_by_platform(file_path, platform):
     }
 
     parser_class = mapping.get(platform_lower)
-    if parser_class:
-        return parser_class(file_path)
+    if not parser_class:
+        # If direct mapping failed, try fuzzy matching
+        for key, parser_cls in mapping.items():
+            if platform_lower in key or key in platform_lower:
+                parser_class = parser_cls
+                break
+
+    if not parser_class:
+        # Other registered parsers are looked up by class name
+        for parser_cls in get_registered_parsers():
+            if parser_cls.__name__.lower() in (platform_lower, platform_lower + 'parser'):
+                parser_class = parser_cls
+                break
 
-    # If direct mapping failed, try fuzzy matching
-    for key, parser_cls in mapping.items():
-        if platform_lower in key or key in platform_lower:
-            return parser_cls(file_path)
+    if parser_class:
+        # Reuse the cached probe only if it was made for the same parser
+        probe = load_probe(file_path)
+        if probe and probe.get('parser') != parser_class.__name__:
+            probe = None
+        return parser_class(file_path, probe=probe)
 
     logger.warning(f"Unsupported platform: {platform}")
     return None
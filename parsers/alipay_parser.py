@@ -1,7 +1,10 @@
 """Alipay bill parser."""
 
 import pandas as pd
-from .base_parser import BaseBillParser, STANDARD_COLUMNS
+from .base_parser import (
+    BaseBillParser, column_values, str_column_values,
+    title_column, rich_text_column, select_column, cents_column, date_column
+)
 import logging
 
 
@@ -26,87 +29,35 @@ class AlipayParser(BaseBillParser):
         '备注': 'remark',
     }
 
-    def get_platform(self) -> str:
-        return "Alipay"
-
-    def parse(self) -> pd.DataFrame:
-        """Parse Alipay bill file (CSV, TXT, XLS, XLSX)."""
-        logger.info(f"Parsing Alipay bill: {self.file_path}")
-
-        # Determine file type
-        file_ext = self.file_path.lower().split('.')[-1]
+    HEADER_KEYWORDS = [['交易时间', '交易分类'], ['金额', '收/支', '收支']]
+    EXCEL_HEADER_KEYWORDS = [['交易时间'], ['交易分类']]
+    FOOTER_MARKERS = ['汇总']
 
-        # For CSV/TXT files, find header and encoding
-        if file_ext in ['csv', 'txt']:
-            header_line, encoding = self.find_header_and_encoding(['交易时间', '交易分类'])
-            if header_line is None:
-                header_line, encoding = self.find_header_and_encoding(['金额', '收/支', '收支'])
+    DETECT_KEYWORDS = ['支付宝支付科技有限公司', '支付宝账户', '支付宝（中国）网络技术有限公司']
+    DETECT_HEADERS = ['交易分类', '商品说明', '收/付款方式', '交易订单号', '商家订单号']
 
-            if header_line is None:
-                raise ValueError("Could not find header line with expected keywords")
+    def get_platform(self) -> str:
+        return "Alipay"
 
-            # Read file
-            self.data = self.read_file(skiprows=header_line, header=0)
+    def _build_notion_columns(self, df: pd.DataFrame) -> dict:
+        """Build Alipay Notion property columns."""
+        if 'item_name' in df.columns:
+            names = str_column_values(df, 'item_name')
         else:
-            # For Excel files, read directly and find header
-            self.data = self.read_file()
-
-            # Find header row in Excel data
-            header_found = False
-            for idx, row in self.data.iterrows():
-                row_str = ' '.join([str(v) for v in row.values if pd.notna(v)])
-                if any(kw in row_str for kw in ['交易时间', '交易分类']):
-                    self.data = pd.read_excel(
-                        self.file_path,
-                        skiprows=idx,
-                        header=0,
-                        engine='openpyxl' if file_ext == 'xlsx' else 'xlrd'
-                    )
-                    header_found = True
-                    break
-
-            if not header_found:
-                # Try to use first row as header
-                self.data = pd.read_excel(
-                    self.file_path,
-                    header=0,
-                    engine='openpyxl' if file_ext == 'xlsx' else 'xlrd'
-                )
-
-        # Remove summary line if present
-        try:
-            if '汇总' in str(self.data.iloc[-1, 0]):
-                self.data = self.data[:-1]
-        except Exception:
-            pass
-
-        # Apply column mapping
-        self.data = self.apply_column_mapping(self.COLUMN_MAP, STANDARD_COLUMNS)
-
-        # Clean amount
-        self.clean_amount_column()
-
-        # Normalize dates
-        if 'transaction_time' in self.data.columns:
-            self.data['transaction_time'] = self.data['transaction_time'].apply(
-                lambda x: self.normalize_date(str(x), '%Y-%m-%d %H:%M:%S') if pd.notna(x) else x
-            )
-
-        logger.info(f"Parsed {len(self.data)} records")
-        return self.data
+            names = str_column_values(df, 'transaction_type')
+        remarks = [str(v) if pd.notna(v) else '' for v in column_values(df, 'remark')]
+        income_expense = [str(v).strip() if v else '' for v in column_values(df, 'income_expense')]
 
-    def _convert_to_notion(self, record) -> dict:
-        """Convert Alipay record to Notion format."""
         return {
-            'Name': {'title': [{'text': {'content': str(record.get('item_name', record.get('transaction_type', '')))}}]},
-            'Price': {'number': record.get('amount', 0)},
-            'Category': {'select': {'name': str(record.get('transaction_type', ''))}},
-            'Date': {'date': {'start': str(record.get('transaction_time', '')), 'time_zone': 'Asia/Shanghai'}},
-            'Counterparty': {'rich_text': [{'text': {'content': str(record.get('counterparty', ''))}}]},
-            'Remarks': {'rich_text': [{'text': {'content': str(record.get('remark', '')) if pd.notna(record.get('remark')) else ''}}]},
-            'Income Expense': {'select': {'name': str(record.get('income_expense', '')).strip() if record.get('income_expense') else ''}},
-            'Merchant Tracking Number': {'rich_text': [{'text': {'content': str(record.get('merchant_id', ''))}}]},
-            'Transaction Number': {'rich_text': [{'text': {'content': str(record.get('transaction_id', ''))}}]},
-            'Payment Method': {'select': {'name': str(record.get('payment_method', ''))}},
-            'From': {'select': {'name': self.get_platform()}}
+            'Name': title_column(names),
+            'Price': cents_column(df),
+            'Category': select_column(str_column_values(df, 'transaction_type')),
+            'Date': date_column(str_column_values(df, 'transaction_time')),
+            'Counterparty': rich_text_column(str_column_values(df, 'counterparty')),
+            'Remarks': rich_text_column(remarks),
+            'Income Expense': select_column(income_expense),
+            'Merchant Tracking Number': rich_text_column(str_column_values(df, 'merchant_id')),
+            'Transaction Number': rich_text_column(str_column_values(df, 'transaction_id')),
+            'Payment Method': select_column(str_column_values(df, 'payment_method')),
+            'From': select_column([self.get_platform()] * len(df))
         }
@@ -0,0 +1,229 @@
+"""Statements inside .zip archives, read without extracting them.
+
+WeChat Pay and Alipay deliver statements as zip archives, often protected
+by a password sent separately. A statement inside an archive is addressed
+by a member path, ``<archive>::<member>`` (see list_members), which parsers
+accept like any other file path: the member is streamed out of the archive
+on every read (see open_bill_file) and is never written to disk. Readers
+that need random access, such as openpyxl and xlrd, get the member in
+memory (see bill_file_source).
+
+Passwords are never stored. An encrypted archive is decrypted once, while
+it is uploaded, and only its statement members are kept, repacked without
+encryption (see decrypt_archive). The standard library decrypts ZipCrypto
+archives; AES-encrypted ones need the optional pyzipper package.
+"""
+
+import io
+import logging
+import os
+import shutil
+import zipfile
+
+
+logger = logging.getLogger(__name__)
+
+# Separates the archive path from the member name in a member path
+MEMBER_SEPARATOR = '::'
+
+# Members read as statements; other members (readme files, images) are ignored
+STATEMENT_EXTENSIONS = ('.csv', '.txt', '.xls', '.xlsx')
+
+# Limit on the uncompressed size of a single statement member
+MAX_MEMBER_BYTES = 512 * 1024 * 1024
+
+# pyzipper.AESZipFile when installed, else zipfile.ZipFile; set on first use
+_zip_class = None
+
+
+def is_archive(file_path: str) -> bool:
+    """Check whether a path names a .zip archive (not a member inside one)."""
+    return MEMBER_SEPARATOR not in file_path and file_path.lower().endswith('.zip')
+
+
+def split_member(file_path: str) -> tuple:
+    """Split a member path into (archive_path, member_name).
+
+    Returns:
+        The path and None for ordinary file paths
+    """
+    archive, separator, member = file_path.partition(MEMBER_SEPARATOR)
+    if not separator or not archive.lower().endswith('.zip'):
+        return file_path, None
+    return archive, member
+
+
+def member_path(archive_path: str, member: str) -> str:
+    """Return the member path of a member inside an archive."""
+    return f"{archive_path}{MEMBER_SEPARATOR}{member}"
+
+
+def _open_zip(archive):
+    """Open an archive with pyzipper when installed (AES support), else zipfile."""
+    global _zip_class
+    if _zip_class is None:
+        try:
+            import pyzipper
+            _zip_class = pyzipper.AESZipFile
+        except ImportError:
+            _zip_class = zipfile.ZipFile
+    return _zip_class(archive)
+
+
+def _statement_members(zf) -> list:
+    """Return the ZipInfo of the statement members of an open archive."""
+    members = []
+    for info in zf.infolist():
+        name = info.filename
+        base = name.rsplit('/', 1)[-1]
+        if info.is_dir() or name.startswith('__MACOSX/') or base.startswith('.'):
+            continue
+        if os.path.splitext(base)[1].lower() in STATEMENT_EXTENSIONS:
+            members.append(info)
+    return members
+
+
+def _read_check(zf, info, password: bytes):
+    """Read the first bytes of a member, turning decryption errors into ValueError."""
+    try:
+        with zf.open(info, pwd=password) as f:
+            f.read(1)
+    except RuntimeError:
+        # zipfile raises RuntimeError for a missing or wrong password
+        if password is None:
+            raise ValueError(f"Archive member {info.filename} is encrypted, a password is required")
+        raise ValueError(f"Wrong password for archive member {info.filename}")
+    except NotImplementedError as e:
+        raise ValueError(
+            f"Cannot decrypt archive member {info.filename} ({e}). "
+            f"AES-encrypted archives require: pip install pyzipper"
+        )
+
+
+def check_archive(archive, password: str = None) -> list:
+    """Validate an uploaded archive before it is stored.
+
+    Args:
+        archive: Archive path or binary file object
+        password: Password of an encrypted archive
+
+    Returns:
+        Names of the statement members
+
+    Raises:
+        ValueError: If the archive is invalid, has no statement members, a
+            member is over MAX_MEMBER_BYTES or cannot be decrypted
+    """
+    pwd = password.encode('utf-8') if password else None
+    try:
+        with _open_zip(archive) as zf:
+            members = _statement_members(zf)
+            if not members:
+                raise ValueError(f"Archive contains no statement files ({', '.join(STATEMENT_EXTENSIONS)})")
+            for info in members:
+                if info.file_size > MAX_MEMBER_BYTES:
+                    raise ValueError(
+                        f"Archive member {info.filename} inflates to {info.file_size} bytes, "
+                        f"limit is {MAX_MEMBER_BYTES}"
+                    )
+                if info.flag_bits & 0x1:
+                    _read_check(zf, info, pwd)
+            return [info.filename for info in members]
+    except zipfile.BadZipFile as e:
+        raise ValueError(f"Invalid zip archive: {e}")
+
+
+def decrypt_archive(archive, password: str) -> bytes:
+    """Repack the statement members of an archive without encryption.
+
+    Args:
+        archive: Archive path or binary file object, validated by check_archive
+        password: Password of the archive
+
+    Returns:
+        The contents of an unencrypted .zip archive holding only the
+        statement members
+    """
+    pwd = password.encode('utf-8') if password else None
+    output = io.BytesIO()
+    with _open_zip(archive) as zf, zipfile.ZipFile(output, 'w', zipfile.ZIP_DEFLATED) as out:
+        for info in _statement_members(zf):
+            target = zipfile.ZipInfo(info.filename, date_time=info.date_time)
+            target.compress_type = zipfile.ZIP_DEFLATED
+            with zf.open(info, pwd=pwd) as src, out.open(target, 'w') as dst:
+                shutil.copyfileobj(src, dst)
+    return output.getvalue()
+
+
+def list_members(archive_path: str) -> list:
+    """Return the member paths of the statements in an archive, in archive order.
+
+    Raises:
+        ValueError: If the archive cannot be read or has no statement members
+    """
+    try:
+        with _open_zip(archive_path) as zf:
+            members = _statement_members(zf)
+    except (zipfile.BadZipFile, OSError) as e:
+        raise ValueError(f"Cannot read zip archive {archive_path}: {e}")
+    if not members:
+        raise ValueError(f"Archive {archive_path} contains no statement files")
+    return [member_path(archive_path, info.filename) for info in members]
+
+
+def _member_info(zf, archive_path: str, member: str):
+    """Look up a statement member, enforcing MAX_MEMBER_BYTES."""
+    try:
+        info = zf.getinfo(member)
+    except KeyError:
+        raise FileNotFoundError(f"No member {member} in archive {archive_path}")
+    if info.file_size > MAX_MEMBER_BYTES:
+        raise ValueError(f"Archive member {member} inflates to {info.file_size} bytes, limit is {MAX_MEMBER_BYTES}")
+    return info
+
+
+def open_bill_file(file_path: str):
+    """Open a bill file or archive member for binary reading.
+
+    Members are decompressed (and decrypted) as they are read; seeking
+    forward reads through the skipped data.
+    """
+    archive_path, member = split_member(file_path)
+    if member is None:
+        return open(file_path, 'rb')
+
+    with _open_zip(archive_path) as zf:
+        info = _member_info(zf, archive_path, member)
+        try:
+            # The member stream keeps the archive file open after zf is closed
+            return zf.open(info)
+        except RuntimeError as e:
+            raise ValueError(f"Cannot decrypt {file_path}: {e}")
+
+
+def bill_file_source(file_path: str):
+    """Return a bill file for readers that need random access.
+
+    Returns:
+        The path itself, or for an archive member its contents in memory
+    """
+    if split_member(file_path)[1] is None:
+        return file_path
+    with open_bill_file(file_path) as f:
+        return io.BytesIO(f.read())
+
+
+def bill_file_size(file_path: str) -> int:
+    """Return the size of a bill file, or the uncompressed size of a member."""
+    archive_path, member = split_member(file_path)
+    if member is None:
+        return os.path.getsize(file_path)
+    with _open_zip(archive_path) as zf:
+        return _member_info(zf, archive_path, member).file_size
+
+
+def member_crc(file_path: str) -> int:
+    """Return the CRC-32 of an archive member's contents."""
+    archive_path, member = split_member(file_path)
+    with _open_zip(archive_path) as zf:
+        return _member_info(zf, archive_path, member).CRC
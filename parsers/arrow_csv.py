@@ -0,0 +1,128 @@
+"""Multithreaded CSV reading with pyarrow.
+
+An optional engine for large CSV statements. The data below the header row
+is transcoded to UTF-8 once (GBK statements) or used as-is, cut at the
+first summary row, and parsed by the pyarrow CSV reader on several threads.
+Columns are read as text and numeric columns are then inferred the way
+pandas.read_csv does, so the result has the same columns, values and dtypes
+as the default engine, with text columns kept in Arrow memory.
+
+pyarrow is optional; see arrow_available().
+"""
+
+import csv
+import io
+import logging
+import re
+
+import numpy as np
+import pandas as pd
+
+from .excel_reader import header_names
+
+
+logger = logging.getLogger(__name__)
+
+# Values read as missing, as in pandas.read_csv
+NA_VALUES = [
+    '', '#N/A', '#N/A N/A', '#NA', '-1.#IND', '-1.#QNAN', '-NaN', '-nan',
+    '1.#IND', '1.#QNAN', '<NA>', 'N/A', 'NA', 'NULL', 'NaN', 'None',
+    'n/a', 'nan', 'null',
+]
+
+# Bytes per block handed to each reader thread
+BLOCK_SIZE = 4 * 1024 * 1024
+
+
+def arrow_available() -> bool:
+    """Check whether the pyarrow CSV reader can be imported."""
+    try:
+        import pyarrow.csv  # noqa: F401
+        return True
+    except ImportError:
+        return False
+
+
+def _footer_start(data: bytes, footer) -> int:
+    """Return the offset of the first line whose first field holds a footer marker."""
+    pattern = re.compile(footer.pattern.encode('utf-8'))
+    for match in pattern.finditer(data):
+        line_start = data.rfind(b'\n', 0, match.start()) + 1
+        if b',' not in data[line_start:match.start()]:
+            return line_start
+    return -1
+
+
+def _infer_column(column) -> object:
+    """Convert a text column to int64 or float64 when every value parses.
+
+    Surrounding whitespace is ignored for numbers, as in pandas.read_csv;
+    integer columns with missing values become float64.
+    """
+    import pyarrow as pa
+    import pyarrow.compute as pc
+
+    if column.null_count == len(column):
+        return np.full(len(column), np.nan)
+
+    trimmed = pc.utf8_trim_whitespace(column)
+    for target in (pa.int64(), pa.float64()):
+        try:
+            return pc.cast(trimmed, target).to_pandas()
+        except (pa.ArrowInvalid, pa.ArrowNotImplementedError):
+            continue
+    return column.to_pandas()
+
+
+def _skip_single_field_rows(row) -> str:
+    """Skip separator and note lines without commas; fail on other malformed rows.
+
+    pandas.read_csv keeps such lines as rows of missing values; they are
+    never transactions. Rows of any other width make the caller fall back
+    to the default engine.
+    """
+    if row.actual_columns == 1:
+        return 'skip'
+    return 'error'
+
+
+def read_csv_utf8(data: bytes, footer=None) -> pd.DataFrame:
+    """Parse UTF-8 CSV data whose first line is the header row.
+
+    Args:
+        data: CSV data starting at the header row
+        footer: Compiled summary-row pattern; data is cut at the first line
+            whose first field matches it
+
+    Returns:
+        DataFrame with the columns and dtypes pandas.read_csv would produce
+
+    Raises:
+        ImportError: If pyarrow is not installed
+        pyarrow.ArrowInvalid: If a row with several fields does not match
+            the header width
+    """
+    import pyarrow as pa
+    import pyarrow.csv as pacsv
+
+    if footer is not None:
+        end = _footer_start(data, footer)
+        if end >= 0:
+            data = data[:end]
+
+    line_end = data.find(b'\n')
+    header_line = (data if line_end < 0 else data[:line_end]).decode('utf-8').rstrip('\r')
+    header = next(csv.reader([header_line]), [])
+    names = header_names([value if value != '' else None for value in header])
+
+    table = pacsv.read_csv(
+        io.BytesIO(data),
+        read_options=pacsv.ReadOptions(column_names=names, skip_rows=1, block_size=BLOCK_SIZE),
+        parse_options=pacsv.ParseOptions(invalid_row_handler=_skip_single_field_rows),
+        convert_options=pacsv.ConvertOptions(
+            column_types={name: pa.string() for name in names},
+            null_values=NA_VALUES,
+            strings_can_be_null=True,
+        ),
+    )
+    return pd.DataFrame({name: _infer_column(column) for name, column in zip(names, table.columns)})
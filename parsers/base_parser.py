@@ -1,13 +1,63 @@
 """Base parser for bill files."""
 
 from abc import ABC, abstractmethod
+import codecs
+from collections import OrderedDict
+import io
+import re
+import numpy as np
 import pandas as pd
 from datetime import datetime
 import logging
 
+from .archive import bill_file_size, bill_file_source, open_bill_file
+from .arrow_csv import arrow_available, read_csv_utf8
+from .excel_reader import iter_sheet_rows, row_text, header_names, rows_frame, sheet_row_count
+from .probe import load_probe, new_probe, save_probe
+from .store import STORE_MAX_ROWS, content_hash, load_normalized, save_normalized
+
 
 logger = logging.getLogger(__name__)
 
+# Bytes read from the start of a CSV/TXT file for encoding and header sniffing.
+# Statement preambles are a few dozen lines, so this comfortably covers them.
+SNIFF_BYTES = 64 * 1024
+
+# Encodings tried in order on the sniffed prefix when there is no BOM.
+# UTF-8 is strict enough that GBK bytes almost never decode as UTF-8.
+SNIFF_ENCODINGS = ['utf-8', 'gbk', 'gb18030']
+
+# Formats tried when a date does not match the parser's expected format
+DATE_FORMATS = [
+    '%Y/%m/%d %H:%M', '%Y/%m/%d %H:%M:%S',
+    '%Y-%m-%d %H:%M', '%Y-%m-%d %H:%M:%S',
+    '%m/%d/%Y %H:%M', '%m/%d/%Y %H:%M:%S',
+    '%Y/%m/%d', '%Y-%m-%d', '%m/%d/%Y'
+]
+
+# Amount text: optional sign and currency symbol, yuan with thousand
+# separators, and up to two decimal places
+AMOUNT_PATTERN = r'^\s*[+-]?\s*[￥¥]?\s*[+-]?(\d[\d,]*|)(?:\.(\d{0,2}))?\s*$'
+
+# Number of distinct values sampled to infer the dominant date format
+DATE_SAMPLE_SIZE = 100
+
+# Default number of rows per chunk yielded by parse_iter()
+DEFAULT_CHUNKSIZE = 5000
+
+# Rows of an Excel sheet searched for the header row
+EXCEL_HEADER_SCAN_ROWS = 100
+
+# CSV/TXT files from this size are read with the pyarrow engine when
+# CSV_ENGINE is 'auto'; below it the default engine is as fast
+ARROW_MIN_BYTES = 4 * 1024 * 1024
+
+# Bytes scanned when counting the lines of a CSV/TXT file for a preview;
+# larger files are estimated from this many bytes
+COUNT_LINES_BYTES = 4 * 1024 * 1024
+
+# Header layouts memoized per compiled column map (see resolve_columns)
+HEADER_CACHE_SIZE = 64
 
 # Standard column names
 STANDARD_COLUMNS = [
@@ -17,17 +67,648 @@ STANDARD_COLUMNS = [
 ]
 
 
+# Control characters stripped from header cells (tab and newline are kept)
+CONTROL_CHARS = re.compile(r'[\x00-\x08\x0b-\x1f]')
+
+
+def compile_column_map(mapping: dict) -> dict:
+    """Precompile a column alias map.
+
+    Header rows seen with the map are resolved once and memoized, so later
+    chunks and files with the same layout skip the alias scan. The cache
+    keeps the HEADER_CACHE_SIZE most recently used layouts.
+
+    Returns:
+        Dict with the exact alias lookup, the ordered alias list used for
+        substring matches, and the per-header resolution cache
+    """
+    return {'exact': dict(mapping), 'aliases': list(mapping.items()), 'headers': OrderedDict()}
+
+
+def resolve_columns(compiled: dict, columns: list, keep_columns: list) -> tuple:
+    """Resolve a header row against a compiled column map.
+
+    A column is mapped by its exact cleaned name, else by the first alias
+    contained in it; each standard column is taken by the first column that
+    maps to it.
+
+    Args:
+        compiled: Result of compile_column_map()
+        columns: Header row
+        keep_columns: Column names to keep after renaming
+
+    Returns:
+        Tuple of (rename dict, kept column names); kept is empty when no
+        column is kept, meaning all columns stay
+    """
+    headers = compiled['headers']
+    key = (tuple(columns), tuple(keep_columns))
+    resolved = headers.get(key)
+    if resolved is not None:
+        try:
+            headers.move_to_end(key)
+        except KeyError:
+            # Evicted by another thread in the meantime
+            pass
+        return resolved
+
+    rename, used = {}, set()
+    for col in columns:
+        cleaned = CONTROL_CHARS.sub('', str(col).strip())
+        standard = compiled['exact'].get(cleaned)
+        if standard is None:
+            standard = next((std for alias, std in compiled['aliases'] if alias in cleaned), None)
+        if standard is not None and standard not in used:
+            rename[col] = standard
+            used.add(standard)
+
+    kept = [rename.get(col, col) for col in columns if rename.get(col, col) in keep_columns]
+    resolved = (rename, kept)
+    headers[key] = resolved
+    while len(headers) > HEADER_CACHE_SIZE:
+        try:
+            headers.popitem(last=False)
+        except KeyError:
+            break
+    return resolved
+
+
+def read_prefix(file_path: str, size: int = SNIFF_BYTES) -> tuple:
+    """Read a bounded prefix of a file.
+
+    Returns:
+        Tuple of (prefix_bytes, at_eof)
+    """
+    with open_bill_file(file_path) as f:
+        prefix = f.read(size)
+        at_eof = len(prefix) < size or not f.read(1)
+    return prefix, at_eof
+
+
+def count_lines(file_path: str, offset: int = 0, max_bytes: int = COUNT_LINES_BYTES) -> tuple:
+    """Count the lines of a file from a byte offset without decoding it.
+
+    Only the first ``max_bytes`` are scanned; the count for the rest of a
+    larger file is extrapolated from them.
+
+    Returns:
+        Tuple of (line_count, exact)
+    """
+    remaining = bill_file_size(file_path) - offset
+    with open_bill_file(file_path) as f:
+        f.seek(offset)
+        data = f.read(max_bytes)
+
+    count = data.count(b'\n')
+    if len(data) >= remaining:
+        # A last line without a newline still counts
+        if data and not data.endswith(b'\n'):
+            count += 1
+        return count, True
+    return round(count * remaining / len(data)), False
+
+
+def sniff_prefix(prefix: bytes, at_eof: bool = True, header_keywords: list = None) -> dict:
+    """Detect encoding and header row from a file prefix.
+
+    The encoding comes from the BOM when present, otherwise from the first
+    candidate in SNIFF_ENCODINGS that decodes the prefix incrementally (a
+    multi-byte character cut off at the end of the prefix is not an error).
+
+    Args:
+        prefix: Leading bytes of the file
+        at_eof: Whether the prefix is the whole file
+        header_keywords: Keywords identifying the header row; the first line
+            is used as header when omitted
+
+    Returns:
+        Dict with keys:
+            encoding: Encoding to decode the file with
+            bom: Length of the BOM in bytes (0 if none)
+            header_line: Index of the header line, None if not found
+            header_offset: Byte offset of the header line, None if not found
+            lines: Decoded complete lines of the prefix
+    """
+    bom = len(codecs.BOM_UTF8) if prefix.startswith(codecs.BOM_UTF8) else 0
+    candidates = ['utf-8'] if bom else SNIFF_ENCODINGS
+
+    text, encoding = None, None
+    for candidate in candidates:
+        decoder = codecs.getincrementaldecoder(candidate)()
+        try:
+            text = decoder.decode(prefix[bom:], final=at_eof)
+            encoding = candidate
+            break
+        except UnicodeDecodeError:
+            continue
+    if encoding is None:
+        text, encoding = prefix[bom:].decode('latin-1'), 'latin-1'
+
+    lines = text.split('\n')
+    if not at_eof:
+        # The last line may be cut off by the prefix boundary
+        lines = lines[:-1]
+
+    header_line, header_offset = None, None
+    offset = bom
+    for i, line in enumerate(lines):
+        if not header_keywords or any(kw in line for kw in header_keywords):
+            header_line, header_offset = i, offset
+            break
+        offset += len(line.encode(encoding)) + 1
+
+    return {
+        'encoding': encoding,
+        'bom': bom,
+        'header_line': header_line,
+        'header_offset': header_offset,
+        'lines': [line.rstrip('\r') for line in lines],
+    }
+
+
+def sniff_file(file_path: str, header_keywords: list = None) -> dict:
+    """Sniff encoding and header row of a CSV/TXT file with a single bounded read."""
+    prefix, at_eof = read_prefix(file_path)
+    return sniff_prefix(prefix, at_eof, header_keywords)
+
+
+def column_values(df: pd.DataFrame, column: str, default=None) -> list:
+    """Return a column as a Python list, or a list of defaults if missing."""
+    if column in df.columns:
+        return df[column].tolist()
+    return [default] * len(df)
+
+
+def str_column_values(df: pd.DataFrame, column: str, default: str = '') -> list:
+    """Return a column as a list of ``str`` values (missing values become 'nan')."""
+    return list(map(str, column_values(df, column, default)))
+
+
+def title_column(texts: list) -> list:
+    """Build Notion title property values."""
+    return [{'title': [{'text': {'content': text}}]} for text in texts]
+
+
+def rich_text_column(texts: list) -> list:
+    """Build Notion rich_text property values."""
+    return [{'rich_text': [{'text': {'content': text}}]} for text in texts]
+
+
+def select_column(names: list) -> list:
+    """Build Notion select property values."""
+    return [{'select': {'name': name}} for name in names]
+
+
+def number_column(numbers: list) -> list:
+    """Build Notion number property values."""
+    return [{'number': number} for number in numbers]
+
+
+def date_column(starts: list) -> list:
+    """Build Notion date property values in the Asia/Shanghai time zone."""
+    return [{'date': {'start': start, 'time_zone': 'Asia/Shanghai'}} for start in starts]
+
+
+def parse_amount_cents(amounts: pd.Series) -> pd.Series:
+    """Parse amounts such as '¥1,200.50' or '-12.3' into absolute integer cents.
+
+    Returns:
+        Nullable Int64 series; unparseable values are <NA>
+    """
+    if pd.api.types.is_numeric_dtype(amounts):
+        return (amounts.abs() * 100).round().astype('Int64')
+
+    text = amounts.astype(str)
+    parts = text.str.extract(AMOUNT_PATTERN)
+    yuan, fen = parts[0], parts[1].fillna('')
+    matched = yuan.notna() & ((yuan != '') | (fen != ''))
+
+    cents = pd.Series(pd.NA, index=amounts.index, dtype='Int64')
+    if matched.any():
+        yuan = yuan[matched].str.replace(',', '', regex=False).replace('', '0')
+        fen = fen[matched].str.pad(2, side='right', fillchar='0')
+        cents[matched] = pd.to_numeric(yuan).astype('int64') * 100 + pd.to_numeric(fen).astype('int64')
+
+    # Rare forms (scientific notation, more than two decimals) go through float
+    rest = ~matched & amounts.notna()
+    if rest.any():
+        numeric = pd.to_numeric(text[rest].str.replace(r'[￥¥,]', '', regex=True), errors='coerce')
+        cents[rest] = (numeric.abs() * 100).round().astype('Int64')
+    return cents
+
+
+def compact_dtypes(df: pd.DataFrame, columns: list) -> pd.DataFrame:
+    """Store low-cardinality text columns of a parsed bill as categoricals.
+
+    A column of a few distinct values (transaction type, income/expense,
+    payment method, status) then takes one small integer code per row
+    instead of one Python string.
+    """
+    categories = {
+        col: 'category' for col in columns
+        if col in df.columns and not isinstance(df[col].dtype, pd.CategoricalDtype)
+    }
+    return df.astype(categories) if categories else df
+
+
+def cents_column(df: pd.DataFrame) -> list:
+    """Build Notion number property values in yuan from the integer cents column."""
+    if 'amount_cents' not in df.columns:
+        return number_column(column_values(df, 'amount', 0))
+    return [{'number': cents / 100 if cents is not pd.NA else float('nan')}
+            for cents in df['amount_cents'].tolist()]
+
+
 class BaseBillParser(ABC):
-    """Base class for bill parsers."""
+    """Base class for bill parsers.
+
+    A platform is described declaratively by the class attributes below;
+    parse() and parse_iter() apply them through a spec compiled once per
+    class (see compile_spec). Subclasses provide the attributes,
+    get_platform() and _build_notion_columns().
+    """
+
+    # Column aliases: statement column name -> standard column name
+    COLUMN_MAP = {}
+
+    # Platform detection (see parsers.detection): signature keywords such as
+    # the platform name in the export banner, and header column names
+    # characteristic of the platform
+    DETECT_KEYWORDS = []
+    DETECT_HEADERS = []
+
+    # Keyword sets identifying the CSV header row, tried in order.
+    # An empty list means the first line is the header.
+    HEADER_KEYWORDS = []
+
+    # Keyword sets identifying the Excel header row: a row is the header
+    # when it contains every keyword of one set. Empty means the first row.
+    EXCEL_HEADER_KEYWORDS = []
+
+    # Text in the first column marking the summary rows after the data
+    FOOTER_MARKERS = []
+
+    # Standard columns joined with spaces into another, e.g. date + time
+    COMBINE_COLUMNS = {}
+
+    # Column holding the transaction amount
+    AMOUNT_COLUMN = 'amount'
+
+    # Column holding the transaction date and its expected format
+    DATE_COLUMN = 'transaction_time'
+    DATE_FORMAT = '%Y-%m-%d %H:%M:%S'
+
+    # CSV engine used by parse(): 'pandas', 'arrow' (multithreaded pyarrow
+    # reader, see parsers.arrow_csv) or 'auto' (arrow for large files).
+    # Falls back to 'pandas' when pyarrow is not installed.
+    CSV_ENGINE = 'auto'
+
+    # Whether the statement may start with an unnamed row number column,
+    # dropped when its values are mostly numeric and all distinct
+    ROW_NUMBER_COLUMN = False
+
+    # Low-cardinality standard columns stored as categoricals
+    CATEGORY_COLUMNS = ['transaction_type', 'income_expense', 'payment_method', 'status']
+
+    # 类级别的规格缓存，每个解析器类只编译一次
+    _spec_cache = {}
+
+    # 类级别的日期格式缓存，按 (平台, 表头指纹) 记录推断出的日期格式
+    _date_format_cache = {}
 
-    def __init__(self, file_path: str):
+    def __init__(self, file_path: str, probe: dict = None):
+        """Create a parser.
+
+        Args:
+            file_path: Path to the bill file
+            probe: Cached probe from an earlier stage (see parsers.probe);
+                loaded lazily from the file's cache directory if omitted
+        """
         self.file_path = file_path
         self.data = None
+        self.probe = probe
+        self.header_fingerprint = None
+        self._prefix = None
+        # Whether the first column is a row number column, decided on the
+        # first data of the file (see _drop_row_number_column)
+        self._row_number_column = None
+
+    @classmethod
+    def compile_spec(cls) -> dict:
+        """Compile the class attributes into a reusable parsing spec.
+
+        Returns:
+            Dict with the compiled column map, the footer pattern, the extra
+            columns kept for transforms, and the names of the transform
+            methods applied to each chunk in order
+        """
+        spec = BaseBillParser._spec_cache.get(cls)
+        if spec is None:
+            transforms = []
+            if cls.COMBINE_COLUMNS:
+                transforms.append('_combine_columns')
+            if cls.AMOUNT_COLUMN:
+                transforms.append('clean_amount_column')
+            if cls.DATE_COLUMN:
+                transforms.append('_normalize_dates')
+            if cls.CATEGORY_COLUMNS:
+                transforms.append('_compact_dtypes')
+
+            footer = None
+            if cls.FOOTER_MARKERS:
+                footer = re.compile('|'.join(re.escape(marker) for marker in cls.FOOTER_MARKERS))
+
+            spec = {
+                'columns': compile_column_map(cls.COLUMN_MAP),
+                'footer': footer,
+                'keep': [col for cols in cls.COMBINE_COLUMNS.values() for col in cols],
+                'transforms': transforms,
+            }
+            BaseBillParser._spec_cache[cls] = spec
+        return spec
 
-    @abstractmethod
     def parse(self) -> pd.DataFrame:
-        """Parse the bill file and return structured data."""
-        pass
+        """Parse bill file (CSV, TXT, XLS, XLSX) and return structured data.
+
+        The result is cached on disk (see parsers.store); later calls for the
+        same file contents and parser code load it instead of parsing.
+        """
+        cached = self.load_normalized()
+        if cached is not None:
+            self.data = cached
+            return self.data
+
+        logger.info(f"Parsing {self.get_platform()} bill: {self.file_path}")
+
+        # Determine file type
+        file_ext = self.file_path.lower().split('.')[-1]
+
+        # For CSV/TXT files, find header and encoding
+        if file_ext in ['csv', 'txt']:
+            sniff = self.locate_header()
+            if sniff['header_line'] is None:
+                raise ValueError("Could not find header line with expected keywords")
+
+            # Read file from the header line in one pass
+            self.data = self.read_file(sniff=sniff, header=0)
+        else:
+            # For Excel files, locate the header and read rows in one pass
+            self.data = self.read_file()
+
+        self.data, _ = self._process_chunk(self.data)
+
+        self.update_probe(row_count=len(self.data))
+        save_normalized(self.file_path, type(self).__name__, self.content_hash(), self.data)
+        logger.info(f"Parsed {len(self.data)} records")
+        return self.data
+
+    def content_hash(self) -> str:
+        """Return the content hash of the file, memoized in the probe."""
+        probe = self.get_probe()
+        if not probe.get('content_hash'):
+            self.update_probe(content_hash=content_hash(self.file_path))
+        return probe['content_hash']
+
+    def load_normalized(self, hash_file: bool = True) -> pd.DataFrame:
+        """Load the cached parse() result for this file, or None.
+
+        Args:
+            hash_file: If False, only look the cache up when the content
+                hash is already memoized in the probe rather than hashing
+                the whole file. parse() memoizes the hash whenever it stores
+                a result, so no current entry is missed this way.
+        """
+        if not hash_file and not self.get_probe().get('content_hash'):
+            return None
+        try:
+            cached = load_normalized(self.file_path, type(self).__name__, self.content_hash())
+        except OSError:
+            return None
+        if cached is not None:
+            logger.info(f"Loaded {len(cached)} normalized records from cache: {self.file_path}")
+        return cached
+
+    def _process_chunk(self, df: pd.DataFrame) -> tuple:
+        """Trim summary rows, map columns and clean values of raw data.
+
+        Used for the whole file by parse() and for each chunk by parse_iter().
+
+        Returns:
+            Tuple of (processed DataFrame, reached_end); reached_end is True
+            when a summary row was found and later rows are not data
+        """
+        spec = self.compile_spec()
+
+        df, reached_end = self._trim_footer(df, spec['footer'])
+        self.data = self._drop_row_number_column(df)
+        self.data = self.apply_column_mapping(self.COLUMN_MAP, STANDARD_COLUMNS)
+
+        for transform in spec['transforms']:
+            getattr(self, transform)()
+
+        return self.data, reached_end
+
+    def _trim_footer(self, df: pd.DataFrame, footer) -> tuple:
+        """Cut data at the first summary row and drop rows with a blank first column.
+
+        Args:
+            df: Raw data
+            footer: Compiled FOOTER_MARKERS pattern, or None
+
+        Returns:
+            Tuple of (trimmed DataFrame, whether a summary row was found)
+        """
+        if df.empty:
+            return df, False
+
+        first = df.iloc[:, 0]
+        text = first.astype(str)
+        reached_end = False
+
+        if footer is not None:
+            is_footer = text.str.contains(footer, na=False).to_numpy()
+            if is_footer.any():
+                end = int(is_footer.argmax())
+                logger.info(f"Stopping at summary row {df.index[end]}: {text.iloc[end]}")
+                df, first, text = df.iloc[:end], first.iloc[:end], text.iloc[:end]
+                reached_end = True
+
+        blank = (first.isna() | (text.str.strip() == '')).to_numpy()
+        if blank.any():
+            df = df[~blank]
+        return df, reached_end
+
+    def _drop_row_number_column(self, df: pd.DataFrame) -> pd.DataFrame:
+        """Drop the first column if it holds row numbers (ROW_NUMBER_COLUMN only).
+
+        The first non-empty data of the file decides, so every chunk of a
+        file keeps the same columns.
+        """
+        if not self.ROW_NUMBER_COLUMN or len(df) == 0:
+            return df
+
+        if self._row_number_column is None:
+            is_row_number = pd.to_numeric(df.iloc[:, 0], errors='coerce')
+            # Mostly numeric and all distinct looks like an exported row index
+            self._row_number_column = bool(
+                is_row_number.notna().sum() / len(df) > 0.5
+                and is_row_number.dropna().nunique() == len(df)
+            )
+        if self._row_number_column:
+            return df.drop(columns=[df.columns[0]])
+        return df
+
+    def _combine_columns(self):
+        """Join the COMBINE_COLUMNS sources with spaces, e.g. date and time."""
+        for target, sources in self.COMBINE_COLUMNS.items():
+            if not all(col in self.data.columns for col in sources):
+                continue
+            combined = self.data[sources[0]].astype(str)
+            for col in sources[1:]:
+                combined = combined + ' ' + self.data[col].astype(str)
+            self.data[target] = combined
+
+        helpers = [col for col in self.compile_spec()['keep'] if col not in STANDARD_COLUMNS]
+        self.data = self.data.drop(columns=helpers, errors='ignore')
+
+    def _normalize_dates(self):
+        """Normalize DATE_COLUMN to ISO format."""
+        if self.DATE_COLUMN in self.data.columns:
+            self.data[self.DATE_COLUMN] = self.normalize_date_column(
+                self.data[self.DATE_COLUMN], self.DATE_FORMAT
+            )
+
+    def _compact_dtypes(self):
+        """Store CATEGORY_COLUMNS as categoricals (see compact_dtypes)."""
+        self.data = compact_dtypes(self.data, self.CATEGORY_COLUMNS)
+
+    def _concat_chunks(self, chunks: list) -> pd.DataFrame:
+        """Concatenate parsed chunks, keeping CATEGORY_COLUMNS categorical.
+
+        Chunks have their own categories, which pandas.concat would turn
+        back into plain strings.
+        """
+        return compact_dtypes(pd.concat(chunks), self.CATEGORY_COLUMNS)
+
+    def parse_iter(self, chunksize: int = DEFAULT_CHUNKSIZE, hash_file: bool = True):
+        """Parse the bill file lazily, yielding DataFrames of at most ``chunksize`` rows.
+
+        CSV/TXT files are read incrementally from the header offset and Excel
+        sheets row by row, and summary trimming, column mapping and cleaning
+        are applied per chunk, so memory stays bounded by the chunk size.
+
+        A cached parse() result is sliced instead when present, and a fully
+        read file of at most STORE_MAX_ROWS rows is cached for later calls.
+
+        Args:
+            chunksize: Maximum rows per chunk
+            hash_file: Passed to load_normalized(); False skips the cache
+                lookup unless the content hash is already known
+
+        Yields:
+            Parsed DataFrame chunks with the same columns as parse()
+        """
+        cached = self.load_normalized(hash_file)
+        if cached is not None:
+            for start in range(0, len(cached), chunksize):
+                yield cached.iloc[start:start + chunksize]
+            return
+
+        file_ext = self.file_path.lower().split('.')[-1]
+
+        if file_ext in ['csv', 'txt']:
+            sniff = self.locate_header()
+            if sniff['header_line'] is None:
+                raise ValueError("Could not find header line with expected keywords")
+            chunks = self.iter_file(chunksize, sniff=sniff, header=0)
+        else:
+            chunks = self.iter_excel(chunksize)
+
+        row_count = 0
+        kept = []
+        try:
+            for chunk in chunks:
+                chunk, reached_end = self._process_chunk(chunk)
+                row_count += len(chunk)
+                if kept is not None:
+                    kept.append(chunk)
+                    if row_count > STORE_MAX_ROWS:
+                        kept = None
+                if len(chunk):
+                    yield chunk
+                if reached_end:
+                    break
+            self.update_probe(row_count=row_count)
+            if kept:
+                save_normalized(self.file_path, type(self).__name__, self.content_hash(), self._concat_chunks(kept))
+        finally:
+            # Chunks are not kept; get_parsed_data() parses the whole file
+            self.data = None
+
+    def preview(self, max_rows: int) -> dict:
+        """Parse only the first ``max_rows`` records of the bill file.
+
+        The file is read chunk-wise (see parse_iter) and reading stops after
+        the first chunk, so the cost does not grow with the file size. The
+        remaining records are counted cheaply instead of parsed (see
+        count_records). A cached parse() result is used only if the file's
+        content hash is already known, so a first preview never reads the
+        whole file to compute it.
+
+        Returns:
+            {
+                'data': DataFrame,      # at most max_rows parsed records
+                'total_rows': int,      # records in the whole file
+                'exact': bool           # False if total_rows is an estimate
+            }
+        """
+        cached = self.load_normalized(hash_file=False)
+        if cached is not None:
+            return {'data': cached.head(max_rows), 'total_rows': len(cached), 'exact': True}
+
+        chunks, row_count = [], 0
+        stream = self.parse_iter(chunksize=max_rows, hash_file=False)
+        try:
+            for chunk in stream:
+                chunks.append(chunk.head(max_rows - row_count))
+                row_count += len(chunks[-1])
+                if row_count >= max_rows:
+                    break
+            else:
+                # The whole file was read, so the count is exact
+                data = self._concat_chunks(chunks) if chunks else pd.DataFrame()
+                return {'data': data, 'total_rows': row_count, 'exact': True}
+        finally:
+            stream.close()
+
+        total_rows, exact = self.count_records()
+        return {'data': self._concat_chunks(chunks), 'total_rows': max(total_rows, row_count), 'exact': exact}
+
+    def count_records(self) -> tuple:
+        """Count the records of the bill file without parsing it.
+
+        Uses the row count in the probe when a previous parse recorded it.
+        Otherwise the raw lines below the CSV header are counted (see
+        count_lines), or for Excel the stored sheet dimension is used; both
+        include summary and blank rows, so they are estimates.
+
+        Returns:
+            Tuple of (record_count, exact)
+        """
+        probe = self.get_probe()
+        if probe.get('row_count') is not None:
+            return probe['row_count'], True
+
+        file_ext = self.file_path.lower().split('.')[-1]
+        if file_ext in ['csv', 'txt']:
+            sniff = self.locate_header()
+            lines, _ = count_lines(self.file_path, sniff['header_offset'])
+            return max(lines - 1, 0), False
+
+        sheet_rows = sheet_row_count(self.file_path)
+        if sheet_rows is None:
+            return 0, False
+        return max(sheet_rows - probe.get('header_row', 0) - 1, 0), False
 
     @abstractmethod
     def get_platform(self) -> str:
@@ -36,12 +717,76 @@ class BaseBillParser(ABC):
 
     def read_csv(self, **kwargs) -> pd.DataFrame:
         """Read CSV file with default encoding settings."""
-        return pd.read_csv(self.file_path, **kwargs)
+        with open_bill_file(self.file_path) as f:
+            return pd.read_csv(f, **kwargs)
 
-    def read_file(self, **kwargs) -> pd.DataFrame:
+    def get_probe(self) -> dict:
+        """Return the probe for this file, loading or creating it on first use.
+
+        A cached probe written for a different parser class is not reused,
+        since its header location was found with other keywords.
+        """
+        if self.probe is None:
+            probe = load_probe(self.file_path)
+            if probe is None or probe.get('parser', type(self).__name__) != type(self).__name__:
+                probe = new_probe(self.file_path)
+            self.probe = probe
+        return self.probe
+
+    def update_probe(self, **fields):
+        """Record detection results in the probe and persist it."""
+        probe = self.get_probe()
+        probe.setdefault('parser', type(self).__name__)
+        probe.setdefault('platform', self.get_platform())
+        probe.update(fields)
+        save_probe(self.file_path, probe)
+
+    def locate_header(self) -> dict:
+        """Locate the CSV header row, using the probe when available.
+
+        Returns:
+            Sniff dict (see sniff_prefix); header_line is None if not found
+        """
+        probe = self.get_probe()
+        if probe.get('header_offset') is not None:
+            return {
+                'encoding': probe['encoding'],
+                'bom': probe['bom'],
+                'header_line': probe['header_line'],
+                'header_offset': probe['header_offset'],
+            }
+
+        for keywords in self.HEADER_KEYWORDS or [None]:
+            sniff = self.sniff(keywords)
+            if sniff['header_line'] is not None:
+                self.update_probe(
+                    encoding=sniff['encoding'],
+                    bom=sniff['bom'],
+                    header_line=sniff['header_line'],
+                    header_offset=sniff['header_offset']
+                )
+                break
+        return sniff
+
+    def sniff(self, header_keywords: list = None) -> dict:
+        """Sniff encoding and header row of this CSV/TXT file.
+
+        The file prefix is read once per parser and reused across calls, so
+        trying several keyword sets does not touch the disk again.
+        """
+        if self._prefix is None:
+            self._prefix = read_prefix(self.file_path)
+        prefix, at_eof = self._prefix
+        return sniff_prefix(prefix, at_eof, header_keywords)
+
+    def read_file(self, sniff: dict = None, **kwargs) -> pd.DataFrame:
         """Read file in various formats (CSV, TXT, XLS, XLSX).
 
+        CSV/TXT files are decoded once with the sniffed encoding, starting at
+        the sniffed header offset.
+
         Args:
+            sniff: Result of sniff(); located with locate_header() if omitted
             **kwargs: Additional arguments to pass to pandas read functions
 
         Returns:
@@ -54,19 +799,22 @@ class BaseBillParser(ABC):
 
         try:
             if file_ext in ['csv', 'txt']:
-                # Try multiple encodings for CSV/TXT files
-                encodings = kwargs.pop('encoding', ['gbk', 'utf-8', 'gb2312', 'latin-1'])
-                if isinstance(encodings, str):
-                    encodings = [encodings]
-
-                for encoding in encodings:
+                if sniff is None:
+                    sniff = self.locate_header()
+                encoding = kwargs.pop('encoding', None) or sniff['encoding']
+                offset = sniff['header_offset'] if sniff['header_offset'] is not None else sniff['bom']
+                if kwargs in ({}, {'header': 0}) and self._use_arrow():
                     try:
-                        return pd.read_csv(self.file_path, encoding=encoding, **kwargs)
-                    except (UnicodeDecodeError, Exception):
-                        continue
-                raise ValueError(f"Cannot read file with any of the encodings: {encodings}")
+                        return self._read_csv_arrow(encoding, offset)
+                    except Exception as e:
+                        logger.warning(f"Arrow CSV read failed ({type(e).__name__}: {e}), using pandas")
+                return self._read_csv_stream(encoding, offset, **kwargs)
 
             elif file_ext in ['xls', 'xlsx']:
+                if not kwargs:
+                    # Stream the sheet, locating the header row in the same pass
+                    return self.read_excel_sheet()
+
                 # Read Excel files
                 try:
                     import openpyxl
@@ -84,7 +832,7 @@ class BaseBillParser(ABC):
                 else:
                     kwargs.setdefault('engine', 'xlrd')
 
-                return pd.read_excel(self.file_path, **kwargs)
+                return pd.read_excel(bill_file_source(self.file_path), **kwargs)
 
             else:
                 raise ValueError(
@@ -92,21 +840,150 @@ class BaseBillParser(ABC):
                     f"Supported formats: CSV, TXT, XLS, XLSX"
                 )
 
+        except ValueError:
+            raise
         except Exception as e:
-            if file_ext in ['csv', 'txt']:
-                # Fallback for CSV/TXT with error handling
-                for encoding in ['gbk', 'utf-8', 'gb2312', 'latin-1']:
-                    try:
-                        return pd.read_csv(
-                            self.file_path,
-                            encoding=encoding,
-                            on_bad_lines='warn',
-                            **kwargs
-                        )
-                    except Exception:
-                        continue
             raise ValueError(f"Failed to read file {self.file_path}: {str(e)}")
 
+    def read_excel_sheet(self) -> pd.DataFrame:
+        """Read the data rows below the header row of an Excel sheet."""
+        return next(self.iter_excel())
+
+    def iter_excel(self, chunksize: int = None):
+        """Stream an Excel sheet as DataFrames below the header row.
+
+        The header row is located and the data rows are read in the same
+        pass over the sheet (see parsers.excel_reader). Its index is kept in
+        the probe, so later reads skip the search.
+
+        Args:
+            chunksize: Rows per DataFrame; all rows in one DataFrame if omitted
+
+        Yields:
+            DataFrame chunks; a single empty one if the sheet has no data rows
+
+        Raises:
+            ValueError: If the header row is not found or a limit is exceeded
+        """
+        rows = iter_sheet_rows(self.file_path)
+        header_row = self.get_probe().get('header_row')
+
+        header = None
+        for idx, row in enumerate(rows):
+            if header_row is not None:
+                if idx == header_row:
+                    header = row
+                    break
+            elif idx >= EXCEL_HEADER_SCAN_ROWS:
+                break
+            elif self._is_excel_header(row):
+                header = row
+                self.update_probe(header_row=idx)
+                logger.info(f"Found Excel header row at index {idx}: {row_text(row)[:100]}")
+                break
+
+        if header is None:
+            rows.close()
+            raise ValueError("Could not find header row in Excel file")
+
+        columns = header_names(header)
+        batch, start = [], 0
+        for row in rows:
+            # Skip blank rows like pandas.read_excel
+            if not row:
+                continue
+            batch.append(row)
+            if chunksize and len(batch) >= chunksize:
+                yield rows_frame(batch, columns, start)
+                start += len(batch)
+                batch = []
+        if batch or start == 0:
+            yield rows_frame(batch, columns, start)
+
+    def _is_excel_header(self, row: list) -> bool:
+        """Check whether an Excel row is the header (see EXCEL_HEADER_KEYWORDS)."""
+        if not self.EXCEL_HEADER_KEYWORDS:
+            return bool(row)
+        text = row_text(row)
+        return any(all(kw in text for kw in keywords) for keywords in self.EXCEL_HEADER_KEYWORDS)
+
+    def iter_file(self, chunksize: int, sniff: dict = None, **kwargs):
+        """Read a CSV/TXT file as a stream of DataFrame chunks.
+
+        Args:
+            chunksize: Number of rows per chunk
+            sniff: Result of sniff(); located with locate_header() if omitted
+            **kwargs: Additional arguments to pass to pandas.read_csv
+
+        Yields:
+            Raw DataFrame chunks
+        """
+        if sniff is None:
+            sniff = self.locate_header()
+        encoding = kwargs.pop('encoding', None) or sniff['encoding']
+        offset = sniff['header_offset'] if sniff['header_offset'] is not None else sniff['bom']
+
+        rows_read = 0
+        try:
+            with self._open_text_stream(encoding, offset) as stream:
+                for chunk in pd.read_csv(stream, chunksize=chunksize, **kwargs):
+                    rows_read += len(chunk)
+                    yield chunk
+            return
+        except (UnicodeDecodeError, pd.errors.ParserError) as e:
+            logger.warning(f"Strict CSV read failed ({type(e).__name__}: {e}), retrying leniently")
+
+        # Reread leniently, skipping the rows already yielded
+        kwargs.setdefault('on_bad_lines', 'warn')
+        with self._open_text_stream(encoding, offset, errors='replace') as stream:
+            for chunk in pd.read_csv(stream, chunksize=chunksize, **kwargs):
+                if rows_read >= len(chunk):
+                    rows_read -= len(chunk)
+                    continue
+                yield chunk.iloc[rows_read:]
+                rows_read = 0
+
+    def _open_text_stream(self, encoding: str, offset: int, errors: str = 'strict'):
+        """Open the file as a decoded text stream positioned at a byte offset."""
+        raw = open_bill_file(self.file_path)
+        raw.seek(offset)
+        return io.TextIOWrapper(raw, encoding=encoding, errors=errors, newline='')
+
+    def _use_arrow(self) -> bool:
+        """Check whether parse() reads this CSV file with the pyarrow engine."""
+        if self.CSV_ENGINE == 'pandas' or not arrow_available():
+            return False
+        return self.CSV_ENGINE == 'arrow' or bill_file_size(self.file_path) >= ARROW_MIN_BYTES
+
+    def _read_csv_arrow(self, encoding: str, offset: int) -> pd.DataFrame:
+        """Read CSV data from a byte offset with the pyarrow engine.
+
+        Non-UTF-8 data is transcoded once and handed to the reader as UTF-8;
+        summary rows are cut before parsing (see parsers.arrow_csv).
+        """
+        with open_bill_file(self.file_path) as f:
+            f.seek(offset)
+            data = f.read()
+        if codecs.lookup(encoding).name != 'utf-8':
+            data = data.decode(encoding).encode('utf-8')
+        logger.info(f"Reading {self.file_path} with the pyarrow CSV engine")
+        return read_csv_utf8(data, self.compile_spec()['footer'])
+
+    def _read_csv_stream(self, encoding: str, offset: int, **kwargs) -> pd.DataFrame:
+        """Read CSV data from a byte offset as one decoded stream.
+
+        Malformed rows and undecodable bytes past the sniffed prefix are
+        tolerated on a second pass instead of failing the whole import.
+        """
+        try:
+            with self._open_text_stream(encoding, offset) as stream:
+                return pd.read_csv(stream, **kwargs)
+        except (UnicodeDecodeError, pd.errors.ParserError) as e:
+            logger.warning(f"Strict CSV read failed ({type(e).__name__}: {e}), retrying leniently")
+            kwargs.setdefault('on_bad_lines', 'warn')
+            with self._open_text_stream(encoding, offset, errors='replace') as stream:
+                return pd.read_csv(stream, **kwargs)
+
     def normalize_date(self, date_str: str, format_str: str) -> str:
         """Normalize date string to ISO format."""
         try:
@@ -114,19 +991,87 @@ class BaseBillParser(ABC):
             return dt.isoformat()
         except ValueError:
             # Try common formats
-            formats = [
-                '%Y/%m/%d %H:%M', '%Y/%m/%d %H:%M:%S',
-                '%Y-%m-%d %H:%M', '%Y-%m-%d %H:%M:%S',
-                '%m/%d/%Y %H:%M', '%m/%d/%Y %H:%M:%S',
-                '%Y/%m/%d', '%Y-%m-%d', '%m/%d/%Y'
-            ]
-            for fmt in formats:
+            for fmt in DATE_FORMATS:
                 try:
                     return datetime.strptime(date_str, fmt).isoformat()
                 except ValueError:
                     continue
             return date_str
 
+    def normalize_date_column(self, series: pd.Series, format_str: str) -> pd.Series:
+        """Normalize a whole date column to ISO format.
+
+        The dominant format is inferred from a sample and applied to the
+        column with one vectorized to_datetime call. Only rows that fail to
+        parse fall back to the per-value search in normalize_date. Missing
+        values are left unchanged.
+
+        Args:
+            series: Column of date strings (or datetime values)
+            format_str: Expected format for this platform
+
+        Returns:
+            Series of ISO date strings
+        """
+        out = series.to_numpy(dtype=object, copy=True)
+        positions = np.flatnonzero(series.notna().to_numpy())
+        if len(positions) == 0:
+            return series
+
+        values = series.iloc[positions].astype(str)
+        fmt = self._infer_date_format(values, format_str)
+
+        failed = np.ones(len(positions), dtype=bool)
+        if fmt:
+            parsed = pd.to_datetime(values, format=fmt, errors='coerce')
+            ok = parsed.notna().to_numpy()
+            out[positions[ok]] = parsed[ok].dt.strftime('%Y-%m-%dT%H:%M:%S').to_numpy(dtype=object)
+            failed = ~ok
+
+        if failed.any():
+            logger.info(f"{failed.sum()} dates did not match inferred format {fmt}, trying common formats")
+            raw = values.to_numpy(dtype=object)
+            for pos, value in zip(positions[failed], raw[failed]):
+                out[pos] = self.normalize_date(value, format_str)
+
+        return pd.Series(out, index=series.index, name=series.name)
+
+    def _infer_date_format(self, values: pd.Series, format_str: str) -> str:
+        """Infer the dominant date format of a column from a sample.
+
+        The format found for a file is memoized in its probe and, per
+        platform and header layout, in a class-level cache, so those are
+        tried first.
+
+        Returns:
+            Format matching the most sampled values, or None if none match
+        """
+        cache_key = (self.get_platform(), self.header_fingerprint)
+        candidates = [self.get_probe().get('date_format'), self._date_format_cache.get(cache_key), format_str]
+        candidates += DATE_FORMATS
+        candidates = list(dict.fromkeys(fmt for fmt in candidates if fmt))
+
+        sample = values.drop_duplicates().head(DATE_SAMPLE_SIZE).tolist()
+        best_fmt, best_hits = None, 0
+        for fmt in candidates:
+            hits = 0
+            for value in sample:
+                try:
+                    datetime.strptime(value, fmt)
+                    hits += 1
+                except ValueError:
+                    pass
+            if hits > best_hits:
+                best_fmt, best_hits = fmt, hits
+            if hits == len(sample):
+                break
+
+        if best_fmt:
+            self._date_format_cache[cache_key] = best_fmt
+            if self.get_probe().get('date_format') != best_fmt:
+                self.update_probe(date_format=best_fmt)
+        return best_fmt
+
     def find_header_and_encoding(
         self,
         header_keywords: list,
@@ -134,25 +1079,19 @@ class BaseBillParser(ABC):
     ) -> tuple:
         """Find header line and encoding.
 
+        Kept for compatibility; sniff() is preferred since it also returns
+        the byte offset of the header line. The encoding is detected from the
+        file prefix, so ``encodings`` is no longer consulted.
+
         Returns:
             Tuple of (header_line_index, encoding) or (None, None) if not found
         """
-        if encodings is None:
-            encodings = ['gbk', 'utf-8', 'gb2312']
+        sniff = self.sniff(header_keywords)
+        if sniff['header_line'] is None:
+            return None, None
 
-        for encoding in encodings:
-            try:
-                with open(self.file_path, 'r', encoding=encoding) as f:
-                    lines = f.readlines()
-
-                for i, line in enumerate(lines):
-                    if any(kw in line for kw in header_keywords):
-                        logger.info(f"Found header at line {i+1}: {line.strip()}")
-                        return i, encoding
-            except (UnicodeDecodeError, Exception):
-                continue
-
-        return None, None
+        logger.info(f"Found header at line {sniff['header_line'] + 1}: {sniff['lines'][sniff['header_line']].strip()}")
+        return sniff['header_line'], sniff['encoding']
 
     def apply_column_mapping(
         self,
@@ -164,56 +1103,43 @@ class BaseBillParser(ABC):
             standard_columns = STANDARD_COLUMNS
 
         df = self.data
-        mapped_columns = {}
-
-        for col in df.columns:
-            cleaned_col = col.strip()
-            cleaned_col = ''.join(c for c in cleaned_col if ord(c) > 31 or c in '\t\n')
+        self.header_fingerprint = '|'.join(str(col) for col in df.columns)
 
-            if cleaned_col in mapping:
-                mapped_columns[col] = mapping[cleaned_col]
-            else:
-                for csv_col, standard_col in mapping.items():
-                    if csv_col in cleaned_col:
-                        mapped_columns[col] = standard_col
-                        break
-
-        # Apply unique mapping
-        unique_mapped = {}
-        for orig, std in mapped_columns.items():
-            if std not in unique_mapped.values():
-                unique_mapped[orig] = std
+        if mapping is self.COLUMN_MAP:
+            spec = self.compile_spec()
+            compiled, extra = spec['columns'], spec['keep']
+        else:
+            compiled, extra = compile_column_map(mapping), []
 
-        if unique_mapped:
-            df = df.rename(columns=unique_mapped)
+        rename, kept = resolve_columns(compiled, list(df.columns), list(standard_columns) + extra)
+        if rename:
+            df = df.rename(columns=rename)
 
         # Keep only existing standard columns
-        existing = [col for col in df.columns if col in standard_columns]
-        if existing:
-            df = df[existing]
+        if kept:
+            df = df[kept]
 
         return df
 
-    def clean_amount_column(self, amount_col: str = 'amount'):
-        """Clean amount column: remove symbols, convert to float, make positive."""
+    def clean_amount_column(self, amount_col: str = None):
+        """Clean amount column into exact integer cents.
+
+        Amounts are parsed with a single regex pass (currency symbols, signs
+        and thousand separators included) into a nullable int64 ``amount_cents``
+        column, made positive. ``amount`` is kept as the float yuan value
+        derived from the cents for display and backward compatibility.
+
+        Args:
+            amount_col: Amount column, AMOUNT_COLUMN if omitted
+        """
+        amount_col = amount_col or self.AMOUNT_COLUMN
         if amount_col not in self.data.columns:
             logger.warning(f"Amount column '{amount_col}' not found in data")
             return
 
         logger.info(f"Cleaning amount column")
-        # Convert to string first to handle any non-string values
-        self.data[amount_col] = self.data[amount_col].astype(str)
-
-        # Remove currency symbols (both full-width and half-width)
-        self.data[amount_col] = self.data[amount_col].str.replace('￥', '', regex=False)  # Full-width ￥
-        self.data[amount_col] = self.data[amount_col].str.replace('¥', '', regex=False)   # Half-width ¥
-        self.data[amount_col] = self.data[amount_col].str.replace(',', '', regex=False)  # Thousand separator
-
-        # Convert to numeric
-        self.data[amount_col] = pd.to_numeric(self.data[amount_col], errors='coerce')
-
-        # Make absolute value (positive)
-        self.data[amount_col] = self.data[amount_col].abs()
+        self.data['amount_cents'] = parse_amount_cents(self.data[amount_col])
+        self.data[amount_col] = self.data['amount_cents'].astype('float64') / 100
 
         logger.info(f"Amount column cleaned. Sample values: {self.data[amount_col].head().tolist()}")
 
@@ -224,20 +1150,45 @@ class BaseBillParser(ABC):
         return self.data
 
     def to_notion_format(self) -> list:
-        """Convert parsed data to Notion database format."""
-        parsed_data = self.get_parsed_data()
-        notion_records = []
+        """Convert parsed data to Notion database format.
 
-        for _, record in parsed_data.iterrows():
-            # Skip non-income/expense records
-            if hasattr(record, 'income_expense') and record['income_expense'] == '不计收支':
-                continue
-            notion_record = self._convert_to_notion(record)
-            notion_records.append(notion_record)
+        Property values are built column by column and zipped into one
+        payload dict per record, instead of converting row by row.
+        """
+        return self._records_from_frame(self.get_parsed_data())
+
+    def iter_notion_format(self, chunksize: int = DEFAULT_CHUNKSIZE, row_filter=None):
+        """Convert the bill to Notion format chunk by chunk (see parse_iter).
 
-        return notion_records
+        Args:
+            chunksize: Rows per parsed chunk
+            row_filter: Optional callable taking a parsed chunk and returning
+                a boolean mask of the rows to convert
+
+        Yields:
+            Lists of Notion property dicts, one list per parsed chunk
+        """
+        for chunk in self.parse_iter(chunksize):
+            if row_filter is not None:
+                chunk = chunk[row_filter(chunk)]
+            yield self._records_from_frame(chunk)
+
+    def _records_from_frame(self, parsed_data: pd.DataFrame) -> list:
+        """Build Notion payload dicts for a parsed DataFrame."""
+        # Skip non-income/expense records
+        if 'income_expense' in parsed_data.columns:
+            parsed_data = parsed_data[parsed_data['income_expense'] != '不计收支']
+
+        columns = self._build_notion_columns(parsed_data)
+        names = list(columns)
+        return [dict(zip(names, values)) for values in zip(*columns.values())]
 
     @abstractmethod
-    def _convert_to_notion(self, record) -> dict:
-        """Convert a single record to Notion format."""
+    def _build_notion_columns(self, df: pd.DataFrame) -> dict:
+        """Build Notion property values for all records.
+
+        Returns:
+            Ordered dict mapping Notion property name to a list of property
+            values, one per row of ``df``
+        """
         pass
@@ -0,0 +1,155 @@
+"""Scored platform detection.
+
+The start of a statement is scanned once with a keyword automaton holding
+the signature keywords and header column names of every registered
+parser. Each parser is scored by the distinct keywords found, so a stray
+keyword in a remark cannot outweigh a matching header row, and the
+candidates are returned ranked by score.
+"""
+
+import logging
+import os
+from collections import deque
+from itertools import islice
+
+from .base_parser import sniff_file
+from .excel_reader import iter_sheet_rows, row_text
+
+
+logger = logging.getLogger(__name__)
+
+# Lines (or sheet rows) scanned for keywords; covers statement preambles
+# and the header row
+DETECT_LINES = 50
+
+# Score of a signature keyword (platform name, export banner) and of a
+# header column name
+KEYWORD_WEIGHT = 3
+HEADER_WEIGHT = 2
+
+# Candidates scoring below this are not considered a match
+MIN_SCORE = 3
+
+
+class KeywordAutomaton:
+    """Aho-Corasick automaton finding all keywords in one pass over a text."""
+
+    def __init__(self, keywords: list):
+        self._goto = [{}]
+        self._fail = [0]
+        self._output = [[]]
+
+        for keyword in keywords:
+            state = 0
+            for char in keyword:
+                if char not in self._goto[state]:
+                    self._goto.append({})
+                    self._fail.append(0)
+                    self._output.append([])
+                    self._goto[state][char] = len(self._goto) - 1
+                state = self._goto[state][char]
+            self._output[state].append(keyword)
+
+        # Breadth-first pass linking each state to its longest proper suffix
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, child in self._goto[state].items():
+                queue.append(child)
+                fail = self._fail[state]
+                while fail and char not in self._goto[fail]:
+                    fail = self._fail[fail]
+                self._fail[child] = self._goto[fail].get(char, 0)
+                self._output[child] = self._output[child] + self._output[self._fail[child]]
+
+    def find(self, text: str) -> set:
+        """Return the set of keywords occurring in text."""
+        found = set()
+        state = 0
+        for char in text:
+            while state and char not in self._goto[state]:
+                state = self._fail[state]
+            state = self._goto[state].get(char, 0)
+            if self._output[state]:
+                found.update(self._output[state])
+        return found
+
+
+def compile_detector(parser_classes: list) -> dict:
+    """Build the keyword automaton and weights for a list of parser classes.
+
+    Keywords come from each class's DETECT_KEYWORDS and DETECT_HEADERS and
+    are matched case-insensitively.
+
+    Returns:
+        Dict with the automaton, the parser classes and, per class, the
+        weight of each of its keywords
+    """
+    weights = []
+    for parser_cls in parser_classes:
+        class_weights = {kw.lower(): HEADER_WEIGHT for kw in parser_cls.DETECT_HEADERS}
+        class_weights.update({kw.lower(): KEYWORD_WEIGHT for kw in parser_cls.DETECT_KEYWORDS})
+        weights.append(class_weights)
+
+    keywords = sorted({kw for class_weights in weights for kw in class_weights})
+    return {
+        'automaton': KeywordAutomaton(keywords),
+        'parsers': list(parser_classes),
+        'weights': weights,
+    }
+
+
+def read_detection_text(file_path: str) -> str:
+    """Read the first DETECT_LINES lines or sheet rows of a bill file as text.
+
+    Returns:
+        The text, or None if the file cannot be read
+    """
+    file_ext = os.path.splitext(file_path)[1].lower()
+
+    if file_ext in ['.xlsx', '.xls']:
+        # For Excel files, stream only the first rows of the sheet
+        try:
+            rows = iter_sheet_rows(file_path)
+            text = '\n'.join(row_text(row) for row in islice(rows, DETECT_LINES))
+            rows.close()
+            return text
+        except Exception as e:
+            logger.error(f"Failed to read Excel file {file_path}: {e}")
+            return None
+
+    # For CSV/TXT files, sniff a bounded prefix once
+    try:
+        lines = sniff_file(file_path)['lines'][:DETECT_LINES]
+    except OSError as e:
+        logger.error(f"Cannot read file {file_path}: {e}")
+        return None
+    if not lines:
+        logger.error(f"Cannot read file: {file_path}")
+        return None
+    return '\n'.join(lines)
+
+
+def rank_candidates(text: str, detector: dict) -> list:
+    """Score every parser against a text.
+
+    Args:
+        text: Start of the bill file (see read_detection_text)
+        detector: Result of compile_detector()
+
+    Returns:
+        List of dicts with keys 'parser', 'score' and 'keywords', best
+        first; ties keep registration order. Candidates below MIN_SCORE are
+        left out.
+    """
+    found = detector['automaton'].find(text.lower())
+
+    candidates = []
+    for parser_cls, class_weights in zip(detector['parsers'], detector['weights']):
+        matched = sorted(kw for kw in found if kw in class_weights)
+        score = sum(class_weights[kw] for kw in matched)
+        if score >= MIN_SCORE:
+            candidates.append({'parser': parser_cls, 'score': score, 'keywords': matched})
+
+    candidates.sort(key=lambda candidate: -candidate['score'])
+    return candidates
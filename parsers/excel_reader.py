@@ -0,0 +1,218 @@
+"""Streaming worksheet reader for Excel statements.
+
+Rows of the first worksheet are yielded one at a time, using openpyxl in
+read-only mode for .xlsx and xlrd for .xls, so a statement is read in a
+single pass without loading the whole workbook into pandas. Row, cell and
+uncompressed-size limits guard against decompression bombs. Statements
+inside .zip archives (see parsers.archive) are read from memory.
+"""
+
+import logging
+import os
+import zipfile
+
+import pandas as pd
+
+from .archive import bill_file_source
+
+
+logger = logging.getLogger(__name__)
+
+# Limits for a single worksheet; statements are far below these
+MAX_ROWS = 1_000_000
+MAX_CELLS = 20_000_000
+
+# Limit on the total uncompressed size of an .xlsx archive
+MAX_UNCOMPRESSED_BYTES = 512 * 1024 * 1024
+
+
+def _import_engine(file_ext: str):
+    """Import the Excel engine for a file extension."""
+    try:
+        if file_ext == 'xlsx':
+            import openpyxl
+            return openpyxl
+        import xlrd
+        return xlrd
+    except ImportError as e:
+        raise ValueError(
+            f"Excel support requires additional libraries. "
+            f"Please install: pip install openpyxl xlrd. Error: {e}"
+        )
+
+
+def _check_archive(file_path: str, source, max_bytes: int):
+    """Reject .xlsx archives whose members inflate beyond max_bytes."""
+    try:
+        with zipfile.ZipFile(source) as archive:
+            total = sum(info.file_size for info in archive.infolist())
+    except zipfile.BadZipFile as e:
+        raise ValueError(f"Invalid xlsx file {file_path}: {e}")
+    if total > max_bytes:
+        raise ValueError(f"Excel file {file_path} inflates to {total} bytes, limit is {max_bytes}")
+
+
+def _open_xls(source):
+    """Open an .xls workbook from a path or an in-memory file."""
+    xlrd = _import_engine('xls')
+    if isinstance(source, str):
+        return xlrd.open_workbook(source, on_demand=True)
+    return xlrd.open_workbook(file_contents=source.getvalue(), on_demand=True)
+
+
+def _iter_xlsx_rows(source):
+    """Yield cell values of the first worksheet of an .xlsx file."""
+    openpyxl = _import_engine('xlsx')
+    workbook = openpyxl.load_workbook(source, read_only=True, data_only=True)
+    try:
+        sheet = workbook.worksheets[0]
+        for row in sheet.iter_rows(values_only=True):
+            yield list(row)
+    finally:
+        workbook.close()
+
+
+def _iter_xls_rows(source, max_rows: int, max_cells: int):
+    """Yield cell values of the first worksheet of an .xls file."""
+    xlrd = _import_engine('xls')
+    book = _open_xls(source)
+    try:
+        sheet = book.sheet_by_index(0)
+        # Dimensions are known up front, so oversized sheets fail early
+        if sheet.nrows > max_rows or sheet.nrows * sheet.ncols > max_cells:
+            raise ValueError(
+                f"Excel sheet has {sheet.nrows} rows x {sheet.ncols} columns, "
+                f"limits are {max_rows} rows and {max_cells} cells"
+            )
+        for i in range(sheet.nrows):
+            row = []
+            for cell in sheet.row(i):
+                if cell.ctype == xlrd.XL_CELL_DATE:
+                    row.append(xlrd.xldate.xldate_as_datetime(cell.value, book.datemode))
+                elif cell.ctype == xlrd.XL_CELL_NUMBER and float(cell.value).is_integer():
+                    row.append(int(cell.value))
+                elif cell.ctype == xlrd.XL_CELL_BOOLEAN:
+                    row.append(bool(cell.value))
+                elif cell.ctype in (xlrd.XL_CELL_EMPTY, xlrd.XL_CELL_BLANK, xlrd.XL_CELL_ERROR):
+                    row.append(None)
+                else:
+                    row.append(cell.value)
+            yield row
+    finally:
+        book.release_resources()
+
+
+def iter_sheet_rows(
+    file_path: str,
+    max_rows: int = MAX_ROWS,
+    max_cells: int = MAX_CELLS,
+    max_uncompressed_bytes: int = MAX_UNCOMPRESSED_BYTES
+):
+    """Stream the rows of the first worksheet of an Excel file.
+
+    Empty cells are None; trailing empty cells are trimmed from each row.
+
+    Args:
+        file_path: Path to an .xlsx or .xls file or archive member
+        max_rows: Maximum number of rows read before failing
+        max_cells: Maximum number of cells read before failing
+        max_uncompressed_bytes: Maximum inflated size of an .xlsx archive
+
+    Yields:
+        List of cell values per row
+
+    Raises:
+        ValueError: If the file is unsupported, unreadable or over a limit
+    """
+    file_ext = os.path.splitext(file_path)[1].lower().lstrip('.')
+    if file_ext == 'xlsx':
+        source = bill_file_source(file_path)
+        _check_archive(file_path, source, max_uncompressed_bytes)
+        rows = _iter_xlsx_rows(source)
+    elif file_ext == 'xls':
+        rows = _iter_xls_rows(bill_file_source(file_path), max_rows, max_cells)
+    else:
+        raise ValueError(f"Unsupported Excel format: .{file_ext}")
+
+    row_count, cell_count = 0, 0
+    for row in rows:
+        while row and (row[-1] is None or row[-1] == ''):
+            row.pop()
+        row_count += 1
+        cell_count += len(row)
+        if row_count > max_rows or cell_count > max_cells:
+            rows.close()
+            raise ValueError(
+                f"Excel sheet {file_path} exceeds limits of {max_rows} rows / {max_cells} cells"
+            )
+        yield [None if value == '' else value for value in row]
+
+
+def sheet_row_count(file_path: str) -> int:
+    """Return the row count of the first worksheet without reading its rows.
+
+    For .xlsx the count comes from the sheet's stored dimension, so it may
+    include trailing blank rows; .xls sheets record their row count.
+
+    Returns:
+        Number of rows including the preamble and header, or None if the
+        sheet does not record its size
+    """
+    file_ext = os.path.splitext(file_path)[1].lower().lstrip('.')
+    if file_ext == 'xlsx':
+        openpyxl = _import_engine('xlsx')
+        workbook = openpyxl.load_workbook(bill_file_source(file_path), read_only=True)
+        try:
+            return workbook.worksheets[0].max_row
+        finally:
+            workbook.close()
+    if file_ext == 'xls':
+        book = _open_xls(bill_file_source(file_path))
+        try:
+            return book.sheet_by_index(0).nrows
+        finally:
+            book.release_resources()
+    raise ValueError(f"Unsupported Excel format: .{file_ext}")
+
+
+def row_text(row: list) -> str:
+    """Join the non-empty cells of a row for keyword matching."""
+    return ' '.join(str(v) for v in row if v is not None)
+
+
+def header_names(row: list) -> list:
+    """Build column names from a header row the way pandas.read_excel does.
+
+    Empty header cells become ``Unnamed: <i>`` and duplicates get a
+    ``.<n>`` suffix.
+    """
+    names, seen = [], {}
+    for i, value in enumerate(row):
+        if value is None:
+            name = f'Unnamed: {i}'
+        elif isinstance(value, float) and value.is_integer():
+            name = str(int(value))
+        else:
+            name = str(value)
+
+        if name in seen:
+            seen[name] += 1
+            name = f'{name}.{seen[name]}'
+        else:
+            seen[name] = 0
+        names.append(name)
+    return names
+
+
+def rows_frame(rows: list, columns: list, start: int = 0) -> pd.DataFrame:
+    """Build a DataFrame from sheet rows, padded or cut to the header width.
+
+    Args:
+        rows: Lists of cell values
+        columns: Column names (see header_names)
+        start: Index label of the first row
+    """
+    width = len(columns)
+    data = [(row + [None] * (width - len(row)))[:width] for row in rows]
+    frame = pd.DataFrame(data, columns=columns, index=range(start, start + len(data)))
+    return frame.infer_objects()
@@ -0,0 +1,163 @@
+"""Parse many bill files in parallel worker processes.
+
+Parsing is CPU-bound pandas work, so files are fanned out to a process
+pool. Each worker sends back its DataFrame in a compact columnar form:
+numeric columns as raw numpy arrays, and text and categorical columns as
+integer codes plus their distinct values. That keeps the pickled result
+small, instead of one Python object per cell. An error in one file does not affect the others.
+"""
+
+import logging
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+
+logger = logging.getLogger(__name__)
+
+
+def encode_frame(df: pd.DataFrame) -> dict:
+    """Encode a DataFrame into compact columns for transfer between processes.
+
+    Returns:
+        Dict with the column names, dtypes and encoded columns, in order
+    """
+    columns = []
+    for name in df.columns:
+        series = df[name]
+        dtype = str(series.dtype)
+        if isinstance(series.dtype, pd.CategoricalDtype):
+            # Categoricals already hold codes; keep their categories as-is
+            columns.append({
+                'kind': 'category',
+                'codes': series.cat.codes.to_numpy().astype(np.int32),
+                'categories': series.cat.categories.tolist(),
+                'ordered': series.cat.ordered,
+            })
+        elif isinstance(series.dtype, pd.api.extensions.ExtensionDtype) and pd.api.types.is_integer_dtype(series):
+            # Nullable integers (amount_cents): values plus a missing mask
+            mask = series.isna().to_numpy()
+            columns.append({'kind': 'masked', 'values': series.to_numpy('int64', na_value=0), 'mask': mask})
+        elif pd.api.types.is_numeric_dtype(series) or pd.api.types.is_bool_dtype(series):
+            columns.append({'kind': 'array', 'values': series.to_numpy()})
+        else:
+            codes, uniques = pd.factorize(series)
+            columns.append({
+                'kind': 'codes',
+                'codes': codes.astype(np.int32),
+                'categories': np.asarray(uniques, dtype=object).tolist(),
+            })
+        columns[-1].update(name=name, dtype=dtype)
+    return {'columns': columns, 'rows': len(df)}
+
+
+def decode_frame(encoded: dict) -> pd.DataFrame:
+    """Rebuild a DataFrame from encode_frame() output."""
+    data = {}
+    for column in encoded['columns']:
+        if column['kind'] == 'masked':
+            data[column['name']] = pd.arrays.IntegerArray(column['values'], column['mask'])
+        elif column['kind'] == 'array':
+            data[column['name']] = column['values']
+        elif column['kind'] == 'category':
+            data[column['name']] = pd.Categorical.from_codes(
+                column['codes'], categories=column['categories'], ordered=column['ordered']
+            )
+        else:
+            categories = np.asarray(column['categories'] + [np.nan], dtype=object)
+            # Code -1 marks a missing value and picks the trailing NaN
+            values = categories[column['codes']]
+            data[column['name']] = pd.Series(values, dtype=column['dtype'])
+    return pd.DataFrame(data, index=range(encoded['rows']))
+
+
+def _parse_file(file_path: str, platform: str = None) -> dict:
+    """Parse one file in a worker process; errors are returned, not raised."""
+    from parsers import get_parser, get_parser_by_platform
+
+    result = {'file_path': file_path, 'success': False, 'platform': None, 'parser': None}
+    try:
+        parser = get_parser_by_platform(file_path, platform) if platform else get_parser(file_path)
+        if parser is None:
+            result['error'] = 'Failed to detect bill format'
+            return result
+
+        result['platform'] = parser.get_platform()
+        result['parser'] = type(parser).__name__
+        result['data'] = encode_frame(parser.parse())
+        result['row_count'] = result['data']['rows']
+        result['success'] = True
+    except Exception as e:
+        logger.error(f"Parse failed for {file_path}: {e}")
+        result['error'] = str(e)
+    return result
+
+
+def parse_many(paths: list, workers: int = None, platform: str = None) -> list:
+    """Parse several bill files in parallel.
+
+    Args:
+        paths: Bill file paths
+        workers: Number of worker processes; defaults to the CPU count.
+            With one worker or one file, parsing runs in this process.
+        platform: Platform for all files; auto-detected per file if omitted
+
+    Returns:
+        One result dict per path, in the same order:
+        {
+            'file_path': str,
+            'success': bool,
+            'platform': str,      # detected platform, None on failure
+            'parser': str,        # parser class name
+            'row_count': int,
+            'data': dict,         # columnar data, see result_frame()
+            'error': str          # only on failure
+        }
+    """
+    paths = list(paths)
+    workers = min(workers or os.cpu_count() or 1, len(paths))
+    if workers <= 1:
+        return [_parse_file(path, platform) for path in paths]
+
+    logger.info(f"Parsing {len(paths)} files with {workers} worker processes")
+    results = []
+    # Workers are spawned rather than forked: this also runs from the web
+    # server (via src.importer), where forking would copy its threads'
+    # locks and open connections into the children
+    context = multiprocessing.get_context('spawn')
+    with ProcessPoolExecutor(max_workers=workers, mp_context=context) as executor:
+        futures = [executor.submit(_parse_file, path, platform) for path in paths]
+        for path, future in zip(paths, futures):
+            try:
+                results.append(future.result())
+            except Exception as e:
+                # The worker itself died (e.g. out of memory)
+                logger.error(f"Worker failed for {path}: {e}")
+                results.append({'file_path': path, 'success': False, 'platform': None,
+                                'parser': None, 'error': str(e)})
+    return results
+
+
+def result_frame(result: dict) -> pd.DataFrame:
+    """Rebuild the parsed DataFrame of a successful parse_many() result."""
+    return decode_frame(result['data'])
+
+
+def result_records(result: dict, row_filter=None) -> list:
+    """Convert a successful parse_many() result to Notion format.
+
+    Args:
+        result: parse_many() result
+        row_filter: Optional callable taking the parsed DataFrame and
+            returning a boolean mask of the rows to convert
+    """
+    from parsers import _parser_class_by_name
+
+    parser = _parser_class_by_name(result['parser'])(result['file_path'])
+    df = result_frame(result)
+    if row_filter is not None:
+        df = df[row_filter(df)]
+    return parser._records_from_frame(df)
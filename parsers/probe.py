@@ -0,0 +1,114 @@
+"""Per-file probe cache shared by detection, preview and import.
+
+A probe records what detection learned about a statement file (platform,
+encoding, header location, row count) so later stages can construct a
+parser without redoing encoding detection, header search and keyword
+scanning. Probes are stored as JSON in a ``.cache`` directory next to the
+file and keyed by path, size and modification time. Cache entries of
+archive members (see parsers.archive) sit next to the archive and are named
+after it, so removing the archive's cache files removes theirs too.
+"""
+
+import glob
+import json
+import logging
+import os
+
+from .archive import member_crc, split_member
+
+
+logger = logging.getLogger(__name__)
+
+# Bump when the probe layout or detection logic changes
+PROBE_VERSION = 2
+
+CACHE_DIR_NAME = '.cache'
+
+
+def get_cache_dir(file_path: str) -> str:
+    """Return the cache directory stored next to a file (or its archive)."""
+    archive_path, _ = split_member(file_path)
+    return os.path.join(os.path.dirname(os.path.abspath(archive_path)), CACHE_DIR_NAME)
+
+
+def cache_name(file_path: str) -> str:
+    """Return the name cache entries of a file start with.
+
+    Members of an archive are named ``<archive>.<member>``, with path
+    separators in the member name replaced.
+    """
+    archive_path, member = split_member(file_path)
+    if member is None:
+        return os.path.basename(file_path)
+    return f"{os.path.basename(archive_path)}.{member.replace('/', '_')}"
+
+
+def get_probe_path(file_path: str) -> str:
+    """Return the probe sidecar path for a file."""
+    return os.path.join(get_cache_dir(file_path), cache_name(file_path) + '.probe.json')
+
+
+def file_key(file_path: str) -> dict:
+    """Identify the current file contents by path, size and mtime.
+
+    Archive members are identified by the archive's key plus the member
+    name and CRC.
+    """
+    archive_path, member = split_member(file_path)
+    stat = os.stat(archive_path)
+    key = {
+        'path': os.path.abspath(archive_path),
+        'size': stat.st_size,
+        'mtime_ns': stat.st_mtime_ns,
+    }
+    if member is not None:
+        key.update(member=member, crc=member_crc(file_path))
+    return key
+
+
+def new_probe(file_path: str) -> dict:
+    """Create an empty probe for the current file contents."""
+    return {'version': PROBE_VERSION, 'key': file_key(file_path)}
+
+
+def load_probe(file_path: str) -> dict:
+    """Load the cached probe for a file.
+
+    Returns:
+        The probe dict, or None if missing or stale
+    """
+    try:
+        with open(get_probe_path(file_path), 'r', encoding='utf-8') as f:
+            probe = json.load(f)
+        if probe.get('version') != PROBE_VERSION or probe.get('key') != file_key(file_path):
+            return None
+        return probe
+    except (OSError, ValueError):
+        return None
+
+
+def save_probe(file_path: str, probe: dict) -> bool:
+    """Persist a probe next to the file.
+
+    Failures are logged and ignored; the cache is an optimization only.
+    """
+    try:
+        os.makedirs(get_cache_dir(file_path), exist_ok=True)
+        tmp_path = get_probe_path(file_path) + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(probe, f, ensure_ascii=False)
+        os.replace(tmp_path, get_probe_path(file_path))
+        return True
+    except OSError as e:
+        logger.debug(f"Cannot save probe for {file_path}: {e}")
+        return False
+
+
+def remove_cache_files(file_path: str):
+    """Remove the probe and all other cache entries of a deleted file."""
+    pattern = os.path.join(get_cache_dir(file_path), glob.escape(cache_name(file_path)) + '.*')
+    for path in glob.glob(pattern):
+        try:
+            os.remove(path)
+        except OSError as e:
+            logger.debug(f"Cannot remove cache file {path}: {e}")
@@ -0,0 +1,139 @@
+"""On-disk cache of normalized transactions.
+
+The DataFrame produced by a parser is stored in the file's ``.cache``
+directory (see parsers.probe), keyed by the SHA-256 of the file contents,
+the parser class and a hash of the parser source code. Preview, re-import
+and the legacy content route then load it instead of parsing again, and
+entries become stale automatically when the file or the parser changes.
+
+Feather is used when pyarrow is installed and read memory-mapped;
+otherwise the frame is pickled in the compact columnar form of
+parsers.parallel.encode_frame.
+"""
+
+import glob
+import hashlib
+import logging
+import os
+import pickle
+
+import pandas as pd
+
+from .parallel import encode_frame, decode_frame
+from .archive import open_bill_file
+from .probe import cache_name, get_cache_dir
+
+
+logger = logging.getLogger(__name__)
+
+# Files hashed in blocks of this size
+HASH_BLOCK_SIZE = 1024 * 1024
+
+# Frames larger than this are not cached by parse_iter(), which would
+# otherwise have to keep every chunk in memory
+STORE_MAX_ROWS = 200_000
+
+_code_version = None
+
+
+def parser_code_version() -> str:
+    """Hash the source of the parsers package, computed once per process."""
+    global _code_version
+    if _code_version is None:
+        digest = hashlib.sha256()
+        package_dir = os.path.dirname(os.path.abspath(__file__))
+        for path in sorted(glob.glob(os.path.join(package_dir, '*.py'))):
+            with open(path, 'rb') as f:
+                digest.update(f.read())
+        _code_version = digest.hexdigest()[:16]
+    return _code_version
+
+
+def content_hash(file_path: str) -> str:
+    """Return the SHA-256 of a file's contents.
+
+    Parsers memoize it in the file's probe (see
+    BaseBillParser.content_hash), so an unchanged file is hashed only once.
+    """
+    digest = hashlib.sha256()
+    with open_bill_file(file_path) as f:
+        for block in iter(lambda: f.read(HASH_BLOCK_SIZE), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _feather_available() -> bool:
+    try:
+        import pyarrow.feather  # noqa: F401
+        return True
+    except ImportError:
+        return False
+
+
+def get_store_path(file_path: str, parser_name: str, digest: str) -> str:
+    """Return the cache path (without extension) for a file and parser.
+
+    Args:
+        file_path: Bill file path
+        parser_name: Parser class name
+        digest: Content hash of the file (see content_hash)
+    """
+    key = hashlib.sha256(f"{digest}:{parser_name}:{parser_code_version()}".encode()).hexdigest()[:32]
+    return os.path.join(get_cache_dir(file_path), f"{cache_name(file_path)}.{key}.normalized")
+
+
+def load_normalized(file_path: str, parser_name: str, digest: str) -> pd.DataFrame:
+    """Load the cached normalized DataFrame for a file.
+
+    Returns:
+        The DataFrame, or None if there is no current entry
+    """
+    try:
+        base = get_store_path(file_path, parser_name, digest)
+        if os.path.exists(base + '.feather') and _feather_available():
+            import pyarrow.feather as feather
+            table = feather.read_table(base + '.feather', memory_map=True)
+            return table.to_pandas()
+        if os.path.exists(base + '.pkl'):
+            with open(base + '.pkl', 'rb') as f:
+                return decode_frame(pickle.load(f))
+    except Exception as e:
+        logger.warning(f"Cannot load normalized cache for {file_path}: {e}")
+    return None
+
+
+def save_normalized(file_path: str, parser_name: str, digest: str, df: pd.DataFrame) -> bool:
+    """Store the normalized DataFrame for a file, replacing older entries.
+
+    Failures are logged and ignored; the cache is an optimization only.
+    """
+    try:
+        base = get_store_path(file_path, parser_name, digest)
+        os.makedirs(os.path.dirname(base), exist_ok=True)
+        df = df.reset_index(drop=True)
+
+        path = None
+        if _feather_available():
+            try:
+                df.to_feather(base + '.feather.tmp')
+                path = base + '.feather'
+                os.replace(path + '.tmp', path)
+            except Exception as e:
+                # Mixed-type object columns cannot be written as Arrow
+                logger.debug(f"Feather cache failed for {file_path}, using pickle: {e}")
+                path = None
+        if path is None:
+            path = base + '.pkl'
+            with open(path + '.tmp', 'wb') as f:
+                pickle.dump(encode_frame(df), f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(path + '.tmp', path)
+
+        # Entries for older contents or parser versions are never read again
+        pattern = os.path.join(os.path.dirname(base), glob.escape(cache_name(file_path)) + '.*.normalized.*')
+        for stale in glob.glob(pattern):
+            if stale != path:
+                os.remove(stale)
+        return True
+    except Exception as e:
+        logger.debug(f"Cannot save normalized cache for {file_path}: {e}")
+        return False
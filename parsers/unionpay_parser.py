@@ -1,7 +1,10 @@
 """UnionPay bill parser."""
 
 import pandas as pd
-from .base_parser import BaseBillParser, STANDARD_COLUMNS
+from .base_parser import (
+    BaseBillParser, str_column_values,
+    title_column, rich_text_column, select_column, cents_column, date_column
+)
 
 
 class UnionPayParser(BaseBillParser):
@@ -20,44 +23,27 @@ class UnionPayParser(BaseBillParser):
         '备注': 'remark'
     }
 
-    def get_platform(self) -> str:
-        return "UnionPay"
-
-    def parse(self) -> pd.DataFrame:
-        """Parse UnionPay bill file (CSV, TXT, XLS, XLSX)."""
-        # Read file using the new read_file method
-        self.data = self.read_file()
-
-        # Apply column mapping
-        self.data = self.apply_column_mapping(self.COLUMN_MAP, STANDARD_COLUMNS)
+    # Dates and times are in separate columns
+    COMBINE_COLUMNS = {'transaction_time': ['transaction_time', 'transaction_hour']}
+    DATE_FORMAT = '%Y/%m/%d %H:%M:%S'
 
-        # Combine date and time columns
-        if 'transaction_time' in self.data.columns and 'transaction_hour' in self.data.columns:
-            self.data['transaction_time'] = self.data.apply(
-                lambda x: f"{x['transaction_time']} {x['transaction_hour']}", axis=1
-            )
-            self.data = self.data.drop(columns=['transaction_hour'])
+    DETECT_KEYWORDS = ['银联', 'unionpay', '中国银联']
+    DETECT_HEADERS = ['交易日期', '交易商户', '交易金额', '入账金额', '卡类型']
 
-        # Clean amount
-        self.clean_amount_column()
-
-        # Normalize dates
-        if 'transaction_time' in self.data.columns:
-            self.data['transaction_time'] = self.data['transaction_time'].apply(
-                lambda x: self.normalize_date(str(x), '%Y/%m/%d %H:%M:%S')
-            )
+    def get_platform(self) -> str:
+        return "UnionPay"
 
-        return self.data
+    def _build_notion_columns(self, df: pd.DataFrame) -> dict:
+        """Build UnionPay Notion property columns."""
+        transaction_types = df['transaction_type'].tolist()
 
-    def _convert_to_notion(self, record) -> dict:
-        """Convert UnionPay record to Notion format."""
         return {
-            'Name': {'title': [{'text': {'content': record['transaction_type']}}]},
-            'Price': {'number': record['amount']},
-            'Category': {'select': {'name': record['transaction_type']}},
-            'Date': {'date': {'start': record['transaction_time'], 'time_zone': 'Asia/Shanghai'}},
-            'Counterparty': {'rich_text': [{'text': {'content': record['counterparty']}}]},
-            'Remarks': {'rich_text': [{'text': {'content': str(record.get('remark', ''))}}]},
-            'Income Expense': {'select': {'name': ''}},
-            'From': {'select': {'name': self.get_platform()}}
+            'Name': title_column(transaction_types),
+            'Price': cents_column(df),
+            'Category': select_column(transaction_types),
+            'Date': date_column(df['transaction_time'].tolist()),
+            'Counterparty': rich_text_column(df['counterparty'].tolist()),
+            'Remarks': rich_text_column(str_column_values(df, 'remark')),
+            'Income Expense': select_column([''] * len(df)),
+            'From': select_column([self.get_platform()] * len(df))
         }
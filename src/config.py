@@ -16,6 +16,21 @@ class Config:
     NOTION_INCOME_DATABASE_ID = os.getenv("NOTION_INCOME_DATABASE_ID", "")
     NOTION_EXPENSE_DATABASE_ID = os.getenv("NOTION_EXPENSE_DATABASE_ID", "")
 
+    # 导入时并发写入 Notion 的最大请求数（实际并发数按限流和延迟自动调整）
+    NOTION_IMPORT_WORKERS = int(os.getenv("NOTION_IMPORT_WORKERS", "8"))
+
+    # Notion API 限流：每个集成密钥每秒的请求数（Notion 平均约 3 次/秒）和突发容量，0 表示不限流
+    NOTION_RATE_LIMIT = float(os.getenv("NOTION_RATE_LIMIT", "3"))
+    NOTION_RATE_LIMIT_BURST = int(os.getenv("NOTION_RATE_LIMIT_BURST", "3"))
+    # 本服务器所有集成密钥合计每秒的请求数，0 表示不限制
+    NOTION_RATE_LIMIT_GLOBAL = float(os.getenv("NOTION_RATE_LIMIT_GLOBAL", "0"))
+    # 令牌桶存储：memory（进程内）、sqlite（多个 Web 进程共享）、auto（多租户模式用 sqlite）
+    NOTION_RATE_LIMIT_STORE = os.getenv("NOTION_RATE_LIMIT_STORE", "auto").lower()
+
+    # Notion 发件箱：每个 Web 进程的后台发送线程数（0 表示导入时直接发送）和每条记录的最大发送次数
+    NOTION_OUTBOX_WORKERS = int(os.getenv("NOTION_OUTBOX_WORKERS", "1"))
+    NOTION_OUTBOX_MAX_ATTEMPTS = int(os.getenv("NOTION_OUTBOX_MAX_ATTEMPTS", "8"))
+
     # Bill File Configuration
     DEFAULT_BILL_DIR = os.getenv("DEFAULT_BILL_DIR", "./bills")
     DEFAULT_BILL_PLATFORM = os.getenv("DEFAULT_BILL_PLATFORM", "alipay")
@@ -56,7 +71,7 @@ class Config:
 
     # 文件上传配置
     MAX_UPLOAD_SIZE = int(os.getenv("MAX_UPLOAD_SIZE", str(50 * 1024 * 1024)))  # 默认50MB
-    ALLOWED_FILE_EXTENSIONS = os.getenv("ALLOWED_FILE_EXTENSIONS", ".csv,.txt,.xls,.xlsx").split(",")
+    ALLOWED_FILE_EXTENSIONS = os.getenv("ALLOWED_FILE_EXTENSIONS", ".csv,.txt,.xls,.xlsx,.zip").split(",")
 
     # 注册配置
     REGISTRATION_ENABLED = os.getenv("REGISTRATION_ENABLED", "true").lower() == "true"
@@ -1,7 +1,11 @@
 import logging
 from src.config import Config
-from parsers import get_parser, get_parser_by_platform
+from parsers import get_parser, get_parser_by_platform, parse_many, result_records
+from parsers.archive import is_archive, list_members, split_member
 from src.notion_api import NotionClient
+from src.services.transaction_index import TransactionIndex
+from src.services.import_watermark import IncrementalWatermark
+from src.services import notion_outbox
 from typing import Optional
 import os
 import pandas as pd
@@ -9,17 +13,30 @@ import pandas as pd
 logger = logging.getLogger(__name__)
 
 
-def import_bill(file_path: str, platform: Optional[str] = None, user_id: Optional[int] = None) -> dict:
+def import_bill(file_path: str, platform: Optional[str] = None, user_id: Optional[int] = None,
+                backfill: bool = False) -> dict:
     """Import bill file to Notion.
 
     支持单用户模式和多租户模式：
     - 单用户模式：使用全局配置的 Notion API key
     - 多租户模式：根据 user_id 使用用户的 Notion 配置
 
+    导入是增量的：早于该用户、该平台导入水位的交易在转换前即被过滤，
+    其余交易通过已导入交易索引跳过未变化的记录。
+
+    需要创建或更新的记录写入 Notion 发件箱（见 src.services.notion_outbox）。
+    当前进程运行着后台发送线程时（Web 服务）立即返回，记录由后台发送；
+    否则（命令行、定时任务）在返回前发送。发送失败的记录留在发件箱中按退避
+    时间重试，不需要重新导入整个文件。
+
+    .zip 压缩包中的账单不解压到磁盘，直接从压缩包读取；包含多个账单时
+    每个账单单独解析（见 import_bills），计数合并，'files' 中给出各账单的结果。
+
     Args:
-        file_path: 账单文件路径
+        file_path: 账单文件或 .zip 压缩包路径
         platform: 支付平台（alipay, wechat, unionpay），不指定则自动检测
         user_id: 用户ID（多租户模式必需）
+        backfill: 为 True 时忽略导入水位，用于补导早于水位的账单
 
     Returns:
         包含导入结果和元数据的字典：
@@ -29,9 +46,15 @@ def import_bill(file_path: str, platform: Optional[str] = None, user_id: Optiona
             'total_records': int,
             'imported': int,
             'updated': int,
-            'skipped': int
+            'skipped': int,    # 发送失败、留在发件箱中重试的记录数
+            'queued': int,     # 交给后台发送线程、尚未发送的记录数
+            'unchanged': int,  # 已导入且未变化、未发送到 Notion 的记录数
+            'filtered': int    # 早于导入水位、未转换的记录数
         }
     """
+    if is_archive(file_path):
+        return _import_archive(file_path, platform, user_id, backfill)
+
     try:
         # 在多租户模式下，验证 user_id 参数
         if Config.is_multi_tenant_mode():
@@ -57,16 +80,10 @@ def import_bill(file_path: str, platform: Optional[str] = None, user_id: Optiona
         detected_platform = parser.get_platform()
         logger.info(f"Using {detected_platform} parser")
 
-        # Parse bill file
-        logger.info(f"Parsing bill file: {file_path}")
-        notion_records = parser.to_notion_format()
-        logger.info(f"Parsed {len(notion_records)} records")
-
         # Import to Notion - 传递 user_id
-        logger.info("Importing records to Notion...")
         if Config.is_multi_tenant_mode():
             logger.info(f"Importing for user_id: {user_id}")
-        notion_client = NotionClient(user_id=user_id)
+        notion_client = NotionClient.for_user(user_id)
 
         # Verify Notion connection
         if not notion_client.verify_connection():
@@ -77,22 +94,43 @@ def import_bill(file_path: str, platform: Optional[str] = None, user_id: Optiona
                 'detected_platform': detected_platform
             }
 
-        # Batch import
-        result = notion_client.batch_import(notion_records)
+        # 流水线处理：逐块解析并立即导入，内存占用与文件大小无关
+        logger.info(f"Parsing and importing bill file: {file_path}")
+        index = TransactionIndex(user_id, detected_platform)
+        watermark = IncrementalWatermark(user_id, detected_platform)
+        row_filter = None if backfill else watermark.mask
+        total_records, queued, unchanged = 0, 0, 0
+        for notion_records in parser.iter_notion_format(row_filter=row_filter):
+            total_records += len(notion_records)
+            chunk_queued, chunk_unchanged = _queue_records(user_id, index, notion_records)
+            queued += chunk_queued
+            unchanged += chunk_unchanged
+            watermark.observe(notion_records)
+
+        # 记录已持久化在发件箱中，发送失败也会重试，因此总是推进水位
+        watermark.save()
+        result = dict(_deliver(user_id, queued), unchanged=unchanged)
 
         # Print import result
         logger.info(f"Import completed successfully!")
+        logger.info(f"Parsed: {total_records} records")
         logger.info(f"Imported: {result['imported']} records")
         logger.info(f"Updated: {result['updated']} records")
         logger.info(f"Skipped: {result['skipped']} records")
+        logger.info(f"Queued: {result['queued']} records")
+        logger.info(f"Unchanged: {result['unchanged']} records")
+        logger.info(f"Filtered by watermark: {watermark.filtered} records")
 
         return {
             'success': True,
             'detected_platform': detected_platform,
-            'total_records': len(notion_records),
+            'total_records': total_records,
             'imported': result['imported'],
             'updated': result['updated'],
-            'skipped': result['skipped']
+            'skipped': result['skipped'],
+            'queued': result['queued'],
+            'unchanged': result['unchanged'],
+            'filtered': watermark.filtered
         }
 
     except Exception as e:
@@ -104,18 +142,191 @@ def import_bill(file_path: str, platform: Optional[str] = None, user_id: Optiona
         }
 
 
+def _import_archive(archive_path: str, platform: Optional[str], user_id: Optional[int], backfill: bool) -> dict:
+    """导入压缩包中的全部账单，合并各账单的导入结果（格式同 import_bill）。"""
+    try:
+        members = list_members(archive_path)
+    except ValueError as e:
+        logger.error(f"Cannot read archive {archive_path}: {e}")
+        return {'success': False, 'error': str(e)}
+
+    # 只有一个账单时逐块流水线导入
+    if len(members) == 1:
+        return import_bill(members[0], platform, user_id=user_id, backfill=backfill)
+
+    results = import_bills(members, platform, user_id=user_id, backfill=backfill)
+    failed = [r for r in results if not r.get('success')]
+    combined = {
+        'success': not failed,
+        'detected_platform': next((r['detected_platform'] for r in results if r.get('detected_platform')), None),
+        'files': results
+    }
+    for key in ('total_records', 'imported', 'updated', 'skipped', 'queued', 'unchanged', 'filtered'):
+        combined[key] = sum(r.get(key, 0) for r in results)
+    if failed:
+        combined['error'] = '; '.join(f"{split_member(r['file_path'])[1]}: {r.get('error')}" for r in failed)
+    return combined
+
+
+def _expand_archives(file_paths: list) -> tuple:
+    """将 .zip 压缩包替换为其中各账单的路径。
+
+    Returns:
+        (账单路径列表, 无法读取的压缩包的错误结果列表)
+    """
+    paths, errors = [], []
+    for path in file_paths:
+        if not is_archive(path):
+            paths.append(path)
+            continue
+        try:
+            paths.extend(list_members(path))
+        except ValueError as e:
+            logger.error(f"Cannot read archive {path}: {e}")
+            errors.append({'success': False, 'file_path': path, 'error': str(e)})
+    return paths, errors
+
+
+def _queue_records(user_id: Optional[int], index: TransactionIndex, notion_records: list) -> tuple:
+    """将一组记录中新增和已变化的记录写入发件箱，跳过已导入且未变化的记录。
+
+    Returns:
+        (写入发件箱的记录数, 未变化的记录数)
+    """
+    plan = index.classify(notion_records)
+    return notion_outbox.enqueue(user_id, index.platform, plan), plan['unchanged']
+
+
+def _deliver(user_id: Optional[int], queued: int) -> dict:
+    """发送用户在发件箱中的记录，或交给后台发送线程。
+
+    Returns:
+        包含 imported、updated、skipped、queued 计数的字典
+    """
+    if notion_outbox.workers_running():
+        notion_outbox.notify()
+        return {'imported': 0, 'updated': 0, 'skipped': 0, 'queued': queued}
+    result = notion_outbox.drain(user_ids=[user_id])
+    return {'imported': result['imported'], 'updated': result['updated'],
+            'skipped': result['skipped'], 'queued': 0}
+
+
+def import_bills(file_paths: list, platform: Optional[str] = None, user_id: Optional[int] = None,
+                 workers: Optional[int] = None, backfill: bool = False) -> list:
+    """Import several bill files to Notion.
+
+    文件先通过 parse_many 在多个进程中并行解析，再逐个文件导入 Notion；
+    单个文件解析或导入失败不影响其他文件。所有文件都按导入开始时的水位过滤，
+    全部文件导入后才推进各平台的水位，因此文件的顺序不影响哪些交易被导入。
+    .zip 压缩包中的每个账单作为单独的文件解析和导入。
+
+    Args:
+        file_paths: 账单文件或 .zip 压缩包路径列表
+        platform: 支付平台，不指定则逐个文件自动检测
+        user_id: 用户ID（多租户模式必需）
+        workers: 解析进程数，默认为 CPU 核数
+        backfill: 为 True 时忽略导入水位（见 import_bill）
+
+    Returns:
+        每个文件一个结果字典（格式同 import_bill，另含 'file_path'），顺序与输入一致；
+        压缩包展开为其中各账单的结果，无法读取的压缩包的结果排在最前
+    """
+    file_paths, archive_errors = _expand_archives(file_paths)
+    try:
+        if Config.is_multi_tenant_mode():
+            if not user_id:
+                logger.error("user_id is required in multi-tenant mode")
+                error = {'success': False, 'error': 'user_id is required in multi-tenant mode'}
+                return archive_errors + [dict(error, file_path=path) for path in file_paths]
+        else:
+            Config.validate()
+
+        notion_client = NotionClient.for_user(user_id)
+        if not notion_client.verify_connection():
+            logger.error("Failed to connect to Notion. Please check your API key and database ID.")
+            error = {'success': False, 'error': 'Failed to connect to Notion'}
+            return archive_errors + [dict(error, file_path=path) for path in file_paths]
+    except Exception as e:
+        logger.error(f"Import failed: {e}", exc_info=True)
+        return archive_errors + [{'success': False, 'error': str(e), 'file_path': path} for path in file_paths]
+
+    results = archive_errors
+    # 每个平台一个水位：本批文件都按导入前的水位过滤，最后合并推进一次
+    watermarks = {}
+    for parsed in parse_many(file_paths, workers=workers, platform=platform):
+        file_path = parsed['file_path']
+        if not parsed['success']:
+            results.append({
+                'success': False,
+                'file_path': file_path,
+                'error': parsed['error'],
+                'detected_platform': parsed['platform']
+            })
+            continue
+
+        try:
+            watermark = watermarks.get(parsed['platform'])
+            if watermark is None:
+                watermark = watermarks[parsed['platform']] = IncrementalWatermark(user_id, parsed['platform'])
+            filtered = watermark.filtered
+            notion_records = result_records(parsed, row_filter=None if backfill else watermark.mask)
+            logger.info(f"Importing {len(notion_records)} records from {file_path}")
+            index = TransactionIndex(user_id, parsed['platform'])
+            queued, unchanged = _queue_records(user_id, index, notion_records)
+            watermark.observe(notion_records)
+            result = dict(_deliver(user_id, queued), unchanged=unchanged)
+            results.append({
+                'success': True,
+                'file_path': file_path,
+                'detected_platform': parsed['platform'],
+                'total_records': len(notion_records),
+                'imported': result['imported'],
+                'updated': result['updated'],
+                'skipped': result['skipped'],
+                'queued': result['queued'],
+                'unchanged': result['unchanged'],
+                'filtered': watermark.filtered - filtered
+            })
+        except Exception as e:
+            logger.error(f"Import failed for {file_path}: {e}", exc_info=True)
+            results.append({
+                'success': False,
+                'file_path': file_path,
+                'error': str(e),
+                'detected_platform': parsed['platform']
+            })
+
+    for watermark in watermarks.values():
+        watermark.save()
+    return results
+
+
 def parse_bill_only(file_path: str, platform: Optional[str] = None) -> Optional[list]:
     """仅解析账单文件，不导入到 Notion。
 
     用于预览或调试目的。
 
     Args:
-        file_path: 账单文件路径
+        file_path: 账单文件或 .zip 压缩包路径（返回其中全部账单的记录）
         platform: 支付平台（alipay, wechat, unionpay），不指定则自动检测
 
     Returns:
         解析后的记录列表（Notion 格式），失败返回 None
     """
+    if is_archive(file_path):
+        try:
+            members = list_members(file_path)
+        except ValueError as e:
+            logger.error(f"Parse failed: {e}")
+            return None
+        records = []
+        for member in members:
+            member_records = parse_bill_only(member, platform)
+            if member_records is None:
+                return None
+            records.extend(member_records)
+        return records
+
     try:
         # Get parser
         if platform:
@@ -141,11 +352,24 @@ def parse_bill_only(file_path: str, platform: Optional[str] = None) -> Optional[
         return None
 
 
+def _preview_records(df: pd.DataFrame) -> list:
+    """按列将预览数据转换为字符串，缺失值为 None，再组装为字典列表。"""
+    columns = []
+    for col in df.columns:
+        values = df[col].astype(str).to_numpy(dtype=object)
+        values[df[col].isna().to_numpy()] = None
+        columns.append(values.tolist())
+    names = list(df.columns)
+    return [dict(zip(names, row)) for row in zip(*columns)]
+
+
 def parse_bill_raw(file_path: str, platform: Optional[str] = None, max_rows: int = 500) -> Optional[dict]:
     """解析账单文件，返回原始 CSV 数据用于预览。
 
+    .zip 压缩包预览其中第一个账单。
+
     Args:
-        file_path: 账单文件路径
+        file_path: 账单文件或 .zip 压缩包路径
         platform: 支付平台（alipay, wechat, unionpay），不指定则自动检测
         max_rows: 最大返回行数
 
@@ -155,10 +379,23 @@ def parse_bill_raw(file_path: str, platform: Optional[str] = None, max_rows: int
             'detected_platform': str,
             'columns': list,
             'data': list,
-            'total_rows': int
+            'total_rows': int,          # 文件总行数，大文件为估计值
+            'total_rows_exact': bool,   # total_rows 是否为精确值
+            'members': list             # 仅压缩包：其中的账单文件名
         }
         失败返回 None
     """
+    if is_archive(file_path):
+        try:
+            members = list_members(file_path)
+        except ValueError as e:
+            logger.error(f"Parse raw failed: {e}")
+            return None
+        result = parse_bill_raw(members[0], platform, max_rows)
+        if result is not None:
+            result['members'] = [split_member(member)[1] for member in members]
+        return result
+
     try:
         # Get parser
         if platform:
@@ -174,45 +411,29 @@ def parse_bill_raw(file_path: str, platform: Optional[str] = None, max_rows: int
 
         detected_platform = parser.get_platform()
 
-        # Parse bill file to get raw DataFrame
+        # 只解析预览所需的前 max_rows 行，其余行只计数
         logger.info(f"Parsing bill file for preview: {file_path}")
-        df = parser.parse()
+        preview = parser.preview(max_rows)
+        df = preview['data']
 
         if df is None or df.empty:
             return {
                 'detected_platform': detected_platform,
                 'columns': [],
                 'data': [],
-                'total_rows': 0
+                'total_rows': 0,
+                'total_rows_exact': True
             }
 
-        total_rows = len(df)
-        # 限制行数
-        df_preview = df.head(max_rows)
-
-        # 转换为字典列表（保持原始列名和数据）
-        # 使用 to_dict('records') 并处理特殊类型
-        data = []
-        for _, row in df_preview.iterrows():
-            record = {}
-            for col in df_preview.columns:
-                value = row[col]
-                # 处理 NaN 值
-                if pd.isna(value):
-                    record[col] = None
-                # 处理 Timestamp 类型
-                elif isinstance(value, pd.Timestamp):
-                    record[col] = str(value)
-                # 处理其他类型，转换为字符串保持一致性
-                else:
-                    record[col] = str(value) if value is not None else None
-            data.append(record)
+        # 内部使用的整数分金额列不展示
+        df = df.drop(columns=['amount_cents'], errors='ignore')
 
         return {
             'detected_platform': detected_platform,
             'columns': list(df.columns),
-            'data': data,
-            'total_rows': total_rows
+            'data': _preview_records(df),
+            'total_rows': preview['total_rows'],
+            'total_rows_exact': preview['exact']
         }
 
     except Exception as e:
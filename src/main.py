@@ -22,6 +22,10 @@ def main():
     parser.add_argument("--month", type=int, choices=range(1, 13))
     parser.add_argument("--quarter", type=int, choices=range(1, 5))
     parser.add_argument("--user-id", type=int)
+    parser.add_argument("--backfill", action="store_true", help="ignore the import watermark")
+    parser.add_argument("--drain", action="store_true", help="send records waiting in the Notion outbox")
+    parser.add_argument("--retry-failed", action="store_true",
+                        help="requeue records the outbox gave up on, then send them")
     args = parser.parse_args()
 
     # 复盘生成
@@ -47,6 +51,16 @@ def main():
         BillScheduler().start()
         return
 
+    # 发送发件箱中的记录
+    if args.drain or args.retry_failed:
+        from src.services import notion_outbox
+        if args.retry_failed:
+            notion_outbox.retry_dead(args.user_id)
+        r = notion_outbox.drain(user_ids=[args.user_id])
+        logger.info(f"Outbox drained: {r['imported']} imported, {r['updated']} updated, "
+                    f"{r['skipped']} failed, {r['dead']} given up")
+        sys.exit(0 if r['skipped'] == 0 else 1)
+
     # 账单导入
     if not args.file:
         parser.print_help()
@@ -62,7 +76,7 @@ def main():
         logger.error(f"Configuration error: {e}")
         sys.exit(1)
 
-    result = import_bill(args.file, args.platform, args.user_id)
+    result = import_bill(args.file, args.platform, args.user_id, backfill=args.backfill)
     if result.get("success"):
         logger.info("Import completed successfully")
         sys.exit(0)
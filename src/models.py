@@ -2,7 +2,7 @@
 
 from sqlalchemy import (
     Column, Integer, String, Boolean, DateTime, Text, ForeignKey,
-    Numeric, Index
+    Numeric, Index, Float
 )
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
@@ -40,6 +40,9 @@ class User(Base):
     uploads = relationship("UserUpload", back_populates="user", cascade="all, delete-orphan")
     import_history = relationship("ImportHistory", back_populates="user", cascade="all, delete-orphan")
     audit_logs = relationship("AuditLog", back_populates="user", cascade="all, delete-orphan")
+    imported_transactions = relationship("ImportedTransaction", back_populates="user", cascade="all, delete-orphan")
+    import_watermarks = relationship("ImportWatermark", back_populates="user", cascade="all, delete-orphan")
+    notion_outbox = relationship("NotionOutbox", back_populates="user", cascade="all, delete-orphan")
 
     def __repr__(self):
         return f"<User(id={self.id}, username='{self.username}', is_superuser={self.is_superuser})>"
@@ -159,6 +162,122 @@ class ImportHistory(Base):
         return f"<ImportHistory(id={self.id}, user_id={self.user_id}, status='{self.status}', imported={self.imported_records}/{self.total_records})>"
 
 
+class ImportedTransaction(Base):
+    """已导入交易索引表。
+
+    记录每笔交易对应的 Notion 页面和内容哈希，重复导入有重叠的账单时
+    跳过未变化的交易，只更新有变化的交易。
+    """
+
+    __tablename__ = "imported_transactions"
+    __table_args__ = (
+        Index("ix_imported_transactions_key", "user_id", "platform", "transaction_key", unique=True),
+    )
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), index=True)  # 单用户模式为空
+
+    platform = Column(String(20), nullable=False)
+    transaction_key = Column(String(100), nullable=False)  # 交易号或交易指纹
+    notion_page_id = Column(String(100), nullable=False)
+    content_hash = Column(String(64), nullable=False)
+
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+
+    # 关系
+    user = relationship("User", back_populates="imported_transactions")
+
+    def __repr__(self):
+        return f"<ImportedTransaction(id={self.id}, user_id={self.user_id}, platform='{self.platform}', key='{self.transaction_key}')>"
+
+
+class ImportWatermark(Base):
+    """增量导入水位表。
+
+    记录每个用户、每个平台已导入的最新交易时间及该时间点的交易号，
+    再次导入累计账单时跳过更早的交易。
+    """
+
+    __tablename__ = "import_watermarks"
+    __table_args__ = (
+        Index("ix_import_watermarks_user_platform", "user_id", "platform", unique=True),
+    )
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), index=True)  # 单用户模式为空
+
+    platform = Column(String(20), nullable=False)
+    last_transaction_time = Column(String(32), nullable=False)  # ISO 格式交易时间
+    transaction_ids = Column(Text)  # JSON 格式，last_transaction_time 时刻已导入的交易号
+
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+
+    # 关系
+    user = relationship("User", back_populates="import_watermarks")
+
+    def __repr__(self):
+        return f"<ImportWatermark(user_id={self.user_id}, platform='{self.platform}', last='{self.last_transaction_time}')>"
+
+
+class NotionOutbox(Base):
+    """Notion 写入发件箱表。
+
+    导入时每条需要创建或更新的记录先写入此表，再由后台发送线程写入 Notion
+    （见 src.services.notion_outbox），发送成功后删除。发送失败的记录按退避时间
+    重试，超过最大发送次数后标记为 dead，可单独重新发送。
+    """
+
+    __tablename__ = "notion_outbox"
+    __table_args__ = (
+        Index("ix_notion_outbox_status_due", "status", "next_attempt_at"),
+        Index("ix_notion_outbox_key", "user_id", "platform", "transaction_key"),
+    )
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), index=True)  # 单用户模式为空
+
+    platform = Column(String(20), nullable=False)
+    transaction_key = Column(String(100), nullable=False)  # 见 TransactionIndex.transaction_key
+    content_hash = Column(String(64), nullable=False)
+    payload = Column(Text, nullable=False)  # JSON 格式的 Notion 属性
+    notion_page_id = Column(String(100))  # 待更新的页面，新建记录为空
+
+    # 状态：pending（待发送）, sending（发送中）, dead（超过最大发送次数）,
+    # superseded（同一交易的旧记录发送中，等待其完成后再发送）
+    status = Column(String(20), default="pending", nullable=False)
+    attempts = Column(Integer, default=0, nullable=False)
+    last_error = Column(Text)
+    next_attempt_at = Column(DateTime, nullable=False)  # UTC
+    claimed_by = Column(String(36))  # 领取记录的发送线程
+    claimed_at = Column(DateTime)  # UTC
+
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+
+    # 关系
+    user = relationship("User", back_populates="notion_outbox")
+
+    def __repr__(self):
+        return f"<NotionOutbox(id={self.id}, user_id={self.user_id}, key='{self.transaction_key}', status='{self.status}')>"
+
+
+class NotionRateLimit(Base):
+    """Notion API 限流令牌桶表。
+
+    多个 Web 进程通过此表共享同一集成密钥的令牌桶（见 src.services.rate_limiter）。
+    """
+
+    __tablename__ = "notion_rate_limits"
+
+    bucket_key = Column(String(64), primary_key=True)  # 集成密钥的哈希，全局桶为 '*'
+    tokens = Column(Float, nullable=False)  # 可为负数，表示已预约的请求
+    updated_at = Column(Float, nullable=False)  # Unix 时间戳（秒）
+
+    def __repr__(self):
+        return f"<NotionRateLimit(key='{self.bucket_key}', tokens={self.tokens:.2f})>"
+
+
 class SystemSettings(Base):
     """系统设置表。"""
 
@@ -1,8 +1,20 @@
 """Notion API client for bill management."""
 
-from notion_client import Client as NotionApiClient, APIResponseError
+from notion_client import AsyncClient as AsyncNotionApiClient, Client as NotionApiClient
+from notion_client.errors import HTTPResponseError, RequestTimeoutError
 from src.config import Config
+from src.services.rate_limiter import rate_limit_request, rate_limit_request_async
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from contextvars import ContextVar
+from email.utils import parsedate_to_datetime
+import asyncio
+import httpx
 import logging
+import random
+import threading
+import time
+import weakref
 
 
 logger = logging.getLogger(__name__)
@@ -12,6 +24,317 @@ logger = logging.getLogger(__name__)
 # 设置为 180 秒（3分钟）以处理大型数据库
 NOTION_TIMEOUT = 180
 
+# 请求耗时超过该值（秒）视为拥塞信号，导入并发数减半
+SLOW_REQUEST_SECONDS = 5.0
+
+# 重试策略：每次 Notion 调用最多尝试 RETRY_MAX_ATTEMPTS 次，重试等待合计不超过 RETRY_BUDGET_SECONDS 秒
+RETRY_MAX_ATTEMPTS = 4
+RETRY_BUDGET_SECONDS = 60.0
+
+# 没有 Retry-After 时，第 n 次重试在 [0, min(RETRY_MAX_DELAY_SECONDS, RETRY_BASE_SECONDS * 2**n)] 秒内随机等待
+RETRY_BASE_SECONDS = 1.0
+RETRY_MAX_DELAY_SECONDS = 20.0
+
+# classify_error() 的错误类别
+RETRYABLE = 'retryable'
+RATE_LIMITED = 'rate_limited'
+FATAL = 'fatal'
+
+# 可以重试的 HTTP 状态码（冲突、服务端错误、网关错误）
+RETRYABLE_STATUSES = {409, 500, 502, 503, 504}
+
+
+def classify_error(error: Exception) -> str:
+    """Classify a failed Notion call as RATE_LIMITED, RETRYABLE or FATAL.
+
+    Rate limiting (429), conflicts, 5xx responses, timeouts and network
+    errors are transient; any other error (invalid request, unauthorized,
+    not found, bugs in our own code) fails the same way when retried.
+    """
+    if isinstance(error, HTTPResponseError):
+        if error.status == 429:
+            return RATE_LIMITED
+        return RETRYABLE if error.status in RETRYABLE_STATUSES else FATAL
+    if isinstance(error, (RequestTimeoutError, httpx.TransportError)):
+        return RETRYABLE
+    return FATAL
+
+
+def is_auth_error(error: Exception) -> bool:
+    """Check whether an error means the integration key is invalid or lacks access."""
+    return isinstance(error, HTTPResponseError) and error.status in (401, 403)
+
+
+def is_rate_limited(error: Exception) -> bool:
+    """Check whether an error is a Notion rate-limit (429) response."""
+    return classify_error(error) == RATE_LIMITED
+
+
+def retry_after_seconds(error: Exception, default: float = None) -> float:
+    """Return the Retry-After delay of an error response, or ``default``.
+
+    Both forms of the header are accepted: seconds and an HTTP date.
+    """
+    headers = getattr(error, 'headers', None)
+    value = headers.get('retry-after') if headers is not None else None
+    if not value:
+        return default
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return default
+
+
+# 当前调用中每次失败的错误类别的接收者（见 record_error_kinds）
+_error_listener = ContextVar('notion_error_listener', default=None)
+
+
+@contextmanager
+def record_error_kinds():
+    """Collect the error kind of every failed attempt made inside the block.
+
+    Retries happen inside the SDK client, so callers that react to
+    congestion (AdaptiveConcurrency) use this to see rate limiting that
+    was retried successfully.
+    """
+    kinds = []
+    token = _error_listener.set(kinds.append)
+    try:
+        yield kinds
+    finally:
+        _error_listener.reset(token)
+
+
+class RetryPolicy:
+    """Retry policy shared by every Notion API call.
+
+    Fatal errors are raised at once. Rate-limited calls wait for the
+    response's Retry-After and other transient errors back off
+    exponentially with full jitter, so clients that failed together do not
+    retry together. Each call has a budget of ``max_attempts`` attempts and
+    ``budget_seconds`` of total waiting; when the next wait does not fit
+    in the budget the error is raised instead.
+
+    Page creation is retried too: after a timeout or 5xx the page may
+    already exist, which trades a rare duplicate for not losing the record.
+    """
+
+    def __init__(self, max_attempts: int = RETRY_MAX_ATTEMPTS, budget_seconds: float = RETRY_BUDGET_SECONDS,
+                 base_seconds: float = RETRY_BASE_SECONDS, max_delay_seconds: float = RETRY_MAX_DELAY_SECONDS):
+        self.max_attempts = max(1, max_attempts)
+        self.budget_seconds = budget_seconds
+        self.base_seconds = base_seconds
+        self.max_delay_seconds = max_delay_seconds
+
+    def delay(self, error: Exception, kind: str, attempt: int) -> float:
+        """Seconds to wait before retrying after the ``attempt``-th retry (0-based)."""
+        if kind == RATE_LIMITED:
+            retry_after = retry_after_seconds(error)
+            if retry_after is not None:
+                return retry_after
+        return random.uniform(0, min(self.max_delay_seconds, self.base_seconds * 2 ** attempt))
+
+    def _retry_delay(self, error: Exception, attempt: int, waited: float, description: str):
+        """Seconds to wait before retrying after ``error``, or None to raise it."""
+        kind = classify_error(error)
+        listener = _error_listener.get()
+        if listener is not None:
+            listener(kind)
+        if kind == FATAL or attempt + 1 >= self.max_attempts:
+            return None
+        delay = self.delay(error, kind, attempt)
+        if waited + delay > self.budget_seconds:
+            logger.warning(f"{description}: retry budget exhausted ({waited:.1f}s waited, "
+                           f"{delay:.1f}s more needed)")
+            return None
+        logger.warning(f"{description} failed ({kind}): {error}; "
+                       f"retry {attempt + 1}/{self.max_attempts - 1} in {delay:.1f}s")
+        return delay
+
+    def run(self, func, description: str = "Notion request"):
+        """Call ``func`` and retry it according to the policy."""
+        waited = 0.0
+        attempt = 0
+        while True:
+            try:
+                return func()
+            except Exception as e:
+                delay = self._retry_delay(e, attempt, waited, description)
+                if delay is None:
+                    raise
+                time.sleep(delay)
+                waited += delay
+                attempt += 1
+
+    async def run_async(self, func, description: str = "Notion request"):
+        """Await ``func()`` and retry it according to the policy, without blocking the event loop."""
+        waited = 0.0
+        attempt = 0
+        while True:
+            try:
+                return await func()
+            except Exception as e:
+                delay = self._retry_delay(e, attempt, waited, description)
+                if delay is None:
+                    raise
+                await asyncio.sleep(delay)
+                waited += delay
+                attempt += 1
+
+
+class RetryingApiClient(NotionApiClient):
+    """SDK client whose requests are retried by a RetryPolicy.
+
+    The SDK's own retries are turned off (see create_api_client) so that a
+    call is retried by one policy with one budget.
+    """
+
+    retry_policy = RetryPolicy()
+
+    def request(self, path, method, query=None, body=None, form_data=None, auth=None):
+        send = super().request
+        return self.retry_policy.run(
+            lambda: send(path, method, query=query, body=body, form_data=form_data, auth=auth),
+            f"Notion {method.upper()} {path}"
+        )
+
+
+class AsyncRetryingApiClient(AsyncNotionApiClient):
+    """Async SDK client whose requests are retried by the same RetryPolicy."""
+
+    retry_policy = RetryingApiClient.retry_policy
+
+    async def request(self, path, method, query=None, body=None, form_data=None, auth=None):
+        send = super().request
+        return await self.retry_policy.run_async(
+            lambda: send(path, method, query=query, body=body, form_data=form_data, auth=auth),
+            f"Notion {method.upper()} {path}"
+        )
+
+
+# 所有 SDK 客户端共用的 HTTP 连接池：保持的空闲连接数和空闲连接的保持时间（秒）
+HTTP_KEEPALIVE_CONNECTIONS = 20
+HTTP_KEEPALIVE_SECONDS = 30
+
+_transport = None
+_transport_lock = threading.Lock()
+
+
+def shared_transport() -> httpx.HTTPTransport:
+    """Return the process-wide HTTP transport, which owns the connection pool.
+
+    Each SDK client needs its own httpx.Client because the SDK stores the
+    integration key in the client's headers, but they all send through this
+    transport, so keep-alive connections to api.notion.com (and their TLS
+    sessions) are reused across users and requests.
+    """
+    global _transport
+    with _transport_lock:
+        if _transport is None:
+            _transport = httpx.HTTPTransport(limits=httpx.Limits(
+                max_keepalive_connections=HTTP_KEEPALIVE_CONNECTIONS,
+                keepalive_expiry=HTTP_KEEPALIVE_SECONDS
+            ))
+        return _transport
+
+
+def create_api_client(api_key: str) -> NotionApiClient:
+    """Create an SDK client whose requests pass through the per-key rate
+    limiter and the shared retry policy, on the shared connection pool."""
+    return RetryingApiClient(
+        client=httpx.Client(transport=shared_transport(), event_hooks={'request': [rate_limit_request]}),
+        auth=api_key,
+        timeout_ms=NOTION_TIMEOUT * 1000,
+        notion_version="2022-06-28",  # 使用旧版 API 以支持 databases.query 端点
+        retry=False
+    )
+
+
+# 事件循环 -> 该循环的异步连接池（异步连接不能跨事件循环使用）
+_async_transports = weakref.WeakKeyDictionary()
+
+
+def shared_async_transport() -> httpx.AsyncHTTPTransport:
+    """Return the running event loop's async HTTP transport.
+
+    The async counterpart of shared_transport(): async connections belong
+    to the loop that opened them, so there is one pool per event loop
+    rather than one per process. Must be called from a coroutine.
+    """
+    loop = asyncio.get_running_loop()
+    with _transport_lock:
+        transport = _async_transports.get(loop)
+        if transport is None:
+            transport = httpx.AsyncHTTPTransport(limits=httpx.Limits(
+                max_keepalive_connections=HTTP_KEEPALIVE_CONNECTIONS,
+                keepalive_expiry=HTTP_KEEPALIVE_SECONDS
+            ))
+            _async_transports[loop] = transport
+        return transport
+
+
+def create_async_api_client(api_key: str) -> AsyncNotionApiClient:
+    """Create an async SDK client, configured like create_api_client().
+
+    Must be called from a coroutine. The client is not closed after use:
+    closing it would close the shared transport.
+    """
+    return AsyncRetryingApiClient(
+        client=httpx.AsyncClient(transport=shared_async_transport(),
+                                 event_hooks={'request': [rate_limit_request_async]}),
+        auth=api_key,
+        timeout_ms=NOTION_TIMEOUT * 1000,
+        notion_version="2022-06-28",  # 使用旧版 API 以支持 databases.query 端点
+        retry=False
+    )
+
+
+class AdaptiveConcurrency:
+    """Concurrency limit adjusted by additive increase, multiplicative decrease.
+
+    Callers wrap each request in acquire() and release(). The limit grows by
+    one after a full window of ``limit`` requests that were neither rate
+    limited nor slower than ``slow_seconds``, and halves when one was. Only
+    one decrease happens per window, so the 429s of requests already in
+    flight count as a single signal.
+    """
+
+    def __init__(self, max_limit: int, slow_seconds: float = SLOW_REQUEST_SECONDS):
+        self.max_limit = max(1, max_limit)
+        self.limit = max(1, self.max_limit // 2)
+        self.slow_seconds = slow_seconds
+        self._in_flight = 0
+        self._window = 0
+        self._condition = threading.Condition()
+
+    def acquire(self) -> float:
+        """Wait until a request may start; returns the start time for release()."""
+        with self._condition:
+            while self._in_flight >= self.limit:
+                self._condition.wait()
+            self._in_flight += 1
+        return time.monotonic()
+
+    def release(self, started: float, rate_limited: bool = False):
+        """Finish a request and adjust the limit from its outcome."""
+        congested = rate_limited or time.monotonic() - started > self.slow_seconds
+        with self._condition:
+            self._in_flight -= 1
+            self._window += 1
+            if congested:
+                if self._window >= self.limit and self.limit > 1:
+                    self.limit = max(1, self.limit // 2)
+                    logger.info(f"Notion congestion, concurrency reduced to {self.limit}")
+                    self._window = 0
+            elif self._window >= self.limit and self.limit < self.max_limit:
+                self.limit += 1
+                self._window = 0
+            self._condition.notify_all()
+
 
 class NotionClient:
     """Notion API client wrapper.
@@ -19,8 +342,53 @@ class NotionClient:
     支持单用户模式和多租户模式：
     - 单用户模式：使用全局配置的 Notion API key 和数据库 ID
     - 多租户模式：根据 user_id 从数据库获取用户的 Notion 配置
+
+    请通过 NotionClient.for_user() 获取进程内共享的实例。
     """
 
+    # 按用户缓存的实例：user_id -> ((api_key, income_db, expense_db), 实例)
+    _instances = {}
+    _instances_lock = threading.Lock()
+
+    @classmethod
+    def for_user(cls, user_id=None) -> 'NotionClient':
+        """返回该用户在本进程内共享的客户端。
+
+        用户的 Notion 密钥或数据库 ID 变化后（见 src.services.notion_config.invalidate）
+        重新创建客户端。
+
+        Raises:
+            ValueError: 当必需的配置缺失时
+        """
+        if Config.is_single_user_mode():
+            signature = (Config.NOTION_API_KEY, Config.NOTION_INCOME_DATABASE_ID, Config.NOTION_EXPENSE_DATABASE_ID)
+        else:
+            if not user_id:
+                raise ValueError("user_id is required in multi-tenant mode")
+            from src.services.notion_config import get_user_notion_config
+            try:
+                config = get_user_notion_config(user_id)
+            except ValueError:
+                cls.discard(user_id)
+                raise
+            signature = (config['api_key'], config['income_db'], config['expense_db'])
+
+        with cls._instances_lock:
+            cached = cls._instances.get(user_id)
+        if cached is not None and cached[0] == signature:
+            return cached[1]
+
+        client = cls(user_id=user_id)
+        with cls._instances_lock:
+            cls._instances[user_id] = (signature, client)
+        return client
+
+    @classmethod
+    def discard(cls, user_id=None):
+        """丢弃用户的共享客户端（配置删除时调用）。"""
+        with cls._instances_lock:
+            cls._instances.pop(user_id, None)
+
     def __init__(self, user_id=None):
         """初始化 Notion 客户端。
 
@@ -49,11 +417,7 @@ class NotionClient:
             logger.info(f"Income DB: {Config.NOTION_INCOME_DATABASE_ID[:8]}***")
             logger.info(f"Expense DB: {Config.NOTION_EXPENSE_DATABASE_ID[:8]}***")
 
-            self.client = NotionApiClient(
-                auth=Config.NOTION_API_KEY,
-                timeout_ms=NOTION_TIMEOUT * 1000,
-                notion_version="2022-06-28"  # 使用旧版 API 以支持 databases.query 端点
-            )
+            self.client = create_api_client(Config.NOTION_API_KEY)
             self.income_db = Config.NOTION_INCOME_DATABASE_ID
             self.expense_db = Config.NOTION_EXPENSE_DATABASE_ID
         else:
@@ -85,45 +449,24 @@ class NotionClient:
             logger.info(f"User {user_id} income DB: {config['income_db'][:8]}***")
             logger.info(f"User {user_id} expense DB: {config['expense_db'][:8]}***")
 
-            self.client = NotionApiClient(
-                auth=config['api_key'],
-                timeout_ms=NOTION_TIMEOUT * 1000,
-                notion_version="2022-06-28"  # 使用旧版 API 以支持 databases.query 端点
-            )
+            self.client = create_api_client(config['api_key'])
             self.income_db = config['income_db']
             self.expense_db = config['expense_db']
 
     def _get_user_notion_config(self, user_id):
-        """从数据库获取用户的 Notion 配置。
+        """获取用户的 Notion 配置（进程内缓存）。
 
         Args:
             user_id: 用户ID
 
         Returns:
-            包含配置信息的字典，包含 api_key, income_db, expense_db
+            包含配置信息的字典，包含 api_key, income_db, expense_db 等
 
         Raises:
             ValueError: 配置不存在时
         """
-        from src.services.database import get_db_context
-        from src.models import UserNotionConfig
-
-        with get_db_context() as db:
-            config = db.query(UserNotionConfig).filter(
-                UserNotionConfig.user_id == user_id
-            ).first()
-
-            if not config:
-                raise ValueError(f"Notion config not found for user {user_id}")
-
-            # 在会话关闭前提取所有需要的值
-            # 这样可以避免会话关闭后访问对象属性的错误
-            return {
-                'api_key': config.notion_api_key,
-                'income_db': config.notion_income_database_id,
-                'expense_db': config.notion_expense_database_id,
-                'is_verified': config.is_verified
-            }
+        from src.services.notion_config import get_user_notion_config
+        return get_user_notion_config(user_id)
 
     def _clean_properties(self, properties: dict) -> tuple:
         """Clean properties and extract income/expense type.
@@ -207,77 +550,204 @@ class NotionClient:
         logger.info(f"Created page: {response['id']} (DB: {'income' if income_expense_type == '收入' else 'expense'})")
         return response
 
-    def batch_import(self, records: list, batch_size: int = 10) -> dict:
-        """Import records in batches."""
-        logger.info(f"Batch import: {len(records)} records, batch size: {batch_size}")
+    def update_page(self, page_id: str, properties: dict):
+        """Update the properties of an existing page in Notion."""
+        cleaned, _ = self._clean_properties(properties)
+        response = self.client.pages.update(page_id=page_id, properties=cleaned)
+        logger.info(f"Updated page: {page_id}")
+        return response
+
+    def _write_record(self, record: dict, page_id: str, concurrency: AdaptiveConcurrency) -> tuple:
+        """Create or update the page of one record.
 
-        imported, skipped = 0, 0
+        Transient errors are retried by the client's RetryPolicy; rate
+        limiting seen on any attempt counts as congestion.
 
-        for i in range(0, len(records), batch_size):
-            batch = records[i:i + batch_size]
-            batch_num = i // batch_size + 1
-            total = (len(records) - 1) // batch_size + 1
+        Returns:
+            Tuple of (outcome, page id, error, fatal): outcome is 'imported',
+            'updated' or 'skipped'; when skipped the page id is None, error
+            holds the failure message and fatal tells whether retrying the
+            record later cannot help
+        """
+        if 'Date' not in record or 'Price' not in record:
+            logger.error(f"Missing required fields: {record}")
+            return 'skipped', None, "Missing required fields: Date, Price", True
+
+        started = concurrency.acquire()
+        with record_error_kinds() as kinds:
+            try:
+                if page_id:
+                    self.update_page(page_id, record)
+                    outcome = 'updated'
+                else:
+                    page_id = self.create_page(record)['id']
+                    outcome = 'imported'
+            except Exception as e:
+                concurrency.release(started, rate_limited=RATE_LIMITED in kinds)
+                logger.error(f"Failed to import record: {e}")
+                if is_auth_error(e):
+                    from src.services.notion_verification import mark_unverified
+                    mark_unverified(self.user_id)
+                return 'skipped', None, str(e), classify_error(e) == FATAL
+        concurrency.release(started, rate_limited=RATE_LIMITED in kinds)
+        return outcome, page_id, None, False
+
+    def batch_import(self, records: list, batch_size: int = 10, page_ids: list = None,
+                     workers: int = None) -> dict:
+        """Import records with several concurrent requests.
+
+        Records are written by a thread pool. The number of requests in
+        flight starts at half of ``workers`` and is adapted to Notion's
+        responses (see AdaptiveConcurrency): it grows while requests are
+        fast and halves on rate limiting or slow responses.
 
-            logger.info(f"Processing batch {batch_num}/{total}, {len(batch)} records")
+        Args:
+            records: Notion property dicts
+            batch_size: Records per progress log line
+            page_ids: Optional list matching records; a page id updates that
+                page instead of creating a new one
+            workers: Maximum concurrent requests, Config.NOTION_IMPORT_WORKERS
+                if omitted
 
-            for record in batch:
-                try:
-                    if 'Date' not in record or 'Price' not in record:
-                        logger.error(f"Missing required fields: {record}")
-                        skipped += 1
-                        continue
-                    self.create_page(record)
-                    imported += 1
-                except Exception as e:
-                    logger.error(f"Failed to import record: {e}")
-                    skipped += 1
-
-            logger.info(f"Batch {batch_num}/{total} complete")
-
-        logger.info(f"Import complete: {imported} imported, {skipped} skipped")
-        return {"imported": imported, "updated": 0, "skipped": skipped}
-
-    def verify_connection(self) -> bool:
+        Returns:
+            Dict with the imported, updated and skipped counts, and lists in
+            input order: 'pages', the page id of each record (None if it was
+            skipped); 'errors', the error message of each record (None if it
+            was written); 'fatal', whether the record failed with an error
+            that retrying cannot fix
+        """
+        workers = max(1, workers or Config.NOTION_IMPORT_WORKERS)
+        logger.info(f"Batch import: {len(records)} records, up to {workers} concurrent requests")
+
+        if page_ids is None:
+            page_ids = [None] * len(records)
+        counts = {'imported': 0, 'updated': 0, 'skipped': 0}
+        pages, errors, fatal = [], [], []
+
+        if records:
+            concurrency = AdaptiveConcurrency(min(workers, len(records)))
+            with ThreadPoolExecutor(max_workers=concurrency.max_limit, thread_name_prefix='notion-import') as pool:
+                futures = [
+                    pool.submit(self._write_record, record, page_id, concurrency)
+                    for record, page_id in zip(records, page_ids)
+                ]
+                # Results are collected in input order
+                for i, future in enumerate(futures, 1):
+                    outcome, page_id, error, is_fatal = future.result()
+                    counts[outcome] += 1
+                    pages.append(page_id)
+                    errors.append(error)
+                    fatal.append(is_fatal)
+                    if i % batch_size == 0 or i == len(futures):
+                        logger.info(f"Processed {i}/{len(futures)} records (concurrency {concurrency.limit})")
+
+        logger.info(f"Import complete: {counts['imported']} imported, {counts['updated']} updated, "
+                    f"{counts['skipped']} skipped")
+        return dict(counts, pages=pages, errors=errors, fatal=fatal)
+
+    def verify_connection(self, force: bool = False) -> bool:
         """验证 Notion API 连接。
 
-        尝试连接到 Notion API 并验证配置是否正确。
+        并发检查 API 密钥和收入、支出数据库；验证成功的结果会被缓存，
+        见 src.services.notion_verification.verify。
+
+        Args:
+            force: 忽略缓存的验证结果，重新检查
 
         Returns:
             bool: 连接成功返回 True，否则返回 False
         """
+        from src.services.notion_verification import verify
+
         logger.info("Verifying Notion connection...")
         try:
-            # 验证 API 密钥
-            logger.debug("Fetching user info from Notion API...")
-            user = self.client.users.me()
-            logger.info(f"API key valid, user: {user.get('name', 'unknown')}")
-
-            # 验证收入数据库
-            logger.debug(f"Fetching income database: {self.income_db[:8]}***")
-            income_db = self.client.databases.retrieve(database_id=self.income_db)
-            income_title = income_db.get('title', [{}])[0].get('text', {}).get('content', 'unknown')
-            logger.info(f"Income DB accessible: {income_title}")
-
-            # 验证支出数据库
-            logger.debug(f"Fetching expense database: {self.expense_db[:8]}***")
-            expense_db = self.client.databases.retrieve(database_id=self.expense_db)
-            expense_title = expense_db.get('title', [{}])[0].get('text', {}).get('content', 'unknown')
-            logger.info(f"Expense DB accessible: {expense_title}")
-
-            logger.info("Connection verified successfully")
-            return True
-
-        except APIResponseError as e:
-            # Notion API 返回了错误响应
-            logger.error(f"Notion API error: {e}")
-            if hasattr(e, 'body') and e.body:
-                logger.error(f"Error details: {e.body}")
-            if hasattr(e, 'status'):
-                logger.error(f"Status code: {e.status}")
-            return False
-
+            result = verify(self.user_id, force=force, client=self)
         except Exception as e:
-            # 其他错误（网络错误、超时等）
             error_type = type(e).__name__
             logger.error(f"Connection failed ({error_type}): {e}")
             return False
+
+        if result['cached']:
+            logger.info("Connection verified (cached)")
+        elif result['success']:
+            logger.info("Connection verified successfully")
+        return result['success']
+
+
+class AsyncNotionClient:
+    """Async counterpart of NotionClient for use from async FastAPI routes.
+
+    Requests are awaited on the event loop instead of holding a worker
+    thread, so one worker can serve many Notion-bound requests at once.
+    They pass through the same rate limiter and retry policy as
+    NotionClient. The configuration comes from the user's shared
+    NotionClient, so creating one per request is cheap. Use for_user() in
+    coroutines: resolving the shared client may read the database.
+
+    The methods cover the requests of the review service; ``client`` is the
+    underlying async SDK client for anything else.
+    """
+
+    def __init__(self, shared: NotionClient):
+        """由用户共享的 NotionClient 创建异步客户端（必须在协程中调用）。
+
+        Args:
+            shared: NotionClient.for_user() 返回的客户端
+        """
+        self.user_id = shared.user_id
+        self.income_db = shared.income_db
+        self.expense_db = shared.expense_db
+        self.client = create_async_api_client(shared.client.options.auth)
+
+    @classmethod
+    async def for_user(cls, user_id=None) -> 'AsyncNotionClient':
+        """创建用户的异步客户端，在线程中读取配置，不阻塞事件循环。
+
+        Raises:
+            ValueError: 当必需的配置缺失时
+        """
+        shared = await asyncio.to_thread(NotionClient.for_user, user_id)
+        return cls(shared)
+
+    async def query_database(self, database_id: str, body: dict = None) -> dict:
+        """Query one page of results of a database.
+
+        Uses the databases.query endpoint of the pinned API version, which
+        the SDK no longer wraps.
+
+        Args:
+            database_id: Database to query
+            body: Filter, sorts and start_cursor of the query
+        """
+        return await self.client.request(
+            path=f"/databases/{database_id}/query",
+            method="POST",
+            body=body or {}
+        )
+
+    async def retrieve_database(self, database_id: str) -> dict:
+        """Retrieve a database, including its property schema."""
+        return await self.client.databases.retrieve(database_id=database_id)
+
+    async def retrieve_page(self, page_id: str) -> dict:
+        """Retrieve a page."""
+        return await self.client.pages.retrieve(page_id=page_id)
+
+    async def create_page(self, database_id: str, properties: dict, children: list = None) -> dict:
+        """Create a page in a database.
+
+        Unlike NotionClient.create_page(), the properties are sent as given
+        to the given database.
+        """
+        body = {"parent": {"database_id": database_id}, "properties": properties}
+        if children:
+            body["children"] = children
+        return await self.client.pages.create(**body)
+
+    async def list_block_children(self, block_id: str) -> dict:
+        """List the first page of child blocks of a block or page."""
+        return await self.client.blocks.children.list(block_id=block_id)
+
+    async def append_block_children(self, block_id: str, children: list) -> dict:
+        """Append child blocks to a block or page (at most 100 per request)."""
+        return await self.client.blocks.children.append(block_id=block_id, children=children)
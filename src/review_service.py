@@ -3,11 +3,12 @@
 从 Notion 收支数据库读取数据，生成周期性复盘报告，写入复盘数据库
 """
 
+import asyncio
 import logging
-from datetime import datetime, date
+from datetime import datetime, date, timedelta
 from typing import Optional, List, Dict, Any
 from dateutil.relativedelta import relativedelta
-from src.notion_api import NotionClient
+from src.notion_api import AsyncNotionClient, NotionClient
 
 
 logger = logging.getLogger(__name__)
@@ -21,6 +22,13 @@ class ReviewService:
     TYPE_QUARTERLY = 'quarterly'
     TYPE_YEARLY = 'yearly'
 
+    # 复盘类型 -> 中文名称和复盘数据库环境变量
+    _REVIEW_TYPE_LABELS = {
+        TYPE_MONTHLY: ("月度", "NOTION_MONTHLY_REVIEW_DB"),
+        TYPE_QUARTERLY: ("季度", "NOTION_QUARTERLY_REVIEW_DB"),
+        TYPE_YEARLY: ("年度", "NOTION_YEARLY_REVIEW_DB"),
+    }
+
     # 类级别的数据库结构缓存，避免重复查询
     _database_structure_cache: Dict[str, Dict[str, Any]] = {}
 
@@ -35,7 +43,7 @@ class ReviewService:
         """
         self.user_id = user_id
         try:
-            self.notion_client = NotionClient(user_id=user_id)
+            self.notion_client = NotionClient.for_user(user_id)
         except ValueError as e:
             logger.error(f"Failed to initialize Notion client for user {user_id}: {e}")
             raise
@@ -187,6 +195,8 @@ class ReviewService:
     ) -> List[Dict[str, Any]]:
         """使用 databases.query API 查询数据库（标准方法）
 
+        临时错误（限流、超时、5xx）由 Notion 客户端的重试策略重试，见 src.notion_api.RetryPolicy。
+
         Args:
             database_id: 数据库ID
             start_date: 开始日期
@@ -195,12 +205,11 @@ class ReviewService:
         Returns:
             查询结果列表
         """
-        import time
+        self._validate_database_id(database_id)
 
         results = []
         has_more = True
         next_cursor = None
-        max_retries = 3  # 增加重试次数
 
         # 首先尝试一个简单的查询来验证数据库可访问性
         logger.info(f"Testing database {database_id[:8]}... accessibility with simple query...")
@@ -221,120 +230,139 @@ class ReviewService:
             )
             logger.info(f"Simple query successful, got {len(simple_response.get('results', []))} results")
         except Exception as e:
-            logger.error(f"Database access failed: {e}")
-            if hasattr(e, 'body') and e.body:
-                logger.error(f"Error body: {e.body}")
-            if hasattr(e, 'status') and e.status:
-                logger.error(f"HTTP status: {e.status}")
-
-            # 简单查询失败，可能是数据库不存在或者权限问题
-            error_msg = str(e).lower()
-            if "unauthorized" in error_msg or "forbidden" in error_msg:
-                raise RuntimeError(f"无权访问数据库 {database_id[:8]}...。请检查：1) API 集成是否已授予该数据库的访问权限 2) 在 Notion 中检查集成设置")
-            elif "not found" in error_msg or "invalid" in error_msg:
-                raise RuntimeError(f"数据库 ID {database_id[:8]}... 无效或数据库不存在。请检查：1) 数据库 ID 是否正确复制 2) 数据库是否已共享给集成")
-            else:
-                raise RuntimeError(f"无法访问数据库 {database_id[:8]}...。请检查：1) 数据库 ID 是否正确 2) API 密钥是否有访问权限。错误详情: {e}")
+            raise self._database_access_error(database_id, e)
 
         while has_more:
-            # 构建 API 请求体
-            body = {
-                "filter": {
-                    "and": [
-                        {
-                            "property": "Date",
-                            "date": {
-                                "on_or_after": start_date.isoformat()
-                            }
-                        },
-                        {
-                            "property": "Date",
-                            "date": {
-                                "on_or_before": end_date.isoformat()
-                            }
-                        }
-                    ]
-                }
-            }
+            body = self._date_filter_body(start_date, end_date, next_cursor)
 
-            if next_cursor:
-                body["start_cursor"] = next_cursor
+            logger.info(f"Querying database {database_id[:8]}... from {start_date} to {end_date}")
+            logger.info(f"Request body: {body}")  # 改为 INFO 级别以便查看
 
-            # 添加分页，避免一次查询过多数据
-            if not next_cursor:
-                body["page_size"] = 100  # 首次查询获取 100 条以提高性能
+            try:
+                response = self.notion_client.client.request(
+                    path=f"/databases/{database_id}/query",
+                    method="POST",
+                    body=body
+                )
+            except Exception as e:
+                raise self._database_query_error(e)
 
-            for attempt in range(max_retries):
-                try:
-                    logger.info(f"Querying database {database_id[:8]}... from {start_date} to {end_date} (attempt {attempt + 1}/{max_retries})")
-                    logger.info(f"Request body: {body}")  # 改为 INFO 级别以便查看
-                    logger.info(f"Date filter: {start_date.isoformat()} to {end_date.isoformat()}")
+            logger.debug(f"Response received, processing results...")
 
-                    # 验证 database_id 格式
-                    if not database_id or len(database_id) < 32:
-                        raise ValueError(f"Invalid database_id: '{database_id}'. Database ID must be 32 characters.")
+            results.extend(response.get("results", []))
+            has_more = response.get("has_more", False)
+            next_cursor = response.get("next_cursor")
+            logger.info(f"Fetched {len(response.get('results', []))} records, has_more={has_more}, total so far={len(results)}")
 
-                    response = self.notion_client.client.request(
-                        path=f"/databases/{database_id}/query",
-                        method="POST",
-                        body=body
-                    )
+        return results
 
-                    logger.debug(f"Response received, processing results...")
+    @staticmethod
+    def _validate_database_id(database_id: str) -> None:
+        """验证 database_id 格式
 
-                    results.extend(response.get("results", []))
-                    has_more = response.get("has_more", False)
-                    next_cursor = response.get("next_cursor")
-                    logger.info(f"Fetched {len(response.get('results', []))} records, has_more={has_more}, total so far={len(results)}")
+        Raises:
+            ValueError: database_id 为空或长度不足 32 位
+        """
+        if not database_id or len(database_id) < 32:
+            raise ValueError(f"Invalid database_id: '{database_id}'. Database ID must be 32 characters.")
 
-                    break
+    @staticmethod
+    def _date_filter_body(start_date: date, end_date: date, next_cursor: Optional[str] = None) -> Dict[str, Any]:
+        """构建按 Date 属性过滤的 databases.query 请求体
 
-                except Exception as e:
-                    error_str = str(e).lower()
-                    error_msg = str(e)
-                    is_timeout = "timeout" in error_str
-                    is_invalid_url = "invalid request url" in error_str
-
-                    logger.error(f"Database query error (attempt {attempt + 1}/{max_retries}): {e}")
-
-                    # 尝试获取更详细的错误信息
-                    if hasattr(e, 'body') and e.body:
-                        logger.error(f"Notion API error body: {e.body}")
-                    if hasattr(e, 'status') and e.status:
-                        logger.error(f"Notion API status code: {e.status}")
-
-                    if attempt == max_retries - 1:
-                        logger.error(f"All {max_retries} attempts failed")
-
-                        # 提供更具体的错误消息
-                        if is_invalid_url or (hasattr(e, 'status') and e.status == 400):
-                            # HTTP 400 通常意味着请求体有问题
-                            error_detail = ""
-                            if hasattr(e, 'body') and e.body:
-                                try:
-                                    import json
-                                    error_body = json.loads(e.body) if isinstance(e.body, str) else e.body
-                                    if isinstance(error_body, dict):
-                                        error_detail = error_body.get('message', '')
-                                except:
-                                    pass
-
-                            if "filter" in error_detail.lower() or "date" in error_detail.lower():
-                                raise RuntimeError(f"数据库查询失败：Notion 数据库中可能没有 'Date' 属性，或者属性名不匹配。请检查 Notion 数据库结构。错误详情: {error_detail}")
-                            else:
-                                raise RuntimeError(f"数据库查询失败 (HTTP 400)。请检查：1) Notion 数据库 ID 是否正确 2) 数据库是否有 'Date' 属性。错误详情: {error_detail}")
-                        elif is_timeout:
-                            logger.warning("Timeout error - query took too long, try narrowing the date range")
-                            raise RuntimeError(f"Query timeout after {max_retries} attempts. The date range may be too large.")
-                        else:
-                            raise RuntimeError(f"Failed to query database after {max_retries} attempts: {e}")
-
-                    # 使用指数退避策略
-                    wait_time = min(2 ** attempt, 10)  # 最多等待10秒
-                    logger.info(f"Waiting {wait_time}s before retry (exponential backoff)...")
-                    time.sleep(wait_time)
+        Args:
+            start_date: 开始日期
+            end_date: 结束日期
+            next_cursor: 分页游标，首次查询为 None
 
-        return results
+        Returns:
+            请求体
+        """
+        body = {
+            "filter": {
+                "and": [
+                    {
+                        "property": "Date",
+                        "date": {
+                            "on_or_after": start_date.isoformat()
+                        }
+                    },
+                    {
+                        "property": "Date",
+                        "date": {
+                            "on_or_before": end_date.isoformat()
+                        }
+                    }
+                ]
+            }
+        }
+
+        if next_cursor:
+            body["start_cursor"] = next_cursor
+
+        # 添加分页，避免一次查询过多数据
+        if not next_cursor:
+            body["page_size"] = 100  # 首次查询获取 100 条以提高性能
+
+        return body
+
+    @staticmethod
+    def _database_access_error(database_id: str, e: Exception) -> RuntimeError:
+        """将数据库访问检查的异常转换为面向用户的错误"""
+        logger.error(f"Database access failed: {e}")
+        if hasattr(e, 'body') and e.body:
+            logger.error(f"Error body: {e.body}")
+        if hasattr(e, 'status') and e.status:
+            logger.error(f"HTTP status: {e.status}")
+
+        # 简单查询失败，可能是数据库不存在或者权限问题
+        error_msg = str(e).lower()
+        if "unauthorized" in error_msg or "forbidden" in error_msg:
+            return RuntimeError(f"无权访问数据库 {database_id[:8]}...。请检查：1) API 集成是否已授予该数据库的访问权限 2) 在 Notion 中检查集成设置")
+        elif "not found" in error_msg or "invalid" in error_msg:
+            return RuntimeError(f"数据库 ID {database_id[:8]}... 无效或数据库不存在。请检查：1) 数据库 ID 是否正确复制 2) 数据库是否已共享给集成")
+        else:
+            return RuntimeError(f"无法访问数据库 {database_id[:8]}...。请检查：1) 数据库 ID 是否正确 2) API 密钥是否有访问权限。错误详情: {e}")
+
+    @staticmethod
+    def _database_query_error(e: Exception) -> RuntimeError:
+        """将 databases.query 的异常转换为面向用户的错误
+
+        按 classify_error 的类别区分：临时错误（超时、限流、5xx）已由重试策略重试，
+        其余错误只尝试了一次。
+        """
+        import httpx
+        from notion_client.errors import HTTPResponseError, RequestTimeoutError
+        from src.notion_api import classify_error, FATAL
+
+        logger.error(f"Database query failed: {e}")
+        if isinstance(e, HTTPResponseError):
+            logger.error(f"Notion API status code: {e.status}")
+            if e.body:
+                logger.error(f"Notion API error body: {e.body}")
+
+        if isinstance(e, (RequestTimeoutError, httpx.TimeoutException)):
+            logger.warning("Timeout error - query took too long, try narrowing the date range")
+            return RuntimeError("Query timeout after retries. The date range may be too large.")
+
+        if isinstance(e, HTTPResponseError) and e.status == 400:
+            # HTTP 400 通常意味着请求体有问题
+            error_detail = str(e)
+            try:
+                import json
+                error_body = json.loads(e.body)
+                if isinstance(error_body, dict):
+                    error_detail = error_body.get('message') or error_detail
+            except (TypeError, ValueError):
+                pass
+
+            if "filter" in error_detail.lower() or "date" in error_detail.lower():
+                return RuntimeError(f"数据库查询失败：Notion 数据库中可能没有 'Date' 属性，或者属性名不匹配。请检查 Notion 数据库结构。错误详情: {error_detail}")
+            return RuntimeError(f"数据库查询失败 (HTTP 400)。请检查：1) Notion 数据库 ID 是否正确 2) 数据库是否有 'Date' 属性。错误详情: {error_detail}")
+
+        if classify_error(e) == FATAL:
+            return RuntimeError(f"Failed to query database: {e}")
+        return RuntimeError(f"Failed to query database after retries: {e}")
 
     def aggregate_by_category(
         self,
@@ -348,7 +376,8 @@ class ReviewService:
         Returns:
             分类汇总数据 {category: {income: x, expense: y}}
         """
-        categories = {}
+        # 以整数分累加，避免浮点误差
+        categories_cents = {}
 
         for transaction in transactions:
             # 提取分类
@@ -360,18 +389,20 @@ class ReviewService:
                 category_name = category_prop["select"].get("name", "未分类")
 
             # 提取金额
-            price_prop = props.get("Price", {})
-            amount = price_prop.get("number", 0) or 0
+            amount_cents = self._price_cents(props)
 
             # 获取类型
             trans_type = transaction.get("type", "expense")
 
-            if category_name not in categories:
-                categories[category_name] = {"income": 0.0, "expense": 0.0}
+            if category_name not in categories_cents:
+                categories_cents[category_name] = {"income": 0, "expense": 0}
 
-            categories[category_name][trans_type] += amount
+            categories_cents[category_name][trans_type] += amount_cents
 
-        return categories
+        return {
+            name: {key: cents / 100 for key, cents in totals.items()}
+            for name, totals in categories_cents.items()
+        }
 
     def calculate_summary(
         self,
@@ -385,28 +416,43 @@ class ReviewService:
         Returns:
             汇总数据
         """
-        total_income = 0.0
-        total_expense = 0.0
+        # 以整数分累加，避免浮点误差
+        income_cents = 0
+        expense_cents = 0
         transaction_count = len(transactions)
 
         for transaction in transactions:
-            props = transaction.get("properties", {})
-            price_prop = props.get("Price", {})
-            amount = price_prop.get("number", 0) or 0
+            amount_cents = self._price_cents(transaction.get("properties", {}))
             trans_type = transaction.get("type", "expense")
 
             if trans_type == "income":
-                total_income += amount
+                income_cents += amount_cents
             else:
-                total_expense += amount
+                expense_cents += amount_cents
 
         return {
-            "total_income": round(total_income, 2),
-            "total_expense": round(total_expense, 2),
-            "net_balance": round(total_income - total_expense, 2),
+            "total_income": income_cents / 100,
+            "total_expense": expense_cents / 100,
+            "net_balance": (income_cents - expense_cents) / 100,
             "transaction_count": transaction_count
         }
 
+    @staticmethod
+    def _price_cents(props: Dict[str, Any]) -> int:
+        """将 Price 属性的金额（元）转换为整数分
+
+        Args:
+            props: Notion 页面属性
+
+        Returns:
+            金额（分），缺失或无效时为0
+        """
+        amount = props.get("Price", {}).get("number", 0) or 0
+        try:
+            return int(round(float(amount) * 100))
+        except (TypeError, ValueError, OverflowError):
+            return 0
+
     def get_review_database_id(self, review_type: str) -> Optional[str]:
         """获取复盘数据库ID
 
@@ -416,6 +462,13 @@ class ReviewService:
         Returns:
             数据库ID，未配置返回None
         """
+        db_id = self._lookup_review_database_id(review_type)
+        if not db_id:
+            logger.warning(f"{review_type} 复盘数据库未配置")
+        return db_id
+
+    def _lookup_review_database_id(self, review_type: str) -> Optional[str]:
+        """从环境变量或用户配置读取复盘数据库ID，未配置返回None"""
         from src.config import Config
         import os
 
@@ -427,30 +480,18 @@ class ReviewService:
             logger.debug(f"从环境变量获取 {review_type} 复盘数据库ID: {db_id[:8]}...")
             return db_id
 
-        # 从用户配置获取（多租户模式）
+        # 从用户配置获取（多租户模式，使用进程内缓存的配置）
         if self.user_id and Config.is_multi_tenant_mode():
-            from src.services.database import get_db_context
-            from src.models import UserNotionConfig
-
-            with get_db_context() as db:
-                config = db.query(UserNotionConfig).filter(
-                    UserNotionConfig.user_id == self.user_id
-                ).first()
-
-                if config:
-                    field_map = {
-                        "monthly": "notion_monthly_review_db",
-                        "quarterly": "notion_quarterly_review_db",
-                        "yearly": "notion_yearly_review_db"
-                    }
-                    field_name = field_map.get(review_type)
-                    if field_name and hasattr(config, field_name):
-                        user_db_id = getattr(config, field_name)
-                        if user_db_id:
-                            logger.debug(f"从用户配置获取 {review_type} 复盘数据库ID: {user_db_id[:8]}...")
-                            return user_db_id
-
-        logger.warning(f"{review_type} 复盘数据库未配置")
+            from src.services.notion_config import get_user_notion_config
+
+            try:
+                user_db_id = get_user_notion_config(self.user_id).get(f"{review_type}_review_db")
+            except ValueError:
+                user_db_id = None
+            if user_db_id:
+                logger.debug(f"从用户配置获取 {review_type} 复盘数据库ID: {user_db_id[:8]}...")
+                return user_db_id
+
         return None
 
     def create_review_page(
@@ -540,87 +581,10 @@ class ReviewService:
             logger.info(f"数据库属性数量: {len(database_properties)}")
             logger.debug(f"数据库属性: {list(database_properties.keys())}")
 
-            # 查找标题类型的属性（通常是 "Name" 或 "名称" 或 "title"）
-            title_property_id = None
-            title_property_name = None
-
-            for prop_name, prop_config in database_properties.items():
-                if prop_config.get("type") == "title":
-                    title_property_id = prop_name
-                    title_property_name = prop_name
-                    break
-
-            if not title_property_id:
-                logger.error("No title property found in database")
+            properties = self._basic_review_properties(database_properties, period, data)
+            if properties is None:
                 return None
 
-            logger.info(f"找到标题属性: {title_property_name}")
-
-            # 使用实际找到的标题属性名
-            properties = {
-                title_property_name: {
-                    "title": [
-                        {
-                            "text": {
-                                "content": f"{period} 账单复盘"
-                            }
-                        }
-                    ]
-                }
-            }
-
-            # 填充其他属性
-            summary = data.get("summary", {})
-            for prop_name, prop_config in database_properties.items():
-                if prop_name == title_property_name:
-                    continue
-
-                prop_type = prop_config.get("type")
-
-                if prop_type == "number":
-                    # 根据属性名映射到数据字段
-                    value_map = {
-                        "Total Income": summary.get("total_income", 0),
-                        "total_income": summary.get("total_income", 0),
-                        "收入": summary.get("total_income", 0),
-                        "Total Expense": summary.get("total_expense", 0),
-                        "total_expense": summary.get("total_expense", 0),
-                        "支出": summary.get("total_expense", 0),
-                        "Net Balance": summary.get("net_balance", 0),
-                        "net_balance": summary.get("net_balance", 0),
-                        "结余": summary.get("net_balance", 0),
-                        "Transaction Count": data.get("transaction_count", 0),
-                        "transaction_count": data.get("transaction_count", 0),
-                        "交易数": data.get("transaction_count", 0)
-                    }
-                    value = value_map.get(prop_name)
-                    if value is not None:
-                        properties[prop_name] = {"number": value}
-                        logger.info(f"填充数值属性 {prop_name} = {value}")
-
-                elif prop_type == "date":
-                    date_value = None
-                    if "Start" in prop_name or "start" in prop_name.lower() or "开始" in prop_name:
-                        date_value = data.get("start_date", "")
-                    elif "End" in prop_name or "end" in prop_name.lower() or "结束" in prop_name:
-                        date_value = data.get("end_date", "")
-
-                    if date_value:
-                        properties[prop_name] = {"date": {"start": date_value}}
-                        logger.info(f"填充日期属性 {prop_name} = {date_value}")
-
-                elif prop_type == "rich_text":
-                    properties[prop_name] = {
-                        "rich_text": [
-                            {
-                                "text": {
-                                    "content": period
-                                }
-                            }
-                        ]
-                    }
-                    logger.info(f"填充文本属性 {prop_name} = {period}")
-
             logger.info(f"准备创建页面，属性数量: {len(properties)}")
             logger.debug(f"页面属性: {properties}")
 
@@ -648,6 +612,105 @@ class ReviewService:
             logger.error(f"Traceback: {traceback.format_exc()}")
             return None
 
+    def _basic_review_properties(
+        self,
+        database_properties: Dict[str, Any],
+        period: str,
+        data: Dict[str, Any]
+    ) -> Optional[Dict[str, Any]]:
+        """根据复盘数据库的属性结构构建基本复盘页面的属性
+
+        Args:
+            database_properties: 复盘数据库的属性结构
+            period: 周期标识
+            data: 复盘数据
+
+        Returns:
+            页面属性，数据库没有标题属性时返回None
+        """
+        # 查找标题类型的属性（通常是 "Name" 或 "名称" 或 "title"）
+        title_property_id = None
+        title_property_name = None
+
+        for prop_name, prop_config in database_properties.items():
+            if prop_config.get("type") == "title":
+                title_property_id = prop_name
+                title_property_name = prop_name
+                break
+
+        if not title_property_id:
+            logger.error("No title property found in database")
+            return None
+
+        logger.info(f"找到标题属性: {title_property_name}")
+
+        # 使用实际找到的标题属性名
+        properties = {
+            title_property_name: {
+                "title": [
+                    {
+                        "text": {
+                            "content": f"{period} 账单复盘"
+                        }
+                    }
+                ]
+            }
+        }
+
+        # 填充其他属性
+        summary = data.get("summary", {})
+        for prop_name, prop_config in database_properties.items():
+            if prop_name == title_property_name:
+                continue
+
+            prop_type = prop_config.get("type")
+
+            if prop_type == "number":
+                # 根据属性名映射到数据字段
+                value_map = {
+                    "Total Income": summary.get("total_income", 0),
+                    "total_income": summary.get("total_income", 0),
+                    "收入": summary.get("total_income", 0),
+                    "Total Expense": summary.get("total_expense", 0),
+                    "total_expense": summary.get("total_expense", 0),
+                    "支出": summary.get("total_expense", 0),
+                    "Net Balance": summary.get("net_balance", 0),
+                    "net_balance": summary.get("net_balance", 0),
+                    "结余": summary.get("net_balance", 0),
+                    "Transaction Count": data.get("transaction_count", 0),
+                    "transaction_count": data.get("transaction_count", 0),
+                    "交易数": data.get("transaction_count", 0)
+                }
+                value = value_map.get(prop_name)
+                if value is not None:
+                    properties[prop_name] = {"number": value}
+                    logger.info(f"填充数值属性 {prop_name} = {value}")
+
+            elif prop_type == "date":
+                date_value = None
+                if "Start" in prop_name or "start" in prop_name.lower() or "开始" in prop_name:
+                    date_value = data.get("start_date", "")
+                elif "End" in prop_name or "end" in prop_name.lower() or "结束" in prop_name:
+                    date_value = data.get("end_date", "")
+
+                if date_value:
+                    properties[prop_name] = {"date": {"start": date_value}}
+                    logger.info(f"填充日期属性 {prop_name} = {date_value}")
+
+            elif prop_type == "rich_text":
+                properties[prop_name] = {
+                    "rich_text": [
+                        {
+                            "text": {
+                                "content": period
+                            }
+                        }
+                    ]
+                }
+                logger.info(f"填充文本属性 {prop_name} = {period}")
+
+        return properties
+
     def _build_review_properties_from_template(
         self,
         template_page: Dict[str, Any],
@@ -675,6 +738,27 @@ class ReviewService:
 
         logger.info(f"目标数据库属性数量: {len(database_properties)}")
 
+        return self._template_review_properties(database_properties, period, data)
+
+    def _template_review_properties(
+        self,
+        database_properties: Dict[str, Any],
+        period: str,
+        data: Dict[str, Any]
+    ) -> Dict[str, Any]:
+        """根据目标数据库的属性结构构建模板复盘页面的属性
+
+        Args:
+            database_properties: 目标数据库的属性结构
+            period: 周期标识
+            data: 复盘数据
+
+        Returns:
+            页面属性
+
+        Raises:
+            ValueError: 目标数据库没有标题属性
+        """
         # 找到标题属性
         title_property_name = None
         for prop_name, prop_config in database_properties.items():
@@ -791,6 +875,24 @@ class ReviewService:
 
         logger.info(f"获取到 {len(template_blocks.get('results', []))} 个模板块")
 
+        return self._fill_template_blocks(template_blocks, period, data)
+
+    def _fill_template_blocks(
+        self,
+        template_blocks: Dict[str, Any],
+        period: str,
+        data: Dict[str, Any]
+    ) -> List[Dict[str, Any]]:
+        """替换模板子块中的占位符
+
+        Args:
+            template_blocks: blocks.children.list 的返回值
+            period: 周期标识
+            data: 复盘数据
+
+        Returns:
+            填充数据后的子块列表
+        """
         children = []
         summary = data.get("summary", {})
         categories = data.get("categories", {})
@@ -1046,6 +1148,37 @@ class ReviewService:
         """
         logger.info(f"开始添加复盘内容块到页面 {page_id[:8]}...")
 
+        blocks = self._review_content_blocks(period, data)
+
+        # 批量添加块
+        logger.info(f"准备添加 {len(blocks)} 个内容块")
+        for i, block in enumerate(blocks):
+            try:
+                self.notion_client.client.blocks.children.append(
+                    block_id=page_id,
+                    children=[block]
+                )
+                if (i + 1) % 10 == 0:
+                    logger.info(f"已添加 {i + 1}/{len(blocks)} 个内容块")
+            except Exception as e:
+                logger.error(f"添加第 {i + 1} 个内容块失败: {e}")
+
+        logger.info(f"成功添加 {len(blocks)} 个内容块到页面 {page_id[:8]}...")
+
+    def _review_content_blocks(
+        self,
+        period: str,
+        data: Dict[str, Any]
+    ) -> List[Dict[str, Any]]:
+        """构建复盘内容块（按照人工复盘的格式）
+
+        Args:
+            period: 周期标识
+            data: 复盘数据
+
+        Returns:
+            内容块列表
+        """
         summary = data.get("summary", {})
         categories = data.get("categories", {})
         start_date = data.get("start_date", "")
@@ -1383,79 +1516,116 @@ class ReviewService:
             }
         })
 
-        # 批量添加块
-        logger.info(f"准备添加 {len(blocks)} 个内容块")
-        for i, block in enumerate(blocks):
-            try:
-                self.notion_client.client.blocks.children.append(
-                    block_id=page_id,
-                    children=[block]
-                )
-                if (i + 1) % 10 == 0:
-                    logger.info(f"已添加 {i + 1}/{len(blocks)} 个内容块")
-            except Exception as e:
-                logger.error(f"添加第 {i + 1} 个内容块失败: {e}")
-
-        logger.info(f"成功添加 {len(blocks)} 个内容块到页面 {page_id[:8]}...")
-
-    def generate_monthly_review(self, year: int, month: int) -> Dict[str, Any]:
-        """生成月度复盘
+        return blocks
 
-        Args:
-            year: 年份
-            month: 月份 (1-12)
+    def _review_period(
+        self,
+        review_type: str,
+        year: int,
+        month: Optional[int] = None,
+        quarter: Optional[int] = None
+    ) -> tuple:
+        """计算复盘的周期标识和日期范围
 
         Returns:
-            复盘结果
+            (周期标识, 开始日期, 结束日期)
         """
-        logger.info(f"=" * 50)
-        logger.info(f"开始生成月度复盘: {year}-{month:02d}")
-        logger.info(f"=" * 50)
-
-        # 阶段1: 获取账单数据
-        logger.info(f"[阶段 1/4] 获取账单数据...")
+        if review_type == self.TYPE_MONTHLY:
+            start_date = date(year, month, 1)
+            return f"{year}-{month:02d}", start_date, start_date + relativedelta(months=1, days=-1)
+        if review_type == self.TYPE_QUARTERLY:
+            start_month = (quarter - 1) * 3 + 1
+            start_date = date(year, start_month, 1)
+            return f"{year}-Q{quarter}", start_date, start_date + relativedelta(months=3, days=-1)
+        return str(year), date(year, 1, 1), date(year, 12, 31)
+
+    def _missing_review_database(self, review_type: str, period: str) -> Optional[Dict[str, Any]]:
+        """复盘数据库未配置时返回失败结果，已配置时返回None"""
+        if self.get_review_database_id(review_type):
+            return None
+        label, env_name = self._REVIEW_TYPE_LABELS[review_type]
+        logger.warning(f"{review_type.capitalize()} review database not configured")
+        return {
+            "success": False,
+            "period": period,
+            "error": f"{label}复盘数据库未配置。请在设置中配置复盘数据库 ID，或在环境变量中设置 {env_name}。"
+        }
 
-        # 检查复盘数据库是否配置
-        database_id = self.get_review_database_id(self.TYPE_MONTHLY)
-        if not database_id:
-            logger.warning("Monthly review database not configured")
-            return {
-                "success": False,
-                "period": f"{year}-{month:02d}",
-                "error": "月度复盘数据库未配置。请在设置中配置复盘数据库 ID，或在环境变量中设置 NOTION_MONTHLY_REVIEW_DB。"
-            }
-
-        # 计算日期范围
-        start_date = date(year, month, 1)
-        end_date = start_date + relativedelta(months=1, days=-1)
-        logger.info(f"复盘周期: {start_date} 至 {end_date}")
-
-        # 获取交易数据
-        logger.info("正在获取交易数据...")
-        transactions = self.fetch_transactions(start_date, end_date)
-        logger.info(f"获取到 {len(transactions)} 条交易记录")
-
-        # 计算汇总
-        logger.info("正在计算汇总数据...")
+    def _build_review_data(
+        self,
+        review_type: str,
+        period: str,
+        start_date: date,
+        end_date: date,
+        transactions: List[Dict[str, Any]]
+    ) -> Dict[str, Any]:
+        """根据交易数据计算汇总和分类，构建复盘数据"""
         summary = self.calculate_summary(transactions)
         logger.info(f"汇总: 收入 ¥{summary['total_income']:.2f}, 支出 ¥{summary['total_expense']:.2f}, 结余 ¥{summary['net_balance']:.2f}")
 
-        # 按分类聚合
-        logger.info("正在按分类聚合...")
         categories = self.aggregate_by_category(transactions)
         logger.info(f"聚合了 {len(categories)} 个分类")
 
-        # 构建复盘数据
-        period = f"{year}-{month:02d}"
-        review_data = {
+        if review_type == self.TYPE_MONTHLY:
+            return {
+                "period": period,
+                "start_date": start_date.isoformat(),
+                "end_date": end_date.isoformat(),
+                "transaction_count": len(transactions),
+                "summary": summary,
+                "categories": categories
+            }
+        return {
             "period": period,
             "start_date": start_date.isoformat(),
             "end_date": end_date.isoformat(),
-            "transaction_count": len(transactions),
-            "summary": summary,
+            **summary,
             "categories": categories
         }
 
+    @staticmethod
+    def _review_result(period: str, page_id: Optional[str], review_data: Dict[str, Any]) -> Dict[str, Any]:
+        """构建复盘生成结果"""
+        return {
+            "success": page_id is not None,
+            "period": period,
+            "page_id": page_id,
+            "data": review_data,
+            "error": None if page_id else "创建复盘页面失败，请检查复盘数据库配置和属性设置"
+        }
+
+    def generate_monthly_review(self, year: int, month: int) -> Dict[str, Any]:
+        """生成月度复盘
+
+        Args:
+            year: 年份
+            month: 月份 (1-12)
+
+        Returns:
+            复盘结果
+        """
+        logger.info(f"=" * 50)
+        logger.info(f"开始生成月度复盘: {year}-{month:02d}")
+        logger.info(f"=" * 50)
+
+        # 阶段1: 获取账单数据
+        logger.info(f"[阶段 1/4] 获取账单数据...")
+
+        # 检查复盘数据库是否配置
+        period, start_date, end_date = self._review_period(self.TYPE_MONTHLY, year, month=month)
+        missing = self._missing_review_database(self.TYPE_MONTHLY, period)
+        if missing:
+            return missing
+        logger.info(f"复盘周期: {start_date} 至 {end_date}")
+
+        # 获取交易数据
+        logger.info("正在获取交易数据...")
+        transactions = self.fetch_transactions(start_date, end_date)
+        logger.info(f"获取到 {len(transactions)} 条交易记录")
+
+        # 计算汇总并按分类聚合
+        review_data = self._build_review_data(self.TYPE_MONTHLY, period, start_date, end_date, transactions)
+
         # 阶段2: 获取模板
         logger.info(f"[阶段 2/4] 获取复盘模板...")
 
@@ -1476,13 +1646,7 @@ class ReviewService:
 
         logger.info(f"=" * 50)
 
-        return {
-            "success": page_id is not None,
-            "period": period,
-            "page_id": page_id,
-            "data": review_data,
-            "error": None if page_id else "创建复盘页面失败，请检查复盘数据库配置和属性设置"
-        }
+        return self._review_result(period, page_id, review_data)
 
     def generate_quarterly_review(self, year: int, quarter: int) -> Dict[str, Any]:
         """生成季度复盘
@@ -1496,39 +1660,13 @@ class ReviewService:
         """
         logger.info(f"Generating quarterly review for {year}-Q{quarter}")
 
-        # 检查复盘数据库是否配置
-        database_id = self.get_review_database_id(self.TYPE_QUARTERLY)
-        if not database_id:
-            logger.warning("Quarterly review database not configured")
-            return {
-                "success": False,
-                "period": f"{year}-Q{quarter}",
-                "error": "季度复盘数据库未配置。请在设置中配置复盘数据库 ID，或在环境变量中设置 NOTION_QUARTERLY_REVIEW_DB。"
-            }
-
-        # 计算日期范围
-        start_month = (quarter - 1) * 3 + 1
-        start_date = date(year, start_month, 1)
-        end_date = start_date + relativedelta(months=3, days=-1)
+        period, start_date, end_date = self._review_period(self.TYPE_QUARTERLY, year, quarter=quarter)
+        missing = self._missing_review_database(self.TYPE_QUARTERLY, period)
+        if missing:
+            return missing
 
-        # 获取交易数据
         transactions = self.fetch_transactions(start_date, end_date)
-
-        # 计算汇总
-        summary = self.calculate_summary(transactions)
-
-        # 按分类聚合
-        categories = self.aggregate_by_category(transactions)
-
-        # 构建复盘数据
-        period = f"{year}-Q{quarter}"
-        review_data = {
-            "period": period,
-            "start_date": start_date.isoformat(),
-            "end_date": end_date.isoformat(),
-            **summary,
-            "categories": categories
-        }
+        review_data = self._build_review_data(self.TYPE_QUARTERLY, period, start_date, end_date, transactions)
 
         # 创建复盘页面
         page_id = self.create_review_page(
@@ -1537,13 +1675,7 @@ class ReviewService:
             review_data
         )
 
-        return {
-            "success": page_id is not None,
-            "period": period,
-            "page_id": page_id,
-            "data": review_data,
-            "error": None if page_id else "创建复盘页面失败，请检查复盘数据库配置和属性设置"
-        }
+        return self._review_result(period, page_id, review_data)
 
     def generate_yearly_review(self, year: int) -> Dict[str, Any]:
         """生成年度复盘
@@ -1556,38 +1688,13 @@ class ReviewService:
         """
         logger.info(f"Generating yearly review for {year}")
 
-        # 检查复盘数据库是否配置
-        database_id = self.get_review_database_id(self.TYPE_YEARLY)
-        if not database_id:
-            logger.warning("Yearly review database not configured")
-            return {
-                "success": False,
-                "period": f"{year}",
-                "error": "年度复盘数据库未配置。请在设置中配置复盘数据库 ID，或在环境变量中设置 NOTION_YEARLY_REVIEW_DB。"
-            }
-
-        # 计算日期范围
-        start_date = date(year, 1, 1)
-        end_date = date(year, 12, 31)
+        period, start_date, end_date = self._review_period(self.TYPE_YEARLY, year)
+        missing = self._missing_review_database(self.TYPE_YEARLY, period)
+        if missing:
+            return missing
 
-        # 获取交易数据
         transactions = self.fetch_transactions(start_date, end_date)
-
-        # 计算汇总
-        summary = self.calculate_summary(transactions)
-
-        # 按分类聚合
-        categories = self.aggregate_by_category(transactions)
-
-        # 构建复盘数据
-        period = str(year)
-        review_data = {
-            "period": period,
-            "start_date": start_date.isoformat(),
-            "end_date": end_date.isoformat(),
-            **summary,
-            "categories": categories
-        }
+        review_data = self._build_review_data(self.TYPE_YEARLY, period, start_date, end_date, transactions)
 
         # 创建复盘页面
         page_id = self.create_review_page(
@@ -1596,39 +1703,20 @@ class ReviewService:
             review_data
         )
 
-        return {
-            "success": page_id is not None,
-            "period": period,
-            "page_id": page_id,
-            "data": review_data,
-            "error": None if page_id else "创建复盘页面失败，请检查复盘数据库配置和属性设置"
-        }
+        return self._review_result(period, page_id, review_data)
 
-    def batch_generate_reviews(
-        self,
-        start_date: date,
-        end_date: date,
-        review_type: str = TYPE_MONTHLY
-    ) -> List[Dict[str, Any]]:
-        """批量生成复盘
-
-        Args:
-            start_date: 开始日期
-            end_date: 结束日期
-            review_type: 复盘类型 (monthly/quarterly/yearly)
+    def _batch_review_periods(self, start_date: date, end_date: date, review_type: str) -> list:
+        """列出批量生成需要的复盘周期
 
         Returns:
-            复盘结果列表
+            [周期参数, ...]，按周期排序，如 {'year': 2024, 'month': 1}
         """
-        logger.info(f"Batch generating {review_type} reviews from {start_date} to {end_date}")
-
-        results = []
+        periods = []
         current = start_date
 
         if review_type == self.TYPE_MONTHLY:
             while current <= end_date:
-                result = self.generate_monthly_review(current.year, current.month)
-                results.append(result)
+                periods.append({'year': current.year, 'month': current.month})
                 current = current + relativedelta(months=1)
 
         elif review_type == self.TYPE_QUARTERLY:
@@ -1636,8 +1724,7 @@ class ReviewService:
             year = current.year
             quarter = (current.month - 1) // 3 + 1
             while date(year, quarter * 3, 1) <= end_date:
-                result = self.generate_quarterly_review(year, quarter)
-                results.append(result)
+                periods.append({'year': year, 'quarter': quarter})
                 quarter += 1
                 if quarter > 4:
                     quarter = 1
@@ -1645,11 +1732,37 @@ class ReviewService:
 
         elif review_type == self.TYPE_YEARLY:
             while current.year <= end_date.year:
-                result = self.generate_yearly_review(current.year)
-                results.append(result)
+                periods.append({'year': current.year})
                 current = current + relativedelta(years=1)
 
-        return results
+        return periods
+
+    def batch_generate_reviews(
+        self,
+        start_date: date,
+        end_date: date,
+        review_type: str = TYPE_MONTHLY
+    ) -> List[Dict[str, Any]]:
+        """批量生成复盘
+
+        Args:
+            start_date: 开始日期
+            end_date: 结束日期
+            review_type: 复盘类型 (monthly/quarterly/yearly)
+
+        Returns:
+            复盘结果列表
+        """
+        logger.info(f"Batch generating {review_type} reviews from {start_date} to {end_date}")
+
+        generate = {
+            self.TYPE_MONTHLY: self.generate_monthly_review,
+            self.TYPE_QUARTERLY: self.generate_quarterly_review,
+            self.TYPE_YEARLY: self.generate_yearly_review,
+        }.get(review_type)
+        if generate is None:
+            return []
+        return [generate(**period) for period in self._batch_review_periods(start_date, end_date, review_type)]
 
     # ==================== 新增：Markdown 生成方法 ====================
 
@@ -1824,24 +1937,8 @@ class ReviewService:
                 "properties": page_properties
             }
 
-            # 添加标题块
-            title = attributes.get("title", "复盘")
-            blocks = [
-                {
-                    "object": "block",
-                    "type": "heading_1",
-                    "heading_1": {
-                        "rich_text": [{"type": "text", "text": {"content": title}}]
-                    }
-                }
-            ]
-
-            # 将 Markdown 转换为 Notion 块
-            content_blocks = self._markdown_to_blocks(markdown_content)
-            blocks.extend(content_blocks)
-
             # 添加子块
-            page_data["children"] = blocks
+            page_data["children"] = self._content_page_blocks(attributes, markdown_content)
 
             # 创建页面
             logger.info(f"正在创建 Notion 页面，父数据库: {database_id[:8]}...")
@@ -1865,6 +1962,32 @@ class ReviewService:
             logger.error(f"数据库ID: {database_id if database_id else 'None'}")
             return None
 
+    def _content_page_blocks(self, attributes: Dict[str, Any], markdown_content: str) -> List[Dict[str, Any]]:
+        """构建复盘页面的子块：标题块和 Markdown 正文
+
+        Args:
+            attributes: 属性数据
+            markdown_content: Markdown 正文内容
+
+        Returns:
+            子块列表
+        """
+        # 添加标题块
+        title = attributes.get("title", "复盘")
+        blocks = [
+            {
+                "object": "block",
+                "type": "heading_1",
+                "heading_1": {
+                    "rich_text": [{"type": "text", "text": {"content": title}}]
+                }
+            }
+        ]
+
+        # 将 Markdown 转换为 Notion 块
+        blocks.extend(self._markdown_to_blocks(markdown_content))
+        return blocks
+
     @classmethod
     def clear_database_cache(cls, database_id: Optional[str] = None):
         """清除数据库结构缓存
@@ -2001,12 +2124,18 @@ class ReviewService:
 
         return base_links
 
-    def _build_properties_from_attributes(self, attributes: Dict[str, Any], review_type: str = "monthly") -> Dict[str, Any]:
+    def _build_properties_from_attributes(
+        self,
+        attributes: Dict[str, Any],
+        review_type: str = "monthly",
+        database_properties: Optional[Dict[str, Any]] = None
+    ) -> Dict[str, Any]:
         """从属性字典构建 Notion 属性格式
 
         Args:
             attributes: 属性字典
             review_type: 复盘类型 (monthly/quarterly/yearly)
+            database_properties: 已获取的复盘数据库属性结构，为 None 时从缓存或 Notion 获取
 
         Returns:
             Notion 属性格式
@@ -2019,14 +2148,15 @@ class ReviewService:
             logger.info(f"构建属性 - 复盘类型: {review_type}, 数据库ID: {database_id[:8]}...")
 
         properties = {}
-        database_properties = {}  # 初始化为空字典
 
         # 动态检测标题属性名（使用缓存优化）
         if database_id:
             cache_key = f"{database_id}:{review_type}"
             try:
                 # 检查缓存
-                if cache_key in self._database_structure_cache:
+                if database_properties is not None:
+                    logger.info(f"使用已获取的数据库结构: {cache_key}")
+                elif cache_key in self._database_structure_cache:
                     database_properties = self._database_structure_cache[cache_key]
                     logger.info(f"使用缓存的数据库结构: {cache_key}")
                 else:
@@ -2257,3 +2387,450 @@ class ReviewService:
             i += 1
 
         return blocks
+
+
+class AsyncReviewService(ReviewService):
+    """账单复盘服务的异步版本，供 FastAPI 异步路由使用
+
+    Notion 请求通过 AsyncNotionClient 在事件循环中等待，不占用工作线程；
+    收入和支出数据库、分批查询的各批次以及批量生成的各个复盘并发执行。
+    汇总、分类聚合和页面内容的构建与 ReviewService 相同。
+
+    异步方法以 a 开头（如 afetch_transactions），不覆盖 ReviewService 的同名同步方法，
+    继承的同步方法仍可照常调用（会阻塞事件循环，协程中不要使用）。
+
+    在协程中通过 create() 创建：读取用户配置在线程中完成，不阻塞事件循环。
+    """
+
+    # 同时进行的数据库查询数
+    FETCH_CONCURRENCY = 4
+
+    # 批量生成时同时生成的复盘数
+    BATCH_CONCURRENCY = 3
+
+    # 每次请求追加的最大块数（Notion 限制为 100）
+    APPEND_BATCH_SIZE = 100
+
+    # 获取复盘数据库结构的超时时间（秒），与同步版本一致，快速失败
+    STRUCTURE_TIMEOUT_SECONDS = 15
+
+    def __init__(self, user_id: Optional[int] = None):
+        """初始化异步复盘服务（会读取数据库，协程中请使用 create()）
+
+        复盘数据库ID在此解析，之后的异步方法不再读取用户配置。
+
+        Args:
+            user_id: 用户ID（多租户模式必需）
+
+        Raises:
+            ValueError: 用户未配置 Notion API key 或数据库 ID
+        """
+        super().__init__(user_id)
+        self._review_databases = {
+            review_type: self._lookup_review_database_id(review_type)
+            for review_type in self._REVIEW_TYPE_LABELS
+        }
+        self.async_client = None
+
+    @classmethod
+    async def create(cls, user_id: Optional[int] = None) -> 'AsyncReviewService':
+        """在线程中读取配置并创建异步复盘服务
+
+        Args:
+            user_id: 用户ID（多租户模式必需）
+
+        Raises:
+            ValueError: 用户未配置 Notion API key 或数据库 ID
+        """
+        service = await asyncio.to_thread(cls, user_id)
+        service.async_client = AsyncNotionClient(service.notion_client)
+        return service
+
+    def get_review_database_id(self, review_type: str) -> Optional[str]:
+        """获取创建服务时解析的复盘数据库ID，未配置返回None"""
+        db_id = self._review_databases.get(review_type)
+        if not db_id:
+            logger.warning(f"{review_type} 复盘数据库未配置")
+        return db_id
+
+    async def afetch_transactions(
+        self,
+        start_date: date,
+        end_date: date,
+        database_type: str = 'all'
+    ) -> List[Dict[str, Any]]:
+        """获取指定时间范围的交易数据
+
+        与 ReviewService.fetch_transactions 相同：超过90天时按30天分批查询，
+        单个批次失败只记录警告。各数据库的访问检查只做一次，所有查询并发执行，
+        返回结果的顺序与同步版本一致。
+
+        Args:
+            start_date: 开始日期
+            end_date: 结束日期
+            database_type: 数据库类型 (income/expense/all)
+
+        Returns:
+            交易记录列表
+        """
+        logger.info(f"Fetching transactions from {start_date} to {end_date}")
+
+        databases = []
+        if database_type in ['income', 'all']:
+            databases.append(('income', self.notion_client.income_db))
+        if database_type in ['expense', 'all']:
+            databases.append(('expense', self.notion_client.expense_db))
+
+        days = (end_date - start_date).days + 1
+        batched = days > 90
+        if batched:
+            logger.info(f"Date range is {days} days (> 90), using batch queries")
+            ranges = self._date_batches(start_date, end_date)
+        else:
+            ranges = [(start_date, end_date)]
+
+        # 检查数据库可访问性；分批查询时无法访问的数据库只记录警告
+        checks = await asyncio.gather(
+            *(self._acheck_database_access(database_id) for _, database_id in databases),
+            return_exceptions=True
+        )
+        accessible = []
+        for (kind, database_id), error in zip(databases, checks):
+            if error is None:
+                accessible.append((kind, database_id))
+            elif batched:
+                logger.warning(f"Failed to fetch {kind} data from {start_date} to {end_date}: {error}")
+            else:
+                raise error
+
+        semaphore = asyncio.Semaphore(self.FETCH_CONCURRENCY)
+
+        async def query(kind: str, database_id: str, batch_start: date, batch_end: date):
+            async with semaphore:
+                try:
+                    items = await self._aquery_pages(database_id, batch_start, batch_end)
+                except Exception as e:
+                    if not batched:
+                        raise
+                    logger.warning(f"Failed to fetch {kind} data for batch {batch_start} to {batch_end}: {e}")
+                    return []
+            for item in items:
+                item['type'] = kind
+            return items
+
+        # 与同步版本相同的顺序：按批次，每批先收入后支出
+        results = await asyncio.gather(*(
+            query(kind, database_id, batch_start, batch_end)
+            for batch_start, batch_end in ranges
+            for kind, database_id in accessible
+        ))
+        transactions = [item for items in results for item in items]
+
+        logger.info(f"Fetched {len(transactions)} transactions")
+        return transactions
+
+    @staticmethod
+    def _date_batches(start_date: date, end_date: date, batch_size_days: int = 30) -> List[tuple]:
+        """将日期范围拆分为每批最多 batch_size_days 天的批次"""
+        batches = []
+        batch_start = start_date
+        while batch_start <= end_date:
+            batch_end = min(batch_start + timedelta(days=batch_size_days - 1), end_date)
+            batches.append((batch_start, batch_end))
+            batch_start = batch_end + timedelta(days=1)
+        return batches
+
+    async def _acheck_database_access(self, database_id: str) -> None:
+        """验证数据库可访问
+
+        Raises:
+            ValueError: database_id 格式无效
+            RuntimeError: 数据库无法访问
+        """
+        self._validate_database_id(database_id)
+        try:
+            db_info = await self.async_client.retrieve_database(database_id)
+        except Exception as e:
+            raise self._database_access_error(database_id, e)
+        logger.info(f"Database retrieve successful: {db_info.get('title', [{}])[0].get('text', {}).get('content', 'unknown')}")
+
+    async def _aquery_pages(self, database_id: str, start_date: date, end_date: date) -> List[Dict[str, Any]]:
+        """使用 databases.query API 分页查询指定日期范围的记录
+
+        临时错误（限流、超时、5xx）由 Notion 客户端的重试策略重试，见 src.notion_api.RetryPolicy。
+
+        Raises:
+            RuntimeError: 查询失败
+        """
+        results = []
+        has_more = True
+        next_cursor = None
+
+        while has_more:
+            body = self._date_filter_body(start_date, end_date, next_cursor)
+            logger.info(f"Querying database {database_id[:8]}... from {start_date} to {end_date}")
+
+            try:
+                response = await self.async_client.query_database(database_id, body)
+            except Exception as e:
+                raise self._database_query_error(e)
+
+            results.extend(response.get("results", []))
+            has_more = response.get("has_more", False)
+            next_cursor = response.get("next_cursor")
+            logger.info(f"Fetched {len(response.get('results', []))} records, has_more={has_more}, total so far={len(results)}")
+
+        return results
+
+    async def acreate_review_page(
+        self,
+        review_type: str,
+        period: str,
+        data: Dict[str, Any]
+    ) -> Optional[str]:
+        """创建复盘页面
+
+        与 ReviewService.create_review_page 相同；模板页面、模板子块和目标数据库结构并发获取。
+
+        Args:
+            review_type: 复盘类型 (monthly/quarterly/yearly)
+            period: 周期标识 (如 2024-01, 2024-Q1, 2024)
+            data: 复盘数据
+
+        Returns:
+            创建的页面ID，失败返回None
+        """
+        import os
+
+        database_id = self.get_review_database_id(review_type)
+        if not database_id:
+            logger.error(f"Review database not configured for type: {review_type}")
+            return None
+
+        template_id = os.getenv(f"NOTION_{review_type.upper()}_TEMPLATE_ID", "")
+        if not template_id:
+            logger.warning(f"Template not configured for {review_type}, falling back to basic page")
+            return await self._acreate_basic_review_page(review_type, period, data, database_id)
+
+        try:
+            _, template_blocks, database_info = await asyncio.gather(
+                self.async_client.retrieve_page(template_id),
+                self.async_client.list_block_children(template_id),
+                self.async_client.retrieve_database(database_id)
+            )
+            logger.info(f"获取到 {len(template_blocks.get('results', []))} 个模板块")
+
+            properties = self._template_review_properties(database_info.get("properties", {}), period, data)
+            response = await self.async_client.create_page(
+                database_id,
+                properties,
+                children=self._fill_template_blocks(template_blocks, period, data)
+            )
+
+            page_id = response.get("id")
+            logger.info(f"Review page created from template: {page_id}")
+            return page_id
+
+        except Exception as e:
+            logger.error(f"Failed to create review page from template: {e}")
+            # 如果模板创建失败，回退到基本页面
+            return await self._acreate_basic_review_page(review_type, period, data, database_id)
+
+    async def _acreate_basic_review_page(
+        self,
+        review_type: str,
+        period: str,
+        data: Dict[str, Any],
+        database_id: str
+    ) -> Optional[str]:
+        """创建基本复盘页面（不使用模板）
+
+        Returns:
+            创建的页面ID，失败返回None
+        """
+        try:
+            logger.info(f"开始创建基本复盘页面，周期: {period}")
+
+            database_info = await self.async_client.retrieve_database(database_id)
+            properties = self._basic_review_properties(database_info.get("properties", {}), period, data)
+            if properties is None:
+                return None
+
+            response = await self.async_client.create_page(database_id, properties)
+
+            page_id = response.get("id")
+            logger.info(f"页面创建成功: {page_id}")
+
+            await self._aadd_review_content_blocks(page_id, period, data)
+
+            logger.info(f"基本复盘页面创建完成: {page_id}")
+            return page_id
+
+        except Exception as e:
+            logger.error(f"Failed to create basic review page: {e}", exc_info=True)
+            if hasattr(e, 'body') and e.body:
+                logger.error(f"Error body: {e.body}")
+            return None
+
+    async def _aadd_review_content_blocks(
+        self,
+        page_id: str,
+        period: str,
+        data: Dict[str, Any]
+    ) -> None:
+        """添加复盘内容块
+
+        每次请求最多追加 APPEND_BATCH_SIZE 个块；一批追加失败时逐个重试该批的块，
+        失败的块只记录错误，与同步版本一致。
+
+        Args:
+            page_id: 页面ID
+            period: 周期标识
+            data: 复盘数据
+        """
+        blocks = self._review_content_blocks(period, data)
+
+        logger.info(f"准备添加 {len(blocks)} 个内容块")
+        for start in range(0, len(blocks), self.APPEND_BATCH_SIZE):
+            batch = blocks[start:start + self.APPEND_BATCH_SIZE]
+            try:
+                await self.async_client.append_block_children(page_id, batch)
+                continue
+            except Exception as e:
+                logger.warning(f"批量添加内容块失败，逐个添加: {e}")
+            for i, block in enumerate(batch, start + 1):
+                try:
+                    await self.async_client.append_block_children(page_id, [block])
+                except Exception as e:
+                    logger.error(f"添加第 {i} 个内容块失败: {e}")
+
+        logger.info(f"成功添加 {len(blocks)} 个内容块到页面 {page_id[:8]}...")
+
+    async def _agenerate_review(
+        self,
+        review_type: str,
+        year: int,
+        month: Optional[int] = None,
+        quarter: Optional[int] = None
+    ) -> Dict[str, Any]:
+        """生成复盘：获取交易数据、计算汇总、创建复盘页面
+
+        Returns:
+            复盘结果
+        """
+        period, start_date, end_date = self._review_period(review_type, year, month=month, quarter=quarter)
+        logger.info(f"Generating {review_type} review for {period}")
+
+        missing = self._missing_review_database(review_type, period)
+        if missing:
+            return missing
+
+        transactions = await self.afetch_transactions(start_date, end_date)
+        logger.info(f"获取到 {len(transactions)} 条交易记录")
+
+        review_data = self._build_review_data(review_type, period, start_date, end_date, transactions)
+        page_id = await self.acreate_review_page(review_type, period, review_data)
+
+        if page_id:
+            logger.info(f"✓ 复盘生成成功: {page_id}")
+        else:
+            logger.error(f"✗ 复盘生成失败: {period}")
+
+        return self._review_result(period, page_id, review_data)
+
+    async def agenerate_monthly_review(self, year: int, month: int) -> Dict[str, Any]:
+        """生成月度复盘"""
+        return await self._agenerate_review(self.TYPE_MONTHLY, year, month=month)
+
+    async def agenerate_quarterly_review(self, year: int, quarter: int) -> Dict[str, Any]:
+        """生成季度复盘"""
+        return await self._agenerate_review(self.TYPE_QUARTERLY, year, quarter=quarter)
+
+    async def agenerate_yearly_review(self, year: int) -> Dict[str, Any]:
+        """生成年度复盘"""
+        return await self._agenerate_review(self.TYPE_YEARLY, year)
+
+    async def abatch_generate_reviews(
+        self,
+        start_date: date,
+        end_date: date,
+        review_type: str = ReviewService.TYPE_MONTHLY
+    ) -> List[Dict[str, Any]]:
+        """批量生成复盘，最多同时生成 BATCH_CONCURRENCY 个
+
+        Returns:
+            复盘结果列表，按周期排序
+        """
+        logger.info(f"Batch generating {review_type} reviews from {start_date} to {end_date}")
+
+        semaphore = asyncio.Semaphore(self.BATCH_CONCURRENCY)
+
+        async def generate_one(period):
+            async with semaphore:
+                return await self._agenerate_review(review_type, **period)
+
+        return list(await asyncio.gather(*(
+            generate_one(period)
+            for period in self._batch_review_periods(start_date, end_date, review_type)
+        )))
+
+    async def _adatabase_properties(self, database_id: str, review_type: str) -> Dict[str, Any]:
+        """获取复盘数据库的属性结构（使用类级别缓存），失败时返回空字典"""
+        cache_key = f"{database_id}:{review_type}"
+        if cache_key in self._database_structure_cache:
+            return self._database_structure_cache[cache_key]
+        try:
+            database_info = await asyncio.wait_for(
+                self.async_client.retrieve_database(database_id),
+                self.STRUCTURE_TIMEOUT_SECONDS
+            )
+        except Exception as e:
+            logger.warning(f"Failed to retrieve database structure for {review_type}: {e!r}")
+            return {}
+        database_properties = database_info.get("properties", {})
+        self._database_structure_cache[cache_key] = database_properties
+        logger.info(f"已缓存数据库结构: {cache_key}")
+        return database_properties
+
+    async def acreate_review_from_content(
+        self,
+        review_type: str,
+        attributes: Dict[str, Any],
+        markdown_content: str
+    ) -> Optional[str]:
+        """根据内容创建复盘页面
+
+        Args:
+            review_type: 复盘类型 (monthly/quarterly/yearly)
+            attributes: 属性数据
+            markdown_content: Markdown 正文内容
+
+        Returns:
+            创建的页面ID，失败返回None
+        """
+        database_id = self.get_review_database_id(review_type)
+        if not database_id:
+            logger.error(f"Review database not configured for type: {review_type}")
+            return None
+
+        logger.info(f"创建复盘页面 - 类型: {review_type}, 数据库ID: {database_id[:8]}...")
+
+        try:
+            database_properties = await self._adatabase_properties(database_id, review_type)
+            response = await self.async_client.create_page(
+                database_id,
+                self._build_properties_from_attributes(attributes, review_type, database_properties),
+                children=self._content_page_blocks(attributes, markdown_content)
+            )
+
+            page_id = response.get("id")
+            if page_id:
+                logger.info(f"复盘页面创建成功: {page_id}")
+            else:
+                logger.error(f"页面创建失败，响应: {response}")
+            return page_id
+
+        except Exception as e:
+            logger.error(f"Failed to create review page: {e}", exc_info=True)
+            logger.error(f"复盘类型: {review_type}, 数据库ID: {database_id}")
+            return None
@@ -3,7 +3,7 @@
 from apscheduler.schedulers.background import BackgroundScheduler
 from apscheduler.triggers.cron import CronTrigger
 from src.config import Config
-from src.importer import import_bill
+from src.importer import import_bills
 import logging
 import os
 import glob
@@ -11,6 +11,9 @@ import glob
 
 logger = logging.getLogger(__name__)
 
+# 自动导入的账单文件；压缩包需先解密（不保存密码，见 parsers.archive）
+BILL_FILE_PATTERNS = ["*.csv", "*.xlsx", "*.xls", "*.zip"]
+
 
 class BillScheduler:
     """Bill import scheduler."""
@@ -64,15 +67,28 @@ class BillScheduler:
                 logger.warning(f"Bill directory not found: {bill_dir}")
                 return
 
-            csv_files = glob.glob(os.path.join(bill_dir, "*.csv"))
-            if not csv_files:
-                logger.info(f"No CSV files in: {bill_dir}")
+            bill_files = [
+                path for pattern in BILL_FILE_PATTERNS
+                for path in glob.glob(os.path.join(bill_dir, pattern))
+            ]
+            if not bill_files:
+                logger.info(f"No bill files in: {bill_dir}")
                 return
 
-            latest_file = max(csv_files, key=os.path.getmtime)
-            logger.info(f"Found latest file: {latest_file}")
-
-            import_bill(latest_file)
+            # 导入水位和已导入交易索引使重复导入的累计账单几乎没有开销，
+            # 因此每次导入目录中的全部账单。同一批文件都按导入前的水位过滤
+            # （见 import_bills），顺序不影响导入哪些交易，按修改时间排序只决定发送顺序
+            bill_files.sort(key=os.path.getmtime)
+            logger.info(f"Found {len(bill_files)} bill files")
+
+            for result in import_bills(bill_files):
+                if result.get('success'):
+                    logger.info(
+                        f"Imported {result['file_path']}: {result['imported']} new, "
+                        f"{result['updated']} updated, {result['filtered']} before watermark"
+                    )
+                else:
+                    logger.error(f"Auto import failed for {result['file_path']}: {result.get('error')}")
 
         except Exception as e:
             logger.error(f"Auto import failed: {e}", exc_info=True)
@@ -34,7 +34,8 @@ def init_db():
     # 导入所有模型以确保表被注册
     from src.models import (
         User, UserSession, UserNotionConfig,
-        UserUpload, ImportHistory, SystemSettings, AuditLog
+        UserUpload, ImportHistory, SystemSettings, AuditLog, ImportedTransaction, ImportWatermark,
+        NotionOutbox, NotionRateLimit
     )
 
     # 创建所有表
@@ -42,6 +43,24 @@ def init_db():
     logger.info("Database initialized successfully")
 
 
+# 已确认存在的表（命令行模式下不会调用 init_db）
+_ready_tables = set()
+
+
+def ensure_table(model):
+    """确保模型对应的表存在，每个进程只检查一次。
+
+    失败时只记录警告，调用方需自行处理表不可用的情况。
+    """
+    if model.__tablename__ in _ready_tables:
+        return
+    try:
+        model.__table__.create(bind=engine, checkfirst=True)
+        _ready_tables.add(model.__tablename__)
+    except Exception as e:
+        logger.warning(f"Cannot create table {model.__tablename__}: {e}")
+
+
 @contextmanager
 def get_db_context():
     """获取数据库session的上下文管理器。
@@ -91,7 +110,8 @@ class DBManager:
         """
         from src.models import (
             User, UserSession, UserNotionConfig,
-            UserUpload, ImportHistory, SystemSettings, AuditLog
+            UserUpload, ImportHistory, SystemSettings, AuditLog, ImportedTransaction, ImportWatermark,
+            NotionOutbox, NotionRateLimit
         )
 
         # 删除所有表
@@ -107,7 +127,8 @@ class DBManager:
         """获取数据库信息。"""
         from src.models import (
             User, UserSession, UserNotionConfig,
-            UserUpload, ImportHistory, SystemSettings, AuditLog
+            UserUpload, ImportHistory, SystemSettings, AuditLog, ImportedTransaction, ImportWatermark,
+            NotionOutbox
         )
 
         db = SessionLocal()
@@ -122,6 +143,9 @@ class DBManager:
                     "import_history": db.query(ImportHistory).count(),
                     "system_settings": db.query(SystemSettings).count(),
                     "audit_logs": db.query(AuditLog).count(),
+                    "imported_transactions": db.query(ImportedTransaction).count(),
+                    "import_watermarks": db.query(ImportWatermark).count(),
+                    "notion_outbox": db.query(NotionOutbox).count(),
                 }
             }
             return info
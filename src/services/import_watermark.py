@@ -0,0 +1,133 @@
+"""Incremental import watermarks per user and platform."""
+
+import json
+import logging
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+
+from src.services.database import ensure_table, get_db_context
+from src.models import ImportWatermark
+
+logger = logging.getLogger(__name__)
+
+
+def _record_text(value: dict, kind: str) -> str:
+    """提取 Notion 属性值中的文本（rich_text）或日期（date）。"""
+    if not isinstance(value, dict):
+        return ''
+    if kind == 'date':
+        return (value.get('date') or {}).get('start') or ''
+    return ''.join(part.get('text', {}).get('content', '') for part in value.get('rich_text') or [])
+
+
+class IncrementalWatermark:
+    """单个用户、单个平台的增量导入水位。
+
+    水位是已导入的最新交易时间，以及该时间点已导入的交易号。再次导入累计账单时，
+    早于水位的交易和水位时刻已导入的交易在转换为 Notion 格式前即被过滤
+    （见 mask），其余交易再交给已导入交易索引精确去重。
+
+    没有交易号的平台（如银联）无法区分水位时刻的交易，这些交易保留，
+    由交易索引去重。
+    """
+
+    def __init__(self, user_id: Optional[int], platform: str):
+        """加载水位。
+
+        Args:
+            user_id: 用户ID（单用户模式为 None）
+            platform: 支付平台
+        """
+        self.user_id = user_id
+        self.platform = platform
+        self.time = None
+        self.ids = set()
+        self.filtered = 0
+
+        # 本次导入观察到的最新交易时间及该时间点的交易号
+        self._latest = None
+        self._latest_ids = set()
+
+        ensure_table(ImportWatermark)
+        try:
+            with get_db_context() as db:
+                row = self._query(db)
+                if row is not None:
+                    self.time = row.last_transaction_time
+                    self.ids = set(json.loads(row.transaction_ids or '[]'))
+        except Exception as e:
+            logger.warning(f"Import watermark unavailable, importing all records: {e}")
+
+        if self.time:
+            logger.info(f"Import watermark for {platform}: {self.time} ({len(self.ids)} transactions)")
+
+    def mask(self, df: pd.DataFrame) -> np.ndarray:
+        """返回解析结果中需要导入的行（晚于水位或水位时刻未导入的交易）。
+
+        交易时间缺失的行保留。
+
+        Args:
+            df: 解析后的 DataFrame（见 BaseBillParser.parse_iter）
+
+        Returns:
+            布尔数组，True 表示保留
+        """
+        if self.time is None or 'transaction_time' not in df.columns:
+            return np.ones(len(df), dtype=bool)
+
+        times = df['transaction_time']
+        keep = times.isna().to_numpy() | (times > self.time).to_numpy(dtype=bool, na_value=False)
+
+        at_watermark = (times == self.time).to_numpy(dtype=bool, na_value=False)
+        if self.ids and 'transaction_id' in df.columns:
+            seen = df['transaction_id'].astype(str).str.strip().isin(self.ids).to_numpy(dtype=bool, na_value=False)
+            keep |= at_watermark & ~seen
+        else:
+            keep |= at_watermark
+
+        self.filtered += int(len(keep) - keep.sum())
+        return keep
+
+    def observe(self, records: list):
+        """记录一组 Notion 格式记录的交易时间，用于推进水位。"""
+        for record in records:
+            start = _record_text(record.get('Date'), 'date')
+            if not start:
+                continue
+            number = _record_text(record.get('Transaction Number'), 'rich_text').strip()
+            if self._latest is None or start > self._latest:
+                self._latest = start
+                self._latest_ids = set()
+            if start == self._latest and number:
+                self._latest_ids.add(number)
+
+    def save(self):
+        """将水位推进到本次导入观察到的最新交易。
+
+        水位只前进不后退；同一时间点的交易号与原有交易号合并。
+        """
+        if self._latest is None or (self.time is not None and self._latest < self.time):
+            return
+
+        ids = self._latest_ids | self.ids if self._latest == self.time else self._latest_ids
+        try:
+            with get_db_context() as db:
+                row = self._query(db)
+                if row is None:
+                    row = ImportWatermark(user_id=self.user_id, platform=self.platform)
+                    db.add(row)
+                row.last_transaction_time = self._latest
+                row.transaction_ids = json.dumps(sorted(ids), ensure_ascii=False)
+            self.time, self.ids = self._latest, ids
+            logger.info(f"Import watermark for {self.platform} advanced to {self._latest}")
+        except Exception as e:
+            logger.warning(f"Failed to save import watermark: {e}")
+
+    def _query(self, db):
+        """查询本用户、本平台的水位行。"""
+        return db.query(ImportWatermark).filter(
+            ImportWatermark.user_id == self.user_id,
+            ImportWatermark.platform == self.platform
+        ).first()
@@ -0,0 +1,88 @@
+"""Process-wide cache of users' Notion configuration."""
+
+import logging
+import threading
+import time
+from typing import Optional
+
+from src.services.database import get_db_context
+from src.models import UserNotionConfig
+
+logger = logging.getLogger(__name__)
+
+# 缓存的配置在该时间（秒）后重新读取。本进程内的修改会立即失效缓存，
+# 该时间只限制其他 Web 进程修改配置后本进程使用旧配置的时长
+CONFIG_CACHE_SECONDS = 60
+
+_cache = {}
+_lock = threading.Lock()
+
+# 每次失效加一；读取期间发生失效时不缓存读取到的旧配置
+_generation = 0
+
+
+def _load(user_id: int) -> dict:
+    """从数据库读取用户的 Notion 配置。"""
+    with get_db_context() as db:
+        config = db.query(UserNotionConfig).filter(
+            UserNotionConfig.user_id == user_id
+        ).first()
+
+        if not config:
+            raise ValueError(f"Notion config not found for user {user_id}")
+
+        # 在会话关闭前提取所有需要的值
+        return {
+            'api_key': config.notion_api_key,
+            'income_db': config.notion_income_database_id,
+            'expense_db': config.notion_expense_database_id,
+            'is_verified': config.is_verified,
+            'last_verified_at': config.last_verified_at,
+            'monthly_review_db': config.notion_monthly_review_db,
+            'quarterly_review_db': config.notion_quarterly_review_db,
+            'yearly_review_db': config.notion_yearly_review_db,
+            'monthly_template_id': config.notion_monthly_template_id,
+            'quarterly_template_id': config.notion_quarterly_template_id,
+            'yearly_template_id': config.notion_yearly_template_id
+        }
+
+
+def get_user_notion_config(user_id: int) -> dict:
+    """返回用户的 Notion 配置（缓存最多 CONFIG_CACHE_SECONDS 秒）。
+
+    返回的字典由调用方共享，不要修改。
+
+    Args:
+        user_id: 用户ID
+
+    Returns:
+        包含 api_key, income_db, expense_db, is_verified, last_verified_at
+        以及复盘数据库和模板ID（monthly_review_db 等）的字典
+
+    Raises:
+        ValueError: 配置不存在时
+    """
+    now = time.monotonic()
+    with _lock:
+        cached = _cache.get(user_id)
+        generation = _generation
+    if cached is not None and now - cached[0] < CONFIG_CACHE_SECONDS:
+        return cached[1]
+
+    config = _load(user_id)
+    with _lock:
+        if generation == _generation:
+            _cache[user_id] = (now, config)
+    return config
+
+
+def invalidate(user_id: Optional[int] = None):
+    """配置修改或删除后清除缓存；user_id 为 None 时清除全部用户。"""
+    global _generation
+    with _lock:
+        _generation += 1
+        if user_id is None:
+            _cache.clear()
+        else:
+            _cache.pop(user_id, None)
+    logger.debug(f"Notion config cache invalidated for user {user_id if user_id is not None else '*'}")
@@ -0,0 +1,436 @@
+"""Durable outbox of Notion writes, drained by background workers."""
+
+import json
+import logging
+import threading
+import uuid
+from datetime import datetime, timedelta
+from typing import Optional
+
+from sqlalchemy import exists, func, or_, select, update
+from sqlalchemy.orm import aliased
+
+from src.config import Config
+from src.services.database import ensure_table, get_db_context
+from src.services.transaction_index import TransactionIndex
+from src.models import NotionOutbox
+
+logger = logging.getLogger(__name__)
+
+# 每次领取的最大记录数
+DRAIN_BATCH_SIZE = 100
+
+# 每条删除语句的最大交易键数量（SQLite 单条语句的变量数有限）
+KEY_BATCH_SIZE = 500
+
+# 第 n 次发送失败后等待 RETRY_BASE_SECONDS * 2**(n-1) 秒再重试，最长 RETRY_MAX_SECONDS
+RETRY_BASE_SECONDS = 30
+RETRY_MAX_SECONDS = 3600
+
+# 发送中的记录超过该时间仍未完成（发送进程已退出）则重新发送
+CLAIM_LEASE_SECONDS = 600
+
+# 后台发送线程空闲时检查新记录的间隔（秒）
+POLL_SECONDS = 5
+
+# 可以被新导入的同一交易替换的状态
+REPLACEABLE_STATUSES = ('pending', 'dead', 'superseded')
+
+
+def enqueue(user_id: Optional[int], platform: str, plan: dict) -> int:
+    """将需要导入的记录写入发件箱。
+
+    同一交易尚未发送或已放弃的旧记录被替换，不会重复发送。同一交易的旧记录
+    正在发送时，新记录标记为 superseded，等旧记录发送完成后再发送（见 _send），
+    这样新记录可以更新旧记录创建的页面，而不是再创建一个页面。
+
+    Args:
+        user_id: 用户ID（单用户模式为 None）
+        platform: 支付平台
+        plan: TransactionIndex.classify() 的返回值
+
+    Returns:
+        写入的记录数
+    """
+    if not plan['records']:
+        return 0
+
+    ensure_table(NotionOutbox)
+    now = datetime.utcnow()
+    keys = plan['keys']
+    in_flight = set()
+    with get_db_context() as db:
+        for start in range(0, len(keys), KEY_BATCH_SIZE):
+            batch = keys[start:start + KEY_BATCH_SIZE]
+            same_key = (_owner(user_id), NotionOutbox.platform == platform, NotionOutbox.transaction_key.in_(batch))
+            db.query(NotionOutbox).filter(
+                *same_key, NotionOutbox.status.in_(REPLACEABLE_STATUSES)
+            ).delete(synchronize_session=False)
+            in_flight.update(key for key, in db.query(NotionOutbox.transaction_key).filter(
+                *same_key, NotionOutbox.status == 'sending'
+            ))
+
+        db.add_all([
+            NotionOutbox(
+                user_id=user_id,
+                platform=platform,
+                transaction_key=key,
+                content_hash=digest,
+                payload=json.dumps(record, ensure_ascii=False, default=str),
+                notion_page_id=page_id,
+                status='superseded' if key in in_flight else 'pending',
+                attempts=0,
+                next_attempt_at=now
+            )
+            for record, page_id, key, digest in zip(plan['records'], plan['page_ids'], keys, plan['hashes'])
+        ])
+
+    logger.info(f"Queued {len(keys)} {platform} records for Notion"
+                + (f", {len(in_flight)} waiting for an earlier send" if in_flight else ""))
+    return len(keys)
+
+
+def _owner(user_id: Optional[int]):
+    """本用户记录的查询条件。"""
+    return NotionOutbox.user_id == user_id if user_id is not None else NotionOutbox.user_id.is_(None)
+
+
+def _user_filter(user_ids: Optional[list]):
+    """只领取给定用户的记录；None 表示全部用户（单用户模式的用户为 None）。"""
+    if user_ids is None:
+        return None
+    conditions = [NotionOutbox.user_id.in_([uid for uid in user_ids if uid is not None])]
+    if None in user_ids:
+        conditions.append(NotionOutbox.user_id.is_(None))
+    return or_(*conditions)
+
+
+def _claim(worker_id: str, user_ids: Optional[list] = None, limit: int = DRAIN_BATCH_SIZE) -> list:
+    """领取到期的待发送记录，以及租约过期的发送中记录。
+
+    领取是一条 UPDATE 语句，多个发送线程（包括其他 Web 进程中的线程）不会领取到同一条记录。
+    同一交易已没有发送中记录的 superseded 记录先改为待发送（正常情况下由 _send 处理，
+    这里处理与入队同时完成发送的情况）。
+    """
+    now = datetime.utcnow()
+    sending = aliased(NotionOutbox)
+    orphaned = update(NotionOutbox).where(
+        NotionOutbox.status == 'superseded',
+        ~exists().where(
+            sending.status == 'sending',
+            sending.user_id.is_not_distinct_from(NotionOutbox.user_id),
+            sending.platform == NotionOutbox.platform,
+            sending.transaction_key == NotionOutbox.transaction_key
+        )
+    ).values(status='pending', next_attempt_at=now).execution_options(synchronize_session=False)
+
+    due = select(NotionOutbox.id).where(or_(
+        (NotionOutbox.status == 'pending') & (NotionOutbox.next_attempt_at <= now),
+        (NotionOutbox.status == 'sending') & (NotionOutbox.claimed_at < now - timedelta(seconds=CLAIM_LEASE_SECONDS))
+    ))
+    users = _user_filter(user_ids)
+    if users is not None:
+        due = due.where(users)
+    due = due.order_by(NotionOutbox.id).limit(limit)
+
+    with get_db_context() as db:
+        db.execute(orphaned)
+        db.execute(
+            update(NotionOutbox)
+            .where(NotionOutbox.id.in_(due.scalar_subquery()))
+            .values(status='sending', claimed_by=worker_id, claimed_at=now)
+            .execution_options(synchronize_session=False)
+        )
+        rows = db.query(NotionOutbox).filter(
+            NotionOutbox.claimed_by == worker_id,
+            NotionOutbox.status == 'sending'
+        ).order_by(NotionOutbox.id).all()
+        return [{
+            'id': row.id,
+            'user_id': row.user_id,
+            'platform': row.platform,
+            'transaction_key': row.transaction_key,
+            'content_hash': row.content_hash,
+            'record': json.loads(row.payload),
+            'page_id': row.notion_page_id,
+            'attempts': row.attempts
+        } for row in rows]
+
+
+def _refresh_from_index(worker_id: str, entries: list) -> list:
+    """按已导入交易索引更新领取的记录。
+
+    入队之后同一交易可能已经由另一条记录发送：内容相同的记录不再发送，
+    内容不同的记录改为更新已创建的页面。
+
+    Returns:
+        仍需发送的记录
+    """
+    groups = {}
+    for entry in entries:
+        groups.setdefault((entry['user_id'], entry['platform']), []).append(entry)
+
+    sent = []
+    for (user_id, platform), group in groups.items():
+        try:
+            indexed = TransactionIndex(user_id, platform).lookup([entry['transaction_key'] for entry in group])
+        except Exception as e:
+            logger.warning(f"Transaction index unavailable, sending claimed records as queued: {e}")
+            continue
+        for entry in group:
+            page_id, digest = indexed.get(entry['transaction_key'], (None, None))
+            if page_id is None:
+                continue
+            if digest == entry['content_hash']:
+                sent.append(entry['id'])
+            else:
+                entry['page_id'] = page_id
+
+    if not sent:
+        return entries
+    with get_db_context() as db:
+        db.query(NotionOutbox).filter(
+            NotionOutbox.id.in_(sent),
+            NotionOutbox.claimed_by == worker_id
+        ).delete(synchronize_session=False)
+    logger.info(f"Skipped {len(sent)} queued records already in Notion")
+    sent = set(sent)
+    return [entry for entry in entries if entry['id'] not in sent]
+
+
+def _retry_delay(attempts: int) -> timedelta:
+    """第 attempts 次失败后的重试等待时间。"""
+    return timedelta(seconds=min(RETRY_MAX_SECONDS, RETRY_BASE_SECONDS * 2 ** (attempts - 1)))
+
+
+def _send(user_id: Optional[int], entries: list, worker_id: str) -> dict:
+    """将同一用户的一组记录写入 Notion 并更新发件箱和已导入交易索引。
+
+    只更新仍由 worker_id 领取的记录：租约过期后被其他线程重新领取的记录由该线程处理。
+    发送完成（成功或失败）的交易如有 superseded 的新记录，旧记录删除，新记录改为待发送。
+
+    Returns:
+        包含 imported、updated、skipped（本次发送失败）、dead（本次被放弃）计数的字典
+    """
+    from src.notion_api import NotionClient
+
+    try:
+        result = NotionClient.for_user(user_id).batch_import(
+            [entry['record'] for entry in entries],
+            page_ids=[entry['page_id'] for entry in entries]
+        )
+    except Exception as e:
+        # 配置缺失等无法创建客户端的错误：整组记录按失败处理
+        logger.error(f"Cannot send queued records for user {user_id}: {e}")
+        result = {'imported': 0, 'updated': 0, 'skipped': len(entries), 'pages': [None] * len(entries),
+                  'errors': [str(e)] * len(entries), 'fatal': [False] * len(entries)}
+
+    now = datetime.utcnow()
+    dead = 0
+    sent = {}
+    with get_db_context() as db:
+        rows = {row.id: row for row in db.query(NotionOutbox).filter(
+            NotionOutbox.id.in_([entry['id'] for entry in entries]),
+            NotionOutbox.claimed_by == worker_id,
+            NotionOutbox.status == 'sending'
+        )}
+        lost = len(entries) - len(rows)
+        waiting = _superseded(db, user_id, [entry for entry in entries if entry['id'] in rows])
+
+        for entry, page_id, error, fatal in zip(entries, result['pages'], result['errors'], result['fatal']):
+            row = rows.get(entry['id'])
+            if page_id:
+                # 已发送的记录由已导入交易索引记录，不再保留（租约已过期的记录同样记录页面）
+                sent.setdefault(entry['platform'], []).append((entry, page_id))
+            if row is None:
+                continue
+            newer = waiting.get((entry['platform'], entry['transaction_key']))
+            if newer is not None:
+                # 新记录取代本记录，更新本记录创建（或原有）的页面
+                db.delete(row)
+                newer.status = 'pending'
+                newer.next_attempt_at = now
+                newer.notion_page_id = page_id or newer.notion_page_id or entry['page_id']
+                continue
+            if page_id:
+                db.delete(row)
+                continue
+            row.claimed_by = None
+            row.attempts = entry['attempts'] + 1
+            row.last_error = error
+            # 重试无法解决的错误（请求无效、无权限等）直接放弃
+            if fatal or row.attempts >= Config.NOTION_OUTBOX_MAX_ATTEMPTS:
+                row.status = 'dead'
+                dead += 1
+            else:
+                row.status = 'pending'
+                row.next_attempt_at = now + _retry_delay(row.attempts)
+
+    for platform, done in sent.items():
+        plan = {
+            'keys': [entry['transaction_key'] for entry, _ in done],
+            'hashes': [entry['content_hash'] for entry, _ in done]
+        }
+        TransactionIndex(user_id, platform).record(plan, [page_id for _, page_id in done])
+
+    if lost:
+        logger.warning(f"{lost} queued records for user {user_id} were claimed by another worker "
+                       f"after the lease expired; leaving them to it")
+    if dead:
+        logger.warning(f"Gave up on {dead} queued records for user {user_id}: "
+                       f"non-retryable error or {Config.NOTION_OUTBOX_MAX_ATTEMPTS} attempts")
+    return {'imported': result['imported'], 'updated': result['updated'],
+            'skipped': result['skipped'], 'dead': dead}
+
+
+def _superseded(db, user_id: Optional[int], entries: list) -> dict:
+    """查询等待这些记录发送完成的新记录，返回 {(平台, 交易键): 记录行}。"""
+    waiting = {}
+    keys = sorted({entry['transaction_key'] for entry in entries})
+    platforms = {entry['platform'] for entry in entries}
+    for start in range(0, len(keys), KEY_BATCH_SIZE):
+        for row in db.query(NotionOutbox).filter(
+            _owner(user_id),
+            NotionOutbox.status == 'superseded',
+            NotionOutbox.platform.in_(platforms),
+            NotionOutbox.transaction_key.in_(keys[start:start + KEY_BATCH_SIZE])
+        ):
+            waiting[(row.platform, row.transaction_key)] = row
+    return waiting
+
+
+def drain(user_ids: Optional[list] = None, worker_id: Optional[str] = None) -> dict:
+    """发送发件箱中所有到期的记录，直到没有到期记录为止。
+
+    发送失败的记录按退避时间重新排期，不会在同一次调用中重试。
+
+    Args:
+        user_ids: 只发送这些用户的记录（单用户模式为 [None]），None 表示全部
+        worker_id: 发送线程标识，默认随机生成
+
+    Returns:
+        包含 imported、updated、skipped、dead 计数的字典
+    """
+    ensure_table(NotionOutbox)
+    worker_id = worker_id or uuid.uuid4().hex
+    totals = {'imported': 0, 'updated': 0, 'skipped': 0, 'dead': 0}
+    while True:
+        entries = _claim(worker_id, user_ids)
+        if not entries:
+            return totals
+        entries = _refresh_from_index(worker_id, entries)
+
+        by_user = {}
+        for entry in entries:
+            by_user.setdefault(entry['user_id'], []).append(entry)
+        for user_id, user_entries in by_user.items():
+            result = _send(user_id, user_entries, worker_id)
+            for key in totals:
+                totals[key] += result[key]
+
+
+def retry_dead(user_id: Optional[int] = None, all_users: bool = False) -> int:
+    """将已放弃的记录重新排入发件箱，重试次数清零。
+
+    Args:
+        user_id: 用户ID（单用户模式为 None）
+        all_users: 为 True 时处理全部用户的记录
+
+    Returns:
+        重新排入的记录数
+    """
+    ensure_table(NotionOutbox)
+    with get_db_context() as db:
+        query = db.query(NotionOutbox).filter(NotionOutbox.status == 'dead')
+        if not all_users:
+            query = query.filter(_owner(user_id))
+        count = query.update({
+            'status': 'pending',
+            'attempts': 0,
+            'next_attempt_at': datetime.utcnow()
+        }, synchronize_session=False)
+    if count:
+        logger.info(f"Requeued {count} failed records")
+        notify()
+    return count
+
+
+def outbox_status(user_id: Optional[int], failed_limit: int = 20) -> dict:
+    """返回用户发件箱中各状态的记录数，以及最近放弃的记录。"""
+    ensure_table(NotionOutbox)
+    with get_db_context() as db:
+        owner = _owner(user_id)
+        counts = dict(
+            db.query(NotionOutbox.status, func.count(NotionOutbox.id)).filter(owner).group_by(NotionOutbox.status).all()
+        )
+        failed = db.query(NotionOutbox).filter(owner, NotionOutbox.status == 'dead') \
+            .order_by(NotionOutbox.id.desc()).limit(failed_limit).all()
+        return {
+            'pending': counts.get('pending', 0) + counts.get('sending', 0) + counts.get('superseded', 0),
+            'dead': counts.get('dead', 0),
+            'failed': [{
+                'id': row.id,
+                'platform': row.platform,
+                'transaction_key': row.transaction_key,
+                'attempts': row.attempts,
+                'error': row.last_error
+            } for row in failed]
+        }
+
+
+# ==================== 后台发送线程 ====================
+
+_workers = []
+_wake = threading.Event()
+_stop = threading.Event()
+
+
+def _worker_loop(worker_id: str):
+    """后台发送线程：持续发送到期记录，空闲时等待新记录或 POLL_SECONDS。"""
+    while not _stop.is_set():
+        try:
+            result = drain(worker_id=worker_id)
+            busy = any(result.values())
+        except Exception as e:
+            logger.error(f"Outbox drain failed: {e}", exc_info=True)
+            busy = False
+        if not busy:
+            _wake.wait(POLL_SECONDS)
+            _wake.clear()
+
+
+def start_workers(count: int = None):
+    """启动后台发送线程（每个进程只启动一次）。
+
+    Args:
+        count: 线程数，默认 Config.NOTION_OUTBOX_WORKERS
+    """
+    count = Config.NOTION_OUTBOX_WORKERS if count is None else count
+    if _workers or count <= 0:
+        return
+    _stop.clear()
+    for _ in range(count):
+        worker_id = uuid.uuid4().hex
+        thread = threading.Thread(target=_worker_loop, args=(worker_id,), name='notion-outbox', daemon=True)
+        thread.start()
+        _workers.append(thread)
+    logger.info(f"Started {count} Notion outbox workers")
+
+
+def stop_workers(timeout: float = 10):
+    """停止后台发送线程；发送中的记录由租约过期后重新发送。"""
+    _stop.set()
+    _wake.set()
+    for thread in _workers:
+        thread.join(timeout)
+    _workers.clear()
+
+
+def workers_running() -> bool:
+    """当前进程中是否有后台发送线程。"""
+    return any(thread.is_alive() for thread in _workers)
+
+
+def notify():
+    """唤醒后台发送线程立即发送新记录。"""
+    _wake.set()
@@ -0,0 +1,173 @@
+"""Cached, concurrent verification of Notion connections."""
+
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
+from datetime import datetime
+from typing import Optional
+
+from src.config import Config
+from src.services import notion_config
+from src.services.database import get_db_context
+from src.models import UserNotionConfig
+
+logger = logging.getLogger(__name__)
+
+# 验证成功的结果在进程内缓存的时间（秒）；多租户模式下 UserNotionConfig.is_verified 另外持久保存结果
+VERIFY_CACHE_SECONDS = 3600
+
+# 每项检查的最长等待时间（秒）
+CHECK_TIMEOUT_SECONDS = 15
+
+# 导入账单所需的检查：API 密钥、收入数据库、支出数据库
+CORE_CHECKS = ('api_key', 'income_db', 'expense_db')
+
+# (user_id, 配置签名) -> 验证成功的时间
+_verified = {}
+_lock = threading.Lock()
+
+
+def _signature(client) -> tuple:
+    """客户端配置的签名：密钥或数据库 ID 变化后需要重新验证。"""
+    return client.client.options.auth, client.income_db, client.expense_db
+
+
+def _title(database: dict) -> str:
+    """数据库标题。"""
+    title = database.get('title') or [{}]
+    return title[0].get('text', {}).get('content', 'unknown')
+
+
+def run_checks(client, databases: dict) -> dict:
+    """并发执行 API 密钥检查（users.me）和各数据库的 databases.retrieve。
+
+    Args:
+        client: NotionClient
+        databases: 检查名 -> 数据库ID，ID 为空的数据库不检查
+
+    Returns:
+        检查名 -> 结果字典：ok，name（用户名或数据库标题），error（错误信息），
+        kind（错误类别，见 src.notion_api.classify_error；超时为 retryable）
+    """
+    from src.notion_api import classify_error, RETRYABLE
+
+    calls = {'api_key': (client.client.users.me, {})}
+    for name, database_id in databases.items():
+        if database_id:
+            calls[name] = (client.client.databases.retrieve, {'database_id': database_id})
+
+    pool = ThreadPoolExecutor(max_workers=len(calls), thread_name_prefix='notion-verify')
+    futures = {name: pool.submit(func, **kwargs) for name, (func, kwargs) in calls.items()}
+    done, _ = wait(futures.values(), timeout=CHECK_TIMEOUT_SECONDS)
+    # 超时的检查留在后台线程中结束，不再等待
+    pool.shutdown(wait=False)
+
+    checks = {}
+    for name, future in futures.items():
+        if future not in done:
+            checks[name] = {'ok': False, 'name': None, 'error': 'timeout', 'kind': RETRYABLE}
+            continue
+        try:
+            response = future.result()
+        except Exception as e:
+            checks[name] = {'ok': False, 'name': None, 'error': str(e), 'kind': classify_error(e)}
+            continue
+        label = (response.get('name') or 'unknown') if name == 'api_key' else _title(response)
+        checks[name] = {'ok': True, 'name': label, 'error': None, 'kind': None}
+    return checks
+
+
+def _is_cached(key: tuple) -> bool:
+    with _lock:
+        verified_at = _verified.get(key)
+    return verified_at is not None and time.monotonic() - verified_at < VERIFY_CACHE_SECONDS
+
+
+def _remember(key: tuple):
+    with _lock:
+        _verified[key] = time.monotonic()
+
+
+def _persist(user_id: Optional[int], verified: bool):
+    """将验证结果写入 UserNotionConfig（仅多租户模式）。"""
+    if user_id is None or not Config.is_multi_tenant_mode():
+        return
+    values = {'is_verified': verified}
+    if verified:
+        values['last_verified_at'] = datetime.utcnow()
+    with get_db_context() as db:
+        db.query(UserNotionConfig).filter(UserNotionConfig.user_id == user_id).update(
+            values, synchronize_session=False
+        )
+    notion_config.invalidate(user_id)
+
+
+def _is_persisted(user_id: Optional[int]) -> bool:
+    """多租户模式下用户配置是否已标记为验证通过。"""
+    if user_id is None or not Config.is_multi_tenant_mode():
+        return False
+    try:
+        return bool(notion_config.get_user_notion_config(user_id)['is_verified'])
+    except ValueError:
+        return False
+
+
+def verify(user_id: Optional[int] = None, force: bool = False, client=None,
+           extra_databases: dict = None) -> dict:
+    """验证用户的 Notion 连接。
+
+    验证成功的结果先在进程内缓存 VERIFY_CACHE_SECONDS 秒，多租户模式下另外保存在
+    UserNotionConfig.is_verified 中；配置修改（见 users 路由）或遇到认证错误
+    （见 mark_unverified）后才重新验证。
+
+    Args:
+        user_id: 用户ID（单用户模式为 None）
+        force: 忽略缓存，重新执行检查
+        client: 已创建的 NotionClient，默认 NotionClient.for_user(user_id)
+        extra_databases: 额外检查的数据库（检查名 -> 数据库ID），不影响验证结果
+
+    Returns:
+        字典：success（核心检查是否全部通过），cached（是否来自缓存），
+        checks（run_checks() 的结果，来自缓存时为 None）
+
+    Raises:
+        ValueError: 用户未配置 Notion 时
+    """
+    from src.notion_api import NotionClient, FATAL
+
+    client = client or NotionClient.for_user(user_id)
+    key = (user_id, _signature(client))
+    if not force and (_is_cached(key) or _is_persisted(user_id)):
+        _remember(key)
+        return {'success': True, 'cached': True, 'checks': None}
+
+    databases = {'income_db': client.income_db, 'expense_db': client.expense_db}
+    databases.update(extra_databases or {})
+    checks = run_checks(client, databases)
+    success = all(checks[name]['ok'] for name in CORE_CHECKS)
+
+    if success:
+        logger.info(f"Notion connection verified for user {user_id}")
+        _remember(key)
+        _persist(user_id, True)
+    else:
+        failed = {name: checks[name] for name in CORE_CHECKS if not checks[name]['ok']}
+        logger.error(f"Notion connection check failed for user {user_id}: "
+                     + ", ".join(f"{name}: {check['error']}" for name, check in failed.items()))
+        # 只有配置本身的问题才撤销验证状态，超时、限流等临时错误不影响
+        if any(check['kind'] == FATAL for check in failed.values()):
+            mark_unverified(user_id)
+
+    return {'success': success, 'cached': False, 'checks': checks}
+
+
+def mark_unverified(user_id: Optional[int] = None):
+    """撤销用户的验证状态（遇到认证错误时调用），下次使用前重新验证。"""
+    with _lock:
+        for key in [key for key in _verified if key[0] == user_id]:
+            del _verified[key]
+    try:
+        _persist(user_id, False)
+    except Exception as e:
+        logger.warning(f"Failed to reset verification state for user {user_id}: {e}")
@@ -0,0 +1,209 @@
+"""Token-bucket rate limiting of Notion API requests per integration key."""
+
+import asyncio
+import hashlib
+import logging
+import threading
+import time
+from typing import Optional
+
+from sqlalchemy import func, update
+from sqlalchemy.dialects.sqlite import insert
+
+from src.config import Config
+from src.services.database import ensure_table, engine
+from src.models import NotionRateLimit
+
+logger = logging.getLogger(__name__)
+
+# 所有集成密钥共享的全局桶（见 Config.NOTION_RATE_LIMIT_GLOBAL）
+GLOBAL_BUCKET = '*'
+
+# 共享存储失败后改用进程内令牌桶的时间（秒），之后重新尝试共享存储
+SHARED_STORE_RETRY_SECONDS = 30
+
+
+def bucket_key(authorization: str) -> str:
+    """集成密钥（或 Authorization 请求头）的令牌桶键，不保存密钥本身。"""
+    return hashlib.sha256(authorization.encode('utf-8')).hexdigest()[:32]
+
+
+class MemoryBucketStore:
+    """进程内的令牌桶。"""
+
+    def __init__(self):
+        self._buckets = {}
+        self._lock = threading.Lock()
+
+    def reserve(self, key: str, rate: float, capacity: int) -> float:
+        """预约一个令牌，返回需要等待的秒数。
+
+        令牌按 rate 每秒补充、最多 capacity 个。没有令牌时同样扣减，
+        令牌数变为负数，后到的请求排在已预约的请求之后。
+        """
+        now = time.monotonic()
+        with self._lock:
+            tokens, updated = self._buckets.get(key, (capacity, now))
+            tokens = min(capacity, tokens + (now - updated) * rate) - 1
+            self._buckets[key] = (tokens, now)
+        return max(0.0, -tokens / rate)
+
+
+class SQLiteBucketStore:
+    """保存在数据库中的令牌桶，由同一台服务器上的多个 Web 进程共享。
+
+    每次预约是一条带 RETURNING 的 UPDATE 语句，在 SQLite 中原子执行。
+    """
+
+    def __init__(self):
+        ensure_table(NotionRateLimit)
+        self._table = NotionRateLimit.__table__
+
+    def reserve(self, key: str, rate: float, capacity: int) -> float:
+        """预约一个令牌，返回需要等待的秒数（语义同 MemoryBucketStore.reserve）。"""
+        table = self._table
+        now = time.time()
+        with engine.begin() as conn:
+            conn.execute(
+                insert(table).values(bucket_key=key, tokens=capacity, updated_at=now).on_conflict_do_nothing()
+            )
+            elapsed = func.max(0.0, now - table.c.updated_at)
+            tokens = conn.execute(
+                update(table)
+                .where(table.c.bucket_key == key)
+                .values(
+                    tokens=func.min(capacity, table.c.tokens + elapsed * rate) - 1,
+                    updated_at=func.max(table.c.updated_at, now),
+                )
+                .returning(table.c.tokens)
+            ).scalar_one()
+        return max(0.0, -tokens / rate)
+
+
+class NotionRateLimiter:
+    """按集成密钥限制 Notion API 请求速率。
+
+    同一密钥的所有请求（导入、复盘、连接验证，不论来自哪个线程）共用一个
+    令牌桶，速率为 Config.NOTION_RATE_LIMIT；设置了 NOTION_RATE_LIMIT_GLOBAL 时
+    另有一个所有密钥共用的全局桶。数据库暂时不可用（如 database is locked）时，
+    SHARED_STORE_RETRY_SECONDS 秒内改用进程内的令牌桶，之后重新尝试数据库。
+    """
+
+    def __init__(self, rate: float, burst: int, global_rate: float = 0, store: str = 'memory'):
+        """创建限流器。
+
+        Args:
+            rate: 每个密钥每秒的请求数
+            burst: 每个密钥的突发容量
+            global_rate: 所有密钥合计每秒的请求数，0 表示不限制
+            store: 'memory' 或 'sqlite'
+        """
+        self.rate = rate
+        self.burst = max(1, burst)
+        self.global_rate = global_rate
+        self._memory = MemoryBucketStore()
+        self._shared = None
+        self._use_shared = store == 'sqlite'
+        # 共享存储失败后，到该时间（time.monotonic()）之前使用进程内令牌桶
+        self._retry_at = 0.0
+        self._degraded = False
+        self._state_lock = threading.Lock()
+
+    @property
+    def uses_shared_store(self) -> bool:
+        """预约令牌是否会访问数据库。"""
+        return self._use_shared
+
+    def _reserve(self, key: str, rate: float, capacity: int) -> float:
+        """在共享存储中预约令牌；共享存储不可用时本次改用进程内存储。"""
+        if self._use_shared and time.monotonic() >= self._retry_at:
+            try:
+                if self._shared is None:
+                    self._shared = SQLiteBucketStore()
+                wait = self._shared.reserve(key, rate, capacity)
+            except Exception as e:
+                self._shared_failed(e)
+            else:
+                if self._degraded:
+                    self._degraded = False
+                    logger.info("Shared rate limit store available again")
+                return wait
+        return self._memory.reserve(key, rate, capacity)
+
+    def _shared_failed(self, error: Exception):
+        """记录共享存储失败，SHARED_STORE_RETRY_SECONDS 秒后再重试。"""
+        with self._state_lock:
+            first = not self._degraded
+            self._degraded = True
+            self._retry_at = time.monotonic() + SHARED_STORE_RETRY_SECONDS
+        if first:
+            logger.warning(f"Shared rate limit store failed, limiting per process for "
+                           f"{SHARED_STORE_RETRY_SECONDS}s: {error}")
+
+    def reserve(self, key: str) -> float:
+        """为一个请求预约令牌，返回需要等待的秒数。"""
+        wait = self._reserve(key, self.rate, self.burst)
+        if self.global_rate > 0:
+            capacity = max(self.burst, int(self.global_rate))
+            wait = max(wait, self._reserve(GLOBAL_BUCKET, self.global_rate, capacity))
+        return wait
+
+    def acquire(self, key: str):
+        """等待直到一个请求可以发出。"""
+        wait = self.reserve(key)
+        if wait > 0:
+            logger.debug(f"Notion rate limit: waiting {wait:.2f}s")
+            time.sleep(wait)
+
+
+_limiter = None
+_limiter_lock = threading.Lock()
+
+
+def get_rate_limiter() -> Optional[NotionRateLimiter]:
+    """返回进程内共享的限流器；Config.NOTION_RATE_LIMIT 为 0 时返回 None。"""
+    global _limiter
+    if Config.NOTION_RATE_LIMIT <= 0:
+        return None
+    with _limiter_lock:
+        if _limiter is None:
+            store = Config.NOTION_RATE_LIMIT_STORE
+            if store == 'auto':
+                store = 'sqlite' if Config.is_multi_tenant_mode() else 'memory'
+            _limiter = NotionRateLimiter(
+                Config.NOTION_RATE_LIMIT,
+                Config.NOTION_RATE_LIMIT_BURST,
+                Config.NOTION_RATE_LIMIT_GLOBAL,
+                store,
+            )
+            logger.info(f"Notion rate limit: {Config.NOTION_RATE_LIMIT}/s per integration ({store})")
+    return _limiter
+
+
+def rate_limit_request(request):
+    """httpx 请求钩子：按请求的 Authorization 头限流。
+
+    在每次发送前调用，包括 SDK 自动重试的请求。
+    """
+    limiter = get_rate_limiter()
+    authorization = request.headers.get('authorization')
+    if limiter is not None and authorization:
+        limiter.acquire(bucket_key(authorization))
+
+
+async def rate_limit_request_async(request):
+    """httpx.AsyncClient 的请求钩子：与 rate_limit_request 相同，但在事件循环中等待。
+
+    使用数据库中的令牌桶时在线程中预约，不阻塞事件循环。
+    """
+    limiter = get_rate_limiter()
+    authorization = request.headers.get('authorization')
+    if limiter is not None and authorization:
+        key = bucket_key(authorization)
+        if limiter.uses_shared_store:
+            wait = await asyncio.to_thread(limiter.reserve, key)
+        else:
+            wait = limiter.reserve(key)
+        if wait > 0:
+            logger.debug(f"Notion rate limit: waiting {wait:.2f}s")
+            await asyncio.sleep(wait)
@@ -0,0 +1,182 @@
+"""Local index of transactions already imported to Notion."""
+
+import hashlib
+import json
+import logging
+from collections import Counter
+from typing import Optional
+
+from src.services.database import ensure_table, get_db_context
+from src.models import ImportedTransaction
+
+logger = logging.getLogger(__name__)
+
+# 每次查询索引的最大键数量（SQLite 单条语句的变量数有限）
+LOOKUP_BATCH_SIZE = 500
+
+# 没有交易号时用于生成交易指纹的 Notion 属性
+FINGERPRINT_PROPERTIES = ['Date', 'Price', 'Income Expense', 'Name', 'Counterparty', 'Payment Method']
+
+def _property_text(value) -> str:
+    """提取 Notion 属性值中的文本，用于生成交易键。"""
+    if not isinstance(value, dict):
+        return ''
+    for kind in ('title', 'rich_text'):
+        if kind in value:
+            return ''.join(part.get('text', {}).get('content', '') for part in value[kind] or [])
+    if 'select' in value:
+        return (value['select'] or {}).get('name', '')
+    if 'number' in value:
+        return '' if value['number'] is None else repr(value['number'])
+    if 'date' in value:
+        return (value['date'] or {}).get('start', '')
+    return ''
+
+
+def content_hash(record: dict) -> str:
+    """计算记录内容的哈希，内容变化时哈希随之变化。"""
+    payload = json.dumps(record, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+class TransactionIndex:
+    """单个用户、单个平台的已导入交易索引。
+
+    每笔交易以交易号为键，没有交易号时使用交易时间、金额、名称等属性的指纹。
+    导入前将记录分为新增、已变化和未变化三类：新增记录创建页面，已变化记录更新
+    原页面，未变化记录不发起任何 Notion 请求。
+
+    同一账单中键相同的记录（如同一秒内的两笔相同消费）按出现顺序编号，
+    因此同一实例需要按顺序处理一个账单的全部记录。
+    """
+
+    def __init__(self, user_id: Optional[int], platform: str):
+        """初始化索引。
+
+        Args:
+            user_id: 用户ID（单用户模式为 None）
+            platform: 支付平台
+        """
+        self.user_id = user_id
+        self.platform = platform
+        self._seen = Counter()
+        ensure_table(ImportedTransaction)
+
+    def transaction_key(self, record: dict) -> str:
+        """返回记录的交易键，同一账单内重复的键追加序号。"""
+        number = _property_text(record.get('Transaction Number')).strip()
+        if number:
+            base = f"id:{number}"
+        else:
+            fields = '\x1f'.join(_property_text(record.get(name)).strip() for name in FINGERPRINT_PROPERTIES)
+            base = f"fp:{hashlib.sha256(fields.encode('utf-8')).hexdigest()[:40]}"
+        if len(base) > 80:
+            base = f"id:{hashlib.sha256(base.encode('utf-8')).hexdigest()[:40]}"
+
+        self._seen[base] += 1
+        count = self._seen[base]
+        return base if count == 1 else f"{base}#{count}"
+
+    def classify(self, records: list) -> dict:
+        """将记录分为新增、已变化和未变化三类。
+
+        索引不可用时所有记录按新增处理，导入不受影响。
+
+        Args:
+            records: Notion 格式的记录列表
+
+        Returns:
+            {
+                'records': list,    # 需要导入的记录（新增和已变化）
+                'page_ids': list,   # 与 records 对应，已变化记录的页面 ID，新增记录为 None
+                'keys': list,       # 与 records 对应的交易键
+                'hashes': list,     # 与 records 对应的内容哈希
+                'new': int,
+                'changed': int,
+                'unchanged': int
+            }
+        """
+        keys = [self.transaction_key(record) for record in records]
+        hashes = [content_hash(record) for record in records]
+        try:
+            existing = self.lookup(keys)
+        except Exception as e:
+            logger.warning(f"Transaction index unavailable, importing all records: {e}")
+            existing = {}
+
+        plan = {'records': [], 'page_ids': [], 'keys': [], 'hashes': [], 'new': 0, 'changed': 0, 'unchanged': 0}
+        for record, key, digest in zip(records, keys, hashes):
+            page_id, indexed_hash = existing.get(key, (None, None))
+            if page_id is not None and indexed_hash == digest:
+                plan['unchanged'] += 1
+                continue
+            plan['changed' if page_id else 'new'] += 1
+            plan['records'].append(record)
+            plan['page_ids'].append(page_id)
+            plan['keys'].append(key)
+            plan['hashes'].append(digest)
+
+        logger.info(
+            f"Transaction index: {plan['new']} new, {plan['changed']} changed, "
+            f"{plan['unchanged']} unchanged"
+        )
+        return plan
+
+    def record(self, plan: dict, pages: list):
+        """保存导入结果到索引。
+
+        Args:
+            plan: classify() 的返回值
+            pages: 与 plan['records'] 对应的 Notion 页面 ID，导入失败为 None
+        """
+        entries = {
+            key: (page_id, digest)
+            for key, digest, page_id in zip(plan['keys'], plan['hashes'], pages)
+            if page_id
+        }
+        if not entries:
+            return
+
+        try:
+            with get_db_context() as db:
+                rows = {}
+                for start in range(0, len(plan['keys']), LOOKUP_BATCH_SIZE):
+                    batch = [key for key in plan['keys'][start:start + LOOKUP_BATCH_SIZE] if key in entries]
+                    for row in self._query(db, batch):
+                        rows[row.transaction_key] = row
+
+                for key, (page_id, digest) in entries.items():
+                    row = rows.get(key)
+                    if row is None:
+                        db.add(ImportedTransaction(
+                            user_id=self.user_id,
+                            platform=self.platform,
+                            transaction_key=key,
+                            notion_page_id=page_id,
+                            content_hash=digest
+                        ))
+                    else:
+                        row.notion_page_id = page_id
+                        row.content_hash = digest
+        except Exception as e:
+            logger.warning(f"Failed to update transaction index: {e}")
+
+    def lookup(self, keys: list) -> dict:
+        """查询已索引的交易，返回 {交易键: (页面ID, 内容哈希)}。"""
+        existing = {}
+        with get_db_context() as db:
+            for start in range(0, len(keys), LOOKUP_BATCH_SIZE):
+                for row in self._query(db, keys[start:start + LOOKUP_BATCH_SIZE]):
+                    existing[row.transaction_key] = (row.notion_page_id, row.content_hash)
+        return existing
+
+    def _query(self, db, keys: list):
+        """查询本用户、本平台中给定交易键的索引行。"""
+        if not keys:
+            return []
+        return db.query(ImportedTransaction).filter(
+            ImportedTransaction.user_id == self.user_id,
+            ImportedTransaction.platform == self.platform,
+            ImportedTransaction.transaction_key.in_(keys)
+        ).all()
+
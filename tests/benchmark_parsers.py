@@ -0,0 +1,289 @@
+#!/usr/bin/env python3
+"""
+Parser benchmark.
+
+Statements are generated with tests/statement_corpus.py.
+
+memory: times parsing of a synthetic Alipay statement and reports the memory
+of the parsed DataFrame with plain string columns (before) and with compact
+dtypes (after).
+
+engines: compares the default pandas CSV engine with the pyarrow engine on
+synthetic Alipay (GBK) and WeChat (UTF-8) statements.
+
+suite: times each parsing stage (get_parser, uncached parse(),
+clean_amount_column, date normalization, to_notion_format) for every
+platform and format and reports rows/s and peak RSS. Each statement is
+measured in a fresh process so peak RSS belongs to that statement alone.
+Results can be saved as a JSON baseline and compared with a later run.
+
+用法：
+    python tests/benchmark_parsers.py memory [行数]
+    python tests/benchmark_parsers.py engines [行数 ...]
+    python tests/benchmark_parsers.py suite [--rows 行数 ...] [--platform 平台 ...] [--format 格式 ...]
+                                            [--repeat 次数] [--save 结果.json] [--compare 基线.json]
+"""
+
+import argparse
+import json
+import multiprocessing
+import os
+import resource
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from parsers import get_parser
+from parsers.arrow_csv import arrow_available
+from parsers.base_parser import BaseBillParser, STANDARD_COLUMNS
+from parsers.probe import remove_cache_files
+from tests.statement_corpus import PLATFORMS, FORMATS, XLS_MAX_ROWS, write_statement
+
+
+ENGINE_ROWS = [10_000, 100_000, 1_000_000]
+
+SUITE_ROWS = [10_000]
+
+STAGES = ['get_parser', 'parse', 'amounts', 'dates', 'notion']
+
+
+def memory_report(df) -> dict:
+    """DataFrame 内存占用：紧凑类型之前（普通字符串列）与之后，单位字节。"""
+    plain = df.astype({col: 'str' for col in df.columns if df[col].dtype == 'category'})
+    return {
+        'before': int(plain.memory_usage(deep=True).sum()),
+        'after': int(df.memory_usage(deep=True).sum()),
+    }
+
+
+def time_parse(path: str, engine: str = None) -> tuple:
+    """解析一次文件，返回 (DataFrame, 耗时秒数)；不使用也不保留缓存。"""
+    if engine:
+        BaseBillParser.CSV_ENGINE = engine
+    remove_cache_files(path)
+    try:
+        start = time.perf_counter()
+        df = get_parser(path).parse()
+        return df, time.perf_counter() - start
+    finally:
+        remove_cache_files(path)
+        BaseBillParser.CSV_ENGINE = 'auto'
+
+
+def bench_memory(rows: int):
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        path = write_statement(tmp_dir, 'alipay', 'csv-gbk', rows)
+        df, elapsed = time_parse(path)
+
+        memory = memory_report(df)
+        print(f"rows: {len(df)}")
+        print(f"parse: {elapsed:.3f}s ({len(df) / elapsed:,.0f} rows/s)")
+        print(f"memory before: {memory['before'] / 1024 / 1024:.1f} MiB")
+        print(f"memory after:  {memory['after'] / 1024 / 1024:.1f} MiB "
+              f"({memory['after'] / memory['before']:.0%})")
+
+
+def time_read(path: str, engine: str) -> float:
+    """只读取 CSV（不做清洗），返回耗时秒数。"""
+    BaseBillParser.CSV_ENGINE = engine
+    remove_cache_files(path)
+    try:
+        parser = get_parser(path)
+        sniff = parser.locate_header()
+        start = time.perf_counter()
+        parser.read_file(sniff=sniff, header=0)
+        return time.perf_counter() - start
+    finally:
+        remove_cache_files(path)
+        BaseBillParser.CSV_ENGINE = 'auto'
+
+
+def bench_engines(row_counts: list):
+    if not arrow_available():
+        print("pyarrow is not installed; only the pandas engine is available")
+        return
+
+    print(f"{'statement':<10}{'rows':>10}  {'read pandas':>12}{'arrow':>8}  {'parse pandas':>13}{'arrow':>8}")
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        for name, fmt in [('alipay', 'csv-gbk'), ('wechat', 'csv-utf8')]:
+            for rows in row_counts:
+                path = write_statement(tmp_dir, name, fmt, rows)
+                reads = [time_read(path, engine) for engine in ('pandas', 'arrow')]
+                parses = [time_parse(path, engine)[1] for engine in ('pandas', 'arrow')]
+                os.remove(path)
+                print(f"{name:<10}{rows:>10,}  {reads[0]:>11.2f}s{reads[1]:>7.2f}s  "
+                      f"{parses[0]:>12.2f}s{parses[1]:>7.2f}s")
+
+
+def _timed(func) -> tuple:
+    """调用 func，返回 (结果, 耗时秒数)。"""
+    start = time.perf_counter()
+    result = func()
+    return result, time.perf_counter() - start
+
+
+def _mapped_frame(parser) -> object:
+    """读取原始数据并完成汇总行裁剪和列映射，即清洗金额和日期之前的数据。"""
+    file_ext = parser.file_path.lower().split('.')[-1]
+    if file_ext in ['csv', 'txt']:
+        raw = parser.read_file(sniff=parser.locate_header(), header=0)
+    else:
+        raw = parser.read_file()
+    df, _ = parser._trim_footer(raw, parser.compile_spec()['footer'])
+    parser.data = parser._drop_row_number_column(df)
+    parser.data = parser.apply_column_mapping(parser.COLUMN_MAP, STANDARD_COLUMNS)
+    if parser.COMBINE_COLUMNS:
+        parser._combine_columns()
+    return parser.data
+
+
+def _measure_statement(path: str, repeat: int) -> dict:
+    """在子进程中测量一份账单的各阶段耗时（取最快一次）和峰值 RSS。"""
+    import logging
+    logging.disable(logging.INFO)
+
+    best = {stage: float('inf') for stage in STAGES}
+    rows = 0
+    try:
+        for _ in range(repeat):
+            remove_cache_files(path)
+            parser, seconds = _timed(lambda: get_parser(path))
+            best['get_parser'] = min(best['get_parser'], seconds)
+
+            remove_cache_files(path)
+            parser = get_parser(path)
+            data, seconds = _timed(parser.parse)
+            best['parse'] = min(best['parse'], seconds)
+            rows = len(data)
+
+            # to_notion_format 使用 parse() 的结果
+            _, seconds = _timed(parser.to_notion_format)
+            best['notion'] = min(best['notion'], seconds)
+
+            mapped = _mapped_frame(get_parser(path))
+
+            parser.data = mapped.copy()
+            _, seconds = _timed(parser.clean_amount_column)
+            best['amounts'] = min(best['amounts'], seconds)
+
+            dates = mapped[parser.DATE_COLUMN]
+            _, seconds = _timed(lambda: parser.normalize_date_column(dates, parser.DATE_FORMAT))
+            best['dates'] = min(best['dates'], seconds)
+    finally:
+        remove_cache_files(path)
+
+    # Linux 上 ru_maxrss 的单位为 KiB
+    peak_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+    return {'rows': rows, 'seconds': best, 'peak_rss': peak_rss}
+
+
+def run_suite(row_counts: list, platforms: list, formats: list, repeat: int = 1) -> list:
+    """生成各平台、各格式的账单并逐个测量。
+
+    Returns:
+        结果列表，每项含 platform, format, rows, seconds（各阶段耗时）和 peak_rss（字节）
+    """
+    results = []
+    context = multiprocessing.get_context('spawn')
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        for rows in row_counts:
+            for platform in platforms:
+                for fmt in formats:
+                    if fmt == 'xls' and rows + 64 > XLS_MAX_ROWS:
+                        print(f"skip {platform} {fmt} {rows:,}: .xls holds at most {XLS_MAX_ROWS} rows")
+                        continue
+                    try:
+                        path = write_statement(tmp_dir, platform, fmt, rows)
+                    except ValueError as e:
+                        print(f"skip {platform} {fmt} {rows:,}: {e}")
+                        continue
+
+                    with ProcessPoolExecutor(max_workers=1, mp_context=context) as pool:
+                        result = pool.submit(_measure_statement, path, repeat).result()
+                    os.remove(path)
+
+                    result.update(platform=platform, format=fmt)
+                    results.append(result)
+                    print_result(result)
+    return results
+
+
+def print_header():
+    print(f"{'platform':<10}{'format':<10}{'rows':>10}"
+          + ''.join(f"{stage:>14}" for stage in STAGES) + f"{'peak RSS':>12}")
+
+
+def print_result(result: dict, baseline: dict = None):
+    """打印一行结果：各阶段的每秒行数；有基线时附带相对基线的速度比。"""
+    cells = []
+    for stage in STAGES:
+        seconds = result['seconds'][stage]
+        rate = result['rows'] / seconds if seconds > 0 else float('inf')
+        cell = f"{rate:,.0f}/s"
+        if baseline is not None:
+            cell += f" {baseline['seconds'][stage] / seconds:.2f}x" if seconds > 0 else ''
+        cells.append(f"{cell:>14}" if baseline is None else f"{cell:>20}")
+    print(f"{result['platform']:<10}{result['format']:<10}{result['rows']:>10,}"
+          + ''.join(cells) + f"{result['peak_rss'] / 1024 / 1024:>9.0f} MiB")
+
+
+def compare(results: list, baseline_path: str):
+    """与保存的基线逐项比较（倍数 > 1 表示比基线快）。"""
+    with open(baseline_path, 'r', encoding='utf-8') as f:
+        baseline = {(r['platform'], r['format'], r['rows']): r for r in json.load(f)}
+
+    print(f"\ncompared with {baseline_path} (speedup, >1 is faster):")
+    for result in results:
+        previous = baseline.get((result['platform'], result['format'], result['rows']))
+        if previous is None:
+            print(f"{result['platform']:<10}{result['format']:<10}{result['rows']:>10,}  not in baseline")
+        else:
+            print_result(result, previous)
+
+
+def bench_suite(args):
+    print_header()
+    results = run_suite(args.rows, args.platform, args.format, args.repeat)
+    if args.save:
+        with open(args.save, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=2)
+        print(f"saved {len(results)} results to {args.save}")
+    if args.compare:
+        compare(results, args.compare)
+
+
+def main():
+    import logging
+    logging.disable(logging.INFO)
+
+    parser = argparse.ArgumentParser(description="Parser benchmarks")
+    modes = parser.add_subparsers(dest='mode')
+
+    memory = modes.add_parser('memory', help="parse time and DataFrame memory")
+    memory.add_argument('rows', nargs='?', type=int, default=100_000)
+
+    engines = modes.add_parser('engines', help="pandas vs pyarrow CSV engine")
+    engines.add_argument('rows', nargs='*', type=int, default=ENGINE_ROWS)
+
+    suite = modes.add_parser('suite', help="per-stage rows/s and peak RSS")
+    suite.add_argument('--rows', nargs='+', type=int, default=SUITE_ROWS)
+    suite.add_argument('--platform', nargs='+', choices=PLATFORMS, default=PLATFORMS)
+    suite.add_argument('--format', nargs='+', choices=FORMATS, default=FORMATS)
+    suite.add_argument('--repeat', type=int, default=3, help="runs per statement, the fastest is kept")
+    suite.add_argument('--save', help="write the results to a JSON file")
+    suite.add_argument('--compare', help="compare with results saved by --save")
+
+    args = parser.parse_args()
+    if args.mode == 'engines':
+        bench_engines(args.rows)
+    elif args.mode == 'suite':
+        bench_suite(args)
+    else:
+        bench_memory(getattr(args, 'rows', 100_000))
+
+
+if __name__ == "__main__":
+    main()
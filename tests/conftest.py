@@ -0,0 +1,63 @@
+"""
+Fixtures shared by the Notion sync tests.
+
+Notion SDK 由假客户端代替（见 tests.notion_fakes），数据库使用每个测试独立的临时 SQLite 文件。
+"""
+
+import pytest
+
+import sys
+import os
+
+# 添加项目根目录到路径
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.config import Config
+from src.notion_api import NotionClient
+from src.services import notion_config
+from tests.notion_fakes import EXPENSE_DB, INCOME_DB, FakeSDK, fake_client
+
+
+@pytest.fixture
+def temp_db(tmp_path, monkeypatch):
+    """临时 SQLite 数据库，替换 src.services.database 的引擎和会话工厂。"""
+    from sqlalchemy import create_engine
+    from sqlalchemy.orm import sessionmaker
+    from src.services import database, rate_limiter
+
+    engine = create_engine(f"sqlite:///{tmp_path / 'test.sqlite'}", connect_args={"check_same_thread": False})
+    database.Base.metadata.create_all(bind=engine)
+    monkeypatch.setattr(database, "engine", engine)
+    monkeypatch.setattr(database, "SessionLocal", sessionmaker(autocommit=False, autoflush=False, bind=engine))
+    monkeypatch.setattr(rate_limiter, "engine", engine)
+    yield engine
+    engine.dispose()
+
+
+@pytest.fixture
+def single_user(monkeypatch):
+    """单用户模式配置，不限流。"""
+    monkeypatch.setattr(Config, "MULTI_TENANT_ENABLED", "false")
+    monkeypatch.setattr(Config, "NOTION_API_KEY", "secret_test")
+    monkeypatch.setattr(Config, "NOTION_INCOME_DATABASE_ID", INCOME_DB)
+    monkeypatch.setattr(Config, "NOTION_EXPENSE_DATABASE_ID", EXPENSE_DB)
+    monkeypatch.setattr(Config, "NOTION_RATE_LIMIT", 0)
+    monkeypatch.setattr(NotionClient, "_instances", {})
+
+
+@pytest.fixture
+def fake_notion(single_user, monkeypatch):
+    """NotionClient.for_user() 返回使用假 SDK 的客户端，返回假 SDK。"""
+    sdk = FakeSDK()
+    client = fake_client(sdk)
+    monkeypatch.setattr(NotionClient, "for_user", classmethod(lambda cls, user_id=None: client))
+    return sdk
+
+
+@pytest.fixture
+def multi_tenant(temp_db, monkeypatch):
+    """多租户模式配置，不限流，配置缓存为空。"""
+    monkeypatch.setattr(Config, "MULTI_TENANT_ENABLED", "true")
+    monkeypatch.setattr(Config, "NOTION_RATE_LIMIT", 0)
+    monkeypatch.setattr(NotionClient, "_instances", {})
+    monkeypatch.setattr(notion_config, "_cache", {})
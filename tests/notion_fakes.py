@@ -0,0 +1,161 @@
+"""
+Fakes shared by the Notion sync tests.
+
+假的 Notion SDK 客户端，以及构建 Notion 格式记录、错误响应和用户配置的辅助函数。
+"""
+
+import threading
+import time
+from types import SimpleNamespace
+
+import httpx
+
+import sys
+import os
+
+# 添加项目根目录到路径
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from notion_client.errors import HTTPResponseError
+
+from src.models import UserNotionConfig
+from src.notion_api import NotionClient
+from src.services.database import get_db_context
+
+
+INCOME_DB = "1" * 32
+EXPENSE_DB = "2" * 32
+
+
+def make_record(name: str, number: str = None, price: float = 10.0, kind: str = "支出") -> dict:
+    """构建 Notion 格式的账单记录。"""
+    record = {
+        "Name": {"title": [{"text": {"content": name}}]},
+        "Date": {"date": {"start": "2024-01-05"}},
+        "Price": {"number": price},
+        "Income Expense": {"select": {"name": kind}},
+    }
+    if number:
+        record["Transaction Number"] = {"rich_text": [{"text": {"content": number}}]}
+    return record
+
+
+def record_name(properties: dict) -> str:
+    """记录的名称（Name 属性的文本）。"""
+    return properties["Name"]["title"][0]["text"]["content"]
+
+
+def http_error(status: int, headers: dict = None) -> HTTPResponseError:
+    """构建 Notion 错误响应。"""
+    return HTTPResponseError(code="error", status=status, message=f"HTTP {status}",
+                             headers=httpx.Headers(headers or {}), raw_body_text="")
+
+
+class FakePages:
+    """记录 pages.create / pages.update 调用的假 SDK 端点。"""
+
+    def __init__(self):
+        self.created = []
+        self.updated = []
+        # 记录名称 -> 调用时抛出的异常
+        self.failures = {}
+        # 每次调用的耗时（秒）和同时进行的最大调用数
+        self.delay = 0
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self._lock = threading.Lock()
+
+    def _call(self, properties):
+        name = record_name(properties)
+        with self._lock:
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            if self.delay:
+                time.sleep(self.delay)
+            if name in self.failures:
+                raise self.failures[name]
+        finally:
+            with self._lock:
+                self.in_flight -= 1
+        return name
+
+    def create(self, parent, properties):
+        name = self._call(properties)
+        with self._lock:
+            page_id = f"page-{len(self.created) + 1}"
+            self.created.append((page_id, name))
+        return {"id": page_id}
+
+    def update(self, page_id, properties):
+        name = self._call(properties)
+        with self._lock:
+            self.updated.append((page_id, name, properties["Price"]["number"]))
+        return {"id": page_id}
+
+
+class FakeUsers:
+    """假的 users 端点，error 不为 None 时 users.me 抛出该异常。"""
+
+    def __init__(self):
+        self.calls = 0
+        self.error = None
+
+    def me(self):
+        self.calls += 1
+        if self.error is not None:
+            raise self.error
+        return {"object": "user", "name": "测试集成"}
+
+
+class FakeDatabases:
+    """假的 databases 端点，记录检索过的数据库ID。"""
+
+    def __init__(self):
+        self.retrieved = []
+        # 数据库ID -> 检索时抛出的异常
+        self.failures = {}
+
+    def retrieve(self, database_id):
+        self.retrieved.append(database_id)
+        if database_id in self.failures:
+            raise self.failures[database_id]
+        return {"object": "database", "id": database_id, "title": [{"text": {"content": "账单"}}]}
+
+
+class FakeSDK:
+    """假的 notion_client.Client。"""
+
+    def __init__(self, auth: str = "secret_test"):
+        self.options = SimpleNamespace(auth=auth)
+        self.pages = FakePages()
+        self.users = FakeUsers()
+        self.databases = FakeDatabases()
+
+
+def fake_client(sdk: FakeSDK, user_id: int = None) -> NotionClient:
+    """使用假 SDK 的 NotionClient。"""
+    client = NotionClient.__new__(NotionClient)
+    client.user_id = user_id
+    client.client = sdk
+    client.income_db = INCOME_DB
+    client.expense_db = EXPENSE_DB
+    return client
+
+
+def save_user_config(user_id: int, api_key: str = "secret_user", **fields):
+    """创建或修改用户的 Notion 配置。"""
+    with get_db_context() as db:
+        config = db.query(UserNotionConfig).filter(UserNotionConfig.user_id == user_id).first()
+        if config is None:
+            config = UserNotionConfig(user_id=user_id, notion_income_database_id=INCOME_DB,
+                                      notion_expense_database_id=EXPENSE_DB)
+            db.add(config)
+        config.notion_api_key = api_key
+        for name, value in fields.items():
+            setattr(config, name, value)
+
+
+def delete_user_config(user_id: int):
+    with get_db_context() as db:
+        db.query(UserNotionConfig).filter(UserNotionConfig.user_id == user_id).delete()
@@ -0,0 +1,282 @@
+#!/usr/bin/env python3
+"""
+Synthetic statement corpus.
+
+Writes Alipay, WeChat Pay and UnionPay statements laid out like the real
+exports: the preamble lines above the header (account, period, record
+counts and totals, notes), the header row, the requested number of
+transactions and the summary rows below them. Each statement can be
+written as CSV (GBK or UTF-8), XLS or XLSX. The same arguments always
+produce the same statement, so benchmark runs are comparable.
+
+UnionPay card statements have neither preamble nor summary rows.
+Writing .xls requires the xlwt package.
+
+用法：
+    python tests/statement_corpus.py 输出目录 [--rows 行数] [--platform 平台 ...] [--format 格式 ...]
+"""
+
+import argparse
+import csv
+import io
+import os
+import random
+from datetime import datetime, timedelta
+
+
+PLATFORMS = ['alipay', 'wechat', 'unionpay']
+FORMATS = ['csv-gbk', 'csv-utf8', 'xlsx', 'xls']
+
+# 每个平台真实导出的编码，用于默认格式
+NATIVE_FORMATS = {'alipay': 'csv-gbk', 'wechat': 'csv-utf8', 'unionpay': 'csv-gbk'}
+
+# .xls 工作表的最大行数
+XLS_MAX_ROWS = 65536
+
+START_TIME = datetime(2024, 1, 1)
+
+ALIPAY_HEADER = ['交易时间', '交易分类', '交易对方', '对方账号', '商品说明', '收/支', '金额',
+                 '收/付款方式', '交易状态', '交易订单号', '商家订单号', '备注']
+WECHAT_HEADER = ['交易时间', '交易类型', '交易对方', '商品', '收/支', '金额(元)', '支付方式',
+                 '当前状态', '交易单号', '商户单号', '备注']
+UNIONPAY_HEADER = ['交易日期', '交易时间', '交易类型', '交易商户', '交易金额', '入账金额',
+                   '卡类型', '交易状态', '备注']
+
+ALIPAY_CATEGORIES = ['餐饮美食', '日用百货', '交通出行', '转账红包', '充值缴费', '投资理财', '服饰装扮']
+ALIPAY_METHODS = ['余额宝', '花呗', '招商银行储蓄卡(1234)', '余额', '']
+WECHAT_TYPES = ['商户消费', '扫二维码付款', '微信红包', '转账', '零钱提现', '二维码收款']
+WECHAT_METHODS = ['零钱', '招商银行(1234)', '零钱通', '/']
+UNIONPAY_TYPES = ['消费', '退货', '取现', '转账']
+
+
+def _timestamps(rows: int, rng: random.Random) -> list:
+    """按时间倒序生成交易时间（与真实导出相同，最新的交易在最前）。"""
+    seconds = sorted((rng.randrange(365 * 24 * 3600) for _ in range(rows)), reverse=True)
+    return [START_TIME + timedelta(seconds=s) for s in seconds]
+
+
+def _alipay(rows: int, rng: random.Random) -> tuple:
+    """生成支付宝账单的说明行、表头、交易行和汇总行。"""
+    times = _timestamps(rows, rng)
+    data, totals = [], {'收入': [0, 0], '支出': [0, 0], '不计收支': [0, 0]}
+    for i, time in enumerate(times):
+        direction = rng.choices(['支出', '收入', '不计收支'], weights=[8, 1, 1])[0]
+        cents = rng.randrange(1, 500000)
+        totals[direction][0] += 1
+        totals[direction][1] += cents
+        data.append([
+            time.strftime('%Y-%m-%d %H:%M:%S'), rng.choice(ALIPAY_CATEGORIES),
+            f"商户{rng.randrange(5000)}", f"m{rng.randrange(10 ** 6)}@example.com",
+            f"商品{rng.randrange(20000)}", direction, f"{cents / 100:.2f}", rng.choice(ALIPAY_METHODS),
+            rng.choice(['交易成功', '交易成功', '交易成功', '退款成功', '交易关闭']),
+            f"{2024000000000000000 + i}\t", f"M{rng.randrange(10 ** 12):012d}\t",
+            '' if rng.random() < 0.9 else '备注',
+        ])
+
+    period = f"起始时间：[{times[-1]:%Y-%m-%d %H:%M:%S}]    终止时间：[{times[0]:%Y-%m-%d %H:%M:%S}]" \
+        if times else "起始时间：[]    终止时间：[]"
+    preamble = [
+        '------------------------------------------------------------------------------------',
+        '导出信息：',
+        '姓名：张三',
+        '支付宝账户：zhangsan@example.com',
+        period,
+        '导出交易类型：[全部]',
+        '导出时间：[2025-01-01 10:00:00]',
+        f'共{rows}笔记录',
+        *(f"{name}：{count}笔 {cents / 100:.2f}元" for name, (count, cents) in totals.items()),
+        '',
+        '特别提示：',
+        '1.本回单内容可表明支付宝受理了用户的支付申请，付款人应根据实际收款结果等确认交易状态；',
+        '2.因统计逻辑不同，明细金额直接累加后，可能会和下方统计金额不一致，请以实际交易金额为准；',
+        '3.禁止修改本回单内容，一经修改，本回单即刻作废；',
+        '4.本回单不构成支付宝对任何一方承担付款责任的依据。',
+        '',
+        '------------------------支付宝（中国）网络技术有限公司  电子客户回单------------------------',
+    ]
+    footer = [[f"汇总：收入{totals['收入'][1] / 100:.2f}元，支出{totals['支出'][1] / 100:.2f}元"]]
+    return [[line] if line else [] for line in preamble], ALIPAY_HEADER, data, footer
+
+
+def _wechat(rows: int, rng: random.Random) -> tuple:
+    """生成微信支付账单的说明行、表头、交易行和汇总行。"""
+    times = _timestamps(rows, rng)
+    data, totals = [], {'收入': [0, 0], '支出': [0, 0], '/': [0, 0]}
+    for i, time in enumerate(times):
+        direction = rng.choices(['支出', '收入', '/'], weights=[8, 1, 1])[0]
+        cents = rng.randrange(1, 2000000)
+        totals[direction][0] += 1
+        totals[direction][1] += cents
+        data.append([
+            time.strftime('%Y-%m-%d %H:%M:%S'), rng.choice(WECHAT_TYPES), f"对方{rng.randrange(3000)}",
+            '/' if rng.random() < 0.2 else f"商品{rng.randrange(20000)}", direction, f"¥{cents / 100:,.2f}",
+            rng.choice(WECHAT_METHODS), rng.choice(['支付成功', '已存入零钱', '已转账', '已全额退款']),
+            f"{4200000000000000000000000000 + i}\t", f"{rng.randrange(10 ** 12)}\t", '/',
+        ])
+
+    period = f"起始时间：[{times[-1]:%Y-%m-%d %H:%M:%S}] 终止时间：[{times[0]:%Y-%m-%d %H:%M:%S}]" \
+        if times else "起始时间：[] 终止时间：[]"
+    names = {'收入': '收入', '支出': '支出', '/': '中性交易'}
+    preamble = [
+        '微信支付账单明细',
+        '微信昵称：[张三]',
+        period,
+        '导出类型：[全部]',
+        '导出时间：[2025-01-01 10:00:00]',
+        '',
+        f'共{rows}笔记录',
+        *(f"{names[key]}：{count}笔 {cents / 100:.2f}元" for key, (count, cents) in totals.items()),
+        '注：',
+        '1. 充值/提现/理财通购买/零钱通存取/信用卡还款等交易，将计入中性交易',
+        '2. 本明细仅展示当前账单中的交易，不包括已删除的记录',
+        '3. 本明细仅供个人对账使用',
+        '',
+        '----------------------微信支付账单明细列表--------------------',
+    ]
+    footer = [[f"共计：{rows}笔"]]
+    width = len(WECHAT_HEADER)
+    return [[line] + [''] * (width - 3) for line in preamble], WECHAT_HEADER, data, footer
+
+
+def _unionpay(rows: int, rng: random.Random) -> tuple:
+    """生成银联账单的表头和交易行（没有说明行和汇总行）。"""
+    data = []
+    for time in _timestamps(rows, rng):
+        amount = rng.randrange(1, 1000000) / 100
+        data.append([
+            time.strftime('%Y/%m/%d'), time.strftime('%H:%M:%S'), rng.choice(UNIONPAY_TYPES),
+            f"中国银联商户{rng.randrange(2000)}", f"{amount:.2f}", f"{amount:.2f}",
+            rng.choice(['借记卡', '信用卡']), '成功', '',
+        ])
+    return [], UNIONPAY_HEADER, data, []
+
+
+GENERATORS = {'alipay': _alipay, 'wechat': _wechat, 'unionpay': _unionpay}
+
+
+def statement_rows(platform: str, rows: int, seed: int = 0) -> tuple:
+    """生成一份账单的内容。
+
+    Args:
+        platform: alipay, wechat 或 unionpay
+        rows: 交易行数
+        seed: 随机种子
+
+    Returns:
+        (说明行, 表头, 交易行, 汇总行)，每行为单元格字符串列表
+    """
+    if platform not in GENERATORS:
+        raise ValueError(f"Unknown platform: {platform}, expected one of {PLATFORMS}")
+    return GENERATORS[platform](rows, random.Random(f"{platform}:{seed}"))
+
+
+def _write_csv(path: str, platform: str, lines: list, encoding: str):
+    """写入 CSV：支付宝使用 CRLF 换行，与真实导出相同。"""
+    terminator = '\r\n' if platform == 'alipay' else '\n'
+    buffer = io.StringIO()
+    writer = csv.writer(buffer, lineterminator=terminator)
+    for line in lines:
+        writer.writerow(line)
+    text = buffer.getvalue()
+    if encoding == 'gbk':
+        # GBK 没有半角 ¥，GBK 导出使用全角 ￥
+        text = text.replace('¥', '￥')
+    with open(path, 'wb') as f:
+        f.write(text.encode(encoding))
+
+
+def _excel_value(value: str) -> str:
+    """Excel 导出的交易号没有 CSV 中防止科学计数法的制表符。"""
+    return value.strip('\t')
+
+
+def _write_xlsx(path: str, lines: list):
+    from openpyxl import Workbook
+
+    workbook = Workbook(write_only=True)
+    sheet = workbook.create_sheet()
+    for line in lines:
+        sheet.append([_excel_value(value) if value != '' else None for value in line])
+    workbook.save(path)
+
+
+def _write_xls(path: str, lines: list):
+    try:
+        import xlwt
+    except ImportError:
+        raise ValueError("Writing .xls statements requires xlwt: pip install xlwt")
+    if len(lines) > XLS_MAX_ROWS:
+        raise ValueError(f".xls sheets hold at most {XLS_MAX_ROWS} rows, statement has {len(lines)}")
+
+    workbook = xlwt.Workbook(encoding='utf-8')
+    sheet = workbook.add_sheet('Sheet1')
+    for r, line in enumerate(lines):
+        for c, value in enumerate(line):
+            if value != '':
+                sheet.write(r, c, _excel_value(value))
+    workbook.save(path)
+
+
+def write_statement(directory: str, platform: str, fmt: str = None, rows: int = 1000,
+                    seed: int = 0, footer: bool = True) -> str:
+    """写入一份合成账单。
+
+    Args:
+        directory: 输出目录
+        platform: alipay, wechat 或 unionpay
+        fmt: csv-gbk, csv-utf8, xlsx 或 xls，默认为平台真实导出的格式
+        rows: 交易行数
+        seed: 随机种子
+        footer: 是否写入汇总行
+
+    Returns:
+        账单文件路径，文件名为 {platform}_{rows}.{扩展名}（UTF-8 CSV 为 _utf8.csv）
+    """
+    fmt = fmt or NATIVE_FORMATS[platform]
+    if fmt not in FORMATS:
+        raise ValueError(f"Unknown format: {fmt}, expected one of {FORMATS}")
+
+    preamble, header, data, summary = statement_rows(platform, rows, seed)
+    if platform == 'alipay' and fmt.startswith('csv'):
+        # 支付宝 CSV 的表头和交易行以逗号结尾
+        header = header + ['']
+        data = [row + [''] for row in data]
+    lines = preamble + [header] + data
+    if footer:
+        lines += summary
+
+    os.makedirs(directory, exist_ok=True)
+    suffix = {'csv-gbk': '.csv', 'csv-utf8': '_utf8.csv', 'xlsx': '.xlsx', 'xls': '.xls'}[fmt]
+    path = os.path.join(directory, f"{platform}_{rows}{suffix}")
+
+    if fmt == 'csv-gbk':
+        _write_csv(path, platform, lines, 'gbk')
+    elif fmt == 'csv-utf8':
+        # 微信支付导出带 BOM
+        _write_csv(path, platform, lines, 'utf-8-sig' if platform == 'wechat' else 'utf-8')
+    elif fmt == 'xlsx':
+        _write_xlsx(path, lines)
+    else:
+        _write_xls(path, lines)
+    return path
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Write synthetic bill statements")
+    parser.add_argument('directory')
+    parser.add_argument('--rows', type=int, default=10_000)
+    parser.add_argument('--platform', nargs='+', choices=PLATFORMS, default=PLATFORMS)
+    parser.add_argument('--format', nargs='+', choices=FORMATS, default=FORMATS)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    for platform in args.platform:
+        for fmt in args.format:
+            try:
+                print(write_statement(args.directory, platform, fmt, args.rows, args.seed))
+            except ValueError as e:
+                print(f"{platform} {fmt}: {e}")
+
+
+if __name__ == "__main__":
+    main()
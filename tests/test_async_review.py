@@ -0,0 +1,165 @@
+"""
+Async Notion client and review service tests.
+
+测试内容：
+1. 异步 Notion 客户端
+2. 异步复盘服务的创建与查询
+3. 异步限流钩子
+"""
+
+import pytest
+import asyncio
+import threading
+from datetime import date
+
+import httpx
+
+import sys
+import os
+
+# 添加项目根目录到路径
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src import notion_api
+from src.notion_api import AsyncNotionClient, NotionClient
+from src.review_service import AsyncReviewService, ReviewService
+from src.services import rate_limiter
+from tests.notion_fakes import EXPENSE_DB, INCOME_DB
+
+
+@pytest.fixture
+def notion_requests(monkeypatch):
+    """异步客户端使用模拟的 Notion API，返回收到的请求列表。
+
+    数据库查询返回一个以数据库ID为页面ID的页面，创建页面返回ID为 5...5 的页面。
+    """
+    requests = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        requests.append(request)
+        parts = request.url.path.split("/")
+        if request.method == "POST" and parts[2] == "pages":
+            return httpx.Response(200, json={"object": "page", "id": "5" * 32})
+        if request.method == "POST" and parts[-1] == "query":
+            return httpx.Response(200, json={
+                "object": "list", "results": [{"object": "page", "id": parts[3]}],
+                "has_more": False, "next_cursor": None
+            })
+        if parts[2] == "databases":
+            return httpx.Response(200, json={"object": "database", "id": parts[3],
+                                             "title": [{"text": {"content": "账单"}}], "properties": {}})
+        return httpx.Response(404, json={"object": "error", "status": 404, "code": "object_not_found",
+                                         "message": "not found"})
+
+    monkeypatch.setattr(notion_api, "shared_async_transport", lambda: httpx.MockTransport(handler))
+    return requests
+
+
+class RecordingLimiter:
+    """记录预约线程的限流器。"""
+
+    def __init__(self, uses_shared_store: bool):
+        self.uses_shared_store = uses_shared_store
+        self.threads = []
+
+    def reserve(self, key: str) -> float:
+        self.threads.append(threading.current_thread())
+        return 0.0
+
+
+class TestAsyncNotion:
+    """异步 Notion 客户端和复盘服务测试。"""
+
+    def test_async_client_for_user(self, single_user, notion_requests):
+        """异步客户端使用用户共享客户端的配置。"""
+        async def main():
+            client = await AsyncNotionClient.for_user()
+            await client.retrieve_database(INCOME_DB)
+            return client
+
+        client = asyncio.run(main())
+        assert (client.income_db, client.expense_db) == (INCOME_DB, EXPENSE_DB)
+        assert notion_requests[0].headers["authorization"] == "Bearer secret_test"
+
+    def test_async_client_methods(self, single_user, notion_requests):
+        """异步客户端的查询和创建页面方法发送对应的请求。"""
+        import json
+
+        async def main():
+            client = await AsyncNotionClient.for_user()
+            query = await client.query_database(INCOME_DB, {"page_size": 10})
+            page = await client.create_page(EXPENSE_DB, {"Name": {"title": []}})
+            return query, page
+
+        query, page = asyncio.run(main())
+        assert query["results"][0]["id"] == INCOME_DB
+        assert page["id"] == "5" * 32
+        assert [(request.method, request.url.path) for request in notion_requests] == [
+            ("POST", f"/v1/databases/{INCOME_DB}/query"), ("POST", "/v1/pages")
+        ]
+        assert json.loads(notion_requests[0].content) == {"page_size": 10}
+        assert json.loads(notion_requests[1].content) == {
+            "parent": {"database_id": EXPENSE_DB}, "properties": {"Name": {"title": []}}
+        }
+
+    def test_sync_methods_not_overridden(self):
+        """异步复盘服务的协程不覆盖 ReviewService 的同步方法。"""
+        coroutines = [name for name, member in vars(AsyncReviewService).items()
+                      if asyncio.iscoroutinefunction(member)]
+        assert "afetch_transactions" in coroutines
+        assert [name for name in coroutines if hasattr(ReviewService, name)] == []
+
+    def test_create_reads_config_off_the_loop(self, single_user, monkeypatch):
+        """create() 在线程中读取配置，复盘数据库ID在创建时解析。"""
+        monkeypatch.setenv("NOTION_MONTHLY_REVIEW_DB", "3" * 32)
+        monkeypatch.delenv("NOTION_YEARLY_REVIEW_DB", raising=False)
+        threads = []
+        for_user = NotionClient.for_user.__func__
+
+        def recording_for_user(cls, user_id=None):
+            threads.append(threading.current_thread())
+            return for_user(cls, user_id)
+
+        monkeypatch.setattr(NotionClient, "for_user", classmethod(recording_for_user))
+
+        service = asyncio.run(AsyncReviewService.create())
+        assert threads and threading.main_thread() not in threads
+
+        monkeypatch.setenv("NOTION_MONTHLY_REVIEW_DB", "4" * 32)
+        assert service.get_review_database_id("monthly") == "3" * 32
+        assert service.get_review_database_id("yearly") is None
+
+    def test_fetch_transactions(self, single_user, notion_requests):
+        """收入和支出数据库的查询结果按同步版本的顺序返回。"""
+        async def main():
+            service = await AsyncReviewService.create()
+            return await service.afetch_transactions(date(2024, 1, 1), date(2024, 1, 31))
+
+        transactions = asyncio.run(main())
+        assert [(item["id"], item["type"]) for item in transactions] == [
+            (INCOME_DB, "income"), (EXPENSE_DB, "expense")
+        ]
+        queries = [request for request in notion_requests if request.url.path.endswith("/query")]
+        assert len(queries) == 2
+
+    def test_batched_fetch_skips_failed_database(self, single_user, notion_requests):
+        """分批查询时无法访问的数据库只记录警告。"""
+        async def main():
+            service = await AsyncReviewService.create()
+            service.notion_client.expense_db = "bad-id"
+            return await service.afetch_transactions(date(2024, 1, 1), date(2024, 6, 30))
+
+        transactions = asyncio.run(main())
+        assert {item["type"] for item in transactions} == {"income"}
+        assert len(transactions) == len(AsyncReviewService._date_batches(date(2024, 1, 1), date(2024, 6, 30)))
+
+    @pytest.mark.parametrize("uses_shared_store", [True, False])
+    def test_rate_limit_hook_reserves_off_the_loop(self, monkeypatch, uses_shared_store):
+        """使用数据库中的令牌桶时在线程中预约。"""
+        limiter = RecordingLimiter(uses_shared_store)
+        monkeypatch.setattr(rate_limiter, "get_rate_limiter", lambda: limiter)
+        request = httpx.Request("GET", "https://api.notion.com/v1/users/me",
+                                headers={"Authorization": "Bearer secret_test"})
+
+        asyncio.run(rate_limiter.rate_limit_request_async(request))
+        assert (limiter.threads[0] is threading.main_thread()) != uses_shared_store
@@ -0,0 +1,113 @@
+"""
+Concurrent batch import tests.
+
+测试内容：
+1. 自适应并发
+2. 批量导入的结果与并发数
+"""
+
+import pytest
+import threading
+import time
+
+import sys
+import os
+
+# 添加项目根目录到路径
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src import notion_api
+from src.notion_api import NotionClient
+from tests.notion_fakes import http_error, make_record
+
+
+class TestAdaptiveConcurrency:
+    """自适应并发和批量导入测试。"""
+
+    def test_limit_grows_after_fast_window(self):
+        """一个窗口的请求都顺利完成后并发数加一，不超过上限。"""
+        concurrency = notion_api.AdaptiveConcurrency(4)
+        assert concurrency.limit == 2
+
+        for _ in range(2):
+            concurrency.release(concurrency.acquire())
+        assert concurrency.limit == 3
+        for _ in range(3):
+            concurrency.release(concurrency.acquire())
+        assert concurrency.limit == 4
+        for _ in range(4):
+            concurrency.release(concurrency.acquire())
+        assert concurrency.limit == 4
+
+    def test_limit_halves_once_per_window(self):
+        """限流时并发数减半，同一窗口内的多次限流只减一次。"""
+        concurrency = notion_api.AdaptiveConcurrency(8)
+        started = [concurrency.acquire() for _ in range(4)]
+        for start in started:
+            concurrency.release(start, rate_limited=True)
+        assert concurrency.limit == 2
+
+        concurrency.release(concurrency.acquire(), rate_limited=True)
+        assert concurrency.limit == 2
+        concurrency.release(concurrency.acquire(), rate_limited=True)
+        assert concurrency.limit == 1
+
+    def test_slow_request_is_congestion(self):
+        concurrency = notion_api.AdaptiveConcurrency(4, slow_seconds=0.01)
+        started = [concurrency.acquire() for _ in range(2)]
+        time.sleep(0.02)
+        for start in started:
+            concurrency.release(start)
+        assert concurrency.limit == 1
+
+    def test_acquire_waits_at_limit(self):
+        concurrency = notion_api.AdaptiveConcurrency(2)
+        started = concurrency.acquire()
+        acquired = threading.Event()
+
+        def acquire():
+            concurrency.release(concurrency.acquire())
+            acquired.set()
+
+        thread = threading.Thread(target=acquire)
+        thread.start()
+        assert not acquired.wait(0.1)
+        concurrency.release(started)
+        assert acquired.wait(1)
+        thread.join()
+
+    def test_batch_import_results_in_order(self, single_user, fake_notion):
+        """结果按输入顺序返回，失败的记录注明错误及能否重试。"""
+        client = NotionClient.for_user()
+        fake_notion.pages.failures["坏账"] = http_error(400)
+        fake_notion.pages.failures["超时"] = http_error(504)
+        records = [make_record("面馆"), make_record("坏账"), make_record("超时"),
+                   {"Name": make_record("缺字段")["Name"]}, make_record("工资")]
+
+        result = client.batch_import(records, page_ids=[None, None, None, None, "page-9"], workers=3)
+
+        assert (result["imported"], result["updated"], result["skipped"]) == (1, 1, 3)
+        assert result["pages"] == ["page-1", None, None, None, "page-9"]
+        assert [error is None for error in result["errors"]] == [True, False, False, False, True]
+        assert result["fatal"] == [False, True, False, True, False]
+
+    def test_batch_import_concurrency_bounded(self, single_user, fake_notion):
+        client = NotionClient.for_user()
+        fake_notion.pages.delay = 0.01
+
+        result = client.batch_import([make_record(f"记录{i}") for i in range(40)], workers=4)
+
+        assert result["imported"] == 40
+        assert 1 < fake_notion.pages.max_in_flight <= 4
+
+    def test_batch_import_auth_error_marks_unverified(self, single_user, fake_notion, monkeypatch):
+        """密钥无效时清除连接验证结果。"""
+        from src.services import notion_verification
+
+        marked = []
+        monkeypatch.setattr(notion_verification, "mark_unverified", marked.append)
+        fake_notion.pages.failures["面馆"] = http_error(401)
+
+        result = NotionClient.for_user().batch_import([make_record("面馆")])
+        assert result["fatal"] == [True]
+        assert marked == [None]
@@ -0,0 +1,194 @@
+"""
+Incremental import watermark tests.
+
+测试内容：
+1. 按水位过滤解析结果
+2. 水位的推进与保存
+3. 批量导入时的水位
+"""
+
+import pytest
+import numpy as np
+import pandas as pd
+
+import sys
+import os
+
+# 添加项目根目录到路径
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.importer import import_bills
+from src.services import notion_verification
+from src.services.import_watermark import IncrementalWatermark
+from tests.notion_fakes import make_record
+
+
+WATERMARK = "2024-03-31T12:00:00"
+
+ALIPAY_HEADER = "交易时间,交易分类,交易对方,对方账号,商品说明,收/支,金额,收/付款方式,交易状态,交易订单号,商家订单号,备注,"
+
+
+def record_at(start: str, number: str = None) -> dict:
+    """交易时间为 start 的 Notion 格式记录。"""
+    record = make_record("面馆", number)
+    record["Date"] = {"date": {"start": start, "time_zone": "Asia/Shanghai"}}
+    return record
+
+
+def saved_watermark(platform: str = "Alipay") -> IncrementalWatermark:
+    """重新从数据库加载的水位。"""
+    return IncrementalWatermark(None, platform)
+
+
+def set_watermark(time: str, ids: list = (), platform: str = "Alipay"):
+    """将水位保存为 time 时刻、交易号为 ids。"""
+    watermark = IncrementalWatermark(None, platform)
+    watermark.observe([record_at(time, number) for number in ids] or [record_at(time)])
+    watermark.save()
+
+
+def write_alipay(path, rows: list) -> str:
+    """写入支付宝账单，rows 为 (交易时间, 交易号) 列表。"""
+    lines = ["支付宝交易记录明细查询", ALIPAY_HEADER] + [
+        f"{time},餐饮美食,面馆,a@x.com,牛肉面,支出,25.00,余额宝,交易成功,{number}\t,M{number}\t,,"
+        for time, number in rows
+    ]
+    path.write_bytes(("\r\n".join(lines) + "\r\n").encode("gbk"))
+    return str(path)
+
+
+class TestMask:
+    """按水位过滤解析结果测试。"""
+
+    def frame(self, rows: list, ids: bool = True) -> pd.DataFrame:
+        """rows 为 (交易时间, 交易号) 列表的解析结果。"""
+        df = pd.DataFrame({"transaction_time": [time for time, _ in rows]})
+        if ids:
+            df["transaction_id"] = [number for _, number in rows]
+        return df
+
+    def test_without_watermark_keeps_all(self, temp_db):
+        watermark = IncrementalWatermark(None, "Alipay")
+        assert watermark.mask(self.frame([("2020-01-01T00:00:00", "A")])).tolist() == [True]
+        assert watermark.filtered == 0
+
+    def test_before_at_and_after(self, temp_db):
+        """早于水位的交易过滤，晚于水位的保留，水位时刻按交易号区分。"""
+        set_watermark(WATERMARK, ["A"])
+        watermark = saved_watermark()
+        df = self.frame([
+            ("2024-03-01T08:00:00", "X"),
+            (WATERMARK, "A"),
+            (WATERMARK, "B"),
+            ("2024-04-01T08:00:00", "Y"),
+            (None, "Z"),
+        ])
+
+        assert watermark.mask(df).tolist() == [False, False, True, True, True]
+        assert watermark.filtered == 2
+
+    def test_ids_are_stripped(self, temp_db):
+        set_watermark(WATERMARK, ["A"])
+        assert saved_watermark().mask(self.frame([(WATERMARK, " A ")])).tolist() == [False]
+
+    def test_rows_without_transaction_id(self, temp_db):
+        """没有交易号的平台（银联）保留水位时刻的全部交易。"""
+        set_watermark(WATERMARK, platform="UnionPay")
+        watermark = saved_watermark("UnionPay")
+        df = self.frame([("2024-03-01T08:00:00", None), (WATERMARK, None), ("2024-04-01T08:00:00", None)],
+                        ids=False)
+
+        assert watermark.mask(df).tolist() == [False, True, True]
+
+    def test_mask_type(self, temp_db):
+        set_watermark(WATERMARK, ["A"])
+        keep = saved_watermark().mask(self.frame([(WATERMARK, "B")]))
+        assert isinstance(keep, np.ndarray) and keep.dtype == bool
+
+
+class TestSave:
+    """水位的推进与保存测试。"""
+
+    def test_advances_to_latest(self, temp_db):
+        watermark = IncrementalWatermark(None, "Alipay")
+        watermark.observe([record_at("2024-01-05T12:00:00", "A"), record_at(WATERMARK, "B"),
+                           record_at(WATERMARK, "C"), record_at("2024-02-01T00:00:00", "D")])
+        watermark.save()
+
+        saved = saved_watermark()
+        assert (saved.time, saved.ids) == (WATERMARK, {"B", "C"})
+
+    def test_never_moves_backwards(self, temp_db):
+        set_watermark(WATERMARK, ["A"])
+
+        watermark = saved_watermark()
+        watermark.observe([record_at("2024-01-05T12:00:00", "X")])
+        watermark.save()
+
+        saved = saved_watermark()
+        assert (saved.time, saved.ids) == (WATERMARK, {"A"})
+
+    def test_same_time_merges_ids(self, temp_db):
+        set_watermark(WATERMARK, ["A"])
+        set_watermark(WATERMARK, ["B"])
+        assert saved_watermark().ids == {"A", "B"}
+
+    def test_per_user_and_platform(self, temp_db):
+        set_watermark(WATERMARK, ["A"])
+        assert saved_watermark("WeChat").time is None
+        assert IncrementalWatermark(1, "Alipay").time is None
+
+
+class TestBatchImport:
+    """批量导入时的水位测试。"""
+
+    @pytest.fixture
+    def importing(self, temp_db, fake_notion, monkeypatch):
+        """导入到假 Notion，返回假 SDK。"""
+        monkeypatch.setattr(notion_verification, "_verified", {})
+        return fake_notion
+
+    @pytest.fixture
+    def statements(self, tmp_path):
+        """一月至三月的账单和四月的账单。"""
+        early = write_alipay(tmp_path / "early.csv", [
+            ("2024-01-05 12:30:00", "2024010500001"),
+            ("2024-02-10 09:00:00", "2024021000002"),
+            ("2024-03-20 18:00:00", "2024032000003"),
+        ])
+        april = write_alipay(tmp_path / "april.csv", [
+            ("2024-04-02 12:30:00", "2024040200004"),
+            ("2024-04-15 09:00:00", "2024041500005"),
+        ])
+        return early, april
+
+    def test_file_order_does_not_filter_batch(self, importing, statements):
+        """同一批中较新的账单先导入时，较早账单的交易同样导入。"""
+        early, april = statements
+
+        results = import_bills([april, early], platform="alipay", workers=1)
+
+        assert [r["success"] for r in results] == [True, True]
+        assert [r["imported"] for r in results] == [2, 3]
+        assert [r["filtered"] for r in results] == [0, 0]
+        assert len(importing.pages.created) == 5
+        assert saved_watermark().time == "2024-04-15T09:00:00"
+
+    def test_next_batch_is_filtered(self, importing, statements):
+        early, april = statements
+        import_bills([april, early], platform="alipay", workers=1)
+
+        results = import_bills([early, april], platform="alipay", workers=1)
+        assert [r["filtered"] for r in results] == [3, 2]
+        assert [r["total_records"] for r in results] == [0, 0]
+        assert len(importing.pages.created) == 5
+
+    def test_backfill_ignores_watermark(self, importing, statements):
+        """backfill 时不按水位过滤，已导入的交易由交易索引跳过。"""
+        early, april = statements
+        import_bills([april], platform="alipay", workers=1)
+
+        assert import_bills([early], platform="alipay", workers=1)[0]["filtered"] == 3
+        result = import_bills([early], platform="alipay", workers=1, backfill=True)[0]
+        assert (result["filtered"], result["imported"]) == (0, 3)
+        assert saved_watermark().time == "2024-04-15T09:00:00"
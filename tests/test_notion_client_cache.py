@@ -0,0 +1,90 @@
+"""
+Shared NotionClient tests.
+
+测试内容：
+1. 按用户共享实例
+2. 配置修改与删除后的失效
+"""
+
+import pytest
+import threading
+
+import sys
+import os
+
+# 添加项目根目录到路径
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.config import Config
+from src.notion_api import NotionClient
+from src.services import notion_config
+from tests.notion_fakes import delete_user_config, save_user_config
+
+
+class TestSharedClient:
+    """按用户共享的 Notion 客户端测试。"""
+
+    def test_shared_per_user(self, multi_tenant):
+        save_user_config(1, "secret_one")
+        save_user_config(2, "secret_two")
+
+        first = NotionClient.for_user(1)
+        assert NotionClient.for_user(1) is first
+        other = NotionClient.for_user(2)
+        assert other is not first
+        assert (first.client.options.auth, other.client.options.auth) == ("secret_one", "secret_two")
+
+    def test_replaced_after_config_change(self, multi_tenant):
+        """配置修改并失效缓存后创建新的客户端。"""
+        save_user_config(1, "secret_old")
+        old = NotionClient.for_user(1)
+
+        save_user_config(1, "secret_new")
+        # 缓存失效前继续使用缓存的配置
+        assert NotionClient.for_user(1) is old
+
+        notion_config.invalidate(1)
+        new = NotionClient.for_user(1)
+        assert new is not old
+        assert new.client.options.auth == "secret_new"
+        assert NotionClient.for_user(1) is new
+
+    def test_discarded_after_config_deleted(self, multi_tenant):
+        save_user_config(1)
+        NotionClient.for_user(1)
+
+        delete_user_config(1)
+        notion_config.invalidate(1)
+        with pytest.raises(ValueError):
+            NotionClient.for_user(1)
+        assert 1 not in NotionClient._instances
+
+    def test_invalid_config_is_rejected(self, multi_tenant):
+        save_user_config(1, notion_income_database_id="short")
+        with pytest.raises(ValueError):
+            NotionClient.for_user(1)
+
+        with pytest.raises(ValueError):
+            NotionClient.for_user(None)
+
+    def test_single_user_config_change(self, single_user, monkeypatch):
+        client = NotionClient.for_user()
+        assert NotionClient.for_user() is client
+
+        monkeypatch.setattr(Config, "NOTION_API_KEY", "secret_changed")
+        changed = NotionClient.for_user()
+        assert changed is not client
+        assert changed.client.options.auth == "secret_changed"
+
+    def test_shared_across_threads(self, multi_tenant):
+        """多个线程同时获取时最终共用同一个客户端。"""
+        save_user_config(1)
+        clients = []
+        threads = [threading.Thread(target=lambda: clients.append(NotionClient.for_user(1))) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert len(clients) == 8
+        assert NotionClient.for_user(1) in clients
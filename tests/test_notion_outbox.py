@@ -0,0 +1,186 @@
+"""
+Notion outbox tests.
+
+测试内容：
+1. 发送与索引
+2. 退避重试与放弃
+3. 领取与租约过期
+4. 同一交易发送中时的合并
+"""
+
+import pytest
+from datetime import datetime, timedelta
+
+import sys
+import os
+
+# 添加项目根目录到路径
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.config import Config
+from src.models import NotionOutbox
+from src.services import notion_outbox
+from src.services.database import get_db_context
+from src.services.transaction_index import TransactionIndex
+from tests.notion_fakes import http_error, make_record
+
+
+def enqueue(records: list, platform: str = "alipay") -> dict:
+    """按已导入交易索引分类后写入发件箱，返回分类结果。"""
+    plan = TransactionIndex(None, platform).classify(records)
+    notion_outbox.enqueue(None, platform, plan)
+    return plan
+
+
+def outbox_rows() -> list:
+    """发件箱中的全部记录：(交易键, 状态, 发送次数, 页面ID)。"""
+    with get_db_context() as db:
+        return [
+            (row.transaction_key, row.status, row.attempts, row.notion_page_id)
+            for row in db.query(NotionOutbox).order_by(NotionOutbox.id)
+        ]
+
+
+def make_due():
+    """将所有待发送记录设为已到期。"""
+    with get_db_context() as db:
+        db.query(NotionOutbox).update({"next_attempt_at": datetime.utcnow() - timedelta(seconds=1)})
+
+
+class TestOutbox:
+    """Notion 发件箱测试。"""
+
+    def test_drain_sends_and_indexes(self, temp_db, fake_notion):
+        """发送成功的记录从发件箱删除并写入索引，再次导入时不再发送。"""
+        records = [make_record("面馆", "T1"), make_record("工资", "T2", kind="收入")]
+        enqueue(records)
+
+        result = notion_outbox.drain()
+        assert result == {"imported": 2, "updated": 0, "skipped": 0, "dead": 0}
+        assert outbox_rows() == []
+        assert [name for _, name in fake_notion.pages.created] == ["面馆", "工资"]
+
+        plan = enqueue(records)
+        assert plan["unchanged"] == 2
+        assert outbox_rows() == []
+
+    def test_changed_record_updates_page(self, temp_db, fake_notion):
+        """内容变化的交易更新原页面。"""
+        enqueue([make_record("面馆", "T1")])
+        notion_outbox.drain()
+        enqueue([make_record("面馆", "T1", price=12.0)])
+
+        assert notion_outbox.drain()["updated"] == 1
+        assert fake_notion.pages.updated == [("page-1", "面馆", 12.0)]
+
+    def test_failure_backs_off_then_dead(self, temp_db, fake_notion, monkeypatch):
+        """临时错误按退避时间重试，超过最大发送次数后放弃，可重新排入。"""
+        monkeypatch.setattr(Config, "NOTION_OUTBOX_MAX_ATTEMPTS", 2)
+        fake_notion.pages.failures["面馆"] = http_error(502)
+        enqueue([make_record("面馆", "T1")])
+
+        assert notion_outbox.drain()["skipped"] == 1
+        assert outbox_rows() == [("id:T1", "pending", 1, None)]
+        with get_db_context() as db:
+            delay = db.query(NotionOutbox).one().next_attempt_at - datetime.utcnow()
+        assert timedelta(seconds=notion_outbox.RETRY_BASE_SECONDS - 5) < delay \
+            <= timedelta(seconds=notion_outbox.RETRY_BASE_SECONDS)
+
+        # 未到重试时间的记录不会被领取
+        assert notion_outbox.drain() == {"imported": 0, "updated": 0, "skipped": 0, "dead": 0}
+
+        make_due()
+        assert notion_outbox.drain()["dead"] == 1
+        assert outbox_rows() == [("id:T1", "dead", 2, None)]
+
+        del fake_notion.pages.failures["面馆"]
+        assert notion_outbox.retry_dead(None) == 1
+        assert notion_outbox.drain()["imported"] == 1
+        assert outbox_rows() == []
+
+    def test_retry_delay_is_capped(self):
+        assert notion_outbox._retry_delay(1) == timedelta(seconds=notion_outbox.RETRY_BASE_SECONDS)
+        assert notion_outbox._retry_delay(2) == timedelta(seconds=notion_outbox.RETRY_BASE_SECONDS * 2)
+        assert notion_outbox._retry_delay(30) == timedelta(seconds=notion_outbox.RETRY_MAX_SECONDS)
+
+    def test_fatal_error_is_dead_at_once(self, temp_db, fake_notion):
+        """重试无法解决的错误直接放弃。"""
+        fake_notion.pages.failures["面馆"] = http_error(400)
+        enqueue([make_record("面馆", "T1")])
+
+        assert notion_outbox.drain()["dead"] == 1
+        assert outbox_rows() == [("id:T1", "dead", 1, None)]
+
+    def test_claim_is_exclusive(self, temp_db, fake_notion):
+        enqueue([make_record("面馆", "T1")])
+
+        assert len(notion_outbox._claim("worker-a")) == 1
+        assert notion_outbox._claim("worker-b") == []
+
+    def test_expired_lease_is_reclaimed_and_not_sent_twice(self, temp_db, fake_notion):
+        """租约过期的记录由其他线程重新领取；原线程发送完成后不修改该记录，记录只创建一个页面。"""
+        enqueue([make_record("面馆", "T1")])
+        entries = notion_outbox._claim("worker-a")
+        with get_db_context() as db:
+            db.query(NotionOutbox).update({
+                "claimed_at": datetime.utcnow() - timedelta(seconds=notion_outbox.CLAIM_LEASE_SECONDS + 1)
+            })
+        assert len(notion_outbox._claim("worker-b")) == 1
+
+        # worker-a 发送完成，但记录已属于 worker-b
+        notion_outbox._send(None, entries, "worker-a")
+        assert outbox_rows() == [("id:T1", "sending", 0, None)]
+
+        # worker-b 领取时从索引得知交易已发送
+        with get_db_context() as db:
+            db.query(NotionOutbox).update({"claimed_at": datetime.utcnow() - timedelta(days=1)})
+        assert notion_outbox.drain(worker_id="worker-b")["imported"] == 0
+        assert outbox_rows() == []
+        assert len(fake_notion.pages.created) == 1
+
+    def test_enqueue_while_sending_supersedes(self, temp_db, fake_notion):
+        """同一交易的旧记录发送中时，新记录等待其完成后更新其创建的页面。"""
+        enqueue([make_record("面馆", "T1")])
+        entries = notion_outbox._claim("worker-a")
+
+        enqueue([make_record("面馆", "T1", price=12.0)])
+        assert outbox_rows() == [("id:T1", "sending", 0, None), ("id:T1", "superseded", 0, None)]
+        # 等待中的记录不会被领取
+        assert notion_outbox._claim("worker-b") == []
+
+        notion_outbox._send(None, entries, "worker-a")
+        assert outbox_rows() == [("id:T1", "pending", 0, "page-1")]
+
+        assert notion_outbox.drain()["updated"] == 1
+        assert fake_notion.pages.created == [("page-1", "面馆")]
+        assert fake_notion.pages.updated == [("page-1", "面馆", 12.0)]
+
+    def test_superseded_record_replaces_failed_send(self, temp_db, fake_notion):
+        """旧记录发送失败时由等待中的新记录取代。"""
+        fake_notion.pages.failures["面馆"] = http_error(502)
+        enqueue([make_record("面馆", "T1")])
+        entries = notion_outbox._claim("worker-a")
+        enqueue([make_record("面馆", "T1", price=12.0)])
+
+        notion_outbox._send(None, entries, "worker-a")
+        assert outbox_rows() == [("id:T1", "pending", 0, None)]
+
+        del fake_notion.pages.failures["面馆"]
+        assert notion_outbox.drain()["imported"] == 1
+        assert len(fake_notion.pages.created) == 1
+
+    def test_orphaned_superseded_record_is_released(self, temp_db, fake_notion):
+        """旧记录已不在发送中的等待记录在领取时改为待发送。"""
+        enqueue([make_record("面馆", "T1")])
+        with get_db_context() as db:
+            db.query(NotionOutbox).update({"status": "superseded"})
+
+        assert notion_outbox.drain()["imported"] == 1
+        assert outbox_rows() == []
+
+    def test_outbox_status_counts_waiting_records(self, temp_db, fake_notion):
+        enqueue([make_record("面馆", "T1")])
+        notion_outbox._claim("worker-a")
+        enqueue([make_record("面馆", "T1", price=12.0)])
+
+        assert notion_outbox.outbox_status(None)["pending"] == 2
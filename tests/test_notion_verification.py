@@ -0,0 +1,108 @@
+"""
+Notion connection verification tests.
+
+测试内容：
+1. 验证结果缓存
+2. 撤销验证状态
+3. 多租户模式下保存验证结果
+"""
+
+import pytest
+
+import sys
+import os
+
+# 添加项目根目录到路径
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src import notion_api
+from src.notion_api import NotionClient
+from src.services import notion_config, notion_verification
+from tests.notion_fakes import EXPENSE_DB, INCOME_DB, FakeSDK, fake_client, http_error, save_user_config
+
+
+@pytest.fixture
+def no_verified(monkeypatch):
+    """清空进程内缓存的验证结果。"""
+    monkeypatch.setattr(notion_verification, "_verified", {})
+
+
+class TestVerification:
+    """连接验证缓存测试。"""
+
+    def test_success_is_cached(self, single_user, fake_notion, no_verified):
+        """验证成功后不再请求 Notion，force 时重新检查。"""
+        result = notion_verification.verify()
+        assert (result["success"], result["cached"]) == (True, False)
+        assert result["checks"]["api_key"]["name"] == "测试集成"
+        assert sorted(fake_notion.databases.retrieved) == sorted([INCOME_DB, EXPENSE_DB])
+
+        assert notion_verification.verify() == {"success": True, "cached": True, "checks": None}
+        assert fake_notion.users.calls == 1
+
+        assert notion_verification.verify(force=True)["cached"] is False
+        assert fake_notion.users.calls == 2
+
+    def test_mark_unverified(self, single_user, fake_notion, no_verified):
+        notion_verification.verify()
+        notion_verification.mark_unverified(None)
+
+        assert notion_verification.verify()["cached"] is False
+        assert fake_notion.users.calls == 2
+
+    def test_config_change_requires_verification(self, single_user, fake_notion, no_verified):
+        """密钥变化后重新验证。"""
+        notion_verification.verify()
+        fake_notion.options.auth = "secret_changed"
+
+        assert notion_verification.verify()["cached"] is False
+
+    def test_fatal_failure_revokes_verification(self, single_user, fake_notion, no_verified):
+        """配置错误撤销验证状态，临时错误不撤销。"""
+        notion_verification.verify()
+
+        fake_notion.databases.failures[INCOME_DB] = http_error(502)
+        result = notion_verification.verify(force=True)
+        assert result["success"] is False
+        assert result["checks"]["income_db"]["kind"] == notion_api.RETRYABLE
+        assert notion_verification.verify()["cached"] is True
+
+        fake_notion.users.error = http_error(401)
+        assert notion_verification.verify(force=True)["success"] is False
+        del fake_notion.databases.failures[INCOME_DB]
+        fake_notion.users.error = None
+        assert notion_verification.verify()["cached"] is False
+
+    def test_extra_databases_do_not_affect_success(self, single_user, fake_notion, no_verified):
+        review_db = "3" * 32
+        fake_notion.databases.failures[review_db] = http_error(404)
+
+        result = notion_verification.verify(extra_databases={"monthly_review_db": review_db, "yearly_review_db": None})
+        assert result["success"] is True
+        assert result["checks"]["monthly_review_db"]["ok"] is False
+        assert "yearly_review_db" not in result["checks"]
+
+    def test_verify_connection(self, single_user, fake_notion, no_verified):
+        client = NotionClient.for_user()
+        assert client.verify_connection() is True
+
+        fake_notion.users.error = http_error(401)
+        assert client.verify_connection(force=True) is False
+
+    def test_result_persisted_per_user(self, multi_tenant, no_verified, monkeypatch):
+        """多租户模式下验证结果保存在用户配置中，其他进程无需重新验证。"""
+        save_user_config(1)
+        sdk = FakeSDK()
+        client = fake_client(sdk, user_id=1)
+
+        notion_verification.verify(1, client=client)
+        assert notion_config.get_user_notion_config(1)["is_verified"] is True
+
+        # 其他进程：没有进程内缓存
+        monkeypatch.setattr(notion_verification, "_verified", {})
+        assert notion_verification.verify(1, client=client)["cached"] is True
+        assert sdk.users.calls == 1
+
+        notion_verification.mark_unverified(1)
+        assert notion_config.get_user_notion_config(1)["is_verified"] is False
+        assert notion_verification.verify(1, client=client)["cached"] is False
@@ -0,0 +1,708 @@
+"""
+Bill parser tests.
+
+测试内容：
+1. 编码与表头嗅探
+2. 各平台账单解析
+3. 探测结果缓存
+4. Notion 格式转换
+5. 日期标准化
+6. 金额解析（整数分）
+7. 分块流式解析
+8. Excel 流式读取
+9. 声明式解析规格
+10. 平台识别评分
+11. 多文件并行解析
+12. 标准化结果磁盘缓存
+13. 部分解析预览
+14. 紧凑数据类型
+15. Arrow CSV 引擎
+16. ZIP 压缩包账单
+17. 合成账单语料
+"""
+
+import pytest
+import pandas as pd
+
+import sys
+import os
+
+# 添加项目根目录到路径
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from parsers import (
+    get_parser, detect_platform, register_parser, PARSERS, parse_many, result_frame, result_records
+)
+from parsers.base_parser import (
+    BaseBillParser,
+    sniff_file, sniff_prefix, parse_amount_cents, compile_column_map, resolve_columns, count_lines,
+    HEADER_CACHE_SIZE
+)
+from parsers.alipay_parser import AlipayParser
+from parsers.wechat_parser import WeChatParser
+from parsers.unionpay_parser import UnionPayParser
+from parsers.probe import load_probe, remove_cache_files
+from parsers.excel_reader import iter_sheet_rows
+from parsers.archive import check_archive, decrypt_archive, list_members
+from tests.statement_corpus import PLATFORMS, FORMATS, write_statement
+
+
+ALIPAY_PREAMBLE = [
+    "------------------------------------------------------------------------------------",
+    "导出信息：",
+    "姓名：张三",
+    "支付宝账户：zhangsan@example.com",
+    "------------------------支付宝（中国）网络技术有限公司  电子客户回单------------------------",
+]
+ALIPAY_HEADER = "交易时间,交易分类,交易对方,对方账号,商品说明,收/支,金额,收/付款方式,交易状态,交易订单号,商家订单号,备注,"
+ALIPAY_ROWS = [
+    "2024-01-05 12:30:00,餐饮美食,面馆,a@x.com,牛肉面,支出,25.00,余额宝,交易成功,2024010500001\t,M0001\t,,",
+    "2024-01-06 09:00:00,转账红包,李四,b@x.com,转账,收入,100.00,余额,交易成功,2024010600002\t,M0002\t,,",
+]
+
+WECHAT_PREAMBLE = [
+    "微信支付账单明细,,,,,,,,",
+    "微信昵称：[张三],,,,,,,,",
+    "----------------------微信支付账单明细列表--------------------,,,,,,,,",
+]
+WECHAT_HEADER = "交易时间,交易类型,交易对方,商品,收/支,金额(元),支付方式,当前状态,交易单号,商户单号,备注"
+WECHAT_ROWS = [
+    "2024-02-01 08:00:00,商户消费,便利店,\"饮料,零食\",支出,¥12.50,零钱,支付成功,42000001\t,10001\t,/",
+    "2024-02-02 20:15:00,微信红包,王五,/,收入,\"¥1,200.00\",/,已存入零钱,42000002\t,10002\t,/",
+]
+
+
+@pytest.fixture
+def alipay_csv(tmp_path):
+    """GBK 编码、CRLF 换行的支付宝账单。"""
+    path = tmp_path / "alipay.csv"
+    content = "\r\n".join(ALIPAY_PREAMBLE + [ALIPAY_HEADER] + ALIPAY_ROWS) + "\r\n"
+    path.write_bytes(content.encode("gbk"))
+    return str(path)
+
+
+@pytest.fixture
+def wechat_csv(tmp_path):
+    """带 BOM 的 UTF-8 微信支付账单。"""
+    path = tmp_path / "wechat.csv"
+    content = "\n".join(WECHAT_PREAMBLE + [WECHAT_HEADER] + WECHAT_ROWS) + "\n"
+    path.write_bytes(content.encode("utf-8-sig"))
+    return str(path)
+
+
+@pytest.fixture
+def alipay_xlsx(tmp_path):
+    """带说明行的支付宝 Excel 账单。"""
+    from openpyxl import Workbook
+
+    workbook = Workbook()
+    sheet = workbook.active
+    for line in ALIPAY_PREAMBLE:
+        sheet.append([line])
+    sheet.append(ALIPAY_HEADER.split(",")[:-1])
+    for row in ALIPAY_ROWS:
+        sheet.append([value.strip() for value in row.split(",")[:-1]])
+    path = tmp_path / "alipay.xlsx"
+    workbook.save(path)
+    return str(path)
+
+
+class TestSniffing:
+    """编码与表头嗅探测试。"""
+
+    def test_sniff_gbk_header_offset(self, alipay_csv):
+        """GBK 文件应返回表头所在行号及其字节偏移。"""
+        sniff = sniff_file(alipay_csv, ["交易时间", "交易分类"])
+
+        assert sniff["encoding"] == "gbk"
+        assert sniff["header_line"] == len(ALIPAY_PREAMBLE)
+        with open(alipay_csv, "rb") as f:
+            f.seek(sniff["header_offset"])
+            assert f.readline().decode("gbk").startswith("交易时间")
+
+    def test_sniff_utf8_bom(self, wechat_csv):
+        """BOM 应决定编码，且偏移量包含 BOM 长度。"""
+        sniff = sniff_file(wechat_csv, ["交易时间"])
+
+        assert sniff["encoding"] == "utf-8"
+        assert sniff["bom"] == 3
+        with open(wechat_csv, "rb") as f:
+            f.seek(sniff["header_offset"])
+            assert f.readline().decode("utf-8").startswith("交易时间")
+
+    def test_sniff_truncated_multibyte_prefix(self):
+        """前缀在多字节字符中间截断时不应误判编码。"""
+        data = "支付宝交易记录明细查询".encode("gbk")
+
+        sniff = sniff_prefix(data[:5], at_eof=False)
+
+        assert sniff["encoding"] == "gbk"
+
+    def test_sniff_header_not_found(self, alipay_csv):
+        """找不到表头关键字时返回 None。"""
+        sniff = sniff_file(alipay_csv, ["不存在的列"])
+
+        assert sniff["header_line"] is None
+        assert sniff["header_offset"] is None
+
+
+class TestParsing:
+    """账单解析测试。"""
+
+    def test_detect_and_parse_alipay(self, alipay_csv):
+        """支付宝账单应被识别并正确解析金额和日期。"""
+        parser = get_parser(alipay_csv)
+
+        assert isinstance(parser, AlipayParser)
+        df = parser.parse()
+        assert len(df) == 2
+        assert df["amount"].tolist() == [25.0, 100.0]
+        assert df["transaction_time"].iloc[0] == "2024-01-05T12:30:00"
+
+    def test_detect_and_parse_wechat(self, wechat_csv):
+        """微信账单应被识别，带千分位和货币符号的金额应被清洗。"""
+        parser = get_parser(wechat_csv)
+
+        assert isinstance(parser, WeChatParser)
+        df = parser.parse()
+        assert len(df) == 2
+        assert df["amount"].tolist() == [12.5, 1200.0]
+        assert df["item_name"].iloc[0] == "饮料,零食"
+
+
+class TestProbeCache:
+    """文件探测结果缓存测试。"""
+
+    def test_probe_saved_and_reused(self, alipay_csv, monkeypatch):
+        """首次检测写入探测缓存，之后的解析不再检测编码和表头。"""
+        get_parser(alipay_csv).parse()
+
+        probe = load_probe(alipay_csv)
+        assert probe["parser"] == "AlipayParser"
+        assert probe["encoding"] == "gbk"
+        assert probe["header_line"] == len(ALIPAY_PREAMBLE)
+        assert probe["row_count"] == 2
+
+        def fail_sniff(*args, **kwargs):
+            raise AssertionError("detection should be skipped")
+
+        monkeypatch.setattr("parsers.base_parser.read_prefix", fail_sniff)
+        monkeypatch.setattr("parsers.detection.sniff_file", fail_sniff)
+        parser = get_parser(alipay_csv)
+        assert isinstance(parser, AlipayParser)
+        assert len(parser.parse()) == 2
+
+    def test_probe_invalidated_on_change(self, alipay_csv):
+        """文件内容变化后缓存失效。"""
+        get_parser(alipay_csv)
+        assert load_probe(alipay_csv) is not None
+
+        with open(alipay_csv, "ab") as f:
+            f.write(ALIPAY_ROWS[0].encode("gbk") + b"\r\n")
+
+        assert load_probe(alipay_csv) is None
+
+
+class TestNotionFormat:
+    """Notion 数据格式转换测试。"""
+
+    def test_alipay_payload(self, alipay_csv):
+        """按列构建的记录应与逐行转换的格式一致。"""
+        records = get_parser(alipay_csv).to_notion_format()
+
+        assert len(records) == 2
+        assert records[0] == {
+            'Name': {'title': [{'text': {'content': '牛肉面'}}]},
+            'Price': {'number': 25.0},
+            'Category': {'select': {'name': '餐饮美食'}},
+            'Date': {'date': {'start': '2024-01-05T12:30:00', 'time_zone': 'Asia/Shanghai'}},
+            'Counterparty': {'rich_text': [{'text': {'content': '面馆'}}]},
+            'Remarks': {'rich_text': [{'text': {'content': ''}}]},
+            'Income Expense': {'select': {'name': '支出'}},
+            'Merchant Tracking Number': {'rich_text': [{'text': {'content': 'M0001\t'}}]},
+            'Transaction Number': {'rich_text': [{'text': {'content': '2024010500001'}}]},
+            'Payment Method': {'select': {'name': '余额宝'}},
+            'From': {'select': {'name': 'Alipay'}}
+        }
+
+    def test_neutral_records_skipped(self, tmp_path):
+        """不计收支的记录不应导出。"""
+        path = tmp_path / "alipay.csv"
+        neutral = ALIPAY_ROWS[0].replace("支出", "不计收支")
+        content = "\r\n".join(ALIPAY_PREAMBLE + [ALIPAY_HEADER, neutral] + ALIPAY_ROWS) + "\r\n"
+        path.write_bytes(content.encode("gbk"))
+
+        records = get_parser(str(path)).to_notion_format()
+
+        assert [r['Income Expense']['select']['name'] for r in records] == ['支出', '收入']
+
+    def test_row_filter(self, alipay_csv):
+        """行过滤条件在转换前应用于每个解析块。"""
+        def after_jan_5(df):
+            return (df['transaction_time'] > '2024-01-05T12:30:00').to_numpy()
+
+        chunks = list(get_parser(alipay_csv).iter_notion_format(chunksize=1, row_filter=after_jan_5))
+
+        assert [len(records) for records in chunks] == [0, 1]
+        assert chunks[1][0]['Transaction Number']['rich_text'][0]['text']['content'] == '2024010600002'
+
+
+class TestDateNormalization:
+    """日期列标准化测试。"""
+
+    def test_infers_dominant_format(self, alipay_csv):
+        """应推断主要格式，不匹配的行回退到逐个格式尝试。"""
+        parser = AlipayParser(alipay_csv)
+        series = pd.Series(['2024/01/05 12:30', '2024/01/06 08:00', '01/07/2024', None, '无效日期'])
+
+        result = parser.normalize_date_column(series, '%Y-%m-%d %H:%M:%S')
+
+        assert result.iloc[:3].tolist() == ['2024-01-05T12:30:00', '2024-01-06T08:00:00', '2024-01-07T00:00:00']
+        assert pd.isna(result.iloc[3])
+        assert result.iloc[4] == '无效日期'
+        assert parser.get_probe()['date_format'] == '%Y/%m/%d %H:%M'
+
+
+class TestAmountCents:
+    """金额解析为整数分测试。"""
+
+    def test_parse_amount_strings(self):
+        """货币符号、千分位、符号和小数位应精确解析为分。"""
+        series = pd.Series(['¥12.50', '￥1,234,567.8', '-12.3', '+5', '.5', '12.', '1e3', 'abc', '', None])
+
+        result = parse_amount_cents(series)
+
+        assert result.iloc[:7].tolist() == [1250, 123456780, 1230, 500, 50, 1200, 100000]
+        assert result.iloc[7:].isna().all()
+
+    def test_cents_sum_is_exact(self, wechat_csv):
+        """整数分求和不应有浮点误差。"""
+        df = get_parser(wechat_csv).parse()
+
+        assert df["amount_cents"].tolist() == [1250, 120000]
+        assert df["amount_cents"].sum() == 121250
+
+
+class TestParseIter:
+    """分块流式解析测试。"""
+
+    def test_chunks_match_full_parse(self, alipay_csv):
+        """逐块转换的记录应与整体转换一致，且不保留已解析的数据。"""
+        full = get_parser(alipay_csv).to_notion_format()
+
+        parser = get_parser(alipay_csv)
+        chunks = list(parser.iter_notion_format(chunksize=1))
+
+        assert [len(chunk) for chunk in chunks] == [1, 1]
+        assert [r for chunk in chunks for r in chunk] == full
+        assert parser.data is None
+
+    def test_stops_at_summary_row(self, tmp_path):
+        """遇到汇总行后不再读取后续数据块。"""
+        path = tmp_path / "wechat.csv"
+        rows = WECHAT_ROWS + ["共计2笔记录,,,,,,,,,,", WECHAT_ROWS[0]]
+        content = "\n".join(WECHAT_PREAMBLE + [WECHAT_HEADER] + rows) + "\n"
+        path.write_bytes(content.encode("utf-8"))
+
+        chunks = list(get_parser(str(path)).parse_iter(chunksize=2))
+
+        assert [len(chunk) for chunk in chunks] == [2]
+        assert load_probe(str(path))["row_count"] == 2
+
+
+class TestExcelReader:
+    """Excel 流式读取测试。"""
+
+    def test_parse_alipay_xlsx(self, alipay_xlsx):
+        """应定位到真正的表头行，不把表头当作数据。"""
+        parser = get_parser(alipay_xlsx)
+
+        assert isinstance(parser, AlipayParser)
+        df = parser.parse()
+        assert df["amount"].tolist() == [25.0, 100.0]
+        assert df["transaction_id"].astype(str).tolist() == ["2024010500001", "2024010600002"]
+        assert load_probe(alipay_xlsx)["header_row"] == len(ALIPAY_PREAMBLE)
+
+    def test_row_limit(self, alipay_xlsx):
+        """超过行数限制时应报错而不是继续读取。"""
+        with pytest.raises(ValueError, match="exceeds limits"):
+            list(iter_sheet_rows(alipay_xlsx, max_rows=3))
+
+
+class TestParserSpec:
+    """声明式解析规格测试。"""
+
+    def test_resolve_columns(self):
+        """精确匹配优先，其次按别名子串匹配；同一标准列只取第一列，结果被缓存。"""
+        compiled = compile_column_map(WeChatParser.COLUMN_MAP)
+        columns = ["交易时间", " 金额(元)\x00", "交易对方名称", "对方", "其他"]
+
+        rename, kept = resolve_columns(compiled, columns, ["transaction_time", "amount", "counterparty"])
+
+        assert rename == {"交易时间": "transaction_time", " 金额(元)\x00": "amount", "交易对方名称": "counterparty"}
+        assert kept == ["transaction_time", "amount", "counterparty"]
+        assert len(compiled["headers"]) == 1
+
+    def test_header_cache_bounded(self):
+        """表头缓存只保留最近使用的 HEADER_CACHE_SIZE 种表头。"""
+        compiled = compile_column_map(WeChatParser.COLUMN_MAP)
+        first = ["交易时间", "金额(元)", "列0"]
+        resolve_columns(compiled, first, ["transaction_time"])
+
+        for i in range(1, HEADER_CACHE_SIZE + 10):
+            resolve_columns(compiled, ["交易时间", "金额(元)", f"列{i}"], ["transaction_time"])
+            # 反复使用的表头不被淘汰
+            resolve_columns(compiled, first, ["transaction_time"])
+
+        assert len(compiled["headers"]) == HEADER_CACHE_SIZE
+        assert (tuple(first), ("transaction_time",)) in compiled["headers"]
+
+    def test_row_number_column_dropped(self, tmp_path):
+        """微信账单开头的序号列被去掉，整个文件按第一块数据判断一次。"""
+        path = tmp_path / "wechat.csv"
+        rows = [f"{i},{row}" for i, row in enumerate(WECHAT_ROWS * 2, start=1)]
+        content = "\n".join(WECHAT_PREAMBLE + ["," + WECHAT_HEADER] + rows) + "\n"
+        path.write_bytes(content.encode("utf-8"))
+
+        parser = WeChatParser(str(path))
+        chunks = list(parser.parse_iter(chunksize=2))
+
+        assert parser._row_number_column is True
+        assert [chunk["transaction_id"].astype(str).tolist() for chunk in chunks] == [["42000001", "42000002"]] * 2
+        assert WeChatParser(str(path)).parse()["transaction_time"].iloc[0] == "2024-02-01T08:00:00"
+
+    def test_row_number_column_opt_in(self, tmp_path):
+        """未声明 ROW_NUMBER_COLUMN 的平台不丢弃数字第一列，如支付宝的交易订单号。"""
+        path = tmp_path / "alipay.csv"
+        header = ALIPAY_HEADER.split(",")
+        header.insert(0, header.pop(9))
+        lines = []
+        for row in ALIPAY_ROWS:
+            values = row.split(",")
+            values.insert(0, values.pop(9).strip())
+            lines.append(",".join(values))
+        content = "\r\n".join(ALIPAY_PREAMBLE + [",".join(header)] + lines) + "\r\n"
+        path.write_bytes(content.encode("gbk"))
+
+        df = AlipayParser(str(path)).parse()
+
+        assert df["transaction_id"].astype(str).tolist() == ["2024010500001", "2024010600002"]
+
+    def test_unionpay_combines_date_and_time(self, tmp_path):
+        """银联账单的日期和时间列应合并为完整时间。"""
+        path = tmp_path / "unionpay.csv"
+        content = (
+            "交易日期,交易时间,交易类型,交易商户,交易金额,入账金额,卡类型,交易状态,备注\n"
+            "2024/03/01,08:15:30,消费,中国银联商户,18.80,18.80,借记卡,成功,\n"
+        )
+        path.write_bytes(content.encode("gbk"))
+
+        df = UnionPayParser(str(path)).parse()
+
+        assert df["transaction_time"].tolist() == ["2024-03-01T08:15:30"]
+        assert "transaction_hour" not in df.columns
+
+
+class TestDetection:
+    """平台识别评分测试。"""
+
+    def test_ranked_candidates(self, tmp_path):
+        """备注中出现其他平台关键字时，表头匹配的平台应排在前面。"""
+        path = tmp_path / "unionpay.csv"
+        content = (
+            "交易日期,交易时间,交易类型,交易商户,交易金额,入账金额,卡类型,交易状态,备注\n"
+            "2024/03/01,08:15:30,消费,超市,18.80,18.80,借记卡,成功,转入支付宝账户\n"
+        )
+        path.write_bytes(content.encode("gbk"))
+
+        candidates = detect_platform(str(path))
+
+        assert [c["parser"] for c in candidates] == [UnionPayParser, AlipayParser]
+        assert candidates[0]["score"] > candidates[1]["score"]
+        assert isinstance(get_parser(str(path)), UnionPayParser)
+
+    def test_registered_parser_detected(self, tmp_path, monkeypatch):
+        """注册的解析器应参与识别。"""
+        class BankParser(BaseBillParser):
+            DETECT_KEYWORDS = ["示例银行"]
+
+            def get_platform(self):
+                return "Bank"
+
+            def _build_notion_columns(self, df):
+                return {}
+
+        monkeypatch.setattr("parsers.PARSERS", list(PARSERS))
+        monkeypatch.setattr("parsers._detector", None)
+        register_parser(BankParser)
+        path = tmp_path / "bank.csv"
+        path.write_text("示例银行交易明细\n日期,金额\n2024-01-01,1.00\n", encoding="utf-8")
+
+        assert isinstance(get_parser(str(path)), BankParser)
+
+
+class TestParseMany:
+    """多文件并行解析测试。"""
+
+    def test_results_in_order_with_errors_isolated(self, alipay_csv, wechat_csv, tmp_path):
+        """结果按输入顺序返回，单个文件失败不影响其他文件。"""
+        broken = tmp_path / "broken.csv"
+        broken.write_text("无法识别的内容\n", encoding="utf-8")
+
+        results = parse_many([alipay_csv, str(broken), wechat_csv], workers=2)
+
+        assert [r["success"] for r in results] == [True, False, True]
+        assert [r["platform"] for r in results] == ["Alipay", None, "WeChatPay"]
+        assert results[1]["error"]
+
+    def test_workers_are_spawned(self, alipay_csv, wechat_csv, monkeypatch):
+        """工作进程以 spawn 方式启动，不复制调用进程（如 Web 服务）的线程状态。"""
+        import parsers.parallel
+        from concurrent.futures import ProcessPoolExecutor
+
+        contexts = []
+
+        class RecordingExecutor(ProcessPoolExecutor):
+            def __init__(self, *args, **kwargs):
+                contexts.append(kwargs.get("mp_context"))
+                super().__init__(*args, **kwargs)
+
+        monkeypatch.setattr(parsers.parallel, "ProcessPoolExecutor", RecordingExecutor)
+        results = parse_many([alipay_csv, wechat_csv], workers=2)
+
+        assert all(r["success"] for r in results)
+        assert [context.get_start_method() for context in contexts] == ["spawn"]
+
+    def test_columnar_result_roundtrip(self, wechat_csv):
+        """列式结果还原后应与直接解析一致。"""
+        result = parse_many([wechat_csv], workers=1)[0]
+
+        parser = get_parser(wechat_csv)
+        expected = parser.parse().reset_index(drop=True)
+        pd.testing.assert_frame_equal(result_frame(result), expected)
+        assert result_records(result) == parser.to_notion_format()
+
+
+class TestNormalizedStore:
+    """标准化结果磁盘缓存测试。"""
+
+    def test_second_parse_uses_cache(self, alipay_csv, monkeypatch):
+        """同一文件再次解析时直接读取缓存，不再解析。"""
+        expected = get_parser(alipay_csv).parse()
+
+        def fail_process(*args, **kwargs):
+            raise AssertionError("parsing should be skipped")
+
+        monkeypatch.setattr(AlipayParser, "_process_chunk", fail_process)
+        cached = get_parser(alipay_csv).parse()
+        pd.testing.assert_frame_equal(cached, expected.reset_index(drop=True))
+        chunks = list(get_parser(alipay_csv).parse_iter(chunksize=1))
+        assert len(chunks) == 2
+
+    def test_cache_invalidated_by_parser_version(self, alipay_csv, monkeypatch):
+        """解析器代码变化后缓存失效。"""
+        parser = get_parser(alipay_csv)
+        parser.parse()
+        assert parser.load_normalized() is not None
+
+        monkeypatch.setattr("parsers.store._code_version", "changed")
+
+        assert get_parser(alipay_csv).load_normalized() is None
+
+
+class TestPreview:
+    """部分解析预览测试。"""
+
+    def test_preview_parses_first_rows(self, tmp_path):
+        """预览只解析前几行，总行数由行计数得到。"""
+        path = tmp_path / "alipay_large.csv"
+        content = "\r\n".join(ALIPAY_PREAMBLE + [ALIPAY_HEADER] + ALIPAY_ROWS * 500) + "\r\n"
+        path.write_bytes(content.encode("gbk"))
+
+        preview = get_parser(str(path)).preview(3)
+        assert preview["total_rows"] == 1000
+        assert preview["exact"] is False
+        expected = get_parser(str(path)).parse().head(3)
+        pd.testing.assert_frame_equal(preview["data"], expected)
+
+        # 完整解析后行数记录在探测缓存中
+        preview = get_parser(str(path)).preview(3)
+        assert preview["total_rows"] == 1000
+        assert preview["exact"] is True
+
+    def test_preview_does_not_hash_new_file(self, tmp_path, monkeypatch):
+        """首次预览不计算文件内容哈希；完整解析后预览读取缓存。"""
+        import parsers.base_parser
+
+        path = tmp_path / "alipay_large.csv"
+        content = "\r\n".join(ALIPAY_PREAMBLE + [ALIPAY_HEADER] + ALIPAY_ROWS * 500) + "\r\n"
+        path.write_bytes(content.encode("gbk"))
+        calls = []
+        original = parsers.base_parser.content_hash
+        monkeypatch.setattr(parsers.base_parser, "content_hash",
+                            lambda file_path: calls.append(file_path) or original(file_path))
+
+        get_parser(str(path)).preview(1)
+        assert calls == []
+
+        expected = get_parser(str(path)).parse()
+        assert len(calls) == 1
+
+        def fail_process(self, df):
+            raise AssertionError("parsing should be skipped")
+
+        monkeypatch.setattr(AlipayParser, "_process_chunk", fail_process)
+        preview = get_parser(str(path)).preview(1)
+        assert len(calls) == 1
+        pd.testing.assert_frame_equal(preview["data"], expected.head(1))
+        assert preview["total_rows"] == len(expected)
+
+    def test_count_lines_estimate(self, tmp_path):
+        """超过扫描上限的文件按已扫描部分估算行数。"""
+        path = tmp_path / "lines.txt"
+        path.write_bytes(b"0123456789\n" * 1000)
+        assert count_lines(str(path)) == (1000, True)
+        assert count_lines(str(path), offset=11) == (999, True)
+        assert count_lines(str(path), max_bytes=1100) == (1000, False)
+
+
+class TestCompactDtypes:
+    """紧凑数据类型测试。"""
+
+    def test_low_cardinality_columns_categorical(self, wechat_csv):
+        """低基数列为分类类型，分块解析合并后及缓存读取后保持不变。"""
+        df = get_parser(wechat_csv).parse()
+        for col in ['transaction_type', 'income_expense', 'payment_method', 'status']:
+            assert isinstance(df[col].dtype, pd.CategoricalDtype)
+        assert df['counterparty'].dtype == 'str'
+
+        cached = get_parser(wechat_csv).parse()
+        pd.testing.assert_frame_equal(cached, df.reset_index(drop=True))
+
+    def test_chunked_cache_categorical(self, alipay_csv):
+        """分块解析写入的缓存合并各块的分类。"""
+        list(get_parser(alipay_csv).parse_iter(chunksize=1))
+        cached = get_parser(alipay_csv).load_normalized()
+
+        assert isinstance(cached['transaction_type'].dtype, pd.CategoricalDtype)
+        assert list(cached['transaction_type']) == ['餐饮美食', '转账红包']
+
+
+class TestArrowEngine:
+    """Arrow CSV 引擎测试。"""
+
+    @pytest.mark.parametrize("fixture", ["alipay_csv", "wechat_csv"])
+    def test_same_result_as_pandas(self, fixture, request, monkeypatch):
+        """两种引擎解析结果与 Notion 格式相同。"""
+        pytest.importorskip("pyarrow.csv")
+        path = request.getfixturevalue(fixture)
+
+        results = []
+        for engine in ("pandas", "arrow"):
+            monkeypatch.setattr(BaseBillParser, "CSV_ENGINE", engine)
+            remove_cache_files(path)
+            parser = get_parser(path)
+            results.append((parser.parse(), parser.to_notion_format()))
+
+        pd.testing.assert_frame_equal(results[0][0], results[1][0])
+        assert results[0][1] == results[1][1]
+
+    def test_fallback_without_pyarrow(self, alipay_csv, monkeypatch):
+        """未安装 pyarrow 时使用默认引擎。"""
+        monkeypatch.setattr(BaseBillParser, "CSV_ENGINE", "arrow")
+        monkeypatch.setattr("parsers.base_parser.arrow_available", lambda: False)
+
+        df = get_parser(alipay_csv).parse()
+        assert len(df) == 2
+        assert list(df['transaction_type']) == ['餐饮美食', '转账红包']
+
+
+class TestArchive:
+    """ZIP 压缩包账单测试。"""
+
+    @pytest.fixture
+    def bill_zip(self, alipay_csv, alipay_xlsx, tmp_path):
+        """包含支付宝 CSV、Excel 账单及无关文件的压缩包。"""
+        import zipfile
+
+        path = tmp_path / "bills.zip"
+        with zipfile.ZipFile(path, "w", zipfile.ZIP_DEFLATED) as archive:
+            archive.write(alipay_csv, "2024/alipay.csv")
+            archive.write(alipay_xlsx, "alipay.xlsx")
+            archive.writestr("readme.pdf", b"%PDF")
+            archive.writestr("__MACOSX/._alipay.csv", b"")
+        return str(path)
+
+    def test_members_listed(self, bill_zip):
+        """只列出账单文件。"""
+        assert list_members(bill_zip) == [bill_zip + "::2024/alipay.csv", bill_zip + "::alipay.xlsx"]
+
+    def test_member_parsed_without_extracting(self, bill_zip, alipay_csv, alipay_xlsx, tmp_path):
+        """成员直接从压缩包解析，结果与原文件相同，不解压到磁盘。"""
+        before = set(os.listdir(tmp_path)) | {".cache"}
+
+        for member, source in zip(list_members(bill_zip), [alipay_csv, alipay_xlsx]):
+            parser = get_parser(member)
+            assert isinstance(parser, AlipayParser)
+            assert parser.to_notion_format() == get_parser(source).to_notion_format()
+            assert parser.count_records() == (2, True)
+
+        assert set(os.listdir(tmp_path)) <= before
+
+    def test_encrypted_archive(self, alipay_csv, tmp_path):
+        """加密压缩包需要正确的密码。"""
+        import shutil
+        import subprocess
+
+        if shutil.which("zip") is None:
+            pytest.skip("zip command not available")
+        path = str(tmp_path / "encrypted.zip")
+        subprocess.run(["zip", "-j", "-q", "-P", "secret", path, alipay_csv], check=True)
+
+        with pytest.raises(ValueError, match="password is required"):
+            check_archive(path)
+        with pytest.raises(ValueError, match="Wrong password"):
+            check_archive(path, "wrong")
+        assert check_archive(path, "secret") == ["alipay.csv"]
+
+        with pytest.raises(ValueError, match="Cannot decrypt"):
+            get_parser(list_members(path)[0]).to_notion_format()
+
+        decrypted = tmp_path / "decrypted.zip"
+        decrypted.write_bytes(decrypt_archive(path, "secret"))
+        assert check_archive(str(decrypted)) == ["alipay.csv"]
+        member = list_members(str(decrypted))[0]
+        assert get_parser(member).to_notion_format() == get_parser(alipay_csv).to_notion_format()
+
+
+class TestCorpus:
+    """合成账单语料测试。"""
+
+    PARSER_CLASSES = {'alipay': AlipayParser, 'wechat': WeChatParser, 'unionpay': UnionPayParser}
+
+    @pytest.mark.parametrize("fmt", FORMATS)
+    @pytest.mark.parametrize("platform", PLATFORMS)
+    def test_statement_parsed(self, platform, fmt, tmp_path):
+        """各平台、各格式的合成账单被正确识别，说明行和汇总行不计入记录。"""
+        if fmt == "xls":
+            pytest.importorskip("xlwt")
+        path = write_statement(str(tmp_path), platform, fmt, rows=30)
+
+        parser = get_parser(path)
+        assert isinstance(parser, self.PARSER_CLASSES[platform])
+        df = parser.parse()
+        assert len(df) == 30
+        assert df['amount_cents'].notna().all()
+        assert df['transaction_time'].str.match(r'^2024-\d{2}-\d{2}T').all()
+
+    def test_same_transactions_in_every_format(self, tmp_path):
+        """同一份账单的各种格式解析出相同的时间、金额和收支。"""
+        columns = ['transaction_time', 'amount_cents', 'income_expense']
+        frames = [
+            get_parser(write_statement(str(tmp_path), "wechat", fmt, rows=20, seed=1)).parse()[columns]
+            for fmt in ["csv-gbk", "csv-utf8", "xlsx"]
+        ]
+        for df in frames[1:]:
+            pd.testing.assert_frame_equal(
+                df.reset_index(drop=True), frames[0].reset_index(drop=True), check_categorical=False
+            )
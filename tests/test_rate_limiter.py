@@ -0,0 +1,94 @@
+"""
+Notion rate limiter tests.
+
+测试内容：
+1. 令牌桶的预约与补充
+2. 全局桶
+3. 共享存储失败时的回退
+"""
+
+import pytest
+
+import sys
+import os
+
+# 添加项目根目录到路径
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.config import Config
+from src.services import rate_limiter
+
+
+class FailingStore:
+    """预约时抛出异常的共享存储。"""
+
+    def __init__(self):
+        self.calls = 0
+        self.failing = True
+
+    def reserve(self, key: str, rate: float, capacity: int) -> float:
+        self.calls += 1
+        if self.failing:
+            raise RuntimeError("database is locked")
+        return 0.25
+
+
+class TestRateLimiter:
+    """令牌桶限流测试。"""
+
+    @pytest.fixture
+    def clock(self, monkeypatch):
+        """可手动推进的 time.monotonic() / time.time()。"""
+        now = [1000.0]
+        monkeypatch.setattr(rate_limiter.time, "monotonic", lambda: now[0])
+        monkeypatch.setattr(rate_limiter.time, "time", lambda: now[0])
+        return now
+
+    @pytest.mark.parametrize("store_class", [rate_limiter.MemoryBucketStore, rate_limiter.SQLiteBucketStore])
+    def test_reserve_and_refill(self, temp_db, clock, store_class):
+        """突发容量用完后按速率排队，令牌随时间补充且不超过容量。"""
+        store = store_class()
+        waits = [store.reserve("key", 2.0, 2) for _ in range(4)]
+        assert waits == pytest.approx([0.0, 0.0, 0.5, 1.0])
+
+        clock[0] += 1.5
+        assert store.reserve("key", 2.0, 2) == pytest.approx(0.0)
+        clock[0] += 100
+        assert [store.reserve("key", 2.0, 2) for _ in range(3)] == pytest.approx([0.0, 0.0, 0.5])
+
+        # 不同的键使用各自的桶
+        assert store.reserve("other", 2.0, 2) == 0.0
+
+    def test_global_bucket(self, clock):
+        """全局桶限制所有密钥合计的速率。"""
+        limiter = rate_limiter.NotionRateLimiter(rate=10, burst=1, global_rate=1)
+        assert limiter.reserve("a") == 0.0
+        assert limiter.reserve("b") == pytest.approx(1.0)
+
+    def test_shared_store_failure_falls_back_per_call(self, temp_db, clock, caplog):
+        """共享存储失败时本次使用进程内令牌桶，冷却时间过后重新尝试共享存储。"""
+        limiter = rate_limiter.NotionRateLimiter(rate=1, burst=1, store="sqlite")
+        store = FailingStore()
+        limiter._shared = store
+
+        with caplog.at_level("WARNING", logger=rate_limiter.__name__):
+            assert limiter.reserve("key") == 0.0
+            assert limiter.reserve("key") == pytest.approx(1.0)
+        assert store.calls == 1
+        assert [record.levelname for record in caplog.records] == ["WARNING"]
+
+        clock[0] += rate_limiter.SHARED_STORE_RETRY_SECONDS
+        store.failing = False
+        assert limiter.reserve("key") == 0.25
+        assert store.calls == 2
+        assert limiter.reserve("key") == 0.25
+
+    def test_memory_store_does_not_use_database(self, clock):
+        limiter = rate_limiter.NotionRateLimiter(rate=1, burst=1)
+        assert not limiter.uses_shared_store
+        assert limiter.reserve("key") == 0.0
+        assert limiter._shared is None
+
+    def test_get_rate_limiter_disabled(self, monkeypatch):
+        monkeypatch.setattr(Config, "NOTION_RATE_LIMIT", 0)
+        assert rate_limiter.get_rate_limiter() is None
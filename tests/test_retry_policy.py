@@ -0,0 +1,149 @@
+"""
+Notion retry policy tests.
+
+测试内容：
+1. 错误分类
+2. Retry-After 解析
+3. 重试次数和重试预算
+4. 复盘查询错误提示
+"""
+
+import pytest
+import asyncio
+from datetime import datetime, timedelta
+from email.utils import format_datetime
+
+import httpx
+
+import sys
+import os
+
+# 添加项目根目录到路径
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from notion_client.errors import HTTPResponseError, RequestTimeoutError
+
+from src import notion_api
+from src.review_service import ReviewService
+from tests.notion_fakes import http_error
+
+
+class TestRetryPolicy:
+    """重试策略和错误分类测试。"""
+
+    @pytest.mark.parametrize("error, kind", [
+        (http_error(429), notion_api.RATE_LIMITED),
+        (http_error(409), notion_api.RETRYABLE),
+        (http_error(502), notion_api.RETRYABLE),
+        (http_error(400), notion_api.FATAL),
+        (http_error(401), notion_api.FATAL),
+        (http_error(404), notion_api.FATAL),
+        (RequestTimeoutError(), notion_api.RETRYABLE),
+        (httpx.ConnectError("connection refused"), notion_api.RETRYABLE),
+        (ValueError("bug"), notion_api.FATAL),
+    ])
+    def test_classify_error(self, error, kind):
+        assert notion_api.classify_error(error) == kind
+
+    def test_retry_after_seconds(self):
+        """Retry-After 可以是秒数或 HTTP 日期，无法解析时返回默认值。"""
+        assert notion_api.retry_after_seconds(http_error(429, {"Retry-After": "3"})) == 3.0
+        assert notion_api.retry_after_seconds(http_error(429, {"Retry-After": "-1"})) == 0.0
+
+        at = datetime.now().astimezone() + timedelta(seconds=30)
+        delay = notion_api.retry_after_seconds(http_error(429, {"Retry-After": format_datetime(at)}))
+        assert 25 < delay <= 30
+
+        assert notion_api.retry_after_seconds(http_error(429, {"Retry-After": "soon"}), default=1.5) == 1.5
+        assert notion_api.retry_after_seconds(http_error(429)) is None
+        assert notion_api.retry_after_seconds(ValueError(), default=2.0) == 2.0
+
+    @pytest.fixture
+    def sleeps(self, monkeypatch):
+        """不实际等待，返回各次等待的秒数。"""
+        sleeps = []
+        monkeypatch.setattr(notion_api.time, "sleep", sleeps.append)
+        return sleeps
+
+    @staticmethod
+    def failing(*errors):
+        """依次抛出 errors 中的异常，之后返回 "ok" 的函数，及其调用次数列表。"""
+        calls = []
+
+        def func():
+            calls.append(1)
+            if len(calls) <= len(errors):
+                raise errors[len(calls) - 1]
+            return "ok"
+        return func, calls
+
+    def test_transient_errors_are_retried(self, sleeps):
+        """临时错误按指数退避重试，限流错误等待 Retry-After。"""
+        func, calls = self.failing(http_error(502), http_error(429, {"Retry-After": "2"}))
+        policy = notion_api.RetryPolicy(base_seconds=1.0)
+
+        with notion_api.record_error_kinds() as kinds:
+            assert policy.run(func) == "ok"
+        assert len(calls) == 3
+        assert 0 <= sleeps[0] <= 1.0
+        assert sleeps[1] == 2.0
+        assert kinds == [notion_api.RETRYABLE, notion_api.RATE_LIMITED]
+
+    def test_fatal_error_is_not_retried(self, sleeps):
+        func, calls = self.failing(http_error(400))
+
+        with pytest.raises(HTTPResponseError):
+            notion_api.RetryPolicy().run(func)
+        assert len(calls) == 1
+        assert sleeps == []
+
+    def test_max_attempts(self, sleeps):
+        func, calls = self.failing(*[http_error(503)] * 5)
+
+        with pytest.raises(HTTPResponseError):
+            notion_api.RetryPolicy(max_attempts=3).run(func)
+        assert len(calls) == 3
+        assert len(sleeps) == 2
+
+    def test_budget_exhausted(self, sleeps):
+        """下一次等待超出重试预算时不再重试。"""
+        retry_after = http_error(429, {"Retry-After": "40"})
+        func, calls = self.failing(retry_after, retry_after)
+
+        with pytest.raises(HTTPResponseError):
+            notion_api.RetryPolicy(budget_seconds=60).run(func)
+        assert len(calls) == 2
+        assert sleeps == [40.0]
+
+    def test_run_async(self, monkeypatch):
+        sleeps = []
+
+        async def fake_sleep(delay):
+            sleeps.append(delay)
+
+        monkeypatch.setattr(notion_api.asyncio, "sleep", fake_sleep)
+        func, calls = self.failing(http_error(429, {"Retry-After": "1"}))
+
+        async def call():
+            return func()
+
+        assert asyncio.run(notion_api.RetryPolicy().run_async(call)) == "ok"
+        assert sleeps == [1.0]
+
+    def test_query_error_messages(self):
+        """数据库查询错误按错误类别给出提示，只有临时错误提示已重试。"""
+        timeout = ReviewService._database_query_error(httpx.ReadTimeout("timed out"))
+        assert "timeout" in str(timeout).lower()
+        assert "timeout" in str(ReviewService._database_query_error(RequestTimeoutError())).lower()
+
+        bad_filter = http_error(400)
+        bad_filter.body = '{"message": "Could not find property with name or id: Date"}'
+        assert "'Date' 属性" in str(ReviewService._database_query_error(bad_filter))
+
+        not_found = str(ReviewService._database_query_error(http_error(404)))
+        assert "after retries" not in not_found
+        assert "after retries" in str(ReviewService._database_query_error(http_error(502)))
+
+        # 错误消息中的 "timeout" 不代表请求超时
+        fatal = str(ReviewService._database_query_error(ValueError("timeout must be positive")))
+        assert fatal == "Failed to query database: timeout must be positive"
@@ -0,0 +1,86 @@
+"""
+Imported transaction index tests.
+
+测试内容：
+1. 新增、已变化和未变化的分类
+2. 交易键与指纹
+3. 按用户和平台隔离
+"""
+
+import pytest
+
+import sys
+import os
+
+# 添加项目根目录到路径
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.services.transaction_index import TransactionIndex
+from tests.notion_fakes import make_record
+
+
+class TestTransactionIndex:
+    """已导入交易索引测试。"""
+
+    def test_classify_new_changed_unchanged(self, temp_db):
+        """已导入且内容相同的记录不再导入，内容变化的记录带原页面 ID。"""
+        records = [make_record("面馆", "T1"), make_record("工资", "T2", kind="收入")]
+        index = TransactionIndex(None, "alipay")
+        plan = index.classify(records)
+        assert (plan["new"], plan["changed"], plan["unchanged"]) == (2, 0, 0)
+        index.record(plan, ["page-1", "page-2"])
+
+        plan = TransactionIndex(None, "alipay").classify(
+            [make_record("面馆", "T1"), make_record("工资", "T2", price=20.0, kind="收入"), make_record("超市", "T3")]
+        )
+        assert (plan["new"], plan["changed"], plan["unchanged"]) == (1, 1, 1)
+        assert plan["keys"] == ["id:T2", "id:T3"]
+        assert plan["page_ids"] == ["page-2", None]
+
+    def test_failed_records_are_not_indexed(self, temp_db):
+        index = TransactionIndex(None, "alipay")
+        plan = index.classify([make_record("面馆", "T1"), make_record("工资", "T2")])
+        index.record(plan, ["page-1", None])
+
+        plan = TransactionIndex(None, "alipay").classify([make_record("面馆", "T1"), make_record("工资", "T2")])
+        assert plan["keys"] == ["id:T2"]
+
+    def test_fingerprint_and_duplicate_keys(self, temp_db):
+        """没有交易号的记录使用指纹，同一账单中的相同记录按顺序编号。"""
+        index = TransactionIndex(None, "wechat")
+        first = index.transaction_key(make_record("面馆"))
+        second = index.transaction_key(make_record("面馆"))
+        other = index.transaction_key(make_record("面馆", price=11.0))
+
+        assert first.startswith("fp:")
+        assert second == f"{first}#2"
+        assert other != first
+
+        # 新的账单重新编号
+        assert TransactionIndex(None, "wechat").transaction_key(make_record("面馆")) == first
+
+    def test_long_transaction_number_is_hashed(self, temp_db):
+        key = TransactionIndex(None, "alipay").transaction_key(make_record("面馆", "9" * 100))
+        assert key.startswith("id:") and len(key) == 43
+
+    def test_index_is_per_user_and_platform(self, temp_db):
+        index = TransactionIndex(1, "alipay")
+        plan = index.classify([make_record("面馆", "T1")])
+        index.record(plan, ["page-1"])
+
+        assert TransactionIndex(1, "alipay").classify([make_record("面馆", "T1")])["unchanged"] == 1
+        assert TransactionIndex(2, "alipay").classify([make_record("面馆", "T1")])["new"] == 1
+        assert TransactionIndex(1, "wechat").classify([make_record("面馆", "T1")])["new"] == 1
+
+    def test_unavailable_index_imports_all(self, temp_db, monkeypatch):
+        """索引不可用时所有记录按新增处理。"""
+        index = TransactionIndex(None, "alipay")
+        plan = index.classify([make_record("面馆", "T1")])
+        index.record(plan, ["page-1"])
+
+        def fail_lookup(self, keys):
+            raise RuntimeError("database is locked")
+
+        monkeypatch.setattr(TransactionIndex, "lookup", fail_lookup)
+        plan = TransactionIndex(None, "alipay").classify([make_record("面馆", "T1")])
+        assert (plan["new"], plan["unchanged"]) == (1, 0)
@@ -71,6 +71,20 @@ app.include_router(upload.router, prefix="/api", tags=["Upload"])
 app.include_router(review.router, prefix="/api/review", tags=["Review"])
 
 
+@app.on_event("startup")
+def start_outbox_workers():
+    """启动 Notion 发件箱的后台发送线程。"""
+    from src.services import notion_outbox
+    notion_outbox.start_workers()
+
+
+@app.on_event("shutdown")
+def stop_outbox_workers():
+    """停止后台发送线程，未发送的记录留在发件箱中。"""
+    from src.services import notion_outbox
+    notion_outbox.stop_workers()
+
+
 # ==================== 页面鉴权辅助函数 ====================
 
 def get_access_token_from_cookie(request: Request) -> Optional[str]:
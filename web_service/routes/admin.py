@@ -12,6 +12,7 @@ from typing import Optional, List
 from datetime import datetime, timedelta
 from pydantic import BaseModel
 from src.services.database import get_db
+from src.services import notion_config
 from src.models import User, UserUpload, ImportHistory, AuditLog
 from src.schemas import (
     AdminUserCreate, AdminUserUpdate, AdminUserListResponse, UserResponse,
@@ -19,6 +20,7 @@ from src.schemas import (
     SystemSettingsResponse, SystemSettingsUpdate, MessageResponse
 )
 from src.auth import get_password_hash
+from src.notion_api import NotionClient
 from src.services.dependencies import get_current_superuser, get_client_ip, get_user_agent
 import logging
 import json
@@ -224,6 +226,8 @@ async def delete_user(
     username = user.username
     db.delete(user)
     db.commit()
+    notion_config.invalidate(user_id)
+    NotionClient.discard(user_id)
 
     # 记录审计日志
     _create_audit_log(
@@ -1,9 +1,11 @@
 """Bill management routes for upload, list, preview, and delete operations."""
+import asyncio
 import sys
 import os
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), "../.."))
 
 from datetime import datetime
+from functools import partial
 
 import json
 import logging
@@ -19,6 +21,7 @@ from src.services.dependencies import get_current_active_user, get_pagination_pa
 from src.importer import import_bill, parse_bill_only, parse_bill_raw
 from src.models import User, UserUpload, ImportHistory, AuditLog
 from src.schemas import UploadResponse, FileUploadResponse, FileListResponse, ImportHistoryResponse
+from parsers.archive import is_archive, list_members
 from web_service.services.user_file_service import UserFileService
 
 logger = logging.getLogger(__name__)
@@ -33,14 +36,19 @@ async def upload_bill(
     request: Request,
     file: UploadFile = File(...),
     platform: Optional[str] = Form(None),
+    password: Optional[str] = Form(None),
     current_user: User = Depends(get_current_active_user),
     db: Session = Depends(get_db)
 ):
     """上传账单文件。
 
+    支持 .zip 压缩包（微信、支付宝导出的账单），压缩包不解压，导入时其中
+    每个账单单独解析。
+
     Args:
-        file: 上传的账单文件
+        file: 上传的账单文件或 .zip 压缩包
         platform: 支付平台（alipay, wechat, unionpay），不指定则自动检测
+        password: 加密压缩包的解压密码
     """
     # 创建上传记录
     upload = UserUpload(
@@ -60,7 +68,8 @@ async def upload_bill(
             user_id=current_user.id,
             upload_id=upload.id,
             file=file,
-            original_filename=file.filename
+            original_filename=file.filename,
+            password=password
         )
 
         # 更新上传记录
@@ -73,8 +82,7 @@ async def upload_bill(
         if upload.platform == "auto":
             try:
                 # 调用平台检测逻辑
-                from parsers import get_parser
-                parser = get_parser(file_path)
+                parser = _detect_upload_parser(file_path)
                 if parser:
                     detected_platform = parser.get_platform()
                     # 映射平台名称到数据库存储格式
@@ -195,6 +203,7 @@ async def get_upload_detail(
 async def import_uploaded_bill(
     upload_id: int,
     request: Request,
+    backfill: bool = False,
     current_user: User = Depends(get_current_active_user),
     db: Session = Depends(get_db)
 ):
@@ -202,6 +211,7 @@ async def import_uploaded_bill(
 
     Args:
         upload_id: 上传记录ID
+        backfill: 为 True 时忽略导入水位，用于补导早于已导入交易的账单
 
     Returns:
         导入结果，包括成功/失败状态、导入记录数等
@@ -243,7 +253,10 @@ async def import_uploaded_bill(
     try:
         # 使用用户的 Notion 配置导入
         platform_param = None if upload.platform == 'auto' else upload.platform
-        import_result = import_bill(file_path, platform_param, user_id=current_user.id)
+        # 解析和写入发件箱是同步的数据库和文件操作，在线程池中执行，不阻塞事件循环
+        import_result = await asyncio.get_running_loop().run_in_executor(
+            None, partial(import_bill, file_path, platform_param, user_id=current_user.id, backfill=backfill)
+        )
 
         # 更新平台为检测到的实际平台
         if import_result.get('detected_platform'):
@@ -262,8 +275,12 @@ async def import_uploaded_bill(
                 user_id=current_user.id,
                 upload_id=upload.id,
                 total_records=import_result.get('total_records', 0),
-                imported_records=import_result.get('imported', 0),
-                skipped_records=import_result.get('skipped', 0),
+                # 已写入发件箱、由后台发送的记录也计为导入
+                imported_records=(import_result.get('imported', 0) + import_result.get('updated', 0)
+                                  + import_result.get('queued', 0)),
+                # 已导入且未变化、早于导入水位的记录也计为跳过
+                skipped_records=(import_result.get('skipped', 0) + import_result.get('unchanged', 0)
+                                 + import_result.get('filtered', 0)),
                 failed_records=0,
                 status="success",
                 completed_at=completed_at,
@@ -287,13 +304,18 @@ async def import_uploaded_bill(
 
             return {
                 "success": True,
-                "message": "Bill imported successfully",
+                "message": ("Bill queued for import to Notion" if import_result.get('queued')
+                            else "Bill imported successfully"),
                 "upload_id": upload_id,
                 "status": "completed",
                 "detected_platform": upload.platform,
                 "total_records": import_result.get('total_records', 0),
                 "imported": import_result.get('imported', 0),
-                "skipped": import_result.get('skipped', 0)
+                "updated": import_result.get('updated', 0),
+                "skipped": import_result.get('skipped', 0),
+                "queued": import_result.get('queued', 0),
+                "unchanged": import_result.get('unchanged', 0),
+                "filtered": import_result.get('filtered', 0)
             }
         else:
             upload.status = "failed"
@@ -398,7 +420,8 @@ async def preview_upload_file(
 ):
     """预览上传的 CSV 文件内容。
 
-    返回文件的前几行数据用于预览。
+    只解析前 max_rows 行数据用于预览，总行数通过行计数获得，
+    大文件的 total_records 为估计值（total_records_exact 为 False）。
     """
     upload = db.query(UserUpload).filter(
         UserUpload.id == upload_id,
@@ -443,6 +466,8 @@ async def preview_upload_file(
             "platform": upload.platform,  # 返回更新后的平台
             "detected_platform": result.get('detected_platform', upload.platform),
             "total_records": result.get('total_rows', 0),
+            "total_records_exact": result.get('total_rows_exact', True),
+            "members": result.get('members'),
             "preview_records": len(result.get('data', [])),
             "columns": result.get('columns', []),
             "data": result.get('data', [])
@@ -572,6 +597,31 @@ async def delete_upload(
     }
 
 
+# ==================== Notion 发件箱 ====================
+
+@router.get("/outbox", tags=["Bills"])
+async def get_outbox_status(
+    current_user: User = Depends(get_current_active_user)
+):
+    """获取当前用户等待写入 Notion 的记录数，以及多次发送失败后放弃的记录。"""
+    from src.services import notion_outbox
+    return notion_outbox.outbox_status(current_user.id)
+
+
+@router.post("/outbox/retry", tags=["Bills"])
+async def retry_outbox_failures(
+    current_user: User = Depends(get_current_active_user)
+):
+    """重新发送当前用户多次发送失败后放弃的记录，不需要重新导入账单。"""
+    from src.services import notion_outbox
+    requeued = notion_outbox.retry_dead(current_user.id)
+    return {
+        "success": True,
+        "message": f"{requeued} records queued for retry",
+        "requeued": requeued
+    }
+
+
 # ==================== 导入历史 ====================
 
 @router.get("/history/stats", tags=["Bills"])
@@ -778,6 +828,22 @@ async def delete_import_history_batch(
 # ==================== 辅助函数 ====================
 
 
+def _detect_upload_parser(file_path: str):
+    """检测上传文件的解析器。
+
+    压缩包中全部账单属于同一平台时返回第一个账单的解析器，否则返回 None，
+    平台保持 auto，导入时逐个账单检测。
+    """
+    from parsers import get_parser
+
+    if not is_archive(file_path):
+        return get_parser(file_path)
+
+    parsers = [get_parser(member) for member in list_members(file_path)]
+    platforms = {parser.get_platform() if parser else None for parser in parsers}
+    return parsers[0] if len(platforms) == 1 else None
+
+
 def _create_audit_log(
     db: Session,
     user_id: int,
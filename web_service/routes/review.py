@@ -15,7 +15,7 @@ import time
 import logging
 
 from src.services.dependencies import get_current_user
-from src.review_service import ReviewService
+from src.review_service import AsyncReviewService, ReviewService
 
 
 router = APIRouter()
@@ -89,21 +89,21 @@ async def generate_review(
     根据指定的复盘类型和时间周期，生成账单复盘报告并写入 Notion
     """
     user_id = current_user.id if hasattr(current_user, 'id') else None
-    service = ReviewService(user_id=user_id)
+    service = await AsyncReviewService.create(user_id=user_id)
 
     try:
         if request.review_type == "monthly":
             if not request.month:
                 raise HTTPException(status_code=400, detail="月份参数必填")
-            result = service.generate_monthly_review(request.year, request.month)
+            result = await service.agenerate_monthly_review(request.year, request.month)
 
         elif request.review_type == "quarterly":
             if not request.quarter:
                 raise HTTPException(status_code=400, detail="季度参数必填")
-            result = service.generate_quarterly_review(request.year, request.quarter)
+            result = await service.agenerate_quarterly_review(request.year, request.quarter)
 
         elif request.review_type == "yearly":
-            result = service.generate_yearly_review(request.year)
+            result = await service.agenerate_yearly_review(request.year)
 
         else:
             raise HTTPException(status_code=400, detail="不支持的复盘类型")
@@ -139,8 +139,8 @@ async def batch_generate_reviews(
     except ValueError:
         raise HTTPException(status_code=400, detail="日期格式错误，请使用 YYYY-MM-DD")
 
-    service = ReviewService(user_id=user_id)
-    results = service.batch_generate_reviews(
+    service = await AsyncReviewService.create(user_id=user_id)
+    results = await service.abatch_generate_reviews(
         start_date,
         end_date,
         request.review_type
@@ -245,7 +245,9 @@ async def update_review_config(
             user_config.updated_at = datetime.utcnow()
             db.commit()
 
-        # 清除数据库结构缓存，以便使用新的配置
+        # 清除配置缓存和数据库结构缓存，以便使用新的配置
+        from src.services import notion_config
+        notion_config.invalidate(user_id)
         ReviewService.clear_database_cache()
 
         return {"success": True, "message": "配置已更新"}
@@ -304,7 +306,7 @@ async def preview_review(
     logger.info(f"Preview review request: user_id={user_id}, {start_date} to {end_date}")
 
     try:
-        service = ReviewService(user_id=user_id)
+        service = await AsyncReviewService.create(user_id=user_id)
     except ValueError as e:
         logger.error(f"Notion config error: {e}")
         raise HTTPException(status_code=400, detail="请先配置 Notion API 密钥和数据库 ID")
@@ -315,7 +317,7 @@ async def preview_review(
     try:
         # 获取交易数据
         try:
-            transactions = service.fetch_transactions(start_dt, end_dt)
+            transactions = await service.afetch_transactions(start_dt, end_dt)
         except Exception as e:
             logger.error(f"Failed to fetch transactions: {e}")
             raise HTTPException(status_code=500, detail=f"获取交易数据失败: {str(e)}")
@@ -425,7 +427,7 @@ async def test_notion_connection(current_user = Depends(get_current_user)):
         network_diag["diagnostic_error"] = str(e)
 
     try:
-        service = ReviewService(user_id=user_id)
+        service = await AsyncReviewService.create(user_id=user_id)
     except ValueError as e:
         logger.error(f"Notion config error: {e}")
         return {
@@ -459,112 +461,72 @@ async def test_notion_connection(current_user = Depends(get_current_user)):
         "yearly_review_db_valid": None
     }
 
-    # 测试 API 密钥
-    logger.info("Testing API key...")
-    user_info, error = await call_with_timeout(service.notion_client.client.users.me, timeout=15)
+    # 复盘数据库（从用户配置或环境变量获取）
+    review_dbs = {
+        f"{review_type}_review_db": service.get_review_database_id(review_type)
+        for review_type in ("monthly", "quarterly", "yearly")
+    }
 
+    # 所有检查由验证服务并发执行，验证成功的结果会被记录
+    logger.info("Testing API key and databases...")
+    from src.services.notion_verification import verify
+    verification, error = await call_with_timeout(
+        verify, user_id, force=True, client=service.notion_client, extra_databases=review_dbs, timeout=30
+    )
     if error:
+        verification = {"checks": {"api_key": {"ok": False, "error": error}}}
+    checks = verification["checks"]
+
+    # API 密钥
+    api_key = checks["api_key"]
+    if not api_key["ok"]:
+        error = api_key["error"]
         logger.error(f"API key test failed: {error}")
         error_str = error.lower() if error else ""
 
         # 处理网络连接错误
-        if error == "timeout" or "timeout" in error_str:
+        if error == "timeout" or "timeout" in error_str or "timed out" in error_str:
             result["error"] = "Notion API 连接超时。请检查网络连接或配置代理服务器。"
-            return result
         elif "connection" in error_str and ("reset" in error_str or "refused" in error_str):
             result["error"] = "无法连接到 Notion API（连接被重置）。请检查：1) 网络连接 2) 是否需要配置代理 3) 防火墙设置"
-            return result
-        elif "unauthorized" in error_str:
+        elif "unauthorized" in error_str or "invalid" in error_str:
             result["error"] = "Notion API 密钥无效，请检查配置"
-            return result
         else:
             result["error"] = f"API 密钥验证失败: {error}"
-            return result
-    else:
-        result["api_key_valid"] = True
-        result["user_name"] = user_info.get("name", "unknown")
-        logger.info(f"API key valid, user: {result['user_name']}")
-
-    # 测试收入数据库
-    logger.info("Testing income database...")
-    income_db, error = await call_with_timeout(
-        service.notion_client.client.databases.retrieve,
-        database_id=service.notion_client.income_db,
-        timeout=15
-    )
-
-    if error:
-        logger.error(f"Income DB error: {error}")
-        error_str = error.lower() if error else ""
-        if error == "timeout" or "timeout" in error_str:
-            result["income_db_error"] = "收入数据库查询超时"
-        elif "not found" in error_str:
-            result["income_db_error"] = "收入数据库不存在"
-        else:
-            result["income_db_error"] = error
-    else:
-        result["income_db_valid"] = True
-        result["income_db_title"] = income_db.get('title', [{}])[0].get('text', {}).get('content', 'unknown')
-        logger.info(f"Income DB valid: {result['income_db_title']}")
-
-    # 测试支出数据库
-    logger.info("Testing expense database...")
-    expense_db, error = await call_with_timeout(
-        service.notion_client.client.databases.retrieve,
-        database_id=service.notion_client.expense_db,
-        timeout=15
-    )
-
-    if error:
-        logger.error(f"Expense DB error: {error}")
-        error_str = error.lower() if error else ""
-        if error == "timeout" or "timeout" in error_str:
-            result["expense_db_error"] = "支出数据库查询超时"
-        elif "not found" in error_str:
-            result["expense_db_error"] = "支出数据库不存在"
-        else:
-            result["expense_db_error"] = error
-    else:
-        result["expense_db_valid"] = True
-        result["expense_db_title"] = expense_db.get('title', [{}])[0].get('text', {}).get('content', 'unknown')
-        logger.info(f"Expense DB valid: {result['expense_db_title']}")
+        return result
 
-    # 测试复盘数据库（从用户配置或环境变量获取）
-    review_dbs = {
-        "monthly": service.get_review_database_id("monthly"),
-        "quarterly": service.get_review_database_id("quarterly"),
-        "yearly": service.get_review_database_id("yearly")
+    result["api_key_valid"] = True
+    result["user_name"] = api_key["name"]
+    logger.info(f"API key valid, user: {result['user_name']}")
+
+    # 收入、支出和复盘数据库
+    names = {
+        "income_db": "收入数据库",
+        "expense_db": "支出数据库",
+        "monthly_review_db": "Monthly复盘数据库",
+        "quarterly_review_db": "Quarterly复盘数据库",
+        "yearly_review_db": "Yearly复盘数据库"
     }
-
-    for review_type, db_id in review_dbs.items():
-        result_key = f"{review_type}_review_db_valid"
-        title_key = f"{review_type}_review_db_title"
-        error_key = f"{review_type}_review_db_error"
-
-        if db_id:
-            logger.info(f"Testing {review_type} review database: {db_id[:8]}...")
-            review_db, error = await call_with_timeout(
-                service.notion_client.client.databases.retrieve,
-                database_id=db_id,
-                timeout=15
-            )
-
-            if error:
-                logger.error(f"{review_type.capitalize()} review DB error: {error}")
-                error_str = error.lower() if error else ""
-                if error == "timeout" or "timeout" in error_str:
-                    result[error_key] = f"{review_type.capitalize()}复盘数据库查询超时"
-                elif "not found" in error_str:
-                    result[error_key] = f"{review_type.capitalize()}复盘数据库不存在"
-                else:
-                    result[error_key] = error
-            else:
-                result[result_key] = True
-                result[title_key] = review_db.get('title', [{}])[0].get('text', {}).get('content', 'unknown')
-                logger.info(f"{review_type.capitalize()} review DB valid: {result[title_key]}")
+    for key, label in names.items():
+        check = checks.get(key)
+        if check is None:
+            logger.info(f"{label} not configured")
+            continue
+        if check["ok"]:
+            result[f"{key}_valid"] = True
+            result[f"{key}_title"] = check["name"]
+            logger.info(f"{key} valid: {check['name']}")
+            continue
+
+        error = check["error"]
+        logger.error(f"{key} error: {error}")
+        error_str = error.lower() if error else ""
+        if error == "timeout" or "timeout" in error_str or "timed out" in error_str:
+            result[f"{key}_error"] = f"{label}查询超时"
+        elif "not found" in error_str or "could not find" in error_str:
+            result[f"{key}_error"] = f"{label}不存在"
         else:
-            logger.info(f"{review_type.capitalize()} review database not configured")
-            result[result_key] = None
+            result[f"{key}_error"] = error
 
     # 添加网络诊断结果
     result["network_diagnostic"] = network_diag
@@ -598,7 +560,7 @@ async def list_reviews(
 
     # 缓存未命中，查询数据
     logger.info(f"Cache miss, fetching review list for user {user_id}")
-    service = ReviewService(user_id=user_id)
+    service = await AsyncReviewService.create(user_id=user_id)
 
     try:
         # 获取复盘数据库ID
@@ -623,26 +585,7 @@ async def list_reviews(
         # 查询数据库中的页面
         logger.info(f"Querying review database: {database_id[:8]}...")
 
-        # 使用正确的 API 调用方式
-        # 方式1: 使用 client.request 方法（推荐）
-        try:
-            response = service.notion_client.client.request(
-                path=f"/databases/{database_id}/query",
-                method="POST",
-                body={}
-            )
-        except AttributeError:
-            # 方式2: 如果 request 方法不可用，使用直接调用
-            response = service.notion_client.client.databases.retrieve(database_id=database_id)
-            # 对于 retrieve，我们需要手动获取页面
-            # 暂时返回空列表，因为 retrieve 只返回数据库信息，不返回页面列表
-            logger.warning("Using database retrieve instead of query - this won't return page list")
-            return {
-                "success": True,
-                "reviews": [],
-                "total": 0,
-                "warning": "数据库查询功能需要更新 Notion 客户端版本"
-            }
+        response = await service.async_client.query_database(database_id)
 
         results = response.get("results", [])
 
@@ -748,10 +691,10 @@ async def submit_review(
         logger.info(f"Submitting review: {attributes.get('title')}")
 
         # 创建服务实例
-        service = ReviewService(user_id=user_id)
+        service = await AsyncReviewService.create(user_id=user_id)
 
         # 创建复盘页面
-        page_id = service.create_review_from_content(
+        page_id = await service.acreate_review_from_content(
             review_type,
             attributes,
             markdown_content
@@ -1,4 +1,5 @@
 """Upload and bill management routes."""
+import asyncio
 import sys
 import os
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), "../.."))
@@ -10,6 +11,7 @@ import pandas as pd
 import os
 import logging
 import datetime
+from functools import partial
 
 # Import directly from project root
 import sys
@@ -23,6 +25,8 @@ except ImportError:
     PSUTIL_AVAILABLE = False
 
 from src.importer import import_bill
+from parsers import get_parser
+from parsers.probe import remove_cache_files
 
 
 router = APIRouter()
@@ -51,7 +55,8 @@ async def upload_file(
         file_path = await file_service.save_file(file)
 
         if sync_type == "immediate":
-            result = import_bill(file_path, platform)
+            # 在线程池中导入，不阻塞事件循环
+            result = await asyncio.get_running_loop().run_in_executor(None, partial(import_bill, file_path, platform))
             if result and result.get("success"):
                 import_stats["success_imports"] += 1
             else:
@@ -101,8 +106,16 @@ async def get_file_content(file_name: str):
         df = None
         header_line = None
 
+        # Prefer the normalized transactions, cached on disk by earlier parses
+        try:
+            parser = get_parser(file_path)
+            if parser is not None:
+                df = parser.parse().drop(columns=['amount_cents'], errors='ignore').head(20)
+        except Exception:
+            df = None
+
         # For CSV and TXT files
-        if file_ext in ['csv', 'txt']:
+        if df is None and file_ext in ['csv', 'txt']:
             # Try multiple encodings
             encodings = ['gbk', 'utf-8', 'gb2312', 'latin-1']
 
@@ -131,7 +144,7 @@ async def get_file_content(file_name: str):
                         continue
 
         # For Excel files (XLS, XLSX)
-        elif file_ext in ['xls', 'xlsx']:
+        elif df is None and file_ext in ['xls', 'xlsx']:
             try:
                 # Try to import required libraries
                 if file_ext == 'xlsx':
@@ -204,6 +217,7 @@ async def delete_file(file_name: str):
             return JSONResponse(status_code=404, content={"success": False, "message": "File not found"})
 
         os.remove(file_path)
+        remove_cache_files(file_path)
         return JSONResponse(status_code=200, content={"success": True, "message": "File deleted"})
     except Exception as e:
         return JSONResponse(status_code=500, content={"success": False, "message": f"Delete failed: {str(e)}"})
@@ -17,6 +17,7 @@ from src.services.database import get_db
 from src.services.dependencies import get_current_active_user, require_multi_tenant, get_client_ip, get_user_agent
 from src.models import User, UserNotionConfig, UserUpload, ImportHistory, AuditLog
 from src.notion_api import NotionClient
+from src.services import notion_config, notion_verification
 from src.schemas import (
     UserUpdate, UserProfileResponse, NotionConfigCreate, NotionConfigUpdate,
     NotionConfigResponse, MessageResponse,
@@ -179,17 +180,22 @@ async def create_or_update_notion_config(
         else:
             api_key_changed = False
 
+        databases_changed = (
+            existing_config.notion_income_database_id != config_data.notion_income_database_id
+            or existing_config.notion_expense_database_id != config_data.notion_expense_database_id
+        )
         existing_config.notion_income_database_id = config_data.notion_income_database_id
         existing_config.notion_expense_database_id = config_data.notion_expense_database_id
         existing_config.config_name = config_data.config_name
 
-        # 只有API密钥变化时才需要重新验证
-        if api_key_changed:
+        # 只有API密钥或数据库变化时才需要重新验证
+        if api_key_changed or databases_changed:
             existing_config.is_verified = False
 
         existing_config.updated_at = datetime.utcnow()
 
         db.commit()
+        notion_config.invalidate(current_user.id)
         db.refresh(existing_config)
 
         # 记录审计日志
@@ -220,6 +226,7 @@ async def create_or_update_notion_config(
         )
         db.add(new_config)
         db.commit()
+        notion_config.invalidate(current_user.id)
         db.refresh(new_config)
 
         # 记录审计日志
@@ -257,15 +264,10 @@ async def verify_notion_config(
         )
 
     try:
-        # 创建Notion客户端并验证连接
-        client = NotionClient(user_id=current_user.id)
-        is_valid = client.verify_connection()
+        # 重新验证连接，结果由验证服务保存到配置中
+        is_valid = notion_verification.verify(current_user.id, force=True)['success']
 
         if is_valid:
-            config.is_verified = True
-            config.last_verified_at = datetime.utcnow()
-            db.commit()
-
             # 记录审计日志
             _create_audit_log(
                 db=db,
@@ -330,84 +332,45 @@ async def verify_notion_config_step(
     current_step_index = {"api_key": 0, "income_db": 1, "expense_db": 2}.get(step, 0)
 
     try:
-        client = NotionClient(user_id=current_user.id)
-        all_success = True
-
-        # 执行请求的步骤
-        if step == "api_key":
-            steps[0].status = "in_progress"
-            steps[0].message = "正在验证API密钥..."
-
-            try:
-                user_info = client.client.users.me()
-                user_name = user_info.get('name', 'unknown')
-                steps[0].status = "success"
-                steps[0].message = f"API密钥验证成功 (用户: {user_name})"
-                steps[0].details = {"user_name": user_name}
-            except Exception as e:
-                steps[0].status = "error"
-                steps[0].message = "API密钥验证失败"
-                steps[0].error = str(e)
-                all_success = False
-
-        elif step == "income_db":
-            # 前面的步骤标记为成功（假设已验证）
-            steps[0].status = "success"
-            steps[0].message = "API密钥已验证"
-
-            steps[1].status = "in_progress"
-            steps[1].message = "正在验证收入数据库..."
-
-            try:
-                income_db_info = client.client.databases.retrieve(database_id=client.income_db)
-                db_title = income_db_info.get('title', [{}])[0].get('text', {}).get('content', 'unknown')
-                steps[1].status = "success"
-                steps[1].message = f"收入数据库验证成功"
-                steps[1].details = {"db_title": db_title, "db_id": client.income_db[:8] + "***"}
-            except Exception as e:
-                steps[1].status = "error"
-                steps[1].message = "收入数据库验证失败"
-                steps[1].error = str(e)
-                all_success = False
-
-        elif step == "expense_db":
-            # 前面的步骤标记为成功
-            steps[0].status = "success"
-            steps[0].message = "API密钥已验证"
-            steps[1].status = "success"
-            steps[1].message = "收入数据库已验证"
-
-            steps[2].status = "in_progress"
-            steps[2].message = "正在验证支出数据库..."
-
-            try:
-                expense_db_info = client.client.databases.retrieve(database_id=client.expense_db)
-                db_title = expense_db_info.get('title', [{}])[0].get('text', {}).get('content', 'unknown')
-                steps[2].status = "success"
-                steps[2].message = f"支出数据库验证成功"
-                steps[2].details = {"db_title": db_title, "db_id": client.expense_db[:8] + "***"}
-
-                # 如果全部成功，更新配置状态
-                if all_success:
-                    config.is_verified = True
-                    config.last_verified_at = datetime.utcnow()
-                    db.commit()
-
-                    # 记录审计日志
-                    _create_audit_log(
-                        db=db,
-                        user_id=current_user.id,
-                        action="notion_config_verified",
-                        request=request
-                    )
-
-                    logger.info(f"Notion config fully verified for user: {current_user.username} (ID: {current_user.id})")
+        # 第一步重新检查（三项检查并发执行），后续步骤使用刚才缓存的结果
+        result = notion_verification.verify(current_user.id, force=(step == "api_key"))
+        checks = result["checks"]
+        client = NotionClient.for_user(current_user.id)
+        labels = {"api_key": "API密钥", "income_db": "收入数据库", "expense_db": "支出数据库"}
+        database_ids = {"income_db": client.income_db, "expense_db": client.expense_db}
+
+        for item in steps[:current_step_index + 1]:
+            label = labels[item.step]
+            check = checks[item.step] if checks else None
+            if check is None:
+                # 验证结果来自缓存
+                item.status = "success"
+                item.message = f"{label}已验证"
+            elif check["ok"]:
+                item.status = "success"
+                if item.step == "api_key":
+                    item.message = f"API密钥验证成功 (用户: {check['name']})"
+                    item.details = {"user_name": check["name"]}
+                else:
+                    item.message = f"{label}验证成功"
+                    item.details = {"db_title": check["name"], "db_id": database_ids[item.step][:8] + "***"}
+            else:
+                item.status = "error"
+                item.message = f"{label}验证失败"
+                item.error = check["error"]
+
+        all_success = all(item.status == "success" for item in steps[:current_step_index + 1])
+
+        # 全部验证成功（验证状态已由验证服务保存），记录审计日志
+        if step == "expense_db" and all_success:
+            _create_audit_log(
+                db=db,
+                user_id=current_user.id,
+                action="notion_config_verified",
+                request=request
+            )
 
-            except Exception as e:
-                steps[2].status = "error"
-                steps[2].message = "支出数据库验证失败"
-                steps[2].error = str(e)
-                all_success = False
+            logger.info(f"Notion config fully verified for user: {current_user.username} (ID: {current_user.id})")
 
         return NotionVerifyProgressResponse(
             current_step=current_step_index + 1,
@@ -457,6 +420,8 @@ async def delete_notion_config(
 
     db.delete(config)
     db.commit()
+    notion_config.invalidate(current_user.id)
+    NotionClient.discard(current_user.id)
 
     # 记录审计日志
     _create_audit_log(
@@ -547,6 +512,8 @@ async def delete_account(
         # 7. 最后删除用户记录（User表）
         db.delete(current_user)
         db.commit()
+        notion_config.invalidate(user_id)
+        NotionClient.discard(user_id)
 
         logger.info(f"User account deleted: {username} (ID: {user_id})")
         return {
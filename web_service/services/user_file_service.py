@@ -3,6 +3,7 @@ import sys
 import os
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), "../.."))
 
+import io
 import os
 import shutil
 import logging
@@ -10,6 +11,7 @@ from datetime import datetime
 from typing import Optional, List
 from sqlalchemy.orm import Session
 from src.config import Config
+from parsers.archive import check_archive, decrypt_archive
 
 logger = logging.getLogger(__name__)
 
@@ -22,7 +24,10 @@ class UserFileService:
     └── {user_id}/
         └── {upload_id}/
             ├── original/
-            │   └── {timestamp}_{original_filename}
+            │   ├── {timestamp}_{original_filename}
+            │   └── .cache/
+            │       ├── {timestamp}_{original_filename}.probe.json
+            │       └── {timestamp}_{original_filename}.{key}.normalized.pkl
             └── processed/
                 └── {timestamp}_{original_filename}.json
     """
@@ -96,20 +101,25 @@ class UserFileService:
             "temp"
         )
 
-    async def save_file(self, user_id: int, upload_id: int, file, original_filename: str) -> str:
+    async def save_file(self, user_id: int, upload_id: int, file, original_filename: str,
+                        password: Optional[str] = None) -> str:
         """保存文件到用户专属目录。
 
+        .zip 压缩包不解压；保存前检查其中包含账单文件且密码正确。加密压缩包
+        在此解密，只保存其中的账单文件（不加密），密码不会写入磁盘。
+
         Args:
             user_id: 用户ID
             upload_id: 上传记录ID
             file: 上传的文件对象
             original_filename: 原始文件名
+            password: 加密 .zip 压缩包的密码
 
         Returns:
             保存后的文件路径
 
         Raises:
-            ValueError: 文件类型或大小不合法
+            ValueError: 文件类型或大小不合法，或压缩包无效、密码错误
         """
         # 验证文件类型
         file_extension = os.path.splitext(original_filename)[1].lower()
@@ -132,6 +142,12 @@ class UserFileService:
                 f"文件大小超过限制: {file_size} bytes，最大支持 {self.max_file_size} bytes"
             )
 
+        if file_extension == ".zip":
+            check_archive(io.BytesIO(content), password)
+            if password:
+                # 加密压缩包在上传时解密，只保存其中的账单文件，不保存密码
+                content = decrypt_archive(io.BytesIO(content), password)
+
         # 生成唯一文件名
         timestamp = datetime.now().strftime("%Y%m%d%H%M%S")
         safe_filename = self._sanitize_filename(original_filename)